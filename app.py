@@ -3,14 +3,21 @@
 Texas Hold'em Poker Game Main Application
 """
 
+import os
+import hmac
+import atexit
 import uuid
 import time
 import re
+import signal
+import sys
 import traceback
+import functools
 from typing import Dict, List, Optional
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, has_request_context
 from flask_socketio import SocketIO, emit, join_room, leave_room, rooms
 import eventlet
+from eventlet import tpool
 import threading
 import sqlite3
 from datetime import datetime
@@ -19,6 +26,8 @@ import json
 from poker_engine import Player, Table, Bot, BotLevel
 from poker_engine.player import PlayerAction, PlayerStatus
 from poker_engine.table import GameStage
+from poker_engine import icm
+from poker_engine.snapshot import snapshot_table, restore_table, SnapshotError
 from database import db
 from game_logger import (
     log_table_created, log_hand_started, log_hand_ended, 
@@ -26,9 +35,25 @@ from game_logger import (
 )
 from table_state_manager import (
     record_table_state, register_restart_callback, mark_restart_completed,
-    TableStateChange
+    TableStateChange, table_state_manager
 )
-from player_persistence import update_player_chips, get_player
+from chip_ledger import record_hand_chips, open_chip_account, chip_ledger
+from player_persistence import player_persistence
+from lobby_index import lobby_index
+from server_stats import server_stats
+from session_registry import session_registry
+from broadcast import FrameBatcher, LEGACY_WIRE
+from wire_protocol import PROTOCOL_LEGACY, PROTOCOL_COMPACT, WIRE_SCHEMA, binary_supported, wire_stats
+from equity_service import equity_service, TokenBuckets
+from poker_engine.speculation import speculation_worker, speculation_stats
+from poker_engine import instrumentation
+from metrics import metrics
+from profiler import profiler, slow_handlers
+from tracing import tracer, KIND_SERVER
+from hand_event_log import hand_event_log
+from migrations import migrator
+from startup import startup
+from table_snapshots import table_snapshots
 
 
 # 创建Flask应用
@@ -54,8 +79,7 @@ def default_error_handler(e):
 # 全局状态管理
 tables: Dict[str, Table] = {}
 players: Dict[str, Player] = {}
-player_sessions: Dict[str, str] = {}  # session_id -> player_id
-session_tables: Dict[str, str] = {}   # session_id -> table_id
+# 在线会话（sid / player_id / nickname 索引及房间成员）见 session_registry
 
 # 游戏日志状态管理
 table_sessions: Dict[str, int] = {}   # table_id -> session_id (日志会话ID)
@@ -64,6 +88,87 @@ current_hands: Dict[str, int] = {}    # table_id -> hand_id (当前手牌ID)
 # 添加下一轮开始相关的数据结构
 next_round_votes = {}  # {table_id: {player_id: True/False}}
 
+# 大厅房间，大厅列表增量只推送给这个房间
+LOBBY_ROOM = 'lobby'
+lobby_index.set_publisher(lambda delta: socketio.emit('lobby_update', delta, room=LOBBY_ROOM))
+server_stats.attach(lambda stats: socketio.emit('stats_update', stats, room=LOBBY_ROOM),
+                    socketio.start_background_task, socketio.sleep)
+instrumentation.set_recorder(metrics.record_engine)
+tracer.configure_from_env()
+instrumentation.set_tracer(tracer)
+atexit.register(tracer.flush)
+table_snapshots.configure_from_env()
+hand_event_log.configure_from_env()
+instrumentation.set_hand_sink(hand_event_log.record)
+atexit.register(hand_event_log.flush)
+
+
+def spawn(func, *args, **kwargs):
+    """启动后台任务，并把当前追踪上下文带过去"""
+    return socketio.start_background_task(tracer.propagate(func), *args, **kwargs)
+
+
+equity_service.attach(spawn, socketio.server.eio.create_event)
+
+# 停机排空：收到SIGTERM后不再开始新的牌桌任务，tasks_in_flight 为仍在执行的任务数
+# （重启回调和定期清理在系统线程中执行，计数在 work_lock 下修改）
+draining = False
+tasks_in_flight = 0
+work_lock = threading.Lock()
+
+
+def table_work(func):
+    """
+    会修改牌桌状态的入口（玩家动作、开始手牌、机器人行动等）
+
+    停机排空期间不再开始新的任务（来自客户端的返回错误），进行中的任务计数，
+    排空任务等它们全部完成后才写入快照。嵌套调用的函数不需要再加这个装饰器。
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        global tasks_in_flight
+        with work_lock:
+            accepted = not draining
+            if accepted:
+                tasks_in_flight += 1
+        if not accepted:
+            if has_request_context():
+                emit('error', {'message': '服务器正在重启，请稍后重新连接'})
+            return None
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with work_lock:
+                tasks_in_flight -= 1
+    return wrapper
+
+
+def instrumented(event: str):
+    """Socket.IO事件处理函数的耗时指标、链路追踪和慢处理监控"""
+    def decorator(func):
+        traced = tracer.traced(f'socketio {event}', KIND_SERVER,
+                               attributes=lambda *args, **kwargs: {'socketio.event': event,
+                                                                  'socketio.sid': request.sid})
+        return metrics.timed_event(event)(traced(slow_handlers.watch(event)(func)))
+    return decorator
+
+
+def table_attributes(table_id, *args, **kwargs) -> Dict:
+    """牌桌任务span的属性"""
+    table = tables.get(table_id)
+    return {'table_id': table_id, 'hand_number': table.hand_number if table else None}
+
+
+# 牌桌广播批处理：一条命令产生的事件合并为每个客户端一个frame
+frames = FrameBatcher(socketio, session_registry.table_sessions,
+                      is_room=lambda room: room in tables,
+                      is_session=lambda room: room in session_registry,
+                      wire_of=lambda sid: (session_registry.get(sid) or {}).get('wire', LEGACY_WIRE),
+                      hand_of=lambda room: tables[room].hand_number if room in tables else None)
+
+@slow_handlers.watch('process_bot_actions')
+@tracer.traced('process_bot_actions', attributes=table_attributes)
+@frames.batched
 def process_bot_actions(table_id: str):
     """处理机器人动作"""
     try:
@@ -106,7 +211,7 @@ def process_bot_actions(table_id: str):
                 delay = 1.0
             
             # 通知前端机器人正在思考
-            socketio.emit('bot_thinking', {
+            frames.emit('bot_thinking', {
                 'bot_name': current_player.nickname,
                 'bot_level': current_player.bot_level.value,
                 'thinking_time': delay
@@ -130,7 +235,11 @@ def process_bot_actions(table_id: str):
             print(f"🔍 手牌未结束，继续游戏流程")
         
         # 广播更新后的桌面状态
-        socketio.emit('table_updated', table.get_table_state(), room=table_id)
+        frames.emit('table_updated', table.get_table_state(), room=table_id)
+        
+        # 新的一条街发牌后为在座真人预计算胜率，并趁等待真人行动时为机器人预计算
+        equity_service.on_street(table)
+        speculation_worker.schedule(table)
         
         # 检查是否轮到人类玩家行动
         current_player = table.get_current_player()
@@ -141,15 +250,11 @@ def process_bot_actions(table_id: str):
                 return result
                 
             # 找到该玩家的session并发送行动通知
-            player_session = None
-            for session_id, session_info in player_sessions.items():
-                if session_info['player_id'] == current_player.id:
-                    player_session = session_id
-                    break
+            player_session = session_registry.sid_for_player(current_player.id)
             
             if player_session:
                 print(f"🎯 轮到人类玩家 {current_player.nickname} 行动")
-                socketio.emit('your_turn', {
+                frames.emit('your_turn', {
                     'current_bet': table.current_bet,
                     'min_bet': table.big_blind,
                     'pot': table.pot,
@@ -162,6 +267,8 @@ def process_bot_actions(table_id: str):
         print(f"❌ 处理机器人动作失败: {e}")
         return None
 
+@table_work
+@frames.batched
 def handle_restart_needed(table_id: str, state_type, data: Dict):
     """处理需要重启的回调"""
     try:
@@ -221,21 +328,17 @@ def handle_restart_needed(table_id: str, state_type, data: Dict):
         # 发送手牌给人类玩家
         for player in table.players:
             if not player.is_bot and player.status == PlayerStatus.PLAYING:
-                player_session = None
-                for session_id, player_id in player_sessions.items():
-                    if player_id == player.id:
-                        player_session = session_id
-                        break
+                player_session = session_registry.sid_for_player(player.id)
                 
                 if player_session and len(player.hole_cards) == 2:
                     print(f"📤 发送手牌给玩家: {player.nickname}")
-                    socketio.emit('your_cards', {
+                    frames.emit('your_cards', {
                         'hole_cards': [card.to_dict() for card in player.hole_cards]
                     }, room=player_session)
         
         # 广播新手牌开始
         print(f"📡 广播新手牌开始事件...")
-        socketio.emit('hand_started', {
+        frames.emit('hand_started', {
             'table': table.get_table_state()
         }, room=table_id)
         
@@ -257,32 +360,20 @@ def handle_restart_needed(table_id: str, state_type, data: Dict):
         print(f"💵 当前投注: ${table.current_bet}")
         print("=" * 50)
         
-        # 启动机器人处理
-        def start_bot_processing():
-            time.sleep(1)  # 给玩家一点时间接收状态
-            process_bot_actions(table_id)
-        
-        threading.Thread(target=start_bot_processing, daemon=True).start()
+        # 启动机器人处理（延迟1秒，给玩家一点时间接收状态）
+        spawn(process_bot_actions_delayed, table_id)
         
         # 标记重启完成
         mark_restart_completed(table_id, hand_number, success=True)
         
-        # 🔧 新增：在重启前保存所有玩家筹码到数据库
-        print(f"💾 保存玩家筹码到数据库...")
-        for player in table.players:
-            if not player.is_bot:  # 只保存人类玩家
-                try:
-                    update_player_chips(player.id, player.chips)
-                    print(f"💰 保存玩家筹码: {player.nickname} -> ${player.chips}")
-                except Exception as e:
-                    print(f"❌ 保存筹码失败: {player.nickname} - {e}")
+        # 玩家筹码已在上一手牌结束时写入筹码账本，这里无需再保存
         
         # 如果房间没有人类玩家了，关闭房间
         human_players = [p for p in table.players if not p.is_bot]
         if len(human_players) == 0:
             print(f"房间 {table_id} 已关闭（无人类玩家）")
             if table_id in tables:
-                del tables[table_id]
+                save_bot_learning(tables.pop(table_id))
             if table_id in next_round_votes:
                 del next_round_votes[table_id]
         
@@ -292,6 +383,64 @@ def handle_restart_needed(table_id: str, state_type, data: Dict):
         mark_restart_completed(table_id, hand_number, success=False)
 
 
+def save_bot_learning(table: Table):
+    """房间关闭（机器人会话结束）时批量保存机器人的对手模型"""
+    try:
+        player_persistence.update_bots_learning_data([
+            (p.id, p.bot_level.value, p.export_learning_data())
+            for p in table.players if isinstance(p, Bot)
+        ])
+    except Exception as e:
+        print(f"❌ 保存机器人学习数据失败: {e}")
+
+
+def get_account_chips(player_id: str, user_data: Dict) -> int:
+    """获取玩家账户余额：以筹码账本为准，首次出现时用用户表中的余额开户"""
+    return open_chip_account(player_id, user_data.get('chips', 1000))
+
+
+def lobby_entry(table: Table, created_by: str) -> Dict:
+    """构建大厅列表条目"""
+    return {
+        'id': table.id,
+        'title': table.title,
+        'small_blind': table.small_blind,
+        'big_blind': table.big_blind,
+        'max_players': table.max_players,
+        'current_players': len(table.players),
+        'game_stage': table.game_stage.value,
+        'game_mode': table.game_mode,
+        'ante_percentage': table.ante_percentage,
+        'created_by': created_by,
+        'created_at': table.created_at
+    }
+
+def sync_lobby_table(table_id: str):
+    """同步大厅中房间的人数和阶段以及服务器计数，房间已关闭时移除"""
+    table = tables.get(table_id)
+    if table is None:
+        lobby_index.remove(table_id)
+        server_stats.remove_table(table_id)
+        session_registry.drop_table(table_id)
+        equity_service.drop_table(table_id)
+        speculation_worker.cancel(table_id)
+        frames.drop_room(table_id)
+        return
+    lobby_index.update(table_id, current_players=len(table.players),
+                       game_stage=table.game_stage.value)
+    server_stats.set_table(table_id, sum(1 for p in table.players if not p.is_bot))
+
+def bootstrap_lobby_index():
+    """首次读取时从数据库载入活跃房间（只执行一次，不创建Table对象，加入房间时再按需载入）"""
+    entries = []
+    for table_data in db.get_all_active_tables():
+        server_stats.set_table(table_data['id'], table_data.get('human_count') or 0)
+        entries.append(dict(table_data,
+                            current_players=table_data['player_count'],
+                            created_by=table_data['creator_nickname']))
+    lobby_index.load(entries)
+    print(f"🏛️ 大厅索引载入 {len(entries)} 个房间")
+
 def validate_nickname(nickname: str) -> bool:
     """验证昵称格式"""
     if not nickname or len(nickname.strip()) == 0:
@@ -359,9 +508,11 @@ def join_game():
         # 获取最新用户信息
         user_data = db.get_user(player_id)
         
+        chips = get_account_chips(player_id, user_data)
+        
         # 创建Player对象（用于游戏逻辑）
         if player_id not in players:
-            player = Player(player_id, nickname, user_data['chips'])
+            player = Player(player_id, nickname, chips)
             players[player_id] = player
         
         return jsonify({
@@ -369,7 +520,7 @@ def join_game():
             'player': {
                 'id': player_id,
                 'nickname': nickname,
-                'chips': user_data['chips']
+                'chips': chips
             }
         })
         
@@ -383,48 +534,36 @@ def join_game():
 
 @app.route('/api/tables', methods=['GET'])
 def get_tables():
-    """获取所有活跃房间列表"""
+    """获取所有活跃房间列表（读内存大厅索引，支持ETag）"""
     try:
-        # 从数据库获取活跃房间
-        db_tables = db.get_all_active_tables()
-        
-        # 转换为前端需要的格式
-        tables_data = []
-        for table_data in db_tables:
-            # 同步内存中的Table对象
-            table_id = table_data['id']
-            if table_id not in tables:
-                # 如果内存中没有，创建一个新的Table对象
-                table = Table(
-                    table_id=table_id,
-                    title=table_data['title'],
-                    small_blind=table_data['small_blind'],
-                    big_blind=table_data['big_blind'],
-                    max_players=table_data['max_players'],
-                    initial_chips=table_data['initial_chips']
-                )
-                tables[table_id] = table
-            
-            # 构建返回数据
-            table_info = {
-                'id': table_id,
-                'title': table_data['title'],
-                'small_blind': table_data['small_blind'],
-                'big_blind': table_data['big_blind'],
-                'max_players': table_data['max_players'],
-                'current_players': table_data['player_count'],
-                'game_stage': table_data['game_stage'],
-                'game_mode': table_data.get('game_mode', 'blinds'),
-                'ante_percentage': table_data.get('ante_percentage', 0.02),
-                'created_by': table_data['creator_nickname'],
-                'created_at': table_data['created_at']
-            }
-            tables_data.append(table_info)
+        if not lobby_index.loaded:
+            bootstrap_lobby_index()
         
-        return jsonify({
-            'success': True,
-            'tables': tables_data
-        })
+        # 可选筛选条件：盲注、模式、是否有空位
+        stakes = None
+        if request.args.get('small_blind') and request.args.get('big_blind'):
+            try:
+                stakes = (int(request.args['small_blind']), int(request.args['big_blind']))
+            except ValueError:
+                return jsonify({'success': False, 'message': '参数格式错误'}), 400
+        game_mode = request.args.get('game_mode') or None
+        available = request.args.get('available') in ('1', 'true')
+        
+        with lobby_index.lock:
+            etag = lobby_index.etag
+            version = lobby_index.version
+            if request.headers.get('If-None-Match') == etag:
+                response = app.response_class(status=304)
+            else:
+                response = jsonify({
+                    'success': True,
+                    'version': version,
+                    'tables': lobby_index.list_tables(stakes, game_mode, available)
+                })
+        
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
         
     except Exception as e:
         print(f"获取房间列表失败: {e}")
@@ -436,40 +575,143 @@ def get_tables():
 
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
-    """获取服务器统计信息"""
-    try:
-        # 获取在线玩家数（通过session管理）
-        online_players = len(player_sessions)
-        print(f"🔍 当前在线玩家数: {online_players}, 会话: {list(player_sessions.keys())}")
-        
-        # 获取活跃房间数 - 使用内存中的tables而不是数据库
-        active_tables = len(tables)
-        
-        # 计算总游戏中玩家数
-        total_players_in_game = 0
-        for table in tables.values():
-            human_players = [p for p in table.players if not p.is_bot]
-            total_players_in_game += len(human_players)
-        
-        stats = {
-            'online_players': online_players,
-            'active_tables': active_tables,
-            'players_in_game': total_players_in_game
+    """获取服务器统计信息（增量计数器，O(1)）"""
+    return jsonify({
+        'success': True,
+        'stats': server_stats.snapshot()
+    })
+
+
+@app.route('/api/cache_stats', methods=['GET'])
+def get_cache_stats():
+    """获取用户目录缓存命中统计"""
+    return jsonify({
+        'success': True,
+        'caches': {
+            'users': db.user_cache.stats(),
+            'players': player_persistence.cache.stats()
         }
-        
-        print(f"📊 统计信息: {stats}")
-        
-        return jsonify({
-            'success': True,
-            'stats': stats
-        })
-        
-    except Exception as e:
-        print(f"获取统计信息失败: {e}")
-        return jsonify({
-            'success': False,
-            'message': '获取统计信息失败'
-        }), 500
+    })
+
+
+@app.route('/api/wire_stats', methods=['GET'])
+def get_wire_stats():
+    """获取广播帧大小统计（按协议和手牌）"""
+    return jsonify({
+        'success': True,
+        'frames': frames.stats(),
+        'wire': wire_stats.report()
+    })
+
+
+@app.route('/api/equity_stats', methods=['GET'])
+def get_equity_stats():
+    """获取胜率缓存统计"""
+    return jsonify({'success': True, 'stats': equity_service.stats()})
+
+
+@app.route('/api/speculation_stats', methods=['GET'])
+def get_speculation_stats():
+    """获取机器人预计算的命中率和节省的决策耗时"""
+    return jsonify({
+        'success': True,
+        'stats': speculation_stats.report(),
+        'pending_tables': speculation_worker.pending()
+    })
+
+
+def is_local_request() -> bool:
+    """请求是否来自本机（指标等运维接口只对本机开放）"""
+    return request.remote_addr in ('127.0.0.1', '::1', 'localhost')
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus格式的延迟指标（仅本机）"""
+    if not is_local_request():
+        return jsonify({'success': False, 'message': '仅允许本机访问'}), 403
+    return app.response_class(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics_snapshot():
+    """延迟指标的JSON快照（仅本机）"""
+    if not is_local_request():
+        return jsonify({'success': False, 'message': '仅允许本机访问'}), 403
+    return jsonify({'success': True, 'metrics': metrics.snapshot()})
+
+
+def is_admin_request() -> bool:
+    """管理接口鉴权：设置了 POKER_ADMIN_TOKEN 时校验 X-Admin-Token 请求头，否则只允许本机"""
+    token = os.environ.get('POKER_ADMIN_TOKEN')
+    if token:
+        return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token)
+    return is_local_request()
+
+
+@app.route('/admin/profiler', methods=['POST'])
+def start_profiler():
+    """启动采样分析器，采样指定秒数（最长120秒）"""
+    if not is_admin_request():
+        return jsonify({'success': False, 'message': '需要管理员权限'}), 403
+    data = request.get_json(silent=True) or {}
+    try:
+        seconds = min(120.0, max(0.1, float(data.get('seconds', 10))))
+        interval = min(1.0, max(0.001, float(data.get('interval_ms', 10)) / 1000))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': '参数格式错误'}), 400
+    if not profiler.start(seconds, interval):
+        return jsonify({'success': False, 'message': '分析器正在运行', 'profile': profiler.report()}), 409
+    print(f"🔬 采样分析器启动: {seconds}秒, 间隔{interval * 1000:.1f}ms")
+    return jsonify({'success': True, 'seconds': seconds, 'interval_ms': interval * 1000}), 202
+
+
+@app.route('/admin/profiler', methods=['GET'])
+def get_profiler_result():
+    """采样结果：默认JSON摘要，format=collapsed 返回折叠栈文本（用于生成火焰图）"""
+    if not is_admin_request():
+        return jsonify({'success': False, 'message': '需要管理员权限'}), 403
+    if request.args.get('format') == 'collapsed':
+        return app.response_class(profiler.collapsed(), content_type='text/plain; charset=utf-8')
+    return jsonify({'success': True, 'profile': profiler.report()})
+
+
+@app.route('/admin/slow_handlers', methods=['GET'])
+def get_slow_handlers():
+    """最近超过阈值的处理函数及其调用栈"""
+    if not is_admin_request():
+        return jsonify({'success': False, 'message': '需要管理员权限'}), 403
+    return jsonify({'success': True, 'threshold': slow_handlers.threshold, 'reports': slow_handlers.recent()})
+
+
+@app.before_request
+def record_first_request():
+    startup.mark_request(request.path)
+
+
+@app.route('/readyz', methods=['GET'])
+def readiness():
+    """就绪检查：后台预热（迁移、余额载入、大厅索引）完成后返回200"""
+    schema = {store: {'version': info['version'], 'latest': info['latest']}
+              for store, info in migrator.status().items()}
+    report = dict(startup.report(), schema=schema, draining=draining, snapshot=table_snapshots.stats())
+    return jsonify(report), (200 if startup.ready and not draining else 503)
+
+
+@app.route('/admin/tracing', methods=['GET'])
+def get_tracing_stats():
+    """链路追踪的采样和导出统计"""
+    if not is_admin_request():
+        return jsonify({'success': False, 'message': '需要管理员权限'}), 403
+    return jsonify({'success': True, 'tracing': tracer.stats()})
+
+
+@app.route('/admin/hand_log', methods=['GET'])
+def get_hand_log_stats():
+    """手牌事件日志的写入统计"""
+    if not is_admin_request():
+        return jsonify({'success': False, 'message': '需要管理员权限'}), 403
+    return jsonify({'success': True, 'hand_log': hand_event_log.stats()})
 
 
 @app.route('/api/showdown_history/<table_id>', methods=['GET'])
@@ -685,8 +927,14 @@ def api_card_tracking():
             # 尝试从数据库恢复（略），这里只查内存
             return jsonify({'success': False, 'message': '房间不存在'}), 404
 
-        info = table.get_card_tracking_info()
-        return jsonify({'success': True, 'data': info})
+        # 记牌信息按街预先序列化，直接拼接到响应中
+        payload = table.get_card_tracking_payload() or '{}'
+
+        # 翻牌后附上该玩家的outs分析（同样按街缓存）
+        outs = table.get_outs_payload(player_id)
+
+        body = '{"success":true,"data":' + payload + ',"outs":' + outs + '}'
+        return app.response_class(body, mimetype='application/json')
     except Exception as e:
         print(f"记牌助手API异常: {e}")
         return jsonify({'success': False, 'message': '服务器错误'}), 500
@@ -707,7 +955,11 @@ def api_win_probability():
         if not table:
             return jsonify({'success': False, 'message': '房间不存在'}), 404
 
-        result = table.calculate_win_probability(player_id)
+        if not equity_service.allow(player_id):
+            return jsonify({'success': False, 'message': '请求过于频繁，请稍后再试'}), 429
+
+        # 同一手牌同一条街的结果直接读缓存，相同的并发请求共享一次计算
+        result = equity_service.get(table, player_id)
         if not result:
             return jsonify({'success': False, 'message': '无法计算胜率，可能未发牌'}), 400
         return jsonify({'success': True, 'data': result})
@@ -716,11 +968,47 @@ def api_win_probability():
         return jsonify({'success': False, 'message': '服务器错误'}), 500
 
 
+# ICM接口的输入上限（蒙特卡洛耗时与 人数×样本数 成正比，上限时约50毫秒）
+ICM_MAX_PLAYERS = 100
+ICM_MAX_SAMPLES = 20000
+# 按IP限流：每秒补充0.5次，允许突发5次
+icm_limiter = TokenBuckets(rate=0.5, burst=5)
+
+
+@app.route('/api/icm', methods=['POST'])
+def api_icm():
+    """ICM奖金期望API：{stacks: [筹码], payouts: [第1名奖金, ...], samples?: 蒙特卡洛样本数}"""
+    try:
+        data = request.get_json(silent=True) or {}
+        stacks = data.get('stacks')
+        payouts = data.get('payouts')
+        samples = data.get('samples', icm.DEFAULT_SAMPLES)
+        numbers = (int, float)
+        if (not isinstance(stacks, list) or not isinstance(payouts, list) or not stacks
+                or any(not isinstance(v, numbers) or isinstance(v, bool) or v < 0 for v in stacks + payouts)):
+            return jsonify({'success': False, 'message': 'stacks 和 payouts 必须是非负数列表'}), 400
+        if len(stacks) > ICM_MAX_PLAYERS or len(payouts) > ICM_MAX_PLAYERS:
+            return jsonify({'success': False, 'message': f'最多 {ICM_MAX_PLAYERS} 名玩家'}), 400
+        if not isinstance(samples, int) or isinstance(samples, bool) or not 1 <= samples <= ICM_MAX_SAMPLES:
+            return jsonify({'success': False, 'message': f'samples 必须在 1-{ICM_MAX_SAMPLES} 之间'}), 400
+        if not icm_limiter.take(request.remote_addr or ''):
+            return jsonify({'success': False, 'message': '请求过于频繁，请稍后再试'}), 429
+
+        # 在线程池中计算，不阻塞eventlet的hub（其它牌桌照常处理）
+        equities, exact = tpool.execute(icm.icm_equity, stacks, payouts, samples)
+        return jsonify({'success': True, 'equities': equities, 'exact': exact})
+    except Exception as e:
+        print(f"ICM计算API异常: {e}")
+        return jsonify({'success': False, 'message': '服务器错误'}), 500
+
+
 # WebSocket 事件处理
 
 @socketio.on('connect')
+@instrumented('connect')
 def handle_connect():
     """客户端连接"""
+    startup.mark_request('socketio connect')
     try:
         print(f"Client connected: {request.sid}")
         emit('connected', {'session_id': request.sid})
@@ -728,34 +1016,46 @@ def handle_connect():
         print(f"连接处理错误: {e}")
 
 
+def remove_player_from_tables(player_id: str):
+    """把没有重连的玩家从所有房间（及数据库）中移除，并清理因此变空的房间"""
+    tables_to_check = []
+    for table_id in session_registry.tables_of(player_id):
+        session_registry.unseat(player_id, table_id)
+        table = tables.get(table_id)
+        players_to_remove = [p for p in table.players if p.id == player_id] if table else []
+        for player in players_to_remove:
+            table.remove_player(player.id)
+            db.leave_table(table_id, player.id)  # 从数据库移除
+            socketio.emit('player_left', {
+                'nickname': player.nickname,
+                'remaining_players': len(table.players)
+            }, room=table_id)
+            tables_to_check.append(table_id)
+    
+    # 检查并清理空房间
+    for table_id in set(tables_to_check):
+        check_and_cleanup_table(table_id)
+        sync_lobby_table(table_id)
+
+
 @socketio.on('disconnect')
+@instrumented('disconnect')
 def handle_disconnect():
     """处理玩家断线"""
     try:
         session_id = request.sid
         
-        if session_id in player_sessions:
-            player_info = player_sessions[session_id]
+        # 立即清理会话（连同房间成员关系），避免重复计数
+        player_info = session_registry.unregister(session_id)
+        if player_info:
             nickname = player_info['nickname']
             player_id = player_info['player_id']
             
             print(f"玩家 {nickname} 断线")
-            
-            # 立即清理会话，避免重复计数
-            del player_sessions[session_id]
             print(f"会话 {session_id} 立即清理完成")
             
-            # 从session_tables中清理
-            if session_id in session_tables:
-                del session_tables[session_id]
-            
-            # 广播更新统计信息
-            online_players = len(player_sessions)
-            active_tables = len(tables)
-            socketio.emit('stats_update', {
-                'online_players': online_players,
-                'active_tables': active_tables
-            })
+            # 更新在线人数（统计推送会被合并）
+            server_stats.set_online(len(session_registry))
             
             # 设置30秒后移除玩家（如果没有重新连接）
             def remove_player_delayed():
@@ -763,44 +1063,16 @@ def handle_disconnect():
                 time.sleep(30)
                 
                 # 检查玩家是否重新连接
-                reconnected = False
-                for sid, session in player_sessions.items():
-                    if session['player_id'] == player_id:
-                        reconnected = True
-                        break
-                
-                if not reconnected:
+                if not session_registry.is_online(player_id):
                     print(f"30秒后移除未重连的玩家 {nickname}")
-                    
-                    # 从所有房间中移除玩家
-                    tables_to_check = []
-                    for table_id, table in list(tables.items()):
-                        players_to_remove = [p for p in table.players if p.id == player_id]
-                        for player in players_to_remove:
-                            table.remove_player(player.id)
-                            db.leave_table(table_id, player.id)  # 从数据库移除
-                            socketio.emit('player_left', {
-                                'nickname': player.nickname,
-                                'remaining_players': len(table.players)
-                            }, room=table_id)
-                            tables_to_check.append(table_id)
-                    
-                    # 检查并清理空房间
-                    for table_id in set(tables_to_check):
-                        check_and_cleanup_table(table_id)
-                        
-                    # 再次广播更新统计信息
-                    online_players = len(player_sessions)
-                    active_tables = len(tables)
-                    socketio.emit('stats_update', {
-                        'online_players': online_players,
-                        'active_tables': active_tables
-                    })
+                    remove_player_from_tables(player_id)
             
             # 立即从所有房间移除断线玩家并检查是否需要清理
             tables_to_check = []
-            for table_id, table in list(tables.items()):
-                if any(p.id == player_id for p in table.players):
+            for table_id in session_registry.tables_of(player_id):
+                session_registry.unseat(player_id, table_id)
+                table = tables.get(table_id)
+                if table and table.get_player(player_id):
                     tables_to_check.append(table_id)
                     # 立即从房间移除断线玩家
                     table.remove_player(player_id)
@@ -818,8 +1090,9 @@ def handle_disconnect():
                     else:
                         # 广播更新的房间状态
                         socketio.emit('table_updated', table.get_table_state(), room=table_id)
+                sync_lobby_table(table_id)
             
-            socketio.start_background_task(remove_player_delayed)
+            spawn(remove_player_delayed)
             
             print(f"玩家 {nickname} 断线，会话已清理，等待重连...")
     except Exception as e:
@@ -827,6 +1100,7 @@ def handle_disconnect():
 
 
 @socketio.on('register_player')
+@instrumented('register_player')
 def handle_register_player(data):
     """处理玩家注册"""
     try:
@@ -835,35 +1109,16 @@ def handle_register_player(data):
             emit('error', {'message': '昵称不能为空'})
             return
         
-        # 检查是否已经有相同昵称的玩家在线
-        existing_player = None
-        for table_id, table in tables.items():
-            for player in table.players:
-                if player.nickname == nickname and not player.is_bot:
-                    existing_player = player
-                    break
-            if existing_player:
-                break
-        
         # 清理当前会话的重复会话（基于昵称）
-        old_sessions_to_remove = []
-        for sid, session_info in player_sessions.items():
-            if session_info['nickname'] == nickname and sid != request.sid:
-                old_sessions_to_remove.append(sid)
-        
-        if old_sessions_to_remove:
-            print(f"发现玩家 {nickname} 的重复会话，清理旧会话")
-            for old_sid in old_sessions_to_remove:
-                print(f"移除旧会话: {old_sid}")
-                if old_sid in player_sessions:
-                    del player_sessions[old_sid]
-                if old_sid in session_tables:
-                    del session_tables[old_sid]
-                # 断开旧连接
-                try:
-                    socketio.disconnect(old_sid)
-                except Exception as e:
-                    print(f"断开旧连接失败: {e}")
+        old_sid = session_registry.sid_for_nickname(nickname)
+        if old_sid and old_sid != request.sid:
+            print(f"发现玩家 {nickname} 的重复会话，移除旧会话: {old_sid}")
+            session_registry.unregister(old_sid)
+            # 断开旧连接
+            try:
+                socketio.disconnect(old_sid)
+            except Exception as e:
+                print(f"断开旧连接失败: {e}")
             
             print(f"玩家 {nickname} 旧会话已清理")
         
@@ -880,11 +1135,10 @@ def handle_register_player(data):
         
         # 注册会话
         session_id = request.sid
-        player_sessions[session_id] = {
-            'player_id': player_data['id'],
-            'nickname': nickname,
-            'timestamp': datetime.now()
-        }
+        # 协议协商：protocol=2 使用紧凑编码，binary=true 且服务端支持时使用MessagePack帧
+        protocol = PROTOCOL_COMPACT if data.get('protocol') == PROTOCOL_COMPACT else PROTOCOL_LEGACY
+        binary = protocol == PROTOCOL_COMPACT and bool(data.get('binary')) and binary_supported()
+        session_registry.register(session_id, player_data['id'], nickname, wire=(protocol, binary))
         
         print(f"玩家会话注册成功: {nickname} (ID: {player_data['id']}, Session: {session_id})")
         
@@ -892,33 +1146,47 @@ def handle_register_player(data):
             'success': True,
             'nickname': nickname,
             'player_id': player_data['id'],
-            'chips': player_data.get('chips', 1000),
-            'has_helper': player_data.get('has_helper', 0)
+            'chips': get_account_chips(player_data['id'], player_data),
+            'has_helper': player_data.get('has_helper', 0),
+            'protocol': protocol,
+            'binary': binary,
+            'wire_schema': WIRE_SCHEMA if protocol == PROTOCOL_COMPACT else None
         })
         
-        # 广播更新统计信息
-        online_players = len(player_sessions)
-        active_tables = len(tables)
-        socketio.emit('stats_update', {
-            'online_players': online_players,
-            'active_tables': active_tables
-        })
+        # 更新在线人数（统计推送会被合并）
+        server_stats.set_online(len(session_registry))
         
     except Exception as e:
         print(f"玩家注册错误: {e}")
         emit('error', {'message': '注册失败，请重试'})
 
 
+@socketio.on('join_lobby')
+@instrumented('join_lobby')
+def handle_join_lobby(data=None):
+    """进入大厅房间，接收大厅列表增量"""
+    join_room(LOBBY_ROOM)
+    emit('lobby_joined', {'version': lobby_index.version})
+
+
+@socketio.on('leave_lobby')
+@instrumented('leave_lobby')
+def handle_leave_lobby(data=None):
+    """离开大厅房间"""
+    leave_room(LOBBY_ROOM)
+
+
 @socketio.on('create_table')
+@instrumented('create_table')
 def handle_create_table(data):
     """创建牌桌"""
     try:
         session_id = request.sid
-        if session_id not in player_sessions:
+        if session_id not in session_registry:
             emit('error', {'message': '请先登录'})
             return
         
-        player_info = player_sessions[session_id]
+        player_info = session_registry.get(session_id)
         player_id = player_info['player_id']
         nickname = player_info['nickname']
         
@@ -978,12 +1246,12 @@ def handle_create_table(data):
             emit('error', {'message': '玩家数据获取失败'})
             return
         
-        player = Player(player_id, nickname, player_data.get('chips', initial_chips))
+        player = Player(player_id, nickname, get_account_chips(player_id, player_data))
         
         # 创建者自动加入房间
         if table.add_player(player) and db.join_table(table_id, player_id):
             join_room(table_id)
-            session_tables[session_id] = table_id
+            session_registry.join_table(session_id, table_id)
             
             # 添加机器人
             bots_added = 0
@@ -1018,28 +1286,9 @@ def handle_create_table(data):
                             bot = Bot(bot_id, bot_name, initial_chips, level_enum)
                             
                             if table.add_player(bot):
-                                # 在users表中创建机器人记录
-                                with db.get_connection() as conn:
-                                    cursor = conn.cursor()
-                                    current_time = time.time()
-                                    cursor.execute('''
-                                        INSERT OR IGNORE INTO users (id, nickname, chips, created_at, last_active)
-                                        VALUES (?, ?, ?, ?, ?)
-                                    ''', (bot_id, bot_name, initial_chips, current_time, current_time))
-                                    conn.commit()
-                                
-                                # 将机器人也保存到数据库，正确设置is_bot标识
-                                if db.join_table(table_id, bot_id):
-                                    # 手动更新机器人的is_bot和bot_level字段
-                                    with db.get_connection() as conn:
-                                        cursor = conn.cursor()
-                                        cursor.execute('''
-                                            UPDATE table_players 
-                                            SET is_bot = 1, bot_level = ?
-                                            WHERE table_id = ? AND player_id = ?
-                                        ''', (level_enum.value, table_id, bot_id))
-                                        conn.commit()
-                                        print(f"✅ 机器人 {bot_name} 数据库标识已更新: is_bot=1, bot_level={level_enum.value}")
+                                # 在users表中创建机器人记录，并带is_bot标识入座
+                                db.create_bot_user(bot_id, bot_name, level_enum.value, initial_chips)
+                                db.join_table(table_id, bot_id, is_bot=True, bot_level=level_enum.value)
                                 bots_added += 1
                                 print(f"机器人 {bot_name} ({level}) 加入房间 {title}")
                             else:
@@ -1064,27 +1313,8 @@ def handle_create_table(data):
             })
             
             # 广播新房间创建给所有在大厅的用户
-            socketio.emit('lobby_update', {
-                'type': 'new_table',
-                'table': {
-                    'id': table_id,
-                    'title': title,
-                    'small_blind': small_blind,
-                    'big_blind': big_blind,
-                    'max_players': max_players,
-                    'current_players': len([p for p in table.players if not p.is_bot]),
-                    'game_stage': 'waiting',
-                    'created_by': nickname
-                }
-            })
-            
-            # 广播更新统计信息
-            online_players = len(player_sessions)
-            active_tables = len(tables)
-            socketio.emit('stats_update', {
-                'online_players': online_players,
-                'active_tables': active_tables
-            })
+            lobby_index.upsert(lobby_entry(table, nickname))
+            sync_lobby_table(table_id)
             
             print(f"玩家 {player.nickname} 创建并加入房间 {title} (ID: {table_id}), 添加了 {bots_added} 个机器人")
         else:
@@ -1096,13 +1326,14 @@ def handle_create_table(data):
 
 
 @socketio.on('join_table')
+@instrumented('join_table')
 def handle_join_table(data):
     """加入牌桌"""
     try:
         session_id = request.sid
         table_id = data.get('table_id')
         
-        if session_id not in player_sessions:
+        if session_id not in session_registry:
             emit('error', {'message': '请先登录'})
             return
         
@@ -1131,8 +1362,8 @@ def handle_join_table(data):
             tables[table_id] = table
             print(f"从数据库重新加载房间: {table.title}")
         
-        player_id = player_sessions[session_id]['player_id']
-        nickname = player_sessions[session_id]['nickname']
+        player_id = session_registry.get(session_id)['player_id']
+        nickname = session_registry.get(session_id)['nickname']
         
         # 动态获取或创建玩家对象
         player = players.get(player_id)
@@ -1143,11 +1374,11 @@ def handle_join_table(data):
                 emit('error', {'message': '玩家数据不存在'})
                 return
             # 创建玩家对象
-            player = Player(player_id, nickname, player_data['chips'])
+            player = Player(player_id, nickname, get_account_chips(player_id, player_data))
             players[player_id] = player
             print(f"动态创建玩家对象: {nickname} (ID: {player_id})")
-            # 将 has_helper 字段加入 player_sessions
-            player_sessions[session_id]['has_helper'] = player_data.get('has_helper', 0)
+            # 将 has_helper 字段加入会话信息
+            session_registry.update(session_id, has_helper=player_data.get('has_helper', 0))
         
         # 检查玩家是否已在房间中（重连情况）
         db_players = db.get_table_players(table_id)
@@ -1160,7 +1391,7 @@ def handle_join_table(data):
         
         if existing_player:
             # 玩家重连
-            session_tables[session_id] = table_id
+            session_registry.join_table(session_id, table_id)
             join_room(table_id)
             
             # 重新加载所有玩家到内存（包括机器人）
@@ -1172,25 +1403,16 @@ def handle_join_table(data):
                         # 重新创建机器人
                         from poker_engine.bot import Bot, BotLevel
                         try:
-                            # 从nickname推断机器人等级
+                            # 使用入座时记录的机器人等级
                             print(f"🔄 重新创建机器人: {db_player['nickname']}")
-                            if '新手' in db_player['nickname'] or '菜鸟' in db_player['nickname'] or '学徒' in db_player['nickname']:
-                                level = BotLevel.BEGINNER
-                                print(f"  - 检测为初级机器人")
-                            elif '老司机' in db_player['nickname'] or '高手' in db_player['nickname'] or '大神' in db_player['nickname']:
-                                level = BotLevel.INTERMEDIATE
-                                print(f"  - 检测为中级机器人")
-                            elif '大师' in db_player['nickname'] or '传奇' in db_player['nickname'] or '王者' in db_player['nickname']:
-                                level = BotLevel.ADVANCED
-                                print(f"  - 检测为高级机器人")
-                            elif '德州之神' in db_player['nickname'] or '扑克天神' in db_player['nickname'] or '全知全能' in db_player['nickname'] or '透视眼' in db_player['nickname'] or '作弊之王' in db_player['nickname']:
-                                level = BotLevel.GOD
-                                print(f"  - 检测为德州扑克之神机器人")
-                            else:
+                            try:
+                                level = BotLevel(db_player.get('bot_level') or 'beginner')
+                            except ValueError:
                                 level = BotLevel.BEGINNER
-                                print(f"  - 未匹配，默认为初级机器人")
+                            print(f"  - 机器人等级: {level.value}")
                             
                             bot = Bot(db_player['player_id'], db_player['nickname'], db_player['chips'], level)
+                            bot.load_learning_data(player_persistence.get_bot_learning_data(bot.id))
                             bot.current_bet = db_player['current_bet']
                             bot.status = PlayerStatus[db_player['status'].upper()]
                             table.add_player_at_position(bot, db_player['position'])
@@ -1223,6 +1445,7 @@ def handle_join_table(data):
                 print(f"玩家 {player.nickname} 重连，发送手牌: {[f'{card.rank.symbol}{card.suit.value}' for card in table_player.hole_cards]}")
             
             print(f"玩家 {player.nickname} 重连到房间 {table.title}")
+            sync_lobby_table(table_id)
             return
         
         # 新玩家加入 - 处理选座位参数
@@ -1230,10 +1453,10 @@ def handle_join_table(data):
         if db.join_table(table_id, player_id, position):
             # 内存中也要加入指定位置
             if position is not None and table.add_player_at_position(player, position):
-                session_tables[session_id] = table_id
+                session_registry.join_table(session_id, table_id)
                 join_room(table_id)
             elif position is None and table.add_player(player):  # 兼容没有指定位置的情况
-                session_tables[session_id] = table_id
+                session_registry.join_table(session_id, table_id)
                 join_room(table_id)
             else:
                 emit('error', {'message': f'座位{position + 1}已被占用或添加失败'})
@@ -1257,6 +1480,7 @@ def handle_join_table(data):
             }, room=table_id, include_self=False)
             
             print(f"玩家 {player.nickname} 加入房间 {table.title}")
+            sync_lobby_table(table_id)
         else:
             emit('error', {'message': '无法加入房间'})
             
@@ -1266,13 +1490,14 @@ def handle_join_table(data):
 
 
 @socketio.on('get_table_state')
+@instrumented('get_table_state')
 def handle_get_table_state(data):
     """手动获取牌桌状态 - 用于处理连接问题时的备用方案"""
     try:
         session_id = request.sid
         table_id = data.get('table_id')
         
-        if session_id not in player_sessions:
+        if session_id not in session_registry:
             emit('error', {'message': '请先登录'})
             return
         
@@ -1286,11 +1511,11 @@ def handle_get_table_state(data):
             emit('error', {'message': '房间不存在'})
             return
         
-        player_id = player_sessions[session_id]['player_id']
+        player_id = session_registry.get(session_id)['player_id']
         
         # 确保玩家在正确的Socket.IO房间中
         join_room(table_id)
-        session_tables[session_id] = table_id
+        session_registry.join_table(session_id, table_id)
         
         # 发送牌桌状态
         table_state = table.get_table_state(player_id)
@@ -1319,33 +1544,30 @@ def handle_get_table_state(data):
 
 
 @socketio.on('add_bot')
+@instrumented('add_bot')
+@table_work
+@frames.batched
 def handle_add_bot(data):
     """添加机器人到牌桌"""
     try:
         session_id = request.sid
-        if session_id not in player_sessions:
-            emit('error', {'message': '请先登录'})
+        if session_id not in session_registry:
+            frames.emit('error', {'message': '请先登录'}, room=request.sid)
             return
         
         # 查找玩家所在的房间
-        table_id = None
-        for tid, table in tables.items():
-            for player in table.players:
-                if player.id == player_sessions[session_id]['player_id']:
-                    table_id = tid
-                    break
-            if table_id:
-                break
+        table_id = session_registry.table_of(session_id)
+        player_id = session_registry.get(session_id)['player_id']
         
-        if not table_id or table_id not in tables:
-            emit('error', {'message': '您不在任何房间中'})
+        if not table_id or table_id not in tables or not tables[table_id].get_player(player_id):
+            frames.emit('error', {'message': '您不在任何房间中'}, room=request.sid)
             return
         
         table = tables[table_id]
         
         # 检查房间是否已满
         if len(table.players) >= table.max_players:
-            emit('error', {'message': '房间已满'})
+            frames.emit('error', {'message': '房间已满'}, room=request.sid)
             return
         
         # 获取机器人等级
@@ -1377,79 +1599,66 @@ def handle_add_bot(data):
         # 添加到房间
         if table.add_player(bot):
             # 同时添加到数据库，正确设置机器人标识
-            if db.join_table(table_id, bot_id):
-                # 手动更新机器人的is_bot和bot_level字段
-                with db.get_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('''
-                        UPDATE table_players 
-                        SET is_bot = 1, bot_level = ?
-                        WHERE table_id = ? AND player_id = ?
-                    ''', (level_enum.value, table_id, bot_id))
-                    conn.commit()
-                    print(f"✅ 手动添加机器人 {bot_name} 数据库标识已更新: is_bot=1, bot_level={level_enum.value}")
+            db.create_bot_user(bot_id, bot_name, level_enum.value, table.initial_chips)
+            db.join_table(table_id, bot_id, is_bot=True, bot_level=level_enum.value)
             
             # 发送机器人添加成功消息
-            socketio.emit('bot_added', {
+            frames.emit('bot_added', {
                 'success': True,
                 'bot': bot.to_dict(),
                 'message': f'机器人 {bot_name} ({level_str}) 已加入房间'
             }, room=table_id)
             
             # 广播更新后的桌面状态给所有玩家
-            socketio.emit('table_updated', table.get_table_state(), room=table_id)
+            frames.emit('table_updated', table.get_table_state(), room=table_id)
             
             print(f"机器人 {bot_name} ({level_str}) 加入房间 {table.title}")
+            sync_lobby_table(table_id)
         else:
-            emit('error', {'message': '添加机器人失败'})
+            frames.emit('error', {'message': '添加机器人失败'}, room=request.sid)
             
     except Exception as e:
         print(f"添加机器人失败: {e}")
-        emit('error', {'message': f'添加机器人失败: {str(e)}'})
+        frames.emit('error', {'message': f'添加机器人失败: {str(e)}'}, room=request.sid)
 
 
 
 @socketio.on('start_hand')
+@instrumented('start_hand')
+@table_work
+@frames.batched
 def handle_start_hand():
     """开始手牌"""
     try:
         session_id = request.sid
-        if session_id not in player_sessions:
-            emit('error', {'message': '请先登录'})
+        if session_id not in session_registry:
+            frames.emit('error', {'message': '请先登录'}, room=request.sid)
             return
         
         # 查找玩家所在的房间
-        table_id = None
-        player_id = player_sessions[session_id]['player_id']
-        
-        for tid, table in tables.items():
-            for player in table.players:
-                if player.id == player_id:
-                    table_id = tid
-                    break
-            if table_id:
-                break
+        table_id = session_registry.table_of(session_id)
+        player_id = session_registry.get(session_id)['player_id']
         
-        if not table_id or table_id not in tables:
-            emit('error', {'message': '您不在任何房间中'})
+        if not table_id or table_id not in tables or not tables[table_id].get_player(player_id):
+            frames.emit('error', {'message': '您不在任何房间中'}, room=request.sid)
             return
         
         table = tables[table_id]
         
         # 检查玩家数量
         if len(table.players) < 2:
-            emit('error', {'message': '至少需要2名玩家才能开始游戏'})
+            frames.emit('error', {'message': '至少需要2名玩家才能开始游戏'}, room=request.sid)
             return
         
         # 检查游戏状态
         if table.game_stage != GameStage.WAITING:
-            emit('error', {'message': '游戏已在进行中'})
+            frames.emit('error', {'message': '游戏已在进行中'}, room=request.sid)
             return
         
         # 开始新手牌
         if table.start_new_hand():
             # 广播手牌开始事件
-            socketio.emit('hand_started', {
+            frames.emit('hand_started', {
                 'table': table.get_table_state(),
                 'message': '新手牌开始！'
             }, room=table_id)
@@ -1457,19 +1666,18 @@ def handle_start_hand():
             # 发送玩家手牌给各自的玩家
             for player in table.players:
                 if not player.is_bot and player.hole_cards:
-                    player_session = None
-                    for sid, session in player_sessions.items():
-                        if session['player_id'] == player.id:
-                            player_session = sid
-                            break
+                    player_session = session_registry.sid_for_player(player.id)
                     
                     if player_session:
                         print(f"📤 发送手牌给玩家 {player.nickname}: {[f'{card.rank.symbol}{card.suit.value}' for card in player.hole_cards]}")
-                        socketio.emit('your_cards', {
+                        frames.emit('your_cards', {
                             'hole_cards': [card.to_dict() for card in player.hole_cards]
                         }, room=player_session)
             
             print(f"房间 {table.title} 开始新手牌")
+            sync_lobby_table(table_id)
+            equity_service.on_street(table)
+            speculation_worker.schedule(table)
             
             # 后台显示所有玩家的手牌
             print("=" * 50)
@@ -1488,42 +1696,45 @@ def handle_start_hand():
             print("=" * 50)
             
             # 开始机器人处理和行动通知
-            socketio.start_background_task(process_bot_actions_delayed, table_id)
+            spawn(process_bot_actions_delayed, table_id)
         else:
-            emit('error', {'message': '开始游戏失败'})
+            frames.emit('error', {'message': '开始游戏失败'}, room=request.sid)
             
     except Exception as e:
         print(f"开始手牌失败: {e}")
-        emit('error', {'message': f'开始游戏失败: {str(e)}'})
+        frames.emit('error', {'message': f'开始游戏失败: {str(e)}'}, room=request.sid)
 
 
 @socketio.on('player_action')
+@instrumented('player_action')
+@table_work
+@frames.batched
 def handle_player_action(data):
     """处理玩家动作"""
     try:
         session_id = request.sid
         
-        if session_id not in player_sessions:
-            emit('error', {'message': '请先登录'})
+        if session_id not in session_registry:
+            frames.emit('error', {'message': '请先登录'}, room=request.sid)
             return
         
-        if session_id not in session_tables:
-            emit('error', {'message': '请先加入房间'})
+        if session_registry.table_of(session_id) is None:
+            frames.emit('error', {'message': '请先加入房间'}, room=request.sid)
             return
         
-        player_id = player_sessions[session_id]['player_id']
-        table_id = session_tables[session_id]
+        player_id = session_registry.get(session_id)['player_id']
+        table_id = session_registry.table_of(session_id)
         table = tables.get(table_id)
         
         if not table:
-            emit('error', {'message': '房间不存在'})
+            frames.emit('error', {'message': '房间不存在'}, room=request.sid)
             return
         
         action_str = data.get('action')
         amount = data.get('amount', 0)
         
         if not action_str:
-            emit('error', {'message': '无效的动作'})
+            frames.emit('error', {'message': '无效的动作'}, room=request.sid)
             return
         
         # 转换字符串动作为枚举
@@ -1539,9 +1750,12 @@ def handle_player_action(data):
         
         action = action_map.get(action_str.lower())
         if not action:
-            emit('error', {'message': f'无效的动作: {action_str}'})
+            frames.emit('error', {'message': f'无效的动作: {action_str}'}, room=request.sid)
             return
         
+        tracer.annotate({'table_id': table_id, 'hand_number': table.hand_number,
+                         'player_id': player_id, 'action': action_str.lower()})
+        
         # 执行玩家动作
         result = table.process_player_action(player_id, action, amount)
         
@@ -1562,7 +1776,7 @@ def handle_player_action(data):
         
         if result.get('success'):
             # 发送动作处理结果
-            emit('action_processed', {
+            frames.emit('action_processed', {
                 'table': table.get_table_state(),
                 'action': result.get('action'),
                 'player_id': player_id,
@@ -1596,7 +1810,7 @@ def handle_player_action(data):
                 except Exception as bot_error:
                     print(f"处理机器人动作时出错: {bot_error}")
                     # 即使机器人处理出错，也要发送状态更新
-                    emit('table_updated', table.get_table_state(), room=table_id)
+                    frames.emit('table_updated', table.get_table_state(), room=table_id)
             
             # 统一处理手牌结束后的状态记录
             if hand_ended:
@@ -1605,23 +1819,24 @@ def handle_player_action(data):
             
     except Exception as e:
         print(f"处理玩家动作失败: {e}")
-        emit('error', {'message': f'动作执行失败: {str(e)}'})
+        frames.emit('error', {'message': f'动作执行失败: {str(e)}'}, room=request.sid)
 
 
 @socketio.on('leave_table')
+@instrumented('leave_table')
 def handle_leave_table():
     """离开牌桌"""
     try:
         session_id = request.sid
         
-        if session_id not in player_sessions:
+        if session_id not in session_registry:
             return
         
-        if session_id not in session_tables:
+        if session_registry.table_of(session_id) is None:
             return
         
-        player_id = player_sessions[session_id]['player_id']
-        table_id = session_tables[session_id]
+        player_id = session_registry.get(session_id)['player_id']
+        table_id = session_registry.table_of(session_id)
         table = tables.get(table_id)
         
         if table:
@@ -1641,22 +1856,14 @@ def handle_leave_table():
             # 立即检查是否需要清理房间
             check_and_cleanup_table(table_id)
         
-        # 清理会话
-        if session_id in session_tables:
-            del session_tables[session_id]
+        # 清理会话和座位
+        session_registry.leave_table(session_id)
+        session_registry.unseat(player_id, table_id)
         
         leave_room(table_id)
         
         # 广播大厅更新
-        socketio.emit('lobby_update')
-        
-        # 获取统计信息并广播
-        online_players = len(player_sessions)
-        active_tables = len(tables)
-        socketio.emit('stats_update', {
-            'online_players': online_players,
-            'active_tables': active_tables
-        })
+        sync_lobby_table(table_id)
         
     except Exception as e:
         print(f"离开房间失败: {e}")
@@ -1680,8 +1887,9 @@ def check_and_cleanup_table(table_id):
             
             # 从内存中删除房间
             if table_id in tables:
-                del tables[table_id]
+                save_bot_learning(tables.pop(table_id))
                 print(f"从内存中清理房间: {table_id}")
+            sync_lobby_table(table_id)
             
             # 清理投票记录
             if table_id in next_round_votes:
@@ -1696,6 +1904,7 @@ def check_and_cleanup_table(table_id):
         print(f"检查清理房间 {table_id} 时出错: {e}")
         return False
 
+@table_work
 def cleanup_empty_tables():
     """定期清理空房间、机器人房间和长时间无活动的房间"""
     try:
@@ -1729,6 +1938,7 @@ def cleanup_empty_tables():
                     if player in table.players:
                         table.players.remove(player)
                         print(f"     移除破产玩家: {player.nickname}")
+                sync_lobby_table(table_id)
             
             if should_remove:
                 tables_to_remove.append(table_id)
@@ -1737,7 +1947,8 @@ def cleanup_empty_tables():
         for table_id in tables_to_remove:
             if table_id in tables:
                 table_title = tables[table_id].title
-                del tables[table_id]
+                save_bot_learning(tables.pop(table_id))
+                sync_lobby_table(table_id)
                 print(f"   从内存中清理房间: {table_title}")
                 
                 # 清理相关的会话数据
@@ -1748,19 +1959,8 @@ def cleanup_empty_tables():
                 if table_id in current_hands:
                     del current_hands[table_id]
         
-        # 3. 清理断开连接的玩家会话
-        disconnected_sessions = []
-        for session_id, session_info in player_sessions.items():
-            # 检查会话是否还有效（这里可以添加更多检查）
-            player_id = session_info.get('player_id')
-            if not player_id:
-                disconnected_sessions.append(session_id)
-        
-        for session_id in disconnected_sessions:
-            if session_id in player_sessions:
-                player_info = player_sessions[session_id]
-                del player_sessions[session_id]
-                print(f"   清理断开的会话: {player_info.get('nickname', 'Unknown')}")
+        # 3. 断开连接的会话在disconnect时已从注册表注销，这里只校正在线计数
+        server_stats.set_online(len(session_registry))
         
         # 4. 优化数据库（每10次清理执行一次）
         import random
@@ -1781,7 +1981,7 @@ def cleanup_empty_tables():
             print("✅ 定期维护完成: 无需清理")
             
         # 5. 显示当前状态
-        print(f"📊 当前状态: {len(tables)} 个活跃房间, {len(player_sessions)} 个玩家会话")
+        print(f"📊 当前状态: {len(tables)} 个活跃房间, {len(session_registry)} 个玩家会话")
         
     except Exception as e:
         print(f"❌ 清理房间时出错: {e}")
@@ -1790,12 +1990,15 @@ def cleanup_empty_tables():
 
 
 @socketio.on('vote_next_round')
+@instrumented('vote_next_round')
+@table_work
+@frames.batched
 def handle_vote_next_round(data):
     """处理下一轮投票"""
     try:
         session_id = request.sid
-        if session_id not in player_sessions:
-            emit('error', {'message': '未找到玩家会话'})
+        if session_id not in session_registry:
+            frames.emit('error', {'message': '未找到玩家会话'}, room=request.sid)
             return
         
         table_id = data.get('table_id')
@@ -1805,17 +2008,17 @@ def handle_vote_next_round(data):
         # 检查房间是否存在
         if not table_id:
             print(f"❌ 无效的房间ID")
-            emit('error', {'message': '无效的房间ID'})
+            frames.emit('error', {'message': '无效的房间ID'}, room=request.sid)
             return
             
         if table_id not in tables:
             print(f"❌ 房间 {table_id} 不存在")
             # 尝试从数据库恢复房间信息或提示用户
-            emit('error', {'message': '房间不存在，请重新创建房间'})
+            frames.emit('error', {'message': '房间不存在，请重新创建房间'}, room=request.sid)
             return
         
         table = tables[table_id]
-        player_id = player_sessions[session_id]['player_id']
+        player_id = session_registry.get(session_id)['player_id']
         
         # 检查玩家是否在房间中
         player = None
@@ -1825,7 +2028,7 @@ def handle_vote_next_round(data):
                 break
         
         if not player:
-            emit('error', {'message': '玩家不在房间中'})
+            frames.emit('error', {'message': '玩家不在房间中'}, room=request.sid)
             return
         
         # 初始化投票记录
@@ -1862,7 +2065,7 @@ def handle_vote_next_round(data):
             'required': len(human_players),
             'players_voted': [p.nickname for p in table.players if p.id in next_round_votes[table_id]]
         }
-        socketio.emit('next_round_vote_update', vote_status, room=table_id)
+        frames.emit('next_round_vote_update', vote_status, room=table_id)
         
         # 如果所有人都投票了，开始下一轮
         if all_voted:
@@ -1871,8 +2074,12 @@ def handle_vote_next_round(data):
                         
     except Exception as e:
         print(f"下一轮投票错误: {e}")
-        emit('error', {'message': '投票失败'})
+        frames.emit('error', {'message': '投票失败'}, room=request.sid)
 
+@table_work
+@slow_handlers.watch('start_next_round')
+@tracer.traced('start_next_round', attributes=table_attributes)
+@frames.batched
 def start_next_round(table_id):
     """开始下一轮游戏"""
     try:
@@ -1902,41 +2109,47 @@ def start_next_round(table_id):
             return
         
         print(f"🎮 房间 {table.title} 开始下一轮")
+        sync_lobby_table(table_id)
+        equity_service.on_street(table)
+        speculation_worker.schedule(table)
         
         # 广播新手牌开始
         game_state = table.get_table_state()
         print(f"🎮 广播new_hand_started事件到房间 {table_id}")
-        socketio.emit('new_hand_started', game_state, room=table_id)
+        frames.emit('new_hand_started', game_state, room=table_id)
         
         # 广播玩家手牌给各自的玩家
         for player in table.players:
             if not player.is_bot and player.hole_cards:
-                player_session = None
-                for sid, session in player_sessions.items():
-                    if session['player_id'] == player.id:
-                        player_session = sid
-                        break
+                player_session = session_registry.sid_for_player(player.id)
                 
                 if player_session:
                     print(f"📤 发送手牌给玩家 {player.nickname}: {[f'{card.rank.symbol}{card.suit.value}' for card in player.hole_cards]}")
-                    socketio.emit('your_cards', {
+                    frames.emit('your_cards', {
                         'hole_cards': [card.to_dict() for card in player.hole_cards]
                     }, room=player_session)
         
         # 开始机器人处理
-        socketio.start_background_task(process_bot_actions_delayed, table_id)
+        spawn(process_bot_actions_delayed, table_id)
         
     except Exception as e:
         print(f"开始下一轮错误: {e}")
 
+@table_work
+@frames.batched
 def process_bot_actions_delayed(table_id, delay=1):
     """延迟处理机器人动作"""
     import time
     time.sleep(delay)
+    if draining:
+        return
     if table_id in tables:
         print(f"🤖 开始处理机器人动作 (table_id: {table_id})")
         process_bot_actions(table_id)
 
+@slow_handlers.watch('handle_hand_end')
+@tracer.traced('handle_hand_end', attributes=table_attributes)
+@frames.batched
 def handle_hand_end(table_id, winner, showdown_info):
     """处理手牌结束"""
     try:
@@ -1992,10 +2205,12 @@ def handle_hand_end(table_id, winner, showdown_info):
             log_hand_ended(hand_id, winner_id, winner_nickname, 
                           winning_amount, table.pot, community_cards, showdown_info)
         
-        # 保存玩家筹码到数据库
-        for player in table.players:
-            if not player.is_bot:
-                update_player_chips(player.id, player.chips)
+        # 把本手牌的筹码流水批量写入账本（重复调用时流水已清空，只做对账）
+        # 只给人类玩家开户和对账，机器人的流水记到共用账户
+        record_hand_chips(table_id, table.hand_number, table.chip_movements,
+                          {p.id: p.chips for p in table.players if not p.is_bot},
+                          {p.id for p in table.players if p.is_bot})
+        table.chip_movements = []
         
         # 处理获胜者信息
         winner_list = []
@@ -2055,12 +2270,13 @@ def handle_hand_end(table_id, winner, showdown_info):
             for i, player in enumerate(hand_ended_data['showdown_info']['showdown_players']):
                 print(f"    玩家{i+1}: {player['nickname']} - {player['hand_description']}")
         
-        socketio.emit('hand_ended', hand_ended_data, room=table_id)
+        frames.emit('hand_ended', hand_ended_data, room=table_id)
+        sync_lobby_table(table_id)
         
         # 检查是否还有足够玩家继续游戏
         active_players = [p for p in table.players if p.chips > 0]
         if len(active_players) < 2:
-            socketio.emit('game_over', {
+            frames.emit('game_over', {
                 'message': '游戏结束，玩家筹码不足'
             }, room=table_id)
             return
@@ -2068,13 +2284,13 @@ def handle_hand_end(table_id, winner, showdown_info):
         # 提示开始下一轮投票
         human_players = [p for p in table.players if not p.is_bot]
         if len(human_players) > 0:
-            socketio.emit('show_next_round_vote', {
+            frames.emit('show_next_round_vote', {
                 'message': '准备开始下一轮？',
                 'required_votes': len(human_players)
             }, room=table_id)
         else:
             # 如果只有机器人，自动开始下一轮
-            socketio.start_background_task(start_next_round, table_id)
+            spawn(start_next_round, table_id)
         
     except Exception as e:
         print(f"处理手牌结束错误: {e}")
@@ -2204,67 +2420,184 @@ def api_game_history():
         }), 500
 
 
+def ensure_lobby_index():
+    if not lobby_index.loaded:
+        bootstrap_lobby_index()
+
+
+def periodic_maintenance():
+    """每3分钟清理空房间"""
+    while True:
+        time.sleep(180)
+        try:
+            cleanup_empty_tables()
+        except Exception as e:
+            print(f"❌ 定期维护出错: {e}")
+
+
+def long_term_cleanup():
+    """每小时深度维护：清理旧状态记录、标记非活跃玩家、优化数据库"""
+    while True:
+        time.sleep(3600)
+        try:
+            print("🔧 执行每小时深度维护...")
+            table_state_manager.cleanup_old_states()
+            player_persistence.cleanup_inactive_players()
+            migrator.optimize()
+            print("✅ 深度维护完成")
+        except Exception as e:
+            print(f"❌ 深度维护失败: {e}")
+
+
+def start_background_services():
+    """后台预热各存储（只执行待处理的迁移）并启动维护线程，不阻塞开始监听"""
+    startup.warmup([
+        ('migrate:poker_game', db.init_database),
+        ('migrate:game_logs', game_logger.init_database),
+        ('migrate:table_states', table_state_manager.init_database),
+        ('migrate:players', player_persistence.init_database),
+        ('chip_ledger', chip_ledger.init_database),
+        ('lobby_index', ensure_lobby_index),
+        ('cleanup_empty_tables', cleanup_empty_tables),
+    ], start_task=socketio.start_background_task)
+    
+    threading.Thread(target=periodic_maintenance, name='periodic-maintenance', daemon=True).start()
+    threading.Thread(target=long_term_cleanup, name='long-term-cleanup', daemon=True).start()
+
+
+# 恢复快照后等待玩家重连的时间（秒），超时未重连的真人按断线处理
+RESTORE_RECONNECT_GRACE = 120
+# 停机时最多等待进行中的牌桌任务多久（秒），超时后照常写入快照
+DRAIN_TIMEOUT = 10
+
+
+def snapshot_tables() -> List[Dict]:
+    """所有牌桌的完整快照，连同日志会话、当前手牌ID和下一轮投票"""
+    entries = []
+    for table_id, table in list(tables.items()):
+        try:
+            entries.append({
+                'table': snapshot_table(table),
+                'log_session': table_sessions.get(table_id),
+                'hand_id': current_hands.get(table_id),
+                'votes': next_round_votes.get(table_id)
+            })
+        except Exception as e:
+            print(f"❌ 牌桌 {table_id} 快照失败: {e}")
+    return entries
+
+
+def restore_tables() -> List[str]:
+    """启动时（开始监听之前）从停机快照重建牌桌，返回恢复的房间ID"""
+    start = time.perf_counter()
+    restored = []
+    for entry in table_snapshots.consume():
+        try:
+            table = restore_table(entry['table'])
+        except (KeyError, SnapshotError) as e:
+            print(f"⚠️ 跳过无法恢复的牌桌快照: {e}")
+            continue
+        tables[table.id] = table
+        for player in table.players:
+            if not player.is_bot:
+                players.setdefault(player.id, player)
+                session_registry.seat(player.id, table.id)
+        if entry.get('log_session') is not None:
+            table_sessions[table.id] = entry['log_session']
+        if entry.get('hand_id') is not None:
+            current_hands[table.id] = entry['hand_id']
+        if entry.get('votes'):
+            next_round_votes[table.id] = entry['votes']
+        restored.append(table.id)
+    if restored:
+        print(f"♻️ 从快照恢复 {len(restored)} 个房间 ({(time.perf_counter() - start) * 1000:.0f}ms)")
+    return restored
+
+
+def resume_restored_tables(table_ids: List[str]):
+    """恢复的牌桌继续进行：轮到机器人的继续行动，宽限期后移除没有重连的真人"""
+    if not table_ids:
+        return
+    for table_id in table_ids:
+        table = tables.get(table_id)
+        if table and table.game_stage not in (GameStage.WAITING, GameStage.FINISHED):
+            spawn(process_bot_actions_delayed, table_id)
+    
+    def remove_absent_players():
+        time.sleep(RESTORE_RECONNECT_GRACE)
+        for table_id in table_ids:
+            table = tables.get(table_id)
+            if not table:
+                continue
+            for player in list(table.players):
+                if not player.is_bot and not session_registry.is_online(player.id):
+                    print(f"{RESTORE_RECONNECT_GRACE}秒内未重连，移除玩家 {player.nickname}")
+                    remove_player_from_tables(player.id)
+    
+    spawn(remove_absent_players)
+
+
+def drain_and_exit(signum, frame):
+    """
+    SIGTERM：停止就绪和接受新的动作，启动排空任务
+
+    信号处理函数可能打断正在执行的greenlet（例如处理到一半的玩家动作），
+    所以这里只设置标记，快照由排空任务在让出点写入。
+    """
+    global draining
+    if draining:
+        return
+    # 不取 work_lock：信号可能正好打断持有锁的主线程，排空任务读计数时再加锁
+    draining = True
+    spawn(drain)
+
+
+def in_flight() -> int:
+    """进行中的牌桌任务数（draining 设置后读到的计数已包含所有通过检查的任务）"""
+    with work_lock:
+        return tasks_in_flight
+
+
+def drain():
+    """等待进行中的牌桌任务（动作处理、手牌结算、账本写入和广播）完成，写入全部牌桌快照、导出追踪数据和手牌日志后退出"""
+    print(f"🛑 收到停止信号，停止接受新的动作，等待 {in_flight()} 个进行中的任务...")
+    deadline = time.monotonic() + DRAIN_TIMEOUT
+    while in_flight() and time.monotonic() < deadline:
+        socketio.sleep(0.05)
+    if in_flight():
+        print(f"⚠️ {DRAIN_TIMEOUT}秒内仍有 {in_flight()} 个任务未完成，直接写入快照")
+
+    try:
+        written = table_snapshots.write(snapshot_tables())
+        if written:
+            print(f"💾 已保存 {written['tables']} 个房间的快照 "
+                  f"({written['bytes'] / 1024:.0f}KB, {written['seconds'] * 1000:.0f}ms)")
+    except Exception as e:
+        print(f"❌ 写入牌桌快照失败: {e}")
+    tracer.flush()
+    hand_event_log.flush()
+    sys.stdout.flush()
+    # 直接退出：抛出 SystemExit 可能被正在运行的greenlet吞掉
+    os._exit(0)
+
+
+def serve(host: str = '0.0.0.0', port: int = 5000, debug: bool = False, **kwargs):
+    """恢复停机快照、启动后台服务并开始监听"""
+    # 重载器的监视进程不处理请求，后台服务只在实际服务的进程里启动
+    if not kwargs.get('use_reloader', debug) or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        # 在大厅索引载入之前恢复，恢复的牌桌不会被数据库中的空牌桌覆盖
+        resume_restored_tables(restore_tables())
+        signal.signal(signal.SIGTERM, drain_and_exit)
+        start_background_services()
+        startup.mark_serving()
+    socketio.run(app, host=host, port=port, debug=debug, **kwargs)
+
+
 if __name__ == '__main__':
-    import os
-    # 只在主进程中执行初始化（避免debug模式重复加载）
+    # debug模式的重载器会在子进程中重新执行本模块，只在实际服务的进程里打印启动信息
     if os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
         print("🃏 德州扑克游戏服务器启动中...")
-        print("📊 数据库初始化完成")
-        
-        # 启动时进行数据库修复和清理
-        print("🔧 执行启动修复...")
-        try:
-            import subprocess
-            result = subprocess.run(['python', 'fix_database_issues.py'], 
-                                  capture_output=True, text=True, timeout=30)
-            if result.returncode == 0:
-                print("✅ 数据库修复完成")
-            else:
-                print(f"⚠️ 数据库修复警告: {result.stderr}")
-        except Exception as e:
-            print(f"⚠️ 数据库修复失败: {e}")
-        
-        # 启动时清理空房间
-        print("🧹 初始清理...")
-        cleanup_empty_tables()
-        
-        # 启动定期维护任务
-        import threading
-        def periodic_maintenance():
-            import time
-            while True:
-                time.sleep(180)  # 每3分钟维护一次（更频繁）
-                try:
-                    cleanup_empty_tables()
-                except Exception as e:
-                    print(f"❌ 定期维护出错: {e}")
-        
-        # 启动长期清理任务  
-        def long_term_cleanup():
-            import time
-            while True:
-                time.sleep(3600)  # 每小时执行一次深度清理
-                try:
-                    print("🔧 执行每小时深度维护...")
-                    import subprocess
-                    result = subprocess.run(['python', 'fix_database_issues.py'], 
-                                          capture_output=True, text=True, timeout=60)
-                    if result.returncode == 0:
-                        print("✅ 深度维护完成")
-                    else:
-                        print(f"⚠️ 深度维护警告")
-                except Exception as e:
-                    print(f"❌ 深度维护失败: {e}")
-        
-        # 启动维护线程
-        maintenance_thread = threading.Thread(target=periodic_maintenance, daemon=True)
-        maintenance_thread.start()
-        
-        cleanup_thread = threading.Thread(target=long_term_cleanup, daemon=True)
-        cleanup_thread.start()
-        
         print("🌐 服务器地址: http://192.168.178.39:5000")
-        print("🎮 游戏已准备就绪！")
-        print("⚙️ 自动维护已启动 (每3分钟快速维护，每小时深度维护)")
+        print("⚙️ 数据库迁移和预热在后台执行，/readyz 返回200后就绪 (每3分钟快速维护，每小时深度维护)")
     
-    socketio.run(app, host='0.0.0.0', port=5000, debug=True) 
\ No newline at end of file
+    serve('0.0.0.0', 5000, debug=True)
@@ -0,0 +1,33 @@
+"""
+性能基准测试
+Offline benchmark suite for the poker engine and storage
+
+在仓库根目录运行:
+    python -m benchmarks run [--quick] [--suite evaluator bots ...] [--output results.json]
+    python -m benchmarks compare baseline.json results.json [--threshold 0.15]
+"""
+
+from .bench_engine import bench_evaluator, bench_bots, bench_table, bench_serialization, bench_shuffle
+from .bench_storage import bench_game_logger
+from .bench_startup import bench_startup
+from .bench_snapshot import bench_snapshot
+from .bench_replay import bench_replay
+from .bench_tournament import bench_tournament
+from .bench_icm import bench_icm
+
+# 套件名 -> 基准函数（参数为是否快速模式，返回结果列表）
+SUITES = {
+    'evaluator': bench_evaluator,
+    'bots': bench_bots,
+    'table': bench_table,
+    'serialization': bench_serialization,
+    'shuffle': bench_shuffle,
+    'storage': bench_game_logger,
+    'startup': bench_startup,
+    'snapshot': bench_snapshot,
+    'replay': bench_replay,
+    'tournament': bench_tournament,
+    'icm': bench_icm
+}
+
+__all__ = ["SUITES"]
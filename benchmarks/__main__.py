@@ -0,0 +1,86 @@
+"""
+基准测试命令行
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from . import SUITES
+from .harness import (
+    DEFAULT_THRESHOLD, write_results, load_results, compare, print_results, print_comparison, missed_target
+)
+
+
+DEFAULT_OUTPUT = os.path.join('benchmarks', 'results', 'latest.json')
+
+
+def run(args) -> int:
+    suites = args.suite or list(SUITES)
+    unknown = [name for name in suites if name not in SUITES]
+    if unknown:
+        print(f"❌ 未知的基准套件: {', '.join(unknown)}（可选: {', '.join(SUITES)}）")
+        return 2
+
+    results = []
+    for name in suites:
+        print(f"⏱️ 运行 {name} ...")
+        start = time.perf_counter()
+        suite_results = SUITES[name](args.quick)
+        print_results(suite_results)
+        print(f"   用时 {time.perf_counter() - start:.1f}秒")
+        results.extend(suite_results)
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    write_results(args.output, results, args.quick)
+    print(f"📄 结果已写入 {args.output}")
+
+    status = 0
+    missed = [r for r in results if missed_target(r)]
+    for r in missed:
+        print(f"❌ {r['name']} = {r['value']:.3f} {r['unit']}，未达到目标 {r['target']:.3f}")
+        status = 1
+
+    if args.baseline:
+        return max(status, _report(load_results(args.baseline), {r['name']: r for r in results}, args.threshold))
+    return status
+
+
+def _report(baseline, current, threshold: float) -> int:
+    rows = compare(baseline, current, threshold)
+    print_comparison(rows)
+    regressions = [row for row in rows if row['status'] == 'regression']
+    if regressions:
+        print(f"❌ {len(regressions)} 项性能回退超过 {threshold * 100:.0f}%")
+        return 1
+    print(f"✅ 共对比 {len(rows)} 项，没有超过 {threshold * 100:.0f}% 的回退")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='德州扑克性能基准')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='运行基准并写入JSON结果')
+    run_parser.add_argument('--quick', action='store_true', help='减少样本数，快速检查')
+    run_parser.add_argument('--suite', nargs='+', metavar='NAME', help=f"只运行指定套件: {', '.join(SUITES)}")
+    run_parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f'结果文件（默认 {DEFAULT_OUTPUT}）')
+    run_parser.add_argument('--baseline', help='运行后与该基线结果对比')
+    run_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='回退判定比例')
+
+    compare_parser = commands.add_parser('compare', help='对比两次结果，有回退时返回非零')
+    compare_parser.add_argument('baseline', help='基线结果文件')
+    compare_parser.add_argument('current', help='当前结果文件')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='回退判定比例')
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        return run(args)
+    return _report(load_results(args.baseline), load_results(args.current), args.threshold)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+游戏引擎基准
+牌型评估、机器人决策、完整一手牌和桌面状态序列化
+"""
+
+import itertools
+import json
+import random
+from typing import Dict, List
+
+from poker_engine import Table, Player, HandEvaluator, Bot, BotLevel
+from poker_engine.card import Deck
+from poker_engine.fast_eval import cards_mask, evaluate_mask
+from poker_engine.player import PlayerStatus
+from poker_engine.rng import DealingStream, hand_rng, fast_stream, bulk_permutations, set_seed_override
+from wire_protocol import encode_frame
+
+from .harness import latency, throughput, quiet
+
+
+SEED = 20240601
+
+# 每个机器人等级、每条街的决策样本数 (快速模式, 完整模式)
+DECISION_SAMPLES = {
+    BotLevel.BEGINNER: (20, 100),
+    BotLevel.INTERMEDIATE: (3, 10),
+    BotLevel.ADVANCED: (5, 20),
+    BotLevel.GOD: (5, 20)
+}
+STREETS = (('preflop', 0), ('flop', 3), ('turn', 4), ('river', 5))
+
+
+def _deal(rng: random.Random, count: int) -> List:
+    deck = Deck()
+    rng.shuffle(deck.cards)
+    return deck.cards[:count]
+
+
+def bench_evaluator(quick: bool) -> List[Dict]:
+    """HandEvaluator.evaluate_hand 在5/6/7张牌下的吞吐，以及位掩码评估器作为参照"""
+    rng = random.Random(SEED)
+    number, repeat = (200, 3) if quick else (1000, 5)
+    results = []
+    for count in (5, 6, 7):
+        hands = itertools.cycle([_deal(rng, count) for _ in range(number)])
+
+        def evaluate():
+            cards = next(hands)
+            HandEvaluator.evaluate_hand(cards[:2], cards[2:])
+
+        results.append(throughput(f'evaluator.evaluate_hand.{count}_cards', evaluate, number, repeat))
+
+    masks = itertools.cycle([cards_mask(_deal(rng, 7)) for _ in range(number)])
+    results.append(throughput('evaluator.fast_eval.7_cards', lambda: evaluate_mask(next(masks)),
+                              number * 10, repeat))
+    return results
+
+
+def _decision(level: BotLevel, community_count: int, hand_number: int, rng: random.Random):
+    """一个独立的决策场景：机器人加三个仍在牌局中的对手，需要跟注一个大盲"""
+    cards = _deal(rng, 2 * 4 + community_count)
+    bot = Bot(f'bench_{level.value}', 'bench', 1000, level)
+    bot.hole_cards = cards[:2]
+    bot.status = PlayerStatus.PLAYING
+    players = [bot]
+    for i in range(3):
+        opponent = Player(f'opp_{i}', f'opp_{i}', 1000)
+        opponent.hole_cards = cards[2 + 2 * i:4 + 2 * i]
+        opponent.status = PlayerStatus.PLAYING
+        players.append(opponent)
+    game_state = {
+        'community_cards': cards[8:],
+        'current_bet': 40,
+        'big_blind': 20,
+        'pot_size': 120,
+        'active_players': len(players),
+        'position': 'middle',
+        'min_raise': 20,
+        'hand_number': hand_number,
+        'all_players': players
+    }
+    return lambda: bot.decide_action(game_state)
+
+
+def bench_bots(quick: bool) -> List[Dict]:
+    """Bot.decide_action 按等级和街的延迟（每个样本都是新的牌面，不命中缓存）"""
+    rng = random.Random(SEED)
+    set_seed_override(SEED)
+    results = []
+    hand_number = 0
+    for level, samples in DECISION_SAMPLES.items():
+        count = samples[0] if quick else samples[1]
+        for street, community_count in STREETS:
+            calls = []
+            for _ in range(count):
+                hand_number += 1
+                calls.append(_decision(level, community_count, hand_number, rng))
+            results.append(latency(f'bot.decide_action.{level.value}.{street}', calls))
+    return results
+
+
+def _bot_table(levels: List[BotLevel]) -> Table:
+    table = Table('bench', 'bench')
+    with quiet():
+        for i, level in enumerate(levels):
+            table.add_player(Bot(f'bench_{i}', f'bench_{i}', 1000, level))
+    return table
+
+
+def _play_hand(table: Table):
+    """从 start_new_hand 到 process_bot_actions 打完一手（每手前恢复筹码）"""
+    for player in table.players:
+        player.chips = 1000
+    table.start_new_hand()
+    for _ in range(10):
+        result = table.process_bot_actions()
+        if (result and result.get('hand_complete')) or table.game_stage.value in ('finished', 'showdown'):
+            break
+
+
+def bench_table(quick: bool) -> List[Dict]:
+    """全机器人牌桌完整一手牌的耗时"""
+    set_seed_override(SEED)
+    results = []
+    tables = {
+        'beginners': ([BotLevel.BEGINNER] * 6, (10, 50)),
+        'mixed': ([BotLevel.BEGINNER, BotLevel.INTERMEDIATE, BotLevel.ADVANCED, BotLevel.GOD,
+                   BotLevel.BEGINNER, BotLevel.BEGINNER], (2, 8))
+    }
+    for name, (levels, samples) in tables.items():
+        table = _bot_table(levels)
+        count = samples[0] if quick else samples[1]
+        results.append(latency(f'table.full_hand.{name}', [lambda: _play_hand(table)] * count))
+    return results
+
+
+def bench_serialization(quick: bool) -> List[Dict]:
+    """get_table_state 及其JSON/紧凑协议编码的开销（9人桌翻牌圈）"""
+    set_seed_override(SEED)
+    number, repeat = (200, 3) if quick else (1000, 5)
+    table = _bot_table([BotLevel.BEGINNER] * 9)
+    with quiet():
+        table.start_new_hand()
+        table.community_cards = table.deck.deal_cards(3)
+        state = table.get_table_state()
+    viewer = table.players[0].id
+
+    return [
+        throughput('serialization.get_table_state', table.get_table_state, number, repeat),
+        throughput('serialization.get_table_state.player_view', lambda: table.get_table_state(viewer),
+                   number, repeat),
+        throughput('serialization.json_dumps', lambda: json.dumps(state, ensure_ascii=False), number, repeat),
+        throughput('serialization.compact_frame',
+                   lambda: json.dumps(encode_frame([['table_updated', state]]), separators=(',', ':')),
+                   number, repeat)
+    ]
+
+
+def bench_shuffle(quick: bool) -> List[Dict]:
+    """
+    发牌洗牌和模拟用的批量排列
+
+    逐张 random.randint 的旧洗牌方式作为参照；每手牌的洗牌包括重置牌堆和从发牌流派生手牌种子
+    """
+    set_seed_override(SEED)
+    number, repeat = (2000, 3) if quick else (10000, 5)
+    deck = Deck()
+    stream = DealingStream()
+    sim = fast_stream()
+
+    def randint_loop():
+        deck.reset()
+        cards = deck.cards
+        for i in range(len(cards) - 1, 0, -1):
+            j = random.randint(0, i)
+            cards[i], cards[j] = cards[j], cards[i]
+
+    def seeded_hand():
+        deck.reset()
+        deck.shuffle(hand_rng(stream.next_hand_seed()))
+
+    results = [
+        throughput('shuffle.hand.randint_loop', randint_loop, number, repeat),
+        throughput('shuffle.hand.seeded', seeded_hand, number, repeat),
+        throughput('shuffle.deck.fast_stream', lambda: deck.shuffle(sim), number, repeat)
+    ]
+    # 中级机器人一次决策：2000次模拟，45张剩余牌中取翻牌后需要的9张（3个对手）
+    batch, repeat_batch = (5, 3) if quick else (20, 5)
+    results.append(throughput('shuffle.bulk_permutations.2000x45', lambda: bulk_permutations(2000, 45, sim, 9),
+                              batch, repeat_batch))
+    results.append(throughput('shuffle.per_simulation_shuffle.2000x45',
+                              lambda: [sim.shuffle(list(range(45))) for _ in range(2000)], batch, repeat_batch))
+    return results
+
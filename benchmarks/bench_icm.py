@@ -0,0 +1,66 @@
+"""
+ICM基准
+9人、18人（动态规划）和100人（蒙特卡洛）的ICM奖金期望，以及逐一枚举名次顺序的做法作为参照
+"""
+
+import itertools
+import random
+from typing import Dict, List
+
+from poker_engine import icm
+from poker_engine.rng import set_seed_override
+
+from .harness import latency, throughput
+
+
+SEED = 20240801
+
+# (人数, 奖金结构, 快速/完整模式的样本数)
+FIELDS = [
+    (9, [50, 30, 20], (50, 200)),
+    (9, [30, 20, 14, 10, 8, 6, 5, 4, 3], (10, 50)),
+    (18, [40, 25, 15, 10, 6, 4], (5, 20)),
+    (100, [25, 15, 10, 8, 7, 6, 5, 4, 4, 4, 3, 3, 2, 2, 2], (5, 20))
+]
+NAIVE_PLAYERS = 8
+
+
+def _stacks(rng: random.Random, players: int) -> List[int]:
+    return [rng.randint(500, 20000) for _ in range(players)]
+
+
+def _naive(stacks: List[int], payouts: List[float]) -> List[float]:
+    """逐一枚举所有名次顺序（阶乘复杂度）"""
+    equities = [0.0] * len(stacks)
+    for order in itertools.permutations(range(len(stacks))):
+        probability, remaining = 1.0, sum(stacks)
+        for i in order:
+            probability *= stacks[i] / remaining
+            remaining -= stacks[i]
+        for place, i in enumerate(order[:len(payouts)]):
+            equities[i] += probability * payouts[place]
+    return equities
+
+
+def bench_icm(quick: bool) -> List[Dict]:
+    """每个样本都是新的筹码分布（不命中缓存）"""
+    set_seed_override(SEED)
+    rng = random.Random(SEED)
+    results = []
+    for players, payouts, samples in FIELDS:
+        count = samples[0] if quick else samples[1]
+        method = 'exact' if icm.step_count(players, len(payouts)) <= icm.EXACT_STEP_LIMIT else 'montecarlo'
+        calls = [lambda stacks=_stacks(rng, players): icm.icm_equity(stacks, payouts) for _ in range(count)]
+        results.append(latency(f'icm.{method}.{players}_players.{len(payouts)}_paid', calls))
+
+    # 命中缓存（同一局面反复查询，例如机器人在同一手牌中多次决策）
+    stacks, payouts = _stacks(rng, 100), FIELDS[-1][1]
+    icm.icm_equity(stacks, payouts)
+    results.append(throughput('icm.cached.100_players', lambda: icm.icm_equity(stacks, payouts),
+                              2000 if quick else 10000))
+
+    count = 2 if quick else 5
+    payouts = [50, 30, 20]
+    calls = [lambda stacks=_stacks(rng, NAIVE_PLAYERS): _naive(stacks, payouts) for _ in range(count)]
+    results.append(latency(f'icm.naive_permutations.{NAIVE_PLAYERS}_players.3_paid', calls))
+    return results
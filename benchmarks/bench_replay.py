@@ -0,0 +1,56 @@
+"""
+手牌重放基准
+记录的机器人手牌的完整重放和重放到中途偏移量的速度
+"""
+
+import itertools
+from typing import Dict, List
+
+from poker_engine import BotLevel, instrumentation
+from poker_engine.hand_events import HandLog, HandRecorder
+from poker_engine.replay import replay, verify_hands
+from poker_engine.rng import set_seed_override
+
+from .bench_engine import _bot_table, _play_hand
+from .harness import throughput, quiet
+
+
+SEED = 20240615
+HAND_COUNT = 200
+
+
+def _record_hands(count: int) -> List[HandLog]:
+    """
+    6人机器人桌连续打 count 手牌并记录事件流
+
+    重放不调用机器人的决策逻辑，机器人等级不影响重放速度，这里只用初级机器人缩短录制时间
+    """
+    set_seed_override(SEED)
+    hands: List[HandLog] = []
+    table = _bot_table([BotLevel.BEGINNER] * 6)
+    instrumentation.set_hand_sink(HandRecorder(hands.append))
+    try:
+        with quiet():
+            for _ in range(count):
+                _play_hand(table)
+    finally:
+        instrumentation.set_hand_sink(None)
+    return [hand for hand in hands if hand.complete]
+
+
+def bench_replay(quick: bool) -> List[Dict]:
+    """整手重放（含逐事件校验）和停在一半事件处的重放，结果为每秒手牌数"""
+    hands = _record_hands(HAND_COUNT)
+    with quiet():
+        failures = verify_hands(hands)
+    assert not failures, failures[0]
+
+    full = itertools.cycle(hands)
+    half = itertools.cycle(hands)
+    number = len(hands)
+    repeat = 3 if quick else 10
+    return [
+        throughput('replay.full_hand', lambda: replay(next(full)), number, repeat),
+        throughput('replay.half_offset', lambda: replay((hand := next(half)), len(hand.events) // 2),
+                   number, repeat)
+    ]
@@ -0,0 +1,102 @@
+"""
+停机快照基准
+1000张牌桌（进行中的手牌、带对手模型的机器人）的快照写入和启动恢复耗时
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import Dict, List
+
+from poker_engine import Table, Bot, BotLevel
+from poker_engine.rng import set_seed_override
+from poker_engine.snapshot import snapshot_table, restore_table
+from table_snapshots import TableSnapshotStore
+
+from .harness import result, quiet
+
+
+SEED = 20240601
+TABLE_COUNT = 1000
+# 不同的牌局样板数，其余牌桌由样板复制（只换ID）
+TEMPLATES = 8
+LEVELS = [BotLevel.BEGINNER, BotLevel.INTERMEDIATE, BotLevel.ADVANCED, BotLevel.GOD,
+          BotLevel.BEGINNER, BotLevel.BEGINNER]
+
+
+def _template(index: int, rng: random.Random) -> Dict:
+    """一张6人机器人桌：对手模型记满，停在随机的一条街上"""
+    table = Table(f'template_{index}', f'template_{index}')
+    for i, level in enumerate(LEVELS):
+        bot = Bot(f'bot_{index}_{i}', f'bot_{index}_{i}', 1000, level)
+        bot.load_learning_data({'opponents': {
+            f'opponent_{n}': [rng.random(), rng.random(), rng.random(), rng.randint(1, 500)]
+            for n in range(Bot.OPPONENT_CAPACITY)
+        }})
+        table.add_player(bot)
+    table.start_new_hand()
+    for _ in range(rng.randint(0, 3)):
+        result = table.process_bot_actions()
+        if result and result.get('hand_complete'):
+            break
+    return snapshot_table(table)
+
+
+def _tables(count: int) -> List[Table]:
+    rng = random.Random(SEED)
+    set_seed_override(SEED)
+    with quiet():
+        templates = [_template(i, rng) for i in range(TEMPLATES)]
+    tables = []
+    for i in range(count):
+        data = dict(templates[i % TEMPLATES], id=f'table_{i}', title=f'table_{i}')
+        tables.append(restore_table(data))
+    _expand_models(tables)
+    return tables
+
+
+def _expand_models(tables: List[Table]):
+    """恢复的对手模型在第一次使用时才展开，这里全部展开（相当于每个机器人都已决策过）"""
+    for table in tables:
+        for player in table.players:
+            if isinstance(player, Bot):
+                list(player.opponent_model)
+
+
+def bench_snapshot(quick: bool) -> List[Dict]:
+    """
+    SIGTERM时的快照（序列化+原子写入）和启动时的恢复（读取+重建牌桌）
+
+    对手模型在恢复后第一次使用时才展开，展开全部模型的耗时单独列出（不在启动路径上）
+    """
+    repeat = 3 if quick else 10
+    tables = _tables(TABLE_COUNT)
+    write_samples, restore_samples, expand_samples = [], [], []
+    size = 0
+    with tempfile.TemporaryDirectory() as directory:
+        store = TableSnapshotStore(os.path.join(directory, 'tables.json'))
+        for _ in range(repeat):
+            start = time.perf_counter()
+            written = store.write([{'table': snapshot_table(table)} for table in tables])
+            write_samples.append(time.perf_counter() - start)
+            size = written['bytes']
+            shutil.copyfile(store.path, f'{store.path}.keep')
+
+            start = time.perf_counter()
+            restored = [restore_table(entry['table']) for entry in store.consume()]
+            restore_samples.append(time.perf_counter() - start)
+            assert len(restored) == TABLE_COUNT
+            os.replace(f'{store.path}.keep', store.path)
+
+            start = time.perf_counter()
+            _expand_models(restored)
+            expand_samples.append(time.perf_counter() - start)
+
+    print(f"   快照大小 {size / 1024 / 1024:.1f}MB（{TABLE_COUNT} 张牌桌）")
+    return [
+        result(f'snapshot.write.{TABLE_COUNT}_tables', write_samples, 'ms'),
+        result(f'snapshot.restore.{TABLE_COUNT}_tables', restore_samples, 'ms'),
+        result(f'snapshot.expand_opponent_models.{TABLE_COUNT}_tables', expand_samples, 'ms')
+    ]
@@ -0,0 +1,132 @@
+"""
+启动基准
+数据库迁移耗时，以及真实服务进程从启动到处理第一个请求/就绪的时间
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional
+
+from .harness import latency, result, quiet
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 等待服务进程响应的最长时间（秒）
+SERVE_TIMEOUT = 30.0
+
+SERVER_SCRIPT = '''
+import sys
+sys.path.insert(0, {root!r})
+import app
+app.serve('127.0.0.1', {port}, debug=False, use_reloader=False, log_output=False)
+'''
+
+
+def _stores(directory: str) -> List:
+    with quiet():
+        from database import PokerDatabase
+        from game_logger import GameLogger
+        from player_persistence import PlayerPersistence
+        from table_state_manager import TableStateManager
+        from chip_ledger import ChipLedger
+    return [
+        PokerDatabase(os.path.join(directory, 'poker_game.db')),
+        GameLogger(os.path.join(directory, 'game_logs.db')),
+        PlayerPersistence(os.path.join(directory, 'players.db')),
+        TableStateManager(os.path.join(directory, 'table_states.db')),
+        ChipLedger(os.path.join(directory, 'chip_ledger.db'))
+    ]
+
+
+def _migrate_all(directory: str):
+    for store in _stores(directory):
+        store.init_database()
+
+
+def bench_migrations(quick: bool) -> List[Dict]:
+    """全部存储在新数据库上执行全部迁移，以及已是最新版本时的耗时"""
+    count = 5 if quick else 20
+    with tempfile.TemporaryDirectory() as root:
+        directories = [os.path.join(root, str(i)) for i in range(count)]
+        for directory in directories:
+            os.makedirs(directory)
+        fresh = latency('startup.migrations.fresh', [lambda d=d: _migrate_all(d) for d in directories])
+        up_to_date = latency('startup.migrations.up_to_date',
+                             [lambda d=d: _migrate_all(d) for d in directories])
+    return [fresh, up_to_date]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(url: str, deadline: float, status: int = 200) -> Optional[float]:
+    """轮询直到返回指定状态码，返回此时的 perf_counter"""
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == status:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.01)
+    return None
+
+
+def _serve_once(directory: str) -> Optional[Dict[str, float]]:
+    """在空目录（全新数据库）中启动服务进程，测量到第一个成功请求和到就绪的时间"""
+    port = _free_port()
+    script = SERVER_SCRIPT.format(root=ROOT, port=port)
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', script], cwd=directory,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = start + SERVE_TIMEOUT
+        first = _wait_for(f'http://127.0.0.1:{port}/api/stats', deadline)
+        ready = _wait_for(f'http://127.0.0.1:{port}/readyz', deadline) if first else None
+        if first is None or ready is None:
+            return None
+        return {'first_request': first - start, 'ready': ready - start}
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def bench_cold_start(quick: bool) -> List[Dict]:
+    """服务进程的冷启动：到第一个请求成功（有目标上限）和到 /readyz 返回200"""
+    from startup import startup
+
+    count = 2 if quick else 5
+    first_samples, ready_samples = [], []
+    with tempfile.TemporaryDirectory() as root:
+        for i in range(count):
+            directory = os.path.join(root, str(i))
+            os.makedirs(directory)
+            timings = _serve_once(directory)
+            if timings is None:
+                print(f"⚠️ 服务进程 {SERVE_TIMEOUT:.0f} 秒内没有响应")
+                continue
+            first_samples.append(timings['first_request'])
+            ready_samples.append(timings['ready'])
+
+    if not first_samples:
+        return []
+    return [
+        result('startup.time_to_first_request', first_samples, 'ms', target=startup.target * 1000),
+        result('startup.time_to_ready', ready_samples, 'ms')
+    ]
+
+
+def bench_startup(quick: bool) -> List[Dict]:
+    return bench_migrations(quick) + bench_cold_start(quick)
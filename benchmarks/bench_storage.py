@@ -0,0 +1,36 @@
+"""
+存储基准
+GameLogger 写入吞吐（临时数据库）
+"""
+
+import os
+import tempfile
+from typing import Dict, List
+
+from .harness import throughput, quiet
+
+
+def bench_game_logger(quick: bool) -> List[Dict]:
+    """GameLogger 每次写入一行（各自开连接、提交）的吞吐"""
+    with quiet():
+        from game_logger import GameLogger
+
+    number, repeat = (50, 3) if quick else (200, 5)
+    with tempfile.TemporaryDirectory() as directory:
+        with quiet():
+            logger = GameLogger(os.path.join(directory, 'bench_logs.db'))
+            session_id = logger.start_game_session('bench', 'bench', 6, 6)
+            hand_id = logger.start_hand(session_id, 1, 'bench')
+
+        return [
+            throughput('storage.game_logger.log_player_action',
+                       lambda: logger.log_player_action(hand_id, 'bench_0', 'bench', 'raise', 40, 'flop',
+                                                        chips_before=1000, chips_after=960),
+                       number, repeat),
+            throughput('storage.game_logger.log_game_event',
+                       lambda: logger.log_game_event('bench', 'player_action', {'amount': 40}),
+                       number, repeat),
+            throughput('storage.game_logger.start_hand',
+                       lambda: logger.start_hand(session_id, 2, 'bench'),
+                       number, repeat)
+        ]
@@ -0,0 +1,57 @@
+"""
+锦标赛基准
+1000名机器人的多桌锦标赛无头模拟，以及112张桌的平衡规划
+"""
+
+import time
+from typing import Dict, List
+
+from poker_engine import Bot, BotLevel
+from poker_engine.rng import set_seed_override
+from poker_engine.tournament import Tournament
+
+from .harness import result, throughput, quiet
+
+
+SEED = 20240701
+ENTRANTS = 1000
+
+
+def _tournament(entrants: int) -> Tournament:
+    tournament = Tournament('bench')
+    for i in range(entrants):
+        tournament.register(Bot(f'bench_{i}', f'bench_{i}', 0, BotLevel.BEGINNER))
+    return tournament
+
+
+def bench_tournament(quick: bool) -> List[Dict]:
+    """
+    从开赛到决出冠军的总耗时和每秒手牌数（初级机器人，9人桌，每桌平均10手升一级盲注），
+    以及开赛后整个赛场的一次平衡规划
+    """
+    runs = 1 if quick else 3
+    durations, rates = [], []
+    summary = {}
+    for run in range(runs):
+        set_seed_override(SEED + run)
+        tournament = _tournament(ENTRANTS)
+        with quiet():
+            start = time.perf_counter()
+            summary = tournament.run_headless()
+            elapsed = time.perf_counter() - start
+        durations.append(elapsed)
+        rates.append(elapsed / summary['hands_played'])
+
+    print(f"   {summary['hands_played']} 手牌，移动 {summary['moves']} 次，拆桌 {summary['tables_broken']} 张，"
+          f"结束时盲注 {summary['blinds'][0]}/{summary['blinds'][1]}")
+
+    set_seed_override(SEED)
+    field = _tournament(ENTRANTS)
+    with quiet():
+        field.start()
+    number, repeat = (200, 3) if quick else (1000, 5)
+    return [
+        result(f'tournament.headless.{ENTRANTS}_players', durations, 'ms'),
+        result(f'tournament.headless.{ENTRANTS}_players.hands', rates, 'ops/s', higher_is_better=True),
+        throughput(f'tournament.rebalance.{len(field.tables)}_tables', field.rebalance, number, repeat)
+    ]
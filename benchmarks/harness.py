@@ -0,0 +1,182 @@
+"""
+基准测试工具
+计时、机器信息、结果文件读写和与基线的对比
+"""
+
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+
+# 结果文件格式版本
+RESULT_VERSION = 1
+# 默认认定为性能回退的变化比例
+DEFAULT_THRESHOLD = 0.15
+
+
+@contextlib.contextmanager
+def quiet():
+    """屏蔽被测代码的调试输出（格式化的开销仍然计入）"""
+    with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+        yield
+
+
+def result(name: str, samples: List[float], unit: str, higher_is_better: bool = False,
+           per_sample: int = 1, target: Optional[float] = None) -> Dict:
+    """
+    把一组样本整理为一条结果
+
+    Args:
+        name: 基准名称（用点号分组，如 evaluator.evaluate_hand.7_cards）
+        samples: 每个样本的耗时（秒）
+        unit: 'ms'（延迟，越低越好）或 'ops/s'（吞吐，越高越好）
+        higher_is_better: 数值是否越高越好
+        per_sample: 每个样本包含的操作数（吞吐计算用）
+        target: 绝对目标值（与 value 同单位），超过时不论基线如何都算失败
+    """
+    ordered = sorted(samples)
+    if unit == 'ops/s':
+        values = [per_sample / s for s in ordered if s > 0]
+        value = per_sample * len(ordered) / sum(ordered) if sum(ordered) > 0 else 0.0
+    else:
+        values = [s * 1000 for s in ordered]
+        value = statistics.median(values)
+    values.sort()
+    entry = {
+        'name': name,
+        'unit': unit,
+        'value': round(value, 4),
+        'higher_is_better': higher_is_better,
+        'samples': len(samples),
+        'min': round(values[0], 4),
+        'median': round(statistics.median(values), 4),
+        'p95': round(values[min(len(values) - 1, int(len(values) * 0.95))], 4),
+        'max': round(values[-1], 4)
+    }
+    if target is not None:
+        entry['target'] = target
+    return entry
+
+
+def missed_target(entry: Dict) -> bool:
+    """结果是否没有达到目标"""
+    target = entry.get('target')
+    if target is None:
+        return False
+    return entry['value'] < target if entry.get('higher_is_better') else entry['value'] > target
+
+
+def latency(name: str, calls: List[Callable[[], object]]) -> Dict:
+    """逐个计时（每个调用一个独立的场景），结果为毫秒延迟"""
+    samples = []
+    with quiet():
+        for call in calls:
+            start = time.perf_counter()
+            call()
+            samples.append(time.perf_counter() - start)
+    return result(name, samples, 'ms')
+
+
+def throughput(name: str, fn: Callable[[], object], number: int, repeat: int = 5) -> Dict:
+    """重复执行 repeat 轮、每轮 number 次，结果为每秒操作数"""
+    samples = []
+    with quiet():
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            samples.append(time.perf_counter() - start)
+    return result(name, samples, 'ops/s', higher_is_better=True, per_sample=number)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5, check=True).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def machine_info() -> Dict:
+    """运行环境信息，对比不同机器上的结果时参考"""
+    info = {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor() or None,
+        'cpu_count': os.cpu_count(),
+        'git_revision': _git_revision()
+    }
+    try:
+        import numpy
+        info['numpy'] = numpy.__version__
+    except ImportError:  # NumPy是可选依赖
+        info['numpy'] = None
+    return info
+
+
+def write_results(path: str, results: List[Dict], quick: bool):
+    payload = {
+        'version': RESULT_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'quick': quick,
+        'machine': machine_info(),
+        'results': results
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+
+
+def load_results(path: str) -> Dict[str, Dict]:
+    with open(path, encoding='utf-8') as f:
+        payload = json.load(f)
+    return {entry['name']: entry for entry in payload.get('results', [])}
+
+
+def compare(baseline: Dict[str, Dict], current: Dict[str, Dict],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    对比两次结果
+
+    Returns:
+        List[Dict]: 每个共同基准的变化，change 为正表示变好；status 为 regression/improvement/ok
+    """
+    rows = []
+    for name, now in current.items():
+        before = baseline.get(name)
+        if before is None or not before.get('value'):
+            continue
+        ratio = now['value'] / before['value']
+        change = ratio - 1 if now.get('higher_is_better') else 1 - ratio
+        if change < -threshold:
+            status = 'regression'
+        elif change > threshold:
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append({'name': name, 'unit': now['unit'], 'baseline': before['value'],
+                     'current': now['value'], 'change': round(change, 4), 'status': status})
+    return rows
+
+
+def print_results(results: List[Dict]):
+    width = max((len(r['name']) for r in results), default=10)
+    for r in results:
+        target = f", 目标 {r['target']:.3f}" if 'target' in r else ''
+        print(f"  {r['name']:<{width}}  {r['value']:>12.3f} {r['unit']:<6} "
+              f"(min {r['min']:.3f}, max {r['max']:.3f}, n={r['samples']}{target})")
+
+
+def print_comparison(rows: List[Dict]):
+    marks = {'regression': '❌', 'improvement': '🚀', 'ok': '  '}
+    width = max((len(r['name']) for r in rows), default=10)
+    for r in rows:
+        print(f"{marks[r['status']]} {r['name']:<{width}}  {r['baseline']:>12.3f} -> {r['current']:>12.3f} "
+              f"{r['unit']:<6} {r['change'] * 100:+.1f}%")
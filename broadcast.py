@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+广播批处理
+处理一条命令期间产生的房间事件和私有事件先缓存，命令结束时每个客户端只收到一个有序的 frame
+"""
+
+import contextvars
+import functools
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from tracing import tracer
+from wire_protocol import PROTOCOL_LEGACY, encode_frame, pack_frame, payload_size, wire_stats
+
+
+# 同一帧内只保留最后一次的事件（完整状态快照，旧的会被新的覆盖）
+COALESCED_EVENTS = {'table_updated'}
+
+# 旧协议客户端
+LEGACY_WIRE = (PROTOCOL_LEGACY, False)
+
+
+def wire_room(room: str, wire: Tuple[int, bool]) -> str:
+    """牌桌房间中使用同一种新协议格式的成员组成的房间，例如 table:v2、table:v2bin"""
+    return f"{room}:v{wire[0]}{'bin' if wire[1] else ''}"
+
+# 当前协程/线程正在收集的批次
+_current_batch: contextvars.ContextVar = contextvars.ContextVar('frame_batch', default=None)
+
+
+class _Batch:
+    """一次命令处理期间收集的事件"""
+
+    def __init__(self):
+        self.depth = 0
+        # (事件名, 数据, 目标, 排除的sid集合)
+        self.events: List[Tuple[str, Any, str, Set[str]]] = []
+
+
+class FrameBatcher:
+    """按命令合并广播的批处理器"""
+
+    def __init__(self, socketio, room_members: Callable[[str], Iterable[str]],
+                 is_room: Callable[[str], bool], is_session: Callable[[str], bool],
+                 wire_of: Callable[[str], Tuple[int, bool]] = lambda sid: LEGACY_WIRE,
+                 hand_of: Callable[[str], Optional[int]] = lambda room: None):
+        """
+        Args:
+            socketio: SocketIO实例
+            room_members: 返回房间内会话ID的函数
+            is_room: 判断目标是否为可批处理的牌桌房间
+            is_session: 判断目标是否为单个会话
+            wire_of: 返回会话协商的 (协议版本, 是否二进制)
+            hand_of: 返回房间当前的手牌编号（用于按手牌统计帧大小）
+        """
+        self.socketio = socketio
+        self.room_members = room_members
+        self.is_room = is_room
+        self.is_session = is_session
+        self.wire_of = wire_of
+        self.hand_of = hand_of
+
+        # 牌桌房间 -> {协议: 已加入对应协议房间的会话}（flush时按房间成员同步）
+        self.wire_members: Dict[str, Dict[Tuple[int, bool], Set[str]]] = {}
+
+        self.frames_sent = 0
+        self.events_batched = 0
+        self.events_coalesced = 0
+
+    def emit(self, event: str, data: Any = None, room: Optional[str] = None, skip_sid: Optional[str] = None):
+        """发送事件：批次进行中且目标是牌桌房间或会话时缓存，否则立即发送"""
+        batch = _current_batch.get()
+        if batch is None or room is None or not (self.is_room(room) or self.is_session(room)):
+            self.socketio.emit(event, data, room=room, skip_sid=skip_sid)
+            return
+
+        batch.events.append((event, data, room, {skip_sid} if skip_sid else set()))
+        self.events_batched += 1
+
+    def batched(self, func: Callable) -> Callable:
+        """装饰器：函数执行期间的事件合并为frame，最外层结束时发送（支持嵌套）"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            batch = _current_batch.get()
+            token = None
+            if batch is None:
+                batch = _Batch()
+                token = _current_batch.set(batch)
+            batch.depth += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                batch.depth -= 1
+                if batch.depth == 0:
+                    _current_batch.reset(token)
+                    if batch.events:
+                        with tracer.child_span('broadcast flush', {'events': len(batch.events)}):
+                            self.flush(batch)
+        return wrapper
+
+    def flush(self, batch: _Batch):
+        """把批次拆成房间共享frame和个别会话frame发送"""
+        if not batch.events:
+            return
+
+        # 每个房间的成员
+        members: Dict[str, Set[str]] = {}
+        for _, _, target, _ in batch.events:
+            if target not in members and self.is_room(target):
+                members[target] = set(self.room_members(target))
+
+        # 需要单独frame的会话：收到私有事件的，或被某个房间事件排除的
+        special: Set[str] = set()
+        for _, _, target, skipped in batch.events:
+            if target not in members:
+                special.add(target)
+            special |= skipped
+
+        # 按手牌统计时归到本批次的第一个牌桌
+        stats_room = next(iter(members), None)
+
+        # 房间共享frame：旧协议的普通成员共用一次房间广播，
+        # 新协议成员按格式加入各自的协议房间，每种格式编码一次、广播一次
+        for room, room_members in members.items():
+            events = [(name, data) for name, data, target, _ in batch.events if target == room]
+            if not events:
+                continue
+
+            by_wire: Dict[Tuple[int, bool], Set[str]] = {}
+            for sid in room_members:
+                wire = self.wire_of(sid)
+                if wire != LEGACY_WIRE:
+                    by_wire.setdefault(wire, set()).add(sid)
+            self._sync_wire_rooms(room, by_wire)
+
+            skip = [sid for sid in room_members if sid in special or self.wire_of(sid) != LEGACY_WIRE]
+            self._send(events, [room], LEGACY_WIRE, stats_room, skip_sid=skip or None)
+            for wire, sids in by_wire.items():
+                skip = [sid for sid in sids if sid in special]
+                if len(skip) < len(sids):
+                    self._send(events, [wire_room(room, wire)], wire, stats_room, skip_sid=skip or None)
+
+        # 个别会话frame：按原顺序合并其所在房间的事件和私有事件
+        for sid in special:
+            events = [
+                (name, data) for name, data, target, skipped in batch.events
+                if sid not in skipped and (target == sid or sid in members.get(target, ()))
+            ]
+            if events:
+                self._send(events, [sid], self.wire_of(sid), stats_room)
+
+    def _sync_wire_rooms(self, room: str, by_wire: Dict[Tuple[int, bool], Set[str]]):
+        """让各协议房间的成员与牌桌房间当前的新协议成员一致（离开牌桌或改协议的会话退出）"""
+        joined = self.wire_members.setdefault(room, {})
+        for wire in set(by_wire) | set(joined):
+            target = by_wire.get(wire, set())
+            current = joined.get(wire, set())
+            if target == current:
+                continue
+            name = wire_room(room, wire)
+            for sid in target - current:
+                try:
+                    self.socketio.server.enter_room(sid, name, namespace='/')
+                except (KeyError, ValueError):
+                    # 会话已断开
+                    target = target - {sid}
+            for sid in current - target:
+                self.socketio.server.leave_room(sid, name, namespace='/')
+            if target:
+                joined[wire] = set(target)
+            else:
+                joined.pop(wire, None)
+        if not joined:
+            del self.wire_members[room]
+
+    def drop_room(self, room: str):
+        """牌桌关闭时清理协议房间"""
+        for wire, sids in self.wire_members.pop(room, {}).items():
+            for sid in sids:
+                self.socketio.server.leave_room(sid, wire_room(room, wire), namespace='/')
+
+    def _send(self, events: List[Tuple[str, Any]], targets: List[str], wire: Tuple[int, bool],
+              stats_room: Optional[str], skip_sid=None):
+        """合并覆盖型事件，按协议编码一次后发送给各目标"""
+        last_index = {name: i for i, (name, _) in enumerate(events) if name in COALESCED_EVENTS}
+        frame = [[name, data] for i, (name, data) in enumerate(events)
+                 if name not in last_index or last_index[name] == i]
+        self.events_coalesced += len(events) - len(frame)
+
+        event_name, payload = 'frame', {'events': frame}
+        if wire[0] != PROTOCOL_LEGACY:
+            payload = encode_frame(frame)
+            packed = pack_frame(payload) if wire[1] else None
+            if packed is not None:
+                event_name, payload = 'frame_bin', packed
+
+        if wire_stats.should_sample():
+            label = 'v1' if wire[0] == PROTOCOL_LEGACY else f"v{wire[0]}" + ('+msgpack' if event_name == 'frame_bin' else '')
+            legacy_bytes = payload_size({'events': frame})
+            wire_bytes = legacy_bytes if wire[0] == PROTOCOL_LEGACY else payload_size(payload)
+            hand_number = self.hand_of(stats_room) if stats_room else None
+            for _ in targets:
+                wire_stats.record(stats_room, hand_number, label, wire_bytes, legacy_bytes)
+
+        for target in targets:
+            self.socketio.emit(event_name, payload, room=target, skip_sid=skip_sid)
+            self.frames_sent += 1
+
+    def stats(self) -> Dict:
+        """批处理统计"""
+        return {
+            'frames_sent': self.frames_sent,
+            'events_batched': self.events_batched,
+            'events_coalesced': self.events_coalesced
+        }
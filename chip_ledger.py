@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+筹码账本
+只追加的筹码流水账本，定期生成余额快照，内存中维护当前余额
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from metrics import metrics
+from migrations import Migration, LazySchema
+
+# 机器人共用的账户：机器人每次创建都是新的uuid，单独开户会让账户无限增长，
+# 它们的筹码流水记在这个账户下（一手牌的下注和派奖仍然相互抵消）
+BOT_ACCOUNT = '__bots__'
+
+
+def _create_tables(cursor):
+    """版本1：筹码流水表和余额快照表"""
+    # 筹码流水表（只追加，不更新）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ledger_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            player_id TEXT NOT NULL,
+            table_id TEXT,
+            hand_number INTEGER,
+            entry_type TEXT NOT NULL,
+            delta INTEGER NOT NULL,
+            created_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_ledger_player ON ledger_entries(player_id, id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_ledger_hand ON ledger_entries(table_id, hand_number)')
+
+    # 余额快照表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS balance_snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            last_entry_id INTEGER NOT NULL,
+            player_count INTEGER NOT NULL,
+            created_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS snapshot_balances (
+            snapshot_id INTEGER NOT NULL,
+            player_id TEXT NOT NULL,
+            balance INTEGER NOT NULL,
+            PRIMARY KEY (snapshot_id, player_id),
+            FOREIGN KEY (snapshot_id) REFERENCES balance_snapshots (id)
+        )
+    ''')
+
+
+MIGRATIONS = [
+    Migration(1, '创建筹码流水和余额快照表', _create_tables),
+]
+
+
+class ChipLedger:
+    """只追加的筹码账本"""
+
+    def __init__(self, db_path: str = 'chip_ledger.db', snapshot_interval: int = 1000):
+        """
+        初始化账本
+
+        Args:
+            db_path: 数据库路径
+            snapshot_interval: 每追加多少条流水生成一次余额快照
+        """
+        self.db_path = db_path
+        self.snapshot_interval = snapshot_interval
+        self.lock = threading.Lock()
+
+        # 内存中的当前余额 player_id -> chips
+        self.balances: Dict[str, int] = {}
+        self.last_entry_id = 0
+        self.entries_since_snapshot = 0
+
+        # 第一次使用时才执行迁移和重建余额
+        self.schema = LazySchema('chip_ledger', db_path, MIGRATIONS, on_ready=self._load)
+
+    def get_connection(self) -> sqlite3.Connection:
+        """获取数据库连接"""
+        self.schema.ensure()
+        return sqlite3.connect(self.db_path)
+
+    def init_database(self):
+        """执行待处理的迁移并载入余额"""
+        self.schema.ensure()
+
+    def _load(self):
+        """迁移完成后：开启WAL并从快照和流水重建内存余额"""
+        conn = sqlite3.connect(self.db_path)
+        # WAL模式下追加写入是顺序写（不能在事务中切换，所以不放在迁移里）
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.close()
+        self.rebuild_balances()
+
+    def rebuild_balances(self):
+        """从最近一次快照和其后的流水重建内存余额"""
+        with self.lock:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+
+            balances: Dict[str, int] = {}
+            snapshot_entry_id = 0
+
+            cursor.execute('''
+                SELECT id, last_entry_id FROM balance_snapshots
+                ORDER BY id DESC LIMIT 1
+            ''')
+            snapshot = cursor.fetchone()
+            if snapshot:
+                snapshot_id, snapshot_entry_id = snapshot
+                cursor.execute('''
+                    SELECT player_id, balance FROM snapshot_balances WHERE snapshot_id = ?
+                ''', (snapshot_id,))
+                balances.update(cursor.fetchall())
+
+            # 重放快照之后的流水
+            cursor.execute('''
+                SELECT player_id, SUM(delta), COUNT(*), MAX(id)
+                FROM ledger_entries WHERE id > ?
+                GROUP BY player_id
+            ''', (snapshot_entry_id,))
+
+            tail_entries = 0
+            last_entry_id = snapshot_entry_id
+            for player_id, delta, count, max_id in cursor.fetchall():
+                balances[player_id] = balances.get(player_id, 0) + delta
+                tail_entries += count
+                last_entry_id = max(last_entry_id, max_id)
+
+            conn.close()
+
+            self.balances = balances
+            self.last_entry_id = last_entry_id
+            self.entries_since_snapshot = tail_entries
+
+        print(f"📒 账本余额已重建: {len(self.balances)} 个账户, 快照后流水 {tail_entries} 条")
+
+    def get_balance(self, player_id: str, default: Optional[int] = None) -> Optional[int]:
+        """获取玩家当前余额（内存读取）"""
+        self.schema.ensure()
+        return self.balances.get(player_id, default)
+
+    def has_account(self, player_id: str) -> bool:
+        """玩家是否已有账户"""
+        self.schema.ensure()
+        return player_id in self.balances
+
+    @metrics.timed_write('chip_ledger')
+    def open_account(self, player_id: str, opening_balance: int) -> int:
+        """
+        为玩家开户，已有账户时直接返回当前余额
+
+        Returns:
+            int: 玩家当前余额
+        """
+        self.schema.ensure()
+        with self.lock:
+            if player_id in self.balances:
+                return self.balances[player_id]
+            self._append_entries([(player_id, None, None, 'open', opening_balance)])
+            return self.balances[player_id]
+
+    @metrics.timed_write('chip_ledger')
+    def record_hand(self, table_id: str, hand_number: int,
+                    movements: List[Tuple[str, str, int]],
+                    final_chips: Optional[Dict[str, int]] = None,
+                    bot_ids: Optional[Set[str]] = None) -> int:
+        """
+        批量写入一手牌的筹码流水
+
+        Args:
+            table_id: 牌桌ID
+            hand_number: 手牌编号
+            movements: 筹码流水 [(player_id, entry_type, delta)]
+            final_chips: 手牌结束后玩家的实际筹码，用于开户和对账
+            bot_ids: 机器人ID，它们的流水记到 BOT_ACCOUNT，不开户也不对账
+
+        Returns:
+            int: 写入的流水条数
+        """
+        self.schema.ensure()
+        if bot_ids:
+            movements = [(BOT_ACCOUNT if player_id in bot_ids else player_id, entry_type, delta)
+                         for player_id, entry_type, delta in movements]
+            final_chips = {player_id: chips for player_id, chips in (final_chips or {}).items()
+                           if player_id not in bot_ids}
+        with self.lock:
+            entries = []
+            hand_deltas: Dict[str, int] = {}
+            for player_id, entry_type, delta in movements:
+                hand_deltas[player_id] = hand_deltas.get(player_id, 0) + delta
+
+            # 新玩家：用手牌前的筹码开户
+            for player_id, chips in (final_chips or {}).items():
+                if player_id not in self.balances:
+                    opening = chips - hand_deltas.get(player_id, 0)
+                    entries.append((player_id, table_id, hand_number, 'open', opening))
+
+            for player_id, entry_type, delta in movements:
+                entries.append((player_id, table_id, hand_number, entry_type, delta))
+
+            # 对账：账本余额与实际筹码不一致时追加调整流水
+            for player_id, chips in (final_chips or {}).items():
+                if player_id not in self.balances:
+                    continue
+                expected = self.balances[player_id] + hand_deltas.get(player_id, 0)
+                if expected != chips:
+                    entries.append((player_id, table_id, hand_number, 'adjust', chips - expected))
+
+            if not entries:
+                return 0
+
+            self._append_entries(entries)
+
+        print(f"📒 账本记录: 牌桌 {table_id} 手牌#{hand_number}, {len(entries)} 条流水")
+        return len(entries)
+
+    def _append_entries(self, entries: List[Tuple[str, Optional[str], Optional[int], str, int]]):
+        """批量追加流水并更新内存余额（调用方需持有锁）"""
+        current_time = time.time()
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        cursor.executemany('''
+            INSERT INTO ledger_entries (player_id, table_id, hand_number, entry_type, delta, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [entry + (current_time,) for entry in entries])
+        cursor.execute('SELECT last_insert_rowid()')
+        last_entry_id = cursor.fetchone()[0]
+
+        conn.commit()
+        conn.close()
+
+        for player_id, _, _, _, delta in entries:
+            self.balances[player_id] = self.balances.get(player_id, 0) + delta
+        self.last_entry_id = last_entry_id
+        self.entries_since_snapshot += len(entries)
+
+        if self.entries_since_snapshot >= self.snapshot_interval:
+            self._write_snapshot()
+
+    @metrics.timed_write('chip_ledger')
+    def _write_snapshot(self):
+        """把当前内存余额物化为快照，并删除更早的快照（重建只用最近一次，调用方需持有锁）"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            INSERT INTO balance_snapshots (last_entry_id, player_count, created_at)
+            VALUES (?, ?, ?)
+        ''', (self.last_entry_id, len(self.balances), time.time()))
+        snapshot_id = cursor.lastrowid
+
+        cursor.executemany('''
+            INSERT INTO snapshot_balances (snapshot_id, player_id, balance)
+            VALUES (?, ?, ?)
+        ''', [(snapshot_id, player_id, balance) for player_id, balance in self.balances.items()])
+
+        cursor.execute('DELETE FROM snapshot_balances WHERE snapshot_id < ?', (snapshot_id,))
+        cursor.execute('DELETE FROM balance_snapshots WHERE id < ?', (snapshot_id,))
+
+        conn.commit()
+        conn.close()
+
+        self.entries_since_snapshot = 0
+        print(f"📸 余额快照 #{snapshot_id}: {len(self.balances)} 个账户, 截至流水 {self.last_entry_id}")
+
+    def snapshot(self):
+        """立即生成余额快照"""
+        self.schema.ensure()
+        with self.lock:
+            self._write_snapshot()
+
+    def get_player_entries(self, player_id: str, limit: int = 50) -> List[Dict]:
+        """获取玩家最近的筹码流水（审计用）"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT id, table_id, hand_number, entry_type, delta, created_at
+            FROM ledger_entries
+            WHERE player_id = ?
+            ORDER BY id DESC
+            LIMIT ?
+        ''', (player_id, limit))
+
+        columns = ['id', 'table_id', 'hand_number', 'entry_type', 'delta', 'created_at']
+        entries = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        conn.close()
+        return entries
+
+    def audit_hand(self, table_id: str, hand_number: int) -> Dict:
+        """审计一手牌：下注与派奖应当相互抵消"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT player_id, entry_type, delta
+            FROM ledger_entries
+            WHERE table_id = ? AND hand_number = ?
+            ORDER BY id
+        ''', (table_id, hand_number))
+        rows = cursor.fetchall()
+        conn.close()
+
+        entries = [{'player_id': r[0], 'entry_type': r[1], 'delta': r[2]} for r in rows]
+        pot_flow = sum(e['delta'] for e in entries if e['entry_type'] not in ('open', 'adjust'))
+
+        return {
+            'table_id': table_id,
+            'hand_number': hand_number,
+            'entries': entries,
+            'balanced': pot_flow == 0
+        }
+
+
+# 全局账本实例
+chip_ledger = ChipLedger()
+
+def record_hand_chips(table_id: str, hand_number: int, movements: List[Tuple[str, str, int]],
+                      final_chips: Optional[Dict[str, int]] = None,
+                      bot_ids: Optional[Set[str]] = None) -> int:
+    """记录一手牌的筹码流水"""
+    return chip_ledger.record_hand(table_id, hand_number, movements, final_chips, bot_ids)
+
+def get_chip_balance(player_id: str, default: Optional[int] = None) -> Optional[int]:
+    """获取玩家当前余额"""
+    return chip_ledger.get_balance(player_id, default)
+
+def open_chip_account(player_id: str, opening_balance: int) -> int:
+    """为玩家开户并返回当前余额"""
+    return chip_ledger.open_account(player_id, opening_balance)
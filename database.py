@@ -5,16 +5,118 @@ import json
 from typing import Optional, Dict, List, Any
 import threading
 from contextlib import contextmanager
+from user_cache import UserCache
+from metrics import metrics
+from migrations import Migration, LazySchema, add_column
+
+
+def _create_tables(cursor):
+    """版本1：用户、房间和房间玩家关系表"""
+    # 用户表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id TEXT PRIMARY KEY,
+            nickname TEXT NOT NULL,
+            chips INTEGER DEFAULT 1000,
+            games_played INTEGER DEFAULT 0,
+            games_won INTEGER DEFAULT 0,
+            total_winnings INTEGER DEFAULT 0,
+            is_bot BOOLEAN DEFAULT 0,
+            bot_level TEXT,
+            created_at REAL NOT NULL,
+            last_active REAL NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_nickname ON users(nickname)')
+
+    # 房间表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tables (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            small_blind INTEGER NOT NULL,
+            big_blind INTEGER NOT NULL,
+            max_players INTEGER NOT NULL,
+            initial_chips INTEGER NOT NULL,
+            game_mode TEXT NOT NULL DEFAULT 'blinds',
+            ante_percentage REAL DEFAULT 0.02,
+            game_stage TEXT NOT NULL DEFAULT 'waiting',
+            hand_number INTEGER DEFAULT 0,
+            pot INTEGER DEFAULT 0,
+            current_bet INTEGER DEFAULT 0,
+            current_player_id TEXT,
+            community_cards TEXT DEFAULT '[]',
+            created_by TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_activity REAL NOT NULL,
+            is_active BOOLEAN DEFAULT 1,
+            human_count INTEGER DEFAULT 0,
+            bot_count INTEGER DEFAULT 0,
+            FOREIGN KEY (created_by) REFERENCES users (id),
+            FOREIGN KEY (current_player_id) REFERENCES users (id)
+        )
+    ''')
+
+    # 房间玩家关系表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_players (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_id TEXT NOT NULL,
+            player_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            chips INTEGER NOT NULL,
+            current_bet INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'waiting',
+            hole_cards TEXT DEFAULT '[]',
+            has_acted BOOLEAN DEFAULT 0,
+            is_bot BOOLEAN DEFAULT 0,
+            bot_level TEXT,
+            joined_at REAL NOT NULL,
+            FOREIGN KEY (table_id) REFERENCES tables (id),
+            FOREIGN KEY (player_id) REFERENCES users (id),
+            UNIQUE(table_id, player_id),
+            UNIQUE(table_id, position)
+        )
+    ''')
+
+
+def _add_seat_counts(cursor):
+    """版本2：旧数据库补上机器人标记和房间人数计数列，并按现有座位回填一次"""
+    add_column(cursor, 'users', 'is_bot', 'BOOLEAN DEFAULT 0')
+    add_column(cursor, 'users', 'bot_level', 'TEXT')
+    added_human = add_column(cursor, 'tables', 'human_count', 'INTEGER DEFAULT 0')
+    added_bot = add_column(cursor, 'tables', 'bot_count', 'INTEGER DEFAULT 0')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tables_active_humans ON tables(is_active, human_count)')
+
+    if added_human or added_bot:
+        cursor.execute('''
+            UPDATE tables SET
+                human_count = (SELECT COUNT(*) FROM table_players tp
+                               WHERE tp.table_id = tables.id AND tp.is_bot = 0),
+                bot_count = (SELECT COUNT(*) FROM table_players tp
+                             WHERE tp.table_id = tables.id AND tp.is_bot = 1)
+        ''')
+        print("回填房间人数计数")
+
+
+MIGRATIONS = [
+    Migration(1, '创建用户、房间和房间玩家表', _create_tables),
+    Migration(2, '机器人标记和房间人数计数列', _add_seat_counts),
+]
+
 
 class PokerDatabase:
     def __init__(self, db_path: str = 'poker_game.db'):
         self.db_path = db_path
         self.lock = threading.Lock()
-        self.init_database()
+        self.user_cache = UserCache()
+        # 第一次访问数据库时才执行迁移
+        self.schema = LazySchema('poker_game', db_path, MIGRATIONS)
     
     @contextmanager
     def get_connection(self):
         """获取数据库连接的上下文管理器"""
+        self.schema.ensure()
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         try:
@@ -23,97 +125,18 @@ class PokerDatabase:
             conn.close()
     
     def init_database(self):
-        """初始化数据库表"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # 用户表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id TEXT PRIMARY KEY,
-                    nickname TEXT NOT NULL,
-                    chips INTEGER DEFAULT 1000,
-                    games_played INTEGER DEFAULT 0,
-                    games_won INTEGER DEFAULT 0,
-                    total_winnings INTEGER DEFAULT 0,
-                    created_at REAL NOT NULL,
-                    last_active REAL NOT NULL
-                )
-            ''')
-            
-            # 房间表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS tables (
-                    id TEXT PRIMARY KEY,
-                    title TEXT NOT NULL,
-                    small_blind INTEGER NOT NULL,
-                    big_blind INTEGER NOT NULL,
-                    max_players INTEGER NOT NULL,
-                    initial_chips INTEGER NOT NULL,
-                    game_mode TEXT NOT NULL DEFAULT 'blinds',
-                    ante_percentage REAL DEFAULT 0.02,
-                    game_stage TEXT NOT NULL DEFAULT 'waiting',
-                    hand_number INTEGER DEFAULT 0,
-                    pot INTEGER DEFAULT 0,
-                    current_bet INTEGER DEFAULT 0,
-                    current_player_id TEXT,
-                    community_cards TEXT DEFAULT '[]',
-                    created_by TEXT NOT NULL,
-                    created_at REAL NOT NULL,
-                    last_activity REAL NOT NULL,
-                    is_active BOOLEAN DEFAULT 1,
-                    FOREIGN KEY (created_by) REFERENCES users (id),
-                    FOREIGN KEY (current_player_id) REFERENCES users (id)
-                )
-            ''')
-            
-            # 房间玩家关系表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS table_players (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    table_id TEXT NOT NULL,
-                    player_id TEXT NOT NULL,
-                    position INTEGER NOT NULL,
-                    chips INTEGER NOT NULL,
-                    current_bet INTEGER DEFAULT 0,
-                    status TEXT DEFAULT 'waiting',
-                    hole_cards TEXT DEFAULT '[]',
-                    has_acted BOOLEAN DEFAULT 0,
-                    is_bot BOOLEAN DEFAULT 0,
-                    bot_level TEXT,
-                    joined_at REAL NOT NULL,
-                    FOREIGN KEY (table_id) REFERENCES tables (id),
-                    FOREIGN KEY (player_id) REFERENCES users (id),
-                    UNIQUE(table_id, player_id),
-                    UNIQUE(table_id, position)
-                )
-            ''')
-            
-            conn.commit()
-            print("数据库初始化完成")
+        """执行待处理的迁移"""
+        self.schema.ensure()
     
-    def create_user(self, nickname: str) -> str:
-        """创建新用户，返回用户ID"""
+    @metrics.timed_write('poker_game')
+    def create_user(self, nickname: str, separator: str = '_') -> str:
+        """创建新用户，昵称已被占用时按 separator 追加编号，返回用户ID"""
         with self.lock:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 
-                # 检查昵称是否已存在
-                cursor.execute('SELECT id FROM users WHERE nickname = ?', (nickname,))
-                existing = cursor.fetchone()
-                
-                if existing:
-                    # 如果昵称已存在，生成唯一昵称
-                    base_nickname = nickname
-                    counter = 1
-                    while existing:
-                        new_nickname = f"{base_nickname}_{counter}"
-                        cursor.execute('SELECT id FROM users WHERE nickname = ?', (new_nickname,))
-                        existing = cursor.fetchone()
-                        if not existing:
-                            nickname = new_nickname
-                            break
-                        counter += 1
+                # 如果昵称已存在，生成唯一昵称
+                nickname = self.allocate_nickname(nickname, separator)
                 
                 # 创建新用户
                 user_id = str(uuid.uuid4())
@@ -125,41 +148,104 @@ class PokerDatabase:
                 ''', (user_id, nickname, 1000, current_time, current_time))
                 
                 conn.commit()
+                
+                # 写穿透缓存
+                self.user_cache.put({
+                    'id': user_id, 'nickname': nickname, 'chips': 1000,
+                    'games_played': 0, 'games_won': 0, 'total_winnings': 0,
+                    'is_bot': 0, 'bot_level': None,
+                    'created_at': current_time, 'last_active': current_time
+                })
+                self.user_cache.note_nickname(nickname)
                 print(f"创建新用户: {nickname} (ID: {user_id})")
                 return user_id
     
+    @metrics.timed_write('poker_game')
+    def create_bot_user(self, bot_id: str, nickname: str, bot_level: str, chips: int = 1000) -> str:
+        """创建机器人用户记录，创建时即标记is_bot"""
+        with self.lock:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                current_time = time.time()
+                cursor.execute('''
+                    INSERT OR IGNORE INTO users (id, nickname, chips, is_bot, bot_level, created_at, last_active)
+                    VALUES (?, ?, ?, 1, ?, ?, ?)
+                ''', (bot_id, nickname, chips, bot_level, current_time, current_time))
+                conn.commit()
+        
+        self.user_cache.invalidate(bot_id)
+        self.user_cache.note_nickname(nickname)
+        return bot_id
+    
+    def allocate_nickname(self, nickname: str, separator: str = '_') -> str:
+        """分配唯一昵称：昵称已被占用时追加最小可用编号，只查询一次数据库"""
+        def load_taken():
+            # GLOB通配符需要转义，后缀编号在内存中解析
+            escaped = ''.join(f'[{c}]' if c in '*?[' else c for c in nickname)
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT nickname FROM users WHERE nickname = ? OR nickname GLOB ?
+                ''', (nickname, f'{escaped}{separator}[0-9]*'))
+                taken = set()
+                for row in cursor.fetchall():
+                    suffix = row['nickname'][len(nickname) + len(separator):]
+                    if row['nickname'] == nickname:
+                        taken.add(0)
+                    elif suffix.isdigit():
+                        taken.add(int(suffix))
+                return taken
+        
+        return self.user_cache.allocate_nickname(nickname, separator, load_taken)
+    
     def get_user(self, user_id: str) -> Optional[Dict]:
         """根据ID获取用户信息"""
+        cached = self.user_cache.get(user_id)
+        if cached:
+            return cached
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
             row = cursor.fetchone()
             
             if row:
-                return dict(row)
+                user = dict(row)
+                self.user_cache.put(user)
+                return user
             return None
     
     def get_user_by_nickname(self, nickname: str) -> Optional[Dict]:
         """根据昵称获取用户信息"""
+        cached = self.user_cache.get_by_nickname(nickname)
+        if cached:
+            return cached
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM users WHERE nickname = ?', (nickname,))
             row = cursor.fetchone()
             
             if row:
-                return dict(row)
+                user = dict(row)
+                self.user_cache.put(user)
+                return user
             return None
     
+    @metrics.timed_write('poker_game')
     def update_user_activity(self, user_id: str):
         """更新用户最后活动时间"""
+        current_time = time.time()
         with self.lock:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     UPDATE users SET last_active = ? WHERE id = ?
-                ''', (time.time(), user_id))
+                ''', (current_time, user_id))
                 conn.commit()
+        self.user_cache.update(user_id, last_active=current_time)
     
+    @metrics.timed_write('poker_game')
     def create_table(self, title: str, created_by: str, small_blind: int = 10, 
                     big_blind: int = 20, max_players: int = 9, initial_chips: int = 1000,
                     game_mode: str = "blinds", ante_percentage: float = 0.02) -> str:
@@ -201,12 +287,10 @@ class PokerDatabase:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT t.*, u.nickname as creator_nickname,
-                       COUNT(tp.player_id) as player_count
+                       t.human_count + t.bot_count as player_count
                 FROM tables t
                 LEFT JOIN users u ON t.created_by = u.id
-                LEFT JOIN table_players tp ON t.id = tp.table_id
                 WHERE t.is_active = 1
-                GROUP BY t.id
                 ORDER BY t.created_at DESC
             ''')
             
@@ -217,8 +301,15 @@ class PokerDatabase:
             
             return tables
     
-    def join_table(self, table_id: str, player_id: str, position: int = None) -> bool:
-        """玩家加入房间"""
+    @metrics.timed_write('poker_game')
+    def join_table(self, table_id: str, player_id: str, position: int = None,
+                   is_bot: bool = None, bot_level: str = None) -> bool:
+        """玩家加入房间，is_bot未指定时取用户记录上的标记"""
+        if is_bot is None:
+            user = self.get_user(player_id)
+            is_bot = bool(user and user.get('is_bot'))
+            bot_level = bot_level or (user.get('bot_level') if user else None)
+        
         with self.lock:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
@@ -238,11 +329,7 @@ class PokerDatabase:
                     return False
                 
                 # 检查房间是否已满
-                cursor.execute('''
-                    SELECT COUNT(*) as count FROM table_players WHERE table_id = ?
-                ''', (table_id,))
-                
-                current_players = cursor.fetchone()['count']
+                current_players = table['human_count'] + table['bot_count']
                 if current_players >= table['max_players']:
                     return False
                 
@@ -265,14 +352,17 @@ class PokerDatabase:
                 # 加入房间
                 cursor.execute('''
                     INSERT INTO table_players (
-                        table_id, player_id, position, chips, joined_at
-                    ) VALUES (?, ?, ?, ?, ?)
-                ''', (table_id, player_id, position, table['initial_chips'], time.time()))
+                        table_id, player_id, position, chips, is_bot, bot_level, joined_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (table_id, player_id, position, table['initial_chips'],
+                      1 if is_bot else 0, bot_level, time.time()))
                 
-                # 更新房间活动时间
+                # 更新房间人数计数和活动时间
                 cursor.execute('''
-                    UPDATE tables SET last_activity = ? WHERE id = ?
-                ''', (time.time(), table_id))
+                    UPDATE tables
+                    SET human_count = human_count + ?, bot_count = bot_count + ?, last_activity = ?
+                    WHERE id = ?
+                ''', (0 if is_bot else 1, 1 if is_bot else 0, time.time(), table_id))
                 
                 conn.commit()
                 print(f"玩家 {player_id} 加入房间 {table_id}，位置 {position}")
@@ -295,187 +385,104 @@ class PokerDatabase:
                 player_dict = dict(row)
                 # 解析JSON字段
                 player_dict['hole_cards'] = json.loads(player_dict['hole_cards'])
-                
-                # 判断是否是机器人
-                nickname = player_dict['nickname'] or f"Bot_{player_dict['player_id'][:8]}"
-                
-                # 机器人关键词（更全面的检测）
-                bot_keywords = [
-                    '新手', '菜鸟', '学徒', '小白', '萌新',
-                    '老司机', '高手', '大神', '专家', '老手', 
-                    '大师', '传奇', '王者', '至尊', '无敌',
-                    'Bot_', 'bot_', 'BOT_',
-                    '初级机器人', '中级机器人', '高级机器人', '神级机器人',
-                    '机器人', '电脑', 'AI', 'CPU'
-                ]
-                
-                # 如果数据库中已经标记为机器人，优先使用数据库标记
-                if player_dict['is_bot']:
-                    is_bot = True
-                else:
-                    # 否则根据昵称判断
-                    is_bot = any(keyword in nickname for keyword in bot_keywords)
-                
-                player_dict['nickname'] = nickname
-                player_dict['is_bot'] = is_bot
+                player_dict['nickname'] = player_dict['nickname'] or f"Bot_{player_dict['player_id'][:8]}"
+                player_dict['is_bot'] = bool(player_dict['is_bot'])
                     
                 players.append(player_dict)
             
             return players
     
+    @metrics.timed_write('poker_game')
     def leave_table(self, table_id: str, player_id: str) -> bool:
         """玩家离开房间"""
         with self.lock:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 
-                # 从房间中移除玩家
                 cursor.execute('''
-                    DELETE FROM table_players WHERE table_id = ? AND player_id = ?
+                    SELECT is_bot FROM table_players WHERE table_id = ? AND player_id = ?
                 ''', (table_id, player_id))
+                seat = cursor.fetchone()
+                
+                # 从房间中移除玩家并更新计数
+                if seat:
+                    cursor.execute('''
+                        DELETE FROM table_players WHERE table_id = ? AND player_id = ?
+                    ''', (table_id, player_id))
+                    cursor.execute('''
+                        UPDATE tables
+                        SET human_count = MAX(human_count - ?, 0), bot_count = MAX(bot_count - ?, 0)
+                        WHERE id = ?
+                    ''', (0 if seat['is_bot'] else 1, 1 if seat['is_bot'] else 0, table_id))
                 
-                # 检查房间是否还有玩家
                 cursor.execute('''
-                    SELECT COUNT(*) as count FROM table_players WHERE table_id = ?
+                    SELECT human_count, bot_count FROM tables WHERE id = ?
                 ''', (table_id,))
+                counts = cursor.fetchone()
+                human_players = counts['human_count'] if counts else 0
+                remaining_players = human_players + (counts['bot_count'] if counts else 0)
                 
-                remaining_players = cursor.fetchone()['count']
-                
-                # 如果房间为空，关闭房间
+                # 如果房间为空或只剩机器人，关闭房间
                 if remaining_players == 0:
                     cursor.execute('''
                         UPDATE tables SET is_active = 0 WHERE id = ?
                     ''', (table_id,))
                     print(f"房间 {table_id} 已关闭（无玩家）")
+                elif human_players == 0:
+                    self._close_table_rows(cursor, table_id)
+                    print(f"房间 {table_id} 已关闭（只剩机器人）")
                 else:
-                    # 检查剩余的玩家是否都是机器人
+                    # 更新房间活动时间
                     cursor.execute('''
-                        SELECT tp.*, u.nickname
-                        FROM table_players tp
-                        LEFT JOIN users u ON tp.player_id = u.id
-                        WHERE tp.table_id = ?
-                    ''', (table_id,))
-                    
-                    remaining_player_records = cursor.fetchall()
-                    human_players = 0
-                    
-                    for player_record in remaining_player_records:
-                        nickname = player_record['nickname'] or f"Bot_{player_record['player_id'][:8]}"
-                        
-                        # 机器人关键词检测
-                        bot_keywords = [
-                            '新手', '菜鸟', '学徒', '小白', '萌新',
-                            '老司机', '高手', '大神', '专家', '老手', 
-                            '大师', '传奇', '王者', '至尊', '无敌',
-                            'Bot_', 'bot_', 'BOT_',
-                            '初级机器人', '中级机器人', '高级机器人', '神级机器人',
-                            '机器人', '电脑', 'AI', 'CPU'
-                        ]
-                        
-                        is_bot = player_record['is_bot'] or any(keyword in nickname for keyword in bot_keywords)
-                        
-                        if not is_bot:
-                            human_players += 1
-                    
-                    # 如果只剩机器人，关闭房间
-                    if human_players == 0:
-                        cursor.execute('''
-                            UPDATE tables SET is_active = 0 WHERE id = ?
-                        ''', (table_id,))
-                        cursor.execute('''
-                            DELETE FROM table_players WHERE table_id = ?
-                        ''', (table_id,))
-                        print(f"房间 {table_id} 已关闭（只剩机器人）")
-                    else:
-                        # 更新房间活动时间
-                        cursor.execute('''
-                            UPDATE tables SET last_activity = ? WHERE id = ?
-                        ''', (time.time(), table_id))
+                        UPDATE tables SET last_activity = ? WHERE id = ?
+                    ''', (time.time(), table_id))
                 
                 conn.commit()
                 print(f"玩家 {player_id} 离开房间 {table_id}，剩余玩家: {remaining_players}")
                 return True
     
+    def _close_table_rows(self, cursor, table_id: str):
+        """关闭房间并清空座位和计数（调用方需持有锁）"""
+        cursor.execute('''
+            UPDATE tables SET is_active = 0, human_count = 0, bot_count = 0 WHERE id = ?
+        ''', (table_id,))
+        cursor.execute('''
+            DELETE FROM table_players WHERE table_id = ?
+        ''', (table_id,))
+    
+    @metrics.timed_write('poker_game')
     def close_specific_table(self, table_id: str):
         """关闭指定的房间"""
         with self.lock:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 
-                # 关闭房间
-                cursor.execute('''
-                    UPDATE tables SET is_active = 0 WHERE id = ?
-                ''', (table_id,))
-                
-                # 清理房间中的玩家记录
-                cursor.execute('''
-                    DELETE FROM table_players WHERE table_id = ?
-                ''', (table_id,))
+                # 关闭房间并清理房间中的玩家记录
+                self._close_table_rows(cursor, table_id)
                 
                 conn.commit()
                 print(f"关闭房间: {table_id}")
                 return True
 
+    @metrics.timed_write('poker_game')
     def close_empty_tables(self):
         """关闭所有空房间和只有机器人的房间"""
         with self.lock:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 
-                # 查找没有玩家的活跃房间
+                # 没有真人玩家的活跃房间（空房间和纯机器人房间），走 (is_active, human_count) 索引
                 cursor.execute('''
-                    SELECT t.id, t.title
-                    FROM tables t
-                    LEFT JOIN table_players tp ON t.id = tp.table_id
-                    WHERE t.is_active = 1
-                    GROUP BY t.id
-                    HAVING COUNT(tp.player_id) = 0
+                    SELECT id, title, bot_count FROM tables
+                    WHERE is_active = 1 AND human_count = 0
                 ''')
                 
-                empty_tables = cursor.fetchall()
-                
-                # 查找只有机器人的活跃房间 - 修复逻辑
-                cursor.execute('''
-                    SELECT DISTINCT t.id, t.title
-                    FROM tables t
-                    INNER JOIN table_players tp ON t.id = tp.table_id
-                    LEFT JOIN users u ON tp.player_id = u.id
-                    WHERE t.is_active = 1
-                    GROUP BY t.id
-                    HAVING COUNT(tp.player_id) > 0 AND COUNT(CASE WHEN u.nickname NOT LIKE '%新手%' 
-                           AND u.nickname NOT LIKE '%菜鸟%' 
-                           AND u.nickname NOT LIKE '%学徒%' 
-                           AND u.nickname NOT LIKE '%小白%' 
-                           AND u.nickname NOT LIKE '%萌新%' 
-                           AND u.nickname NOT LIKE '%老司机%' 
-                           AND u.nickname NOT LIKE '%高手%' 
-                           AND u.nickname NOT LIKE '%大神%' 
-                           AND u.nickname NOT LIKE '%专家%' 
-                           AND u.nickname NOT LIKE '%老手%' 
-                           AND u.nickname NOT LIKE '%大师%' 
-                           AND u.nickname NOT LIKE '%传奇%' 
-                           AND u.nickname NOT LIKE '%王者%' 
-                           AND u.nickname NOT LIKE '%至尊%' 
-                           AND u.nickname NOT LIKE '%无敌%' 
-                           AND u.nickname NOT LIKE 'Bot_%' 
-                           THEN 1 END) = 0
-                ''')
-                
-                bot_only_tables = cursor.fetchall()
-                
-                # 合并需要关闭的房间
-                tables_to_close = empty_tables + bot_only_tables
+                tables_to_close = cursor.fetchall()
+                empty_tables = [t for t in tables_to_close if t['bot_count'] == 0]
+                bot_only_tables = [t for t in tables_to_close if t['bot_count'] > 0]
                 
                 for table in tables_to_close:
-                    cursor.execute('''
-                        UPDATE tables SET is_active = 0 WHERE id = ?
-                    ''', (table['id'],))
-                    
-                    # 清理房间中的玩家记录
-                    cursor.execute('''
-                        DELETE FROM table_players WHERE table_id = ?
-                    ''', (table['id'],))
-                    
+                    self._close_table_rows(cursor, table['id'])
                     print(f"自动关闭房间: {table['title']} (ID: {table['id']})")
                 
                 if tables_to_close:
@@ -10,37 +10,25 @@ class DatabaseAdapter:
     
     def create_or_get_player(self, nickname: str) -> Player:
         """创建或获取玩家，确保昵称唯一性"""
-        # 首先尝试通过昵称查找现有玩家
-        existing_player = self.db.get_player_by_nickname(nickname)
+        # 首先尝试通过昵称查找现有玩家（优先命中用户缓存）
+        existing_player = self.db.get_user_by_nickname(nickname)
         
         if existing_player:
             # 玩家已存在，重新创建Player对象
-            if existing_player['is_bot']:
-                bot_level = getattr(BotLevel, existing_player['bot_level'].upper()) if existing_player['bot_level'] else BotLevel.BEGINNER
+            if existing_player.get('is_bot'):
+                bot_level = getattr(BotLevel, existing_player['bot_level'].upper()) if existing_player.get('bot_level') else BotLevel.BEGINNER
                 player = Bot(existing_player['id'], existing_player['nickname'], existing_player['chips'], bot_level)
             else:
                 player = Player(existing_player['id'], existing_player['nickname'], existing_player['chips'])
             
-            player.session_id = existing_player['session_id']
+            player.session_id = existing_player.get('session_id')
             return player
         
-        # 生成唯一昵称
-        base_nickname = nickname
-        counter = 1
-        unique_nickname = base_nickname
+        # 创建新玩家（create_user 内一步分配唯一昵称）
+        user_id = self.db.create_user(nickname, separator='')
+        user = self.db.get_user(user_id)
         
-        while self.db.get_player_by_nickname(unique_nickname):
-            unique_nickname = f"{base_nickname}{counter}"
-            counter += 1
-        
-        # 创建新玩家
-        player_id = str(uuid.uuid4())
-        player = Player(player_id, unique_nickname)
-        
-        # 保存到数据库
-        self.db.create_player(player_id, unique_nickname)
-        
-        return player
+        return Player(user_id, user['nickname'], user['chips'])
     
     def create_bot(self, nickname: str, chips: int, bot_level: BotLevel) -> Bot:
         """创建机器人玩家"""
@@ -48,7 +36,7 @@ class DatabaseAdapter:
         bot = Bot(player_id, nickname, chips, bot_level)
         
         # 保存到数据库
-        self.db.create_player(player_id, nickname, is_bot=True, bot_level=bot_level.value.lower(), chips=chips)
+        self.db.create_bot_user(player_id, nickname, bot_level.value, chips)
         
         return bot
     
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+胜率计算服务
+按 (房间, 手牌编号, 街, 玩家) 缓存胜率结果，相同的并发请求只计算一次，按玩家限流，
+并在每条街发牌后为在座真人后台预计算
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+
+EquityKey = Tuple[str, int, str, str]
+
+
+class _Flight:
+    """一次进行中的计算，等待者共享结果"""
+
+    def __init__(self, event):
+        self.event = event
+        self.result: Optional[Dict] = None
+
+
+class TokenBuckets:
+    """
+    按键限流的令牌桶
+
+    键来自客户端（玩家ID、IP），桶按LRU保留最多 max_keys 个；被淘汰的键
+    下次请求时重新拿到满桶，最多多放行 burst 次。
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+        # key -> (剩余令牌, 上次补充时间)
+        self.buckets: 'OrderedDict[str, Tuple[float, float]]' = OrderedDict()
+
+    def take(self, key: str) -> bool:
+        """取一个令牌，桶空时返回False"""
+        now = time.time()
+        with self.lock:
+            tokens, last = self.buckets.pop(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            self.buckets[key] = (tokens - 1 if allowed else tokens, now)
+            while len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+            return allowed
+
+    def __len__(self) -> int:
+        return len(self.buckets)
+
+
+class EquityService:
+    """胜率缓存、请求合并与预计算"""
+
+    def __init__(self, max_entries: int = 2000, rate: float = 1.0, burst: int = 5):
+        """
+        初始化服务
+
+        Args:
+            max_entries: 缓存的最大结果数
+            rate: 每个玩家每秒补充的请求数
+            burst: 每个玩家允许的突发请求数
+        """
+        self.max_entries = max_entries
+        self.rate = rate
+        self.burst = burst
+        self.lock = threading.Lock()
+
+        # (table_id, hand_number, street, player_id) -> 胜率结果
+        self.cache: 'OrderedDict[EquityKey, Dict]' = OrderedDict()
+        # 进行中的计算
+        self.flights: Dict[EquityKey, _Flight] = {}
+        # table_id -> 最近一次预计算的 (hand_number, street)
+        self.precomputed: Dict[str, Tuple[int, str]] = {}
+        # 按玩家的限流令牌桶
+        self.buckets = TokenBuckets(rate, burst)
+
+        # 不需要计算胜率的阶段
+        self.idle_stages = {'waiting', 'showdown', 'finished'}
+
+        # 后台任务和事件由app注入（与socketio的异步模式一致）
+        self.start_task: Optional[Callable] = None
+        self.create_event: Callable = threading.Event
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.precomputes = 0
+
+    def attach(self, start_task: Callable, create_event: Callable):
+        """注入后台任务调度函数和事件工厂"""
+        self.start_task = start_task
+        self.create_event = create_event
+
+    @staticmethod
+    def key_of(table, player_id: str) -> EquityKey:
+        """胜率结果只取决于房间、手牌、街和玩家"""
+        return (table.id, table.hand_number, table.game_stage.value, player_id)
+
+    def allow(self, player_id: str) -> bool:
+        """按玩家限流，超出时返回False"""
+        if self.buckets.take(player_id):
+            return True
+        with self.lock:
+            self.rate_limited += 1
+        return False
+
+    def get(self, table, player_id: str) -> Optional[Dict]:
+        """获取胜率：命中缓存直接返回，已有相同计算时等待其结果，否则计算并缓存"""
+        key = self.key_of(table, player_id)
+        with self.lock:
+            result = self.cache.get(key)
+            if result is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return result
+
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight(self.create_event())
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            return flight.result
+        return self._compute(key, flight, table, player_id)
+
+    def _compute(self, key: EquityKey, flight: _Flight, table, player_id: str) -> Optional[Dict]:
+        """执行计算，写入缓存并唤醒等待者"""
+        result = None
+        try:
+            result = table.calculate_win_probability(player_id)
+        except Exception as e:
+            print(f"❌ 胜率计算失败: {e}")
+        finally:
+            with self.lock:
+                flight.result = result
+                self.flights.pop(key, None)
+                if result is not None:
+                    self.cache[key] = result
+                    while len(self.cache) > self.max_entries:
+                        self.cache.popitem(last=False)
+            flight.event.set()
+        return result
+
+    def on_street(self, table):
+        """每条街发牌后调用：新街第一次调用时为在座真人后台预计算"""
+        street = (table.hand_number, table.game_stage.value)
+        if street[1] in self.idle_stages:
+            return
+        with self.lock:
+            if self.precomputed.get(table.id) == street:
+                return
+            previous = self.precomputed.get(table.id)
+            self.precomputed[table.id] = street
+            # 新的一手开始时丢弃该房间上一手的结果
+            if previous is None or previous[0] != street[0]:
+                self._drop_cached(table.id)
+
+        player_ids = [p.id for p in table.players
+                      if not p.is_bot and getattr(p.status, 'value', p.status) == 'playing' and len(p.hole_cards) == 2]
+        if not player_ids:
+            return
+
+        def precompute():
+            for player_id in player_ids:
+                # 街已经变化则放弃，下一条街会重新触发
+                if (table.hand_number, table.game_stage.value) != street:
+                    return
+                self.get(table, player_id)
+                with self.lock:
+                    self.precomputes += 1
+
+        if self.start_task:
+            self.start_task(precompute)
+        else:
+            precompute()
+
+    def drop_table(self, table_id: str):
+        """房间关闭时清理缓存"""
+        with self.lock:
+            self.precomputed.pop(table_id, None)
+            self._drop_cached(table_id)
+
+    def _drop_cached(self, table_id: str):
+        """移除房间的缓存结果（调用方需持有锁）"""
+        for key in [k for k in self.cache if k[0] == table_id]:
+            del self.cache[key]
+
+    def stats(self) -> Dict:
+        """缓存统计"""
+        with self.lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                'entries': len(self.cache),
+                'in_flight': len(self.flights),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'rate_limited': self.rate_limited,
+                'rate_buckets': len(self.buckets),
+                'precomputes': self.precomputes,
+                'hit_rate': round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0
+            }
+
+
+# 全局胜率服务实例
+equity_service = EquityService()
@@ -9,101 +9,133 @@ import json
 import time
 from datetime import datetime
 from typing import Dict, List, Optional, Any
+from metrics import metrics
+from migrations import Migration, LazySchema
+
+
+def _create_tables(cursor):
+    """版本1：会话、手牌、玩家动作和事件表"""
+    # 游戏会话表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS game_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_id TEXT NOT NULL,
+            table_title TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            ended_at TIMESTAMP,
+            status TEXT DEFAULT 'active',
+            player_count INTEGER,
+            bot_count INTEGER,
+            total_hands INTEGER DEFAULT 0,
+            metadata TEXT
+        )
+    ''')
+
+    # 手牌记录表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS hands (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id INTEGER,
+            hand_number INTEGER,
+            table_id TEXT NOT NULL,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            ended_at TIMESTAMP,
+            status TEXT DEFAULT 'active',
+            stage TEXT,
+            pot INTEGER DEFAULT 0,
+            current_bet INTEGER DEFAULT 0,
+            community_cards TEXT,
+            winner_id TEXT,
+            winner_nickname TEXT,
+            winning_amount INTEGER,
+            metadata TEXT,
+            FOREIGN KEY (session_id) REFERENCES game_sessions (id)
+        )
+    ''')
+
+    # 玩家动作记录表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_actions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            hand_id INTEGER,
+            player_id TEXT NOT NULL,
+            player_nickname TEXT,
+            action_type TEXT NOT NULL,
+            amount INTEGER DEFAULT 0,
+            stage TEXT,
+            position INTEGER,
+            hole_cards TEXT,
+            chips_before INTEGER,
+            chips_after INTEGER,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            metadata TEXT,
+            FOREIGN KEY (hand_id) REFERENCES hands (id)
+        )
+    ''')
+
+    # 游戏事件记录表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS game_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_id TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            event_data TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            metadata TEXT
+        )
+    ''')
+
+
+def _create_showdown_details(cursor):
+    """版本2：摊牌详情表（原来在每次记录摊牌时创建）"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS showdown_details (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            hand_id INTEGER NOT NULL,
+            player_id TEXT NOT NULL,
+            nickname TEXT NOT NULL,
+            is_bot BOOLEAN NOT NULL,
+            hole_cards TEXT NOT NULL,
+            hand_rank TEXT NOT NULL,
+            hand_description TEXT NOT NULL,
+            rank_position INTEGER NOT NULL,
+            result TEXT NOT NULL,
+            winnings INTEGER NOT NULL,
+            final_chips INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (hand_id) REFERENCES hands (id)
+        )
+    ''')
+
+
+MIGRATIONS = [
+    Migration(1, '创建会话、手牌、动作和事件表', _create_tables),
+    Migration(2, '摊牌详情表', _create_showdown_details),
+]
+
 
 class GameLogger:
     """游戏日志记录器"""
     
     def __init__(self, db_path: str = 'game_logs.db'):
         self.db_path = db_path
-        self.init_database()
+        # 第一次写入时才执行迁移
+        self.schema = LazySchema('game_logs', db_path, MIGRATIONS)
     
     def get_connection(self):
         """获取数据库连接的上下文管理器"""
+        self.schema.ensure()
         return sqlite3.connect(self.db_path)
     
     def init_database(self):
-        """初始化数据库表"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # 游戏会话表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS game_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                table_id TEXT NOT NULL,
-                table_title TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                ended_at TIMESTAMP,
-                status TEXT DEFAULT 'active',
-                player_count INTEGER,
-                bot_count INTEGER,
-                total_hands INTEGER DEFAULT 0,
-                metadata TEXT
-            )
-        ''')
-        
-        # 手牌记录表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS hands (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id INTEGER,
-                hand_number INTEGER,
-                table_id TEXT NOT NULL,
-                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                ended_at TIMESTAMP,
-                status TEXT DEFAULT 'active',
-                stage TEXT,
-                pot INTEGER DEFAULT 0,
-                current_bet INTEGER DEFAULT 0,
-                community_cards TEXT,
-                winner_id TEXT,
-                winner_nickname TEXT,
-                winning_amount INTEGER,
-                metadata TEXT,
-                FOREIGN KEY (session_id) REFERENCES game_sessions (id)
-            )
-        ''')
-        
-        # 玩家动作记录表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS player_actions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                hand_id INTEGER,
-                player_id TEXT NOT NULL,
-                player_nickname TEXT,
-                action_type TEXT NOT NULL,
-                amount INTEGER DEFAULT 0,
-                stage TEXT,
-                position INTEGER,
-                hole_cards TEXT,
-                chips_before INTEGER,
-                chips_after INTEGER,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                metadata TEXT,
-                FOREIGN KEY (hand_id) REFERENCES hands (id)
-            )
-        ''')
-        
-        # 游戏事件记录表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS game_events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                table_id TEXT NOT NULL,
-                event_type TEXT NOT NULL,
-                event_data TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                metadata TEXT
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-        print(f"📊 游戏日志数据库初始化完成: {self.db_path}")
+        """执行待处理的迁移"""
+        self.schema.ensure()
     
+    @metrics.timed_write('game_logs')
     def start_game_session(self, table_id: str, table_title: str, 
                           player_count: int, bot_count: int, metadata: Dict = None) -> int:
         """开始游戏会话"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -118,9 +150,10 @@ class GameLogger:
         print(f"🎮 游戏会话开始: {table_title} (ID: {session_id})")
         return session_id
     
+    @metrics.timed_write('game_logs')
     def end_game_session(self, session_id: int, total_hands: int):
         """结束游戏会话"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -134,10 +167,11 @@ class GameLogger:
         
         print(f"🏁 游戏会话结束: {session_id}, 总手牌数: {total_hands}")
     
+    @metrics.timed_write('game_logs')
     def start_hand(self, session_id: int, hand_number: int, table_id: str, 
                    stage: str = 'pre_flop', metadata: Dict = None) -> int:
         """开始新手牌"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -152,11 +186,12 @@ class GameLogger:
         print(f"🃏 手牌#{hand_number}开始 (Hand ID: {hand_id})")
         return hand_id
     
+    @metrics.timed_write('game_logs')
     def end_hand(self, hand_id: int, winner_id: str = None, winner_nickname: str = None, 
                 winning_amount: int = 0, final_pot: int = 0, community_cards: List = None,
                 showdown_info: Dict = None):
         """结束手牌，记录详细的摊牌信息"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         # 基本手牌结束信息
@@ -189,29 +224,9 @@ class GameLogger:
     
     def _record_showdown_details(self, hand_id: int, showdown_info: Dict):
         """记录详细的摊牌信息"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
-        # 创建摊牌详细记录表（如果不存在）
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS showdown_details (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                hand_id INTEGER NOT NULL,
-                player_id TEXT NOT NULL,
-                nickname TEXT NOT NULL,
-                is_bot BOOLEAN NOT NULL,
-                hole_cards TEXT NOT NULL,
-                hand_rank TEXT NOT NULL,
-                hand_description TEXT NOT NULL,
-                rank_position INTEGER NOT NULL,
-                result TEXT NOT NULL,
-                winnings INTEGER NOT NULL,
-                final_chips INTEGER NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (hand_id) REFERENCES hands (id)
-            )
-        ''')
-        
         # 插入每个玩家的摊牌详情
         for player_info in showdown_info.get('showdown_players', []):
             cursor.execute('''
@@ -240,7 +255,7 @@ class GameLogger:
         
     def get_hand_showdown_details(self, hand_id: int) -> List[Dict]:
         """获取某手牌的详细摊牌信息"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -272,13 +287,14 @@ class GameLogger:
         
         return details
     
+    @metrics.timed_write('game_logs')
     def log_player_action(self, hand_id: int, player_id: str, player_nickname: str,
                          action_type: str, amount: int = 0, stage: str = None,
                          position: int = None, hole_cards: List = None,
                          chips_before: int = None, chips_after: int = None,
                          metadata: Dict = None):
         """记录玩家动作"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -295,9 +311,10 @@ class GameLogger:
         
         print(f"📝 动作记录: {player_nickname} {action_type} ${amount}")
     
+    @metrics.timed_write('game_logs')
     def log_game_event(self, table_id: str, event_type: str, event_data: Dict = None):
         """记录游戏事件"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -310,10 +327,11 @@ class GameLogger:
         
         print(f"📡 事件记录: {event_type}")
     
+    @metrics.timed_write('game_logs')
     def update_hand_stage(self, hand_id: int, stage: str, pot: int = None, 
                          current_bet: int = None, community_cards: List = None):
         """更新手牌阶段"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         update_fields = ['stage = ?']
@@ -345,7 +363,7 @@ class GameLogger:
     
     def get_session_stats(self, session_id: int) -> Dict:
         """获取会话统计"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         # 基本会话信息
@@ -384,7 +402,7 @@ class GameLogger:
     
     def get_recent_games(self, limit: int = 10) -> List[Dict]:
         """获取最近的游戏记录"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
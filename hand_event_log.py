@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+手牌事件日志
+把引擎输出的手牌事件（牌堆顺序、动作、阶段变化）追加写入本地轮转的JSONL文件，
+每行一个 [table_id, hand_number, 事件]。用 load_hands 读回后可以交给
+poker_engine.replay 重建任意一手牌在任意事件处的状态（审计、崩溃后恢复、引擎改动的回归测试）
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from poker_engine.hand_events import HandLog, group_hands
+
+# 默认配置（可用环境变量覆盖，POKER_HAND_LOG_FILE 设为 off 关闭）
+DEFAULT_HAND_LOG_FILE = os.path.join('hand_logs', 'events.jsonl')
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_BACKUPS = 10
+
+
+class HandEventLog:
+    """
+    手牌事件写入器
+
+    牌桌线程只做一次入队，后台线程按批追加写入；文件超过 max_bytes 时按
+    events.jsonl.1 ... .N 轮转。未配置路径时 record 直接返回。
+    """
+
+    BATCH_SIZE = 512
+    FLUSH_INTERVAL = 0.5
+    QUEUE_SIZE = 50000
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 backups: int = DEFAULT_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.queue: queue.Queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self.written = 0
+        self.dropped = 0
+        self.write_errors = 0
+        self.rotations = 0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def configure(self, path: Optional[str], max_bytes: int = DEFAULT_MAX_BYTES, backups: int = DEFAULT_BACKUPS):
+        self.flush()
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def configure_from_env(self):
+        """按环境变量配置：POKER_HAND_LOG_FILE、POKER_HAND_LOG_MAX_MB、POKER_HAND_LOG_BACKUPS"""
+        path = os.environ.get('POKER_HAND_LOG_FILE', DEFAULT_HAND_LOG_FILE)
+        if path.lower() in ('', 'off', 'none', '0'):
+            path = None
+        try:
+            max_bytes = int(float(os.environ.get('POKER_HAND_LOG_MAX_MB', DEFAULT_MAX_BYTES / 1024 / 1024)) * 1024 * 1024)
+            backups = int(os.environ.get('POKER_HAND_LOG_BACKUPS', DEFAULT_BACKUPS))
+        except ValueError as e:
+            print(f"⚠️ 手牌日志配置无效，使用默认值: {e}")
+            max_bytes, backups = DEFAULT_MAX_BYTES, DEFAULT_BACKUPS
+        self.configure(path, max_bytes, backups)
+
+    def record(self, table_id: str, hand_number: int, event: list):
+        """引擎的手牌事件接收函数（instrumentation.set_hand_sink）"""
+        if not self.path:
+            return
+        try:
+            self.queue.put_nowait((table_id, hand_number, event))
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._ensure_thread()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='hand-log-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.FLUSH_INTERVAL
+            while len(batch) < self.BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.write(batch)
+
+    def flush(self):
+        """同步写出队列中剩余的事件（关闭服务器前调用）"""
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self.write(batch)
+
+    def write(self, records: List[tuple]):
+        data = ''.join(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+                       for record in records).encode('utf-8')
+        with self._lock:
+            if not self.path:
+                return
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                if self.max_bytes and os.path.exists(self.path) \
+                        and os.path.getsize(self.path) + len(data) > self.max_bytes:
+                    self._rotate()
+                with open(self.path, 'ab') as f:
+                    f.write(data)
+                self.written += len(records)
+            except OSError as e:
+                self.write_errors += 1
+                print(f"⚠️ 写入手牌日志失败: {e}")
+
+    def _rotate(self):
+        for index in range(self.backups - 1, 0, -1):
+            source = f'{self.path}.{index}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.path}.{index + 1}')
+        if self.backups > 0:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+
+    def stats(self) -> Dict:
+        return {
+            'path': self.path,
+            'queued': self.queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'write_errors': self.write_errors,
+            'rotations': self.rotations
+        }
+
+
+def load_hands(path: str = DEFAULT_HAND_LOG_FILE, include_rotated: bool = True) -> List[HandLog]:
+    """
+    读取事件日志并按手牌分组
+
+    Args:
+        path: 日志文件
+        include_rotated: 是否连同轮转出去的 .1 ... .N 一起读取（按时间从旧到新）
+
+    Returns:
+        List[HandLog]: 手牌（含未结束的，例如进程崩溃时正在进行的手牌）
+    """
+    paths = [path]
+    if include_rotated:
+        index = 1
+        while os.path.exists(f'{path}.{index}'):
+            paths.insert(0, f'{path}.{index}')
+            index += 1
+
+    records = []
+    for file_path in paths:
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # 崩溃时写了一半的最后一行
+                    continue
+    return group_hands(records)
+
+
+# 全局手牌事件日志
+hand_event_log = HandEventLog()
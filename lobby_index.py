@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+大厅索引
+内存中的房间列表，按盲注、模式和空位索引，变更时推送增量，REST读取支持ETag
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+
+# 大厅列表中每个房间展示的字段
+LISTING_FIELDS = (
+    'id', 'title', 'small_blind', 'big_blind', 'max_players', 'current_players',
+    'game_stage', 'game_mode', 'ante_percentage', 'created_by', 'created_at'
+)
+
+
+class LobbyIndex:
+    """大厅房间索引"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = 0
+        self.loaded = False
+
+        # table_id -> 列表条目
+        self.tables: Dict[str, Dict] = {}
+        # (小盲, 大盲) -> table_id集合
+        self.by_stakes: Dict[Tuple[int, int], Set[str]] = {}
+        # 游戏模式 -> table_id集合
+        self.by_mode: Dict[str, Set[str]] = {}
+        # 还有空位的房间
+        self.open_tables: Set[str] = set()
+
+        # 增量推送回调，由app设置
+        self.publisher: Optional[Callable[[Dict], None]] = None
+
+        # 缓存的完整列表（按创建时间倒序），变更时失效
+        self._sorted: Optional[List[Dict]] = None
+
+    def set_publisher(self, publisher: Callable[[Dict], None]):
+        """设置增量推送回调"""
+        self.publisher = publisher
+
+    @property
+    def etag(self) -> str:
+        """当前列表版本对应的ETag"""
+        return f'W/"lobby-{self.version}"'
+
+    def load(self, entries: List[Dict]):
+        """启动时批量载入房间（不推送）"""
+        with self.lock:
+            for entry in entries:
+                self._index(self._normalize(entry))
+            self.version += 1
+            self._sorted = None
+            self.loaded = True
+
+    def upsert(self, entry: Dict):
+        """新增或更新房间条目，内容有变化时推送增量"""
+        entry = self._normalize(entry)
+        with self.lock:
+            old = self.tables.get(entry['id'])
+            if old == entry:
+                return
+            if old:
+                self._unindex(old)
+            self._index(entry)
+            delta = self._bump('new_table' if old is None else 'table_updated', table=dict(entry))
+        self._publish(delta)
+
+    def update(self, table_id: str, **fields):
+        """更新已索引房间的部分字段（如人数、阶段）"""
+        with self.lock:
+            old = self.tables.get(table_id)
+            if old is None:
+                return
+            entry = dict(old)
+            entry.update({k: v for k, v in fields.items() if k in LISTING_FIELDS})
+            self.upsert(entry)
+
+    def remove(self, table_id: str):
+        """移除房间条目并推送增量"""
+        with self.lock:
+            old = self.tables.get(table_id)
+            if old is None:
+                return
+            self._unindex(old)
+            delta = self._bump('table_removed', table_id=table_id)
+        self._publish(delta)
+
+    def get(self, table_id: str) -> Optional[Dict]:
+        """获取单个房间条目"""
+        with self.lock:
+            entry = self.tables.get(table_id)
+            return dict(entry) if entry else None
+
+    def list_tables(self, stakes: Optional[Tuple[int, int]] = None, game_mode: Optional[str] = None,
+                    available: bool = False) -> List[Dict]:
+        """按条件列出房间，按创建时间倒序"""
+        with self.lock:
+            if self._sorted is None:
+                self._sorted = sorted(self.tables.values(), key=lambda t: t['created_at'] or 0, reverse=True)
+
+            if stakes is None and game_mode is None and not available:
+                return list(self._sorted)
+
+            candidates = set(self.tables)
+            if stakes is not None:
+                candidates &= self.by_stakes.get(stakes, set())
+            if game_mode is not None:
+                candidates &= self.by_mode.get(game_mode, set())
+            if available:
+                candidates &= self.open_tables
+            return [t for t in self._sorted if t['id'] in candidates]
+
+    def _normalize(self, entry: Dict) -> Dict:
+        """只保留列表字段"""
+        normalized = {field: entry.get(field) for field in LISTING_FIELDS}
+        normalized['game_mode'] = normalized['game_mode'] or 'blinds'
+        normalized['current_players'] = normalized['current_players'] or 0
+        return normalized
+
+    def _index(self, entry: Dict):
+        """写入条目及二级索引（调用方需持有锁）"""
+        table_id = entry['id']
+        self.tables[table_id] = entry
+        self.by_stakes.setdefault((entry['small_blind'], entry['big_blind']), set()).add(table_id)
+        self.by_mode.setdefault(entry['game_mode'], set()).add(table_id)
+        if entry['current_players'] < entry['max_players']:
+            self.open_tables.add(table_id)
+
+    def _unindex(self, entry: Dict):
+        """移除条目及二级索引（调用方需持有锁）"""
+        table_id = entry['id']
+        self.tables.pop(table_id, None)
+        for index, key in ((self.by_stakes, (entry['small_blind'], entry['big_blind'])),
+                           (self.by_mode, entry['game_mode'])):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(table_id)
+                if not ids:
+                    del index[key]
+        self.open_tables.discard(table_id)
+
+    def _bump(self, change_type: str, **payload) -> Dict:
+        """版本号加一并生成增量（调用方需持有锁）"""
+        self.version += 1
+        self._sorted = None
+        delta = {'type': change_type, 'version': self.version}
+        delta.update(payload)
+        return delta
+
+    def _publish(self, delta: Dict):
+        """推送增量"""
+        if self.publisher:
+            try:
+                self.publisher(delta)
+            except Exception as e:
+                print(f"❌ 推送大厅增量失败: {e}")
+
+
+# 全局大厅索引实例
+lobby_index = LobbyIndex()
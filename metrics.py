@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+延迟指标
+Socket.IO事件、引擎阶段、机器人决策和数据库写入的延迟直方图与计数器，
+以Prometheus文本格式和JSON快照导出
+"""
+
+import bisect
+import functools
+import inspect
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from tracing import tracer
+
+
+# 默认直方图桶（秒）：覆盖从亚毫秒的内存操作到秒级的蒙特卡洛计算
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class _HistogramChild:
+    """一组标签值对应的直方图（非累计计数，导出时再累加）"""
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    """带标签的延迟直方图"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.children: Dict[Tuple[str, ...], _HistogramChild] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, seconds: float, *labelvalues: str):
+        """记录一次耗时（标签值按 labelnames 的顺序）"""
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self.lock:
+            child = self.children.get(labelvalues)
+            if child is None:
+                child = self.children[labelvalues] = _HistogramChild(len(self.buckets) + 1)
+            child.counts[index] += 1
+            child.sum += seconds
+            child.count += 1
+
+    def _quantile(self, child: _HistogramChild, q: float) -> Optional[float]:
+        """按桶估算分位数（取所在桶的上界）"""
+        if not child.count:
+            return None
+        target = q * child.count
+        running = 0
+        for bound, count in zip(self.buckets, child.counts):
+            running += count
+            if running >= target:
+                return bound
+        return float('inf')
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            items = [(labels, list(child.counts), child.sum, child.count)
+                     for labels, child in sorted(self.children.items())]
+        for labels, counts, total, count in items:
+            pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)]
+            running = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                running += bucket_count
+                bucket_labels = ','.join(pairs + [f'le="{_format_value(bound)}"'])
+                lines.append(f'{self.name}_bucket{{{bucket_labels}}} {running}')
+            suffix = '{' + ','.join(pairs) + '}' if pairs else ''
+            lines.append(f'{self.name}_sum{suffix} {_format_value(total)}')
+            lines.append(f'{self.name}_count{suffix} {count}')
+        return '\n'.join(lines)
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            children = list(self.children.items())
+        result = {}
+        for labels, child in sorted(children):
+            key = ','.join(f'{name}={value}' for name, value in zip(self.labelnames, labels)) or 'all'
+            result[key] = {
+                'count': child.count,
+                'sum_ms': round(child.sum * 1000, 3),
+                'avg_ms': round(child.sum * 1000 / child.count, 3) if child.count else 0.0,
+                'p50_ms': _ms(self._quantile(child, 0.5)),
+                'p95_ms': _ms(self._quantile(child, 0.95)),
+                'p99_ms': _ms(self._quantile(child, 0.99))
+            }
+        return result
+
+
+def _max_positional(func: Callable) -> Optional[int]:
+    """函数最多接受的位置参数个数，有*args时为None"""
+    parameters = inspect.signature(func).parameters.values()
+    if any(p.kind == p.VAR_POSITIONAL for p in parameters):
+        return None
+    return sum(1 for p in parameters if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD))
+
+
+def _ms(seconds: Optional[float]):
+    if seconds is None:
+        return None
+    return 'inf' if seconds == float('inf') else round(seconds * 1000, 3)
+
+
+class Counter:
+    """带标签的计数器"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        with self.lock:
+            self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self.lock:
+            items = sorted(self.values.items())
+        for labels, value in items:
+            pairs = ','.join(f'{name}="{_escape(v)}"' for name, v in zip(self.labelnames, labels))
+            lines.append(f'{self.name}{{{pairs}}} {_format_value(value)}' if pairs
+                         else f'{self.name} {_format_value(value)}')
+        return '\n'.join(lines)
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            items = sorted(self.values.items())
+        return {','.join(f'{name}={value}' for name, value in zip(self.labelnames, labels)) or 'all': value
+                for labels, value in items}
+
+
+class Metrics:
+    """服务器的全部延迟指标"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.socketio_events = Histogram('poker_socketio_event_seconds', 'Socket.IO事件处理耗时', ['event'])
+        self.socketio_errors = Counter('poker_socketio_event_errors_total', 'Socket.IO事件处理抛出的异常', ['event'])
+        self.engine_stages = Histogram('poker_engine_stage_seconds', '游戏引擎各阶段耗时', ['stage'])
+        self.bot_decisions = Histogram('poker_bot_decide_seconds', '机器人决策耗时', ['level'])
+        self.db_writes = Histogram('poker_db_write_seconds', '数据库写入耗时', ['store', 'operation'])
+        self.db_errors = Counter('poker_db_write_errors_total', '数据库写入失败', ['store', 'operation'])
+        self.families = [self.socketio_events, self.socketio_errors, self.engine_stages,
+                         self.bot_decisions, self.db_writes, self.db_errors]
+
+    def record_engine(self, stage: str, seconds: float, label: Optional[str] = None):
+        """poker_engine.instrumentation 的记录回调"""
+        if stage == 'bot_decide':
+            self.bot_decisions.observe(seconds, label or 'unknown')
+        else:
+            self.engine_stages.observe(seconds, stage)
+
+    def timed_event(self, event: str) -> Callable:
+        """装饰器：记录Socket.IO事件处理耗时"""
+        def decorator(func: Callable) -> Callable:
+            max_args = _max_positional(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                # Flask-SocketIO 先带参数调用connect处理函数，TypeError时再不带参数重试，这次不计入
+                if max_args is not None and len(args) > max_args:
+                    raise TypeError(f'{func.__name__}() takes {max_args} positional arguments')
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                except Exception:
+                    self.socketio_errors.inc(event)
+                    raise
+                finally:
+                    self.socketio_events.observe(time.perf_counter() - start, event)
+            return wrapper
+        return decorator
+
+    def timed_write(self, store: str) -> Callable:
+        """装饰器：记录数据库写入耗时（操作名取方法名），在请求链路中同时记录为span"""
+        def decorator(func: Callable) -> Callable:
+            operation = func.__name__.lstrip('_')
+            span_name = f'db {store}.{operation}'
+            span_attributes = {'db.system': 'sqlite', 'db.name': store, 'db.operation': operation}
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    with tracer.child_span(span_name, span_attributes):
+                        return func(*args, **kwargs)
+                except Exception:
+                    self.db_errors.inc(store, operation)
+                    raise
+                finally:
+                    self.db_writes.observe(time.perf_counter() - start, store, operation)
+            return wrapper
+        return decorator
+
+    def render(self) -> str:
+        """Prometheus文本格式"""
+        body = '\n'.join(family.render() for family in self.families)
+        uptime = time.time() - self.started_at
+        return (body + '\n# HELP poker_uptime_seconds 服务运行时间\n# TYPE poker_uptime_seconds gauge\n'
+                f'poker_uptime_seconds {uptime:.3f}\n')
+
+    def snapshot(self) -> Dict:
+        """JSON快照"""
+        return {
+            'uptime_seconds': round(time.time() - self.started_at, 3),
+            'socketio_events': self.socketio_events.snapshot(),
+            'socketio_errors': self.socketio_errors.snapshot(),
+            'engine_stages': self.engine_stages.snapshot(),
+            'bot_decisions': self.bot_decisions.snapshot(),
+            'db_writes': self.db_writes.snapshot(),
+            'db_errors': self.db_errors.snapshot()
+        }
+
+
+# 全局指标实例
+metrics = Metrics()
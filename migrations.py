@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+数据库结构迁移
+各个SQLite存储共用的版本化迁移：版本号保存在 PRAGMA user_version 中，
+启动时只执行尚未应用的迁移（已是最新版本时只读一次版本号）
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Union
+
+
+class Migration(NamedTuple):
+    """一个结构版本：SQL脚本或接收cursor的函数"""
+    version: int
+    description: str
+    apply: Union[str, Callable[[sqlite3.Cursor], None]]
+
+
+def add_column(cursor: sqlite3.Cursor, table: str, column: str, definition: str) -> bool:
+    """旧数据库缺少列时补上，返回是否新增"""
+    cursor.execute(f'PRAGMA table_info({table})')
+    if column in {row[1] for row in cursor.fetchall()}:
+        return False
+    cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    return True
+
+
+def _execute_script(cursor: sqlite3.Cursor, script: str):
+    # executescript 会先提交当前事务，这里逐条执行以保证迁移和版本号在同一事务中
+    for statement in script.split(';'):
+        if statement.strip():
+            cursor.execute(statement)
+
+
+class Migrator:
+    """执行迁移并记录每个存储的结构版本和耗时"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stores: Dict[str, Dict] = {}
+
+    def migrate(self, store: str, db_path: str, migrations: List[Migration]) -> int:
+        """
+        把数据库迁移到最新版本
+
+        Args:
+            store: 存储名（用于状态报告）
+            db_path: 数据库路径
+            migrations: 按版本号递增排列的迁移
+
+        Returns:
+            int: 迁移后的版本号
+        """
+        start = time.perf_counter()
+        latest = migrations[-1].version if migrations else 0
+        conn = sqlite3.connect(db_path, isolation_level=None, timeout=30)
+        try:
+            cursor = conn.cursor()
+            version = cursor.execute('PRAGMA user_version').fetchone()[0]
+            applied = []
+            if version < latest:
+                # IMMEDIATE 锁住写入，多个进程同时启动时只有一个执行迁移
+                cursor.execute('BEGIN IMMEDIATE')
+                try:
+                    version = cursor.execute('PRAGMA user_version').fetchone()[0]
+                    for migration in migrations:
+                        if migration.version <= version:
+                            continue
+                        if isinstance(migration.apply, str):
+                            _execute_script(cursor, migration.apply)
+                        else:
+                            migration.apply(cursor)
+                        cursor.execute(f'PRAGMA user_version = {int(migration.version)}')
+                        version = migration.version
+                        applied.append(migration)
+                    cursor.execute('COMMIT')
+                except Exception:
+                    cursor.execute('ROLLBACK')
+                    raise
+        finally:
+            conn.close()
+
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.stores[store] = {
+                'db_path': db_path,
+                'version': version,
+                'latest': latest,
+                'applied': [m.version for m in applied],
+                'seconds': round(elapsed, 4)
+            }
+        for migration in applied:
+            print(f"🗄️ {store} 迁移到版本 {migration.version}: {migration.description}")
+        return version
+
+    def optimize(self):
+        """对已迁移的数据库执行 PRAGMA optimize（定期维护）"""
+        with self.lock:
+            paths = {store: info['db_path'] for store, info in self.stores.items()}
+        for store, db_path in paths.items():
+            try:
+                conn = sqlite3.connect(db_path, timeout=30)
+                try:
+                    conn.execute('PRAGMA optimize')
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                print(f"⚠️ 优化数据库 {store} 失败: {e}")
+
+    def status(self) -> Dict[str, Dict]:
+        with self.lock:
+            return {store: dict(info) for store, info in self.stores.items()}
+
+
+# 全局迁移器
+migrator = Migrator()
+
+
+class LazySchema:
+    """
+    存储的延迟初始化
+
+    存储对象创建时不访问数据库，第一次使用（或启动预热）时才执行迁移和 on_ready
+    （如从流水重建内存余额）。初始化期间同一线程内的再次调用直接返回。
+    """
+
+    def __init__(self, store: str, db_path: str, migrations: List[Migration],
+                 on_ready: Optional[Callable[[], None]] = None):
+        self.store = store
+        self.db_path = db_path
+        self.migrations = migrations
+        self.on_ready = on_ready
+        self.version: Optional[int] = None
+        self.ready = False
+        self._initializing = False
+        self._lock = threading.RLock()
+
+    def ensure(self):
+        if self.ready:
+            return
+        with self._lock:
+            if self.ready or self._initializing:
+                return
+            self._initializing = True
+            try:
+                self.version = migrator.migrate(self.store, self.db_path, self.migrations)
+                if self.on_ready:
+                    self.on_ready()
+                self.ready = True
+            finally:
+                self._initializing = False
+
+
+def migrate(store: str, db_path: str, migrations: List[Migration]) -> int:
+    """把数据库迁移到最新版本的便捷函数"""
+    return migrator.migrate(store, db_path, migrations)
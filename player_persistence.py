@@ -10,91 +10,106 @@ import uuid
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 from enum import Enum
+from user_cache import UserCache
+from metrics import metrics
+from migrations import Migration, LazySchema
 
 class PlayerType(Enum):
     HUMAN = "human"
     BOT = "bot"
 
+
+def _create_tables(cursor):
+    """版本1：玩家、机器人信息、会话和统计表"""
+    # 玩家基础信息表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS players (
+            id TEXT PRIMARY KEY,
+            nickname TEXT NOT NULL,
+            player_type TEXT NOT NULL,
+            chips INTEGER NOT NULL DEFAULT 1000,
+            total_hands_played INTEGER DEFAULT 0,
+            total_wins INTEGER DEFAULT 0,
+            total_losses INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            is_active BOOLEAN DEFAULT 1
+        )
+    ''')
+
+    # 机器人特定信息表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bot_info (
+            player_id TEXT PRIMARY KEY,
+            bot_level TEXT NOT NULL,
+            aggression_level REAL DEFAULT 0.5,
+            tightness_level REAL DEFAULT 0.5,
+            bluff_frequency REAL DEFAULT 0.1,
+            learning_data TEXT,
+            FOREIGN KEY (player_id) REFERENCES players (id)
+        )
+    ''')
+
+    # 玩家会话记录表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            player_id TEXT NOT NULL,
+            table_id TEXT,
+            session_start TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            session_end TIMESTAMP,
+            starting_chips INTEGER,
+            ending_chips INTEGER,
+            hands_played INTEGER DEFAULT 0,
+            hands_won INTEGER DEFAULT 0,
+            FOREIGN KEY (player_id) REFERENCES players (id)
+        )
+    ''')
+
+    # 玩家统计表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_stats (
+            player_id TEXT PRIMARY KEY,
+            total_games INTEGER DEFAULT 0,
+            total_winnings INTEGER DEFAULT 0,
+            biggest_win INTEGER DEFAULT 0,
+            biggest_loss INTEGER DEFAULT 0,
+            win_rate REAL DEFAULT 0.0,
+            avg_session_duration INTEGER DEFAULT 0,
+            preferred_position TEXT,
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (player_id) REFERENCES players (id)
+        )
+    ''')
+
+
+MIGRATIONS = [
+    Migration(1, '创建玩家、机器人、会话和统计表', _create_tables),
+]
+
+
 class PlayerPersistence:
     def __init__(self, db_path: str = "players.db"):
         self.db_path = db_path
-        self.init_database()
+        self.cache = UserCache()
+        # 第一次访问数据库时才执行迁移
+        self.schema = LazySchema('players', db_path, MIGRATIONS)
+    
+    def get_connection(self) -> sqlite3.Connection:
+        """获取数据库连接（第一次使用时执行迁移）"""
+        self.schema.ensure()
+        return sqlite3.connect(self.db_path)
     
     def init_database(self):
-        """初始化数据库表"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # 玩家基础信息表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS players (
-                id TEXT PRIMARY KEY,
-                nickname TEXT NOT NULL,
-                player_type TEXT NOT NULL,
-                chips INTEGER NOT NULL DEFAULT 1000,
-                total_hands_played INTEGER DEFAULT 0,
-                total_wins INTEGER DEFAULT 0,
-                total_losses INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                is_active BOOLEAN DEFAULT 1
-            )
-        ''')
-        
-        # 机器人特定信息表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS bot_info (
-                player_id TEXT PRIMARY KEY,
-                bot_level TEXT NOT NULL,
-                aggression_level REAL DEFAULT 0.5,
-                tightness_level REAL DEFAULT 0.5,
-                bluff_frequency REAL DEFAULT 0.1,
-                learning_data TEXT,
-                FOREIGN KEY (player_id) REFERENCES players (id)
-            )
-        ''')
-        
-        # 玩家会话记录表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS player_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                player_id TEXT NOT NULL,
-                table_id TEXT,
-                session_start TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                session_end TIMESTAMP,
-                starting_chips INTEGER,
-                ending_chips INTEGER,
-                hands_played INTEGER DEFAULT 0,
-                hands_won INTEGER DEFAULT 0,
-                FOREIGN KEY (player_id) REFERENCES players (id)
-            )
-        ''')
-        
-        # 玩家统计表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS player_stats (
-                player_id TEXT PRIMARY KEY,
-                total_games INTEGER DEFAULT 0,
-                total_winnings INTEGER DEFAULT 0,
-                biggest_win INTEGER DEFAULT 0,
-                biggest_loss INTEGER DEFAULT 0,
-                win_rate REAL DEFAULT 0.0,
-                avg_session_duration INTEGER DEFAULT 0,
-                preferred_position TEXT,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (player_id) REFERENCES players (id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-        print("📊 玩家持久化数据库初始化完成")
+        """执行待处理的迁移"""
+        self.schema.ensure()
     
+    @metrics.timed_write('players')
     def create_human_player(self, nickname: str, initial_chips: int = 1000) -> str:
         """创建人类玩家"""
         player_id = str(uuid.uuid4())
         
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -114,6 +129,7 @@ class PlayerPersistence:
         print(f"👤 创建人类玩家: {nickname} (ID: {player_id})")
         return player_id
     
+    @metrics.timed_write('players')
     def create_bot_player(self, nickname: str, bot_level: str, 
                          initial_chips: int = 1000,
                          aggression: float = 0.5,
@@ -122,7 +138,7 @@ class PlayerPersistence:
         """创建机器人玩家"""
         player_id = str(uuid.uuid4())
         
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         # 创建基础玩家记录
@@ -152,7 +168,11 @@ class PlayerPersistence:
     
     def get_player(self, player_id: str) -> Optional[Dict]:
         """获取玩家信息"""
-        conn = sqlite3.connect(self.db_path)
+        cached = self.cache.get(player_id)
+        if cached:
+            return cached
+        
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -202,11 +222,13 @@ class PlayerPersistence:
                 })
         
         conn.close()
+        self.cache.put(player_data)
         return player_data
     
+    @metrics.timed_write('players')
     def update_player_chips(self, player_id: str, new_chips: int):
         """更新玩家筹码"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -218,11 +240,14 @@ class PlayerPersistence:
         conn.commit()
         conn.close()
         
+        # 写穿透缓存
+        self.cache.update(player_id, chips=new_chips)
         print(f"💰 更新玩家筹码: {player_id} -> {new_chips}")
     
+    @metrics.timed_write('players')
     def start_session(self, player_id: str, table_id: str, starting_chips: int) -> int:
         """开始游戏会话"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -237,10 +262,11 @@ class PlayerPersistence:
         print(f"🎮 开始游戏会话: 玩家{player_id} -> 会话{session_id}")
         return session_id
     
+    @metrics.timed_write('players')
     def end_session(self, session_id: int, ending_chips: int, 
                    hands_played: int, hands_won: int):
         """结束游戏会话"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -281,6 +307,7 @@ class PlayerPersistence:
                     last_active = CURRENT_TIMESTAMP
                 WHERE id = ?
             ''', (ending_chips, hands_played, hands_won, player_id))
+            self.cache.invalidate(player_id)
         
         conn.commit()
         conn.close()
@@ -289,7 +316,11 @@ class PlayerPersistence:
     
     def get_player_by_nickname(self, nickname: str) -> Optional[Dict]:
         """通过昵称获取玩家"""
-        conn = sqlite3.connect(self.db_path)
+        cached = self.cache.get_by_nickname(nickname)
+        if cached:
+            return cached
+        
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -308,7 +339,7 @@ class PlayerPersistence:
     
     def get_available_bots(self, level: str = None, limit: int = 10) -> List[Dict]:
         """获取可用的机器人"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         query = '''
@@ -344,23 +375,48 @@ class PlayerPersistence:
         conn.close()
         return bots
     
-    def update_bot_learning_data(self, player_id: str, learning_data: Dict):
+    def update_bot_learning_data(self, player_id: str, learning_data: Dict, bot_level: str = 'advanced'):
         """更新机器人学习数据"""
-        conn = sqlite3.connect(self.db_path)
+        self.update_bots_learning_data([(player_id, bot_level, learning_data)])
+    
+    @metrics.timed_write('players')
+    def update_bots_learning_data(self, entries: List[Tuple[str, str, Dict]]):
+        """批量更新机器人学习数据（一个事务），没有机器人记录时新建"""
+        if not entries:
+            return
+        
+        conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            UPDATE bot_info 
-            SET learning_data = ?
-            WHERE player_id = ?
-        ''', (json.dumps(learning_data), player_id))
+        cursor.executemany('''
+            INSERT INTO bot_info (player_id, bot_level, learning_data)
+            VALUES (?, ?, ?)
+            ON CONFLICT(player_id) DO UPDATE SET learning_data = excluded.learning_data
+        ''', [(player_id, bot_level, json.dumps(learning_data, separators=(',', ':')))
+              for player_id, bot_level, learning_data in entries])
         
         conn.commit()
         conn.close()
+        for player_id, _, learning_data in entries:
+            self.cache.update(player_id, learning_data=learning_data)
     
+    def get_bot_learning_data(self, player_id: str) -> Dict:
+        """读取机器人学习数据"""
+        cached = self.cache.get(player_id)
+        if cached is not None and 'learning_data' in cached:
+            return cached['learning_data']
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT learning_data FROM bot_info WHERE player_id = ?', (player_id,))
+        row = cursor.fetchone()
+        conn.close()
+        return json.loads(row[0]) if row and row[0] else {}
+    
+    @metrics.timed_write('players')
     def cleanup_inactive_players(self, days: int = 30):
         """清理非活跃玩家"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -374,6 +430,10 @@ class PlayerPersistence:
         conn.commit()
         conn.close()
         
+        # 被停用的玩家不能再从缓存中读到
+        if cleaned:
+            self.cache.clear()
+        
         print(f"🧹 清理了 {cleaned} 个非活跃玩家")
         return cleaned
 
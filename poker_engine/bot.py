@@ -3,16 +3,38 @@
 Bot AI for poker game
 """
 
-import random
-from typing import List, Tuple, Dict, Optional
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import List, NamedTuple, Tuple, Dict, Optional, Set
 from enum import Enum
 from .player import Player, PlayerAction, PlayerStatus
 from .card import Card, Suit, Rank
 from .hand_evaluator import HandEvaluator, HandRank
+from .outs import analyze_outs
+from .opponent_model import OpponentModel
+from .fast_eval import cards_mask
+from .exact_equity import pot_equity
+from .icm import call_threshold
+from .speculation import speculation_stats
+from .instrumentation import timed
+from .rng import fast_stream, numpy_generator, bulk_permutations
+try:
+    from .range_model import OpponentRange, range_equity
+except ImportError:  # NumPy是可选依赖，缺失时高级机器人退回均匀抽样
+    OpponentRange = None
 import itertools
 import math
 
 
+class OpponentView(NamedTuple):
+    """胜率计算输入快照中的对手（底牌为拷贝，范围为当时的权重数组）"""
+    id: str
+    nickname: str
+    hole_cards: Tuple[Card, ...]
+    weights: object
+
+
 class BotLevel(Enum):
     """机器人等级"""
     BEGINNER = "beginner"  # 初级
@@ -24,6 +46,16 @@ class BotLevel(Enum):
 class Bot(Player):
     """机器人玩家类"""
     
+    # 记住的对手数和手牌历史长度上限
+    OPPONENT_CAPACITY = 64
+    HAND_HISTORY_SIZE = 100
+    # 上帝级机器人每次决策计算权益的时间预算（秒）
+    GOD_TIME_BUDGET = 0.05
+    # 本街胜率估算的缓存条数
+    EQUITY_CACHE_SIZE = 4
+    # 锦标赛中全下决策的ICM蒙特卡洛样本数（大型比赛才会用到抽样）
+    ICM_SAMPLES = 2000
+    
     def __init__(self, player_id: str, nickname: str, chips: int = 1000, level: BotLevel = BotLevel.BEGINNER):
         """
         初始化机器人
@@ -36,8 +68,9 @@ class Bot(Player):
         """
         super().__init__(player_id, nickname, chips, is_bot=True)
         self.bot_level = level
-        self.hand_history = []  # 手牌历史
-        self.opponent_patterns = {}  # 对手行为模式
+        self.rng = fast_stream('bot')  # 本机器人独立的随机数流（决策和模拟）
+        self.hand_history = deque(maxlen=self.HAND_HISTORY_SIZE)  # 最近的手牌历史
+        self.opponent_model = OpponentModel(self.OPPONENT_CAPACITY)  # 对手统计（固定容量LRU）
         self.session_stats = {  # 会话统计
             'hands_played': 0,
             'vpip': 0,  # 主动入池率
@@ -46,7 +79,17 @@ class Bot(Player):
             'showdown_wins': 0,
             'total_showdowns': 0
         }
+        # 本街胜率估算缓存 {局面键: (结果, 计算耗时, 是否后台预计算)}，后台线程也会写入
+        self._equity_cache: 'OrderedDict[Tuple, Tuple]' = OrderedDict()
+        # 后台正在计算的局面（只用于避免重复预计算，决策时不等待）
+        self._equity_pending: Set[Tuple] = set()
+        self._equity_lock = threading.Lock()
+        # 听牌潜力只取决于底牌和公共牌：(底牌掩码, 公共牌掩码) -> 概率，整体替换（后台线程也会写入）
+        self._draw_cache: Tuple = (None, 0.0)
+        # 最近一次输入快照的 (手牌编号, 底牌掩码)，后台算完时用来判断局面是否已经过时
+        self._equity_hand: Tuple = (None, 0)
     
+    @timed('bot_decide', label=lambda self, *args, **kwargs: self.bot_level.value)
     def decide_action(self, game_state: Dict) -> Tuple[PlayerAction, int]:
         """
         根据游戏状态决定下一步动作
@@ -166,19 +209,19 @@ class Bot(Player):
             # 边际牌：考虑底池赔率和随机性
             if pot_odds > 0.3:  # 底池赔率好的时候弃牌
                 return PlayerAction.FOLD, 0
-            elif random.random() < 0.7:  # 70% 跟注
+            elif self.rng.random() < 0.7:  # 70% 跟注
                 return PlayerAction.CALL, call_amount
             else:
                 return PlayerAction.FOLD, 0
         elif hand_strength < 0.6:
             # 中等牌：基本跟注
-            if random.random() < 0.85:  # 85% 跟注
+            if self.rng.random() < 0.85:  # 85% 跟注
                 return PlayerAction.CALL, call_amount
             else:
                 return PlayerAction.FOLD, 0
         else:
             # 强牌：跟注或加注
-            if random.random() < 0.4:  # 40% 加注
+            if self.rng.random() < 0.4:  # 40% 加注
                 raise_amount = min(min_raise, self.chips)
                 if raise_amount > call_amount:
                     return PlayerAction.RAISE, raise_amount
@@ -203,7 +246,7 @@ class Bot(Player):
         
         # 改进的胜率计算
         if len(community_cards) >= 3:
-            win_probability = self._improved_monte_carlo(community_cards, num_opponents, 2000)
+            win_probability = self.street_equity(game_state)
         else:
             # Pre-flop 胜率表
             win_probability = self._preflop_win_rate(num_opponents)
@@ -221,7 +264,7 @@ class Bot(Player):
                 bet_size = self._calculate_bet_size(pot_size, adjusted_win_prob, 'value')
                 bet_amount = min(bet_size, self.chips)
                 return PlayerAction.BET, bet_amount
-            elif adjusted_win_prob > 0.25 and random.random() < 0.15:
+            elif adjusted_win_prob > 0.25 and self.rng.random() < 0.15:
                 # 小概率诈唬
                 bluff_size = self._calculate_bet_size(pot_size, adjusted_win_prob, 'bluff')
                 bet_amount = min(bluff_size, self.chips)
@@ -252,7 +295,7 @@ class Bot(Player):
                     return PlayerAction.CALL, call_amount
             elif adjusted_win_prob > 0.55:
                 # 中等牌小幅加注或跟注
-                if random.random() < 0.4:
+                if self.rng.random() < 0.4:
                     raise_size = min(int(1.5 * big_blind), self.chips - call_amount)
                     if raise_size > 0:
                         return PlayerAction.RAISE, call_amount + raise_size
@@ -261,7 +304,7 @@ class Bot(Player):
                 return PlayerAction.CALL, call_amount
         elif adjusted_win_prob > pot_odds - 0.05:
             # 边际决策
-            if random.random() < 0.3:
+            if self.rng.random() < 0.3:
                 return PlayerAction.CALL, call_amount
             else:
                 return PlayerAction.FOLD, 0
@@ -286,8 +329,7 @@ class Bot(Player):
         
         # 高级胜率计算
         if len(community_cards) >= 3:
-            win_probability = self._advanced_monte_carlo(community_cards, num_opponents, 3000)
-            hand_equity = self._calculate_hand_equity(community_cards)
+            win_probability, hand_equity = self.street_equity(game_state)
         else:
             win_probability = self._advanced_preflop_strategy(num_opponents, position)
             hand_equity = win_probability
@@ -304,7 +346,7 @@ class Bot(Player):
         
         # 诈唬频率计算 (基于GTO理论)
         bluff_frequency = self._calculate_optimal_bluff_frequency(pot_size, call_amount, position)
-        should_bluff = (random.random() < bluff_frequency and 
+        should_bluff = (self.rng.random() < bluff_frequency and 
                        adjusted_win_prob < 0.35 and 
                        betting_round >= 3)
         
@@ -316,7 +358,7 @@ class Bot(Player):
             elif adjusted_win_prob * position_factor > 0.6:
                 value_size = self._calculate_optimal_bet_size(pot_size, 'value', position)
                 return PlayerAction.BET, min(value_size, self.chips)
-            elif adjusted_win_prob > 0.3 and random.random() < 0.2:
+            elif adjusted_win_prob > 0.3 and self.rng.random() < 0.2:
                 # 小频率的阻挡下注
                 blocking_bet = min(int(0.3 * pot_size), self.chips)
                 return PlayerAction.BET, blocking_bet
@@ -330,7 +372,12 @@ class Bot(Player):
             effective_win_prob = adjusted_win_prob + implied_odds
             pot_odds = self.chips / (pot_size + self.chips)
             
-            if effective_win_prob > pot_odds * 1.1 or should_bluff:
+            # 锦标赛中按奖金期望（ICM）而不是筹码计算所需胜率
+            required = self._icm_call_threshold(game_state)
+            if required is None:
+                required = pot_odds * 1.1
+            
+            if effective_win_prob > required or should_bluff:
                 return PlayerAction.ALL_IN, self.chips
             else:
                 return PlayerAction.FOLD, 0
@@ -340,7 +387,7 @@ class Bot(Player):
         
         if should_bluff:
             # 诈唬策略
-            if random.random() < 0.6:  # 60% 加注诈唬
+            if self.rng.random() < 0.6:  # 60% 加注诈唬
                 bluff_raise = self._calculate_optimal_bet_size(pot_size + call_amount, 'bluff', position)
                 total_bet = call_amount + bluff_raise
                 if total_bet <= self.chips:
@@ -361,7 +408,7 @@ class Bot(Player):
                 # 强牌，适度加注
                 value_raise = self._calculate_optimal_bet_size(pot_size + call_amount, 'value', position)
                 total_bet = call_amount + value_raise
-                if total_bet <= self.chips and random.random() < 0.7:
+                if total_bet <= self.chips and self.rng.random() < 0.7:
                     return PlayerAction.RAISE, total_bet
                 else:
                     return PlayerAction.CALL, call_amount
@@ -369,7 +416,7 @@ class Bot(Player):
                 return PlayerAction.CALL, call_amount
         elif adjusted_win_prob * position_factor > pot_odds:
             # 边际价值，倾向跟注
-            if random.random() < 0.6:
+            if self.rng.random() < 0.6:
                 return PlayerAction.CALL, call_amount
             else:
                 return PlayerAction.FOLD, 0
@@ -458,9 +505,10 @@ class Bot(Player):
         
         return hand_strength * opponent_factor
     
-    def _improved_monte_carlo(self, community_cards: List[Card], num_opponents: int, simulations: int = 2000) -> float:
+    def _improved_monte_carlo(self, hole_cards: List[Card], community_cards: List[Card], num_opponents: int,
+                              simulations: int = 2000) -> float:
         """改进的蒙特卡洛模拟"""
-        if len(self.hole_cards) != 2:
+        if len(hole_cards) != 2:
             return 0.0
         
         wins = 0
@@ -475,13 +523,13 @@ class Bot(Player):
                 all_cards.append(Card(suit, rank))
         
         # 移除已知牌
-        known_cards = set(self.hole_cards + community_cards)
+        known_cards = set(hole_cards + community_cards)
         available_cards = [card for card in all_cards if card not in known_cards]
         
-        for _ in range(simulations):
-            # 随机洗牌
-            simulation_deck = available_cards.copy()
-            random.shuffle(simulation_deck)
+        # 一次生成全部模拟需要的发牌顺序（只取用得到的前几张）
+        cards_used = max(0, 5 - len(community_cards)) + 2 * num_opponents
+        for order in bulk_permutations(simulations, len(available_cards), self.rng, cards_used):
+            simulation_deck = [available_cards[i] for i in order]
             
             # 完成公共牌
             sim_community = community_cards.copy()
@@ -493,7 +541,7 @@ class Bot(Player):
                 deck_pos = 0
             
             # 计算我们的手牌强度
-            our_hand_rank, _ = HandEvaluator.evaluate_hand(self.hole_cards, sim_community)
+            our_hand_rank, _ = HandEvaluator.evaluate_hand(hole_cards, sim_community)
             
             # 模拟对手手牌
             better_opponents = 0
@@ -521,18 +569,37 @@ class Bot(Player):
         
         return (wins + ties * 0.5) / simulations if simulations > 0 else 0.0
     
-    def _advanced_monte_carlo(self, community_cards: List[Card], num_opponents: int, simulations: int = 3000) -> float:
-        """高级蒙特卡洛模拟，考虑对手范围"""
-        base_win_rate = self._improved_monte_carlo(community_cards, num_opponents, simulations)
-        
-        # 根据对手紧松度调整
-        avg_tightness = sum(pattern.get('tightness', 0.5) for pattern in self.opponent_patterns.values())
-        avg_tightness = avg_tightness / len(self.opponent_patterns) if self.opponent_patterns else 0.5
-        
-        # 紧的对手通常有更强的范围
-        tightness_adjustment = (avg_tightness - 0.5) * 0.1
-        
-        return max(0.05, min(0.95, base_win_rate - tightness_adjustment))
+    def _advanced_monte_carlo(self, hole_cards: List[Card], community_cards: List[Card], num_opponents: int,
+                              simulations: int = 3000, opponents: Optional[List[OpponentView]] = None) -> float:
+        """高级蒙特卡洛模拟：按每个对手的底牌范围加权抽样（范围对范围）"""
+        if OpponentRange is None or len(hole_cards) != 2:
+            return self._improved_monte_carlo(hole_cards, community_cards, num_opponents, simulations)
+        
+        # 仍在牌局中的对手，本手有观察记录的用其范围，否则均匀
+        ranges = [opponent.weights for opponent in opponents or []]
+        if not ranges:
+            ranges = [None] * num_opponents
+        
+        win_rate = range_equity(hole_cards, community_cards, ranges, simulations,
+                                rng=numpy_generator(self.rng))
+        return max(0.05, min(0.95, win_rate))
+    
+    def _icm_call_threshold(self, game_state: Dict) -> Optional[float]:
+        """锦标赛中用全部筹码跟注最大下注者所需的ICM胜率，不在锦标赛或没有奖金时为None"""
+        tournament = game_state.get('tournament')
+        if tournament is None or not tournament.payouts:
+            return None
+        opponents = [p for p in game_state.get('all_players', [])
+                     if p.id != self.id and p.status in (PlayerStatus.PLAYING, PlayerStatus.ALL_IN)]
+        if not opponents:
+            return None
+        villain = max(opponents, key=lambda p: p.current_bet)
+        ids, stacks = tournament.icm_stacks()
+        index = {player_id: i for i, player_id in enumerate(ids)}
+        if self.id not in index or villain.id not in index:
+            return None
+        return call_threshold(stacks, tournament.payouts, index[self.id], index[villain.id],
+                              game_state.get('pot_size', 0), self.chips, self.ICM_SAMPLES)
     
     def _advanced_preflop_strategy(self, num_opponents: int, position: str) -> float:
         """高级翻前策略"""
@@ -596,67 +663,43 @@ class Bot(Player):
         
         return max(0.02, min(0.25, base_frequency + position_bonus))
     
-    def _calculate_hand_equity(self, community_cards: List[Card]) -> float:
+    def _calculate_hand_equity(self, hole_cards: List[Card], community_cards: List[Card]) -> float:
         """计算手牌权益"""
         if len(community_cards) < 3:
             return self._evaluate_preflop_hand()
         
-        hand_rank, _ = HandEvaluator.evaluate_hand(self.hole_cards, community_cards)
+        hand_rank, _ = HandEvaluator.evaluate_hand(hole_cards, community_cards)
         base_equity = hand_rank.rank_value / 10.0
         
         # 考虑听牌可能性
         if len(community_cards) < 5:
-            draw_potential = self._calculate_draw_potential(community_cards)
+            draw_potential = self._calculate_draw_potential(hole_cards, community_cards)
             base_equity += draw_potential * 0.1
         
         return min(0.95, base_equity)
     
-    def _calculate_draw_potential(self, community_cards: List[Card]) -> float:
-        """计算听牌潜力"""
-        potential = 0.0
-        
-        all_cards = self.hole_cards + community_cards
-        
-        # 检查同花听牌
-        suit_counts = {}
-        for card in all_cards:
-            suit_counts[card.suit] = suit_counts.get(card.suit, 0) + 1
-        
-        max_suit_count = max(suit_counts.values()) if suit_counts else 0
-        if max_suit_count == 4:  # 同花听牌
-            potential += 0.4
-        elif max_suit_count == 3:  # 可能的同花听牌
-            potential += 0.1
-        
-        # 检查顺子听牌（简化版本）
-        ranks = sorted([card.rank.numeric_value for card in all_cards])
-        consecutive_count = 1
-        max_consecutive = 1
-        
-        for i in range(1, len(ranks)):
-            if ranks[i] == ranks[i-1] + 1:
-                consecutive_count += 1
-                max_consecutive = max(max_consecutive, consecutive_count)
-            else:
-                consecutive_count = 1
-        
-        if max_consecutive == 4:  # 顺子听牌
-            potential += 0.3
-        elif max_consecutive == 3:  # 可能的顺子听牌
-            potential += 0.1
+    def _calculate_draw_potential(self, hole_cards: List[Card], community_cards: List[Card]) -> float:
+        """计算听牌潜力：到河牌前做成顺子及以上牌型的概率"""
+        if len(hole_cards) != 2 or len(community_cards) >= 5:
+            return 0.0
         
-        return min(0.5, potential)
+        key = (cards_mask(hole_cards), cards_mask(community_cards))
+        cached_key, value = self._draw_cache
+        if cached_key != key:
+            # 翻牌圈的runner-runner枚举较重，同一条街只做一次（对手弃牌不影响结果）
+            value = min(0.5, analyze_outs(hole_cards, community_cards)['draw_probability'])
+            self._draw_cache = (key, value)
+        return value
     
     def _analyze_opponents(self, game_state: Dict) -> float:
-        """分析对手并调整策略"""
-        if not self.opponent_patterns:
+        """分析对手并调整策略（平均值由对手模型增量维护）"""
+        if not len(self.opponent_model):
             return 0.0
         
         adjustment = 0.0
         
         # 分析平均对手紧松度
-        avg_tightness = sum(p.get('tightness', 0.5) for p in self.opponent_patterns.values())
-        avg_tightness = avg_tightness / len(self.opponent_patterns)
+        avg_tightness = self.opponent_model.avg_tightness
         
         # 对紧的对手更保守
         if avg_tightness > 0.7:
@@ -665,8 +708,7 @@ class Bot(Player):
             adjustment += 0.05
         
         # 分析平均攻击性
-        avg_aggression = sum(p.get('aggression', 0.5) for p in self.opponent_patterns.values())
-        avg_aggression = avg_aggression / len(self.opponent_patterns)
+        avg_aggression = self.opponent_model.avg_aggression
         
         # 对激进的对手更小心
         if avg_aggression > 0.7:
@@ -678,11 +720,8 @@ class Bot(Player):
         """计算隐含赔率"""
         pot_size = game_state.get('pot_size', 0)
         
-        # 估算对手剩余筹码
-        opponent_stack_estimate = 0
-        for pattern in self.opponent_patterns.values():
-            # 这里可以根据对手历史行为估算其筹码量
-            opponent_stack_estimate += 500  # 简化估算
+        # 估算对手剩余筹码（简化：每个对手按500估算）
+        opponent_stack_estimate = 500 * len(self.opponent_model)
         
         if pot_size == 0:
             return 0.0
@@ -702,28 +741,166 @@ class Bot(Player):
             amount: 下注金额
             context: 游戏上下文
         """
-        if player_id not in self.opponent_patterns:
-            self.opponent_patterns[player_id] = {
-                'aggression': 0.5,  # 攻击性
-                'tightness': 0.5,   # 紧松度
-                'bluff_frequency': 0.1,  # 诈唬频率
-                'action_count': 0
-            }
-        
-        pattern = self.opponent_patterns[player_id]
-        pattern['action_count'] += 1
-        
-        # 更新攻击性
+        stats = self.opponent_model.touch(player_id)
+        stats.action_count += 1
+        
+        # 更新攻击性和紧松度
         if action in [PlayerAction.BET, PlayerAction.RAISE]:
-            pattern['aggression'] = min(1.0, pattern['aggression'] + 0.05)
+            self.opponent_model.adjust(stats, aggression=0.05, tightness=-0.02)
+        elif action == PlayerAction.CALL:
+            self.opponent_model.adjust(stats, tightness=-0.02)
         elif action == PlayerAction.FOLD:
-            pattern['aggression'] = max(0.0, pattern['aggression'] - 0.02)
+            self.opponent_model.adjust(stats, aggression=-0.02, tightness=0.03)
+        
+        # 高级机器人按动作似然更新对手的底牌范围（每手牌重新开始）
+        if OpponentRange is not None and self.bot_level == BotLevel.ADVANCED:
+            if stats.range is None:
+                stats.range = OpponentRange()
+            hand_number = context.get('hand_number')
+            if stats.range.hand_key != hand_number:
+                stats.range.reset(hand_number)
+            stats.range.observe(action.value, context.get('community_cards', []),
+                                amount, context.get('pot', 0))
+    
+    def export_learning_data(self) -> Dict:
+        """导出需要持久化的学习数据"""
+        return {
+            'opponents': self.opponent_model.export(),
+            'session_stats': dict(self.session_stats)
+        }
+    
+    def load_learning_data(self, learning_data: Optional[Dict]):
+        """恢复持久化的学习数据"""
+        if not learning_data:
+            return
+        self.opponent_model.load(learning_data.get('opponents', {}))
+        for key, value in learning_data.get('session_stats', {}).items():
+            if key in self.session_stats:
+                self.session_stats[key] = value
+    
+    def needs_equity(self, game_state: Dict) -> bool:
+        """本街的决策是否需要较重的胜率计算（翻前的中高级机器人只查表）"""
+        if len(self.hole_cards) != 2:
+            return False
+        if self.bot_level == BotLevel.GOD:
+            return True
+        if self.bot_level in (BotLevel.INTERMEDIATE, BotLevel.ADVANCED):
+            return len(game_state.get('community_cards', [])) >= 3
+        return False
+    
+    def equity_inputs(self, game_state: Dict) -> Dict:
+        """
+        在事件循环线程上拍下胜率计算的输入快照
         
-        # 更新紧松度
-        if action == PlayerAction.FOLD:
-            pattern['tightness'] = min(1.0, pattern['tightness'] + 0.03)
-        elif action in [PlayerAction.CALL, PlayerAction.BET, PlayerAction.RAISE]:
-            pattern['tightness'] = max(0.0, pattern['tightness'] - 0.02)
+        线程安全约定：预计算线程只读这里返回的快照（底牌和公共牌的元组、
+        对手底牌的拷贝、对手范围权重的拷贝），不读 game_state 中的玩家对象或对手模型，
+        这些只由事件循环线程修改；计算结果在 _equity_lock 下写入缓存。
+        """
+        hand_number = game_state.get('hand_number')
+        opponents = []
+        for player in game_state.get('all_players', []):
+            if player.id == self.id or player.status not in (PlayerStatus.PLAYING, PlayerStatus.ALL_IN):
+                continue
+            weights = None
+            if self.bot_level == BotLevel.ADVANCED and OpponentRange is not None:
+                stats = self.opponent_model.get(player.id)
+                if stats is not None and stats.range is not None and stats.range.hand_key == hand_number:
+                    weights = stats.range.weights.copy()
+            opponents.append(OpponentView(player.id, player.nickname, tuple(player.hole_cards), weights))
+        
+        hole_cards = tuple(self.hole_cards)
+        self._equity_hand = (hand_number, cards_mask(hole_cards))
+        return {
+            'hand_number': hand_number,
+            'hole_cards': hole_cards,
+            'community_cards': tuple(game_state.get('community_cards', [])),
+            'active_players': game_state.get('active_players', 2),
+            'opponents': opponents,
+        }
+    
+    @staticmethod
+    def _equity_key(inputs: Dict) -> Tuple:
+        """胜率估算的局面键：手牌编号、底牌、公共牌和仍在牌局中的对手"""
+        return (inputs['hand_number'], cards_mask(inputs['hole_cards']), cards_mask(inputs['community_cards']),
+                inputs['active_players'], tuple(opponent.id for opponent in inputs['opponents']))
+    
+    def _compute_equity(self, inputs: Dict):
+        """本街胜率估算中较重的部分，与下注尺度等决策逻辑分开以便提前计算（只读输入快照）"""
+        hole_cards = list(inputs['hole_cards'])
+        community_cards = list(inputs['community_cards'])
+        num_opponents = max(1, inputs['active_players'] - 1)
+        
+        if self.bot_level == BotLevel.INTERMEDIATE:
+            return self._improved_monte_carlo(hole_cards, community_cards, num_opponents, 2000)
+        if self.bot_level == BotLevel.ADVANCED:
+            return (self._advanced_monte_carlo(hole_cards, community_cards, num_opponents, 3000,
+                                               inputs['opponents']),
+                    self._calculate_hand_equity(hole_cards, community_cards))
+        
+        contenders = [opponent for opponent in inputs['opponents'] if len(opponent.hole_cards) == 2]
+        hands = [cards_mask(hole_cards)] + [cards_mask(opponent.hole_cards) for opponent in contenders]
+        equities, runouts, exact = pot_equity(hands, cards_mask(community_cards), len(community_cards),
+                                              self.GOD_TIME_BUDGET, rng=self.rng)
+        return contenders, equities, runouts, exact
+    
+    def _store_equity(self, key: Tuple, value, cost: float, speculative: bool) -> bool:
+        """写入缓存，返回是否写入；后台算完时同一局面已由决策现场算出则丢弃"""
+        with self._equity_lock:
+            if speculative and key in self._equity_cache:
+                return False
+            self._equity_cache[key] = (value, cost, speculative)
+            self._equity_cache.move_to_end(key)
+            while len(self._equity_cache) > self.EQUITY_CACHE_SIZE:
+                self._equity_cache.popitem(last=False)
+        return True
+    
+    def street_equity(self, game_state: Dict):
+        """
+        读取本街的胜率估算，未预计算时现场计算
+        
+        高级机器人的预计算使用当时的对手范围，之后同一条街上的动作要到下一条街才反映出来。
+        后台正在计算同一局面时也不等待（决策在事件循环线程上，等待会阻塞所有牌桌），
+        直接现场计算，后台的结果到时丢弃。
+        """
+        inputs = self.equity_inputs(game_state)
+        key = self._equity_key(inputs)
+        with self._equity_lock:
+            entry = self._equity_cache.get(key)
+        
+        if entry is not None:
+            value, cost, speculative = entry
+            speculation_stats.record_hit(cost, speculative)
+            return value
+        
+        start = time.perf_counter()
+        value = self._compute_equity(inputs)
+        cost = time.perf_counter() - start
+        self._store_equity(key, value, cost, False)
+        speculation_stats.record_miss(cost)
+        return value
+    
+    def precompute_equity(self, inputs: Dict) -> bool:
+        """后台预计算本街的胜率估算（由预计算线程调用，inputs 为 equity_inputs 的快照），返回是否写入了缓存"""
+        key = self._equity_key(inputs)
+        with self._equity_lock:
+            if key in self._equity_cache or key in self._equity_pending:
+                return False
+            self._equity_pending.add(key)
+        
+        try:
+            start = time.perf_counter()
+            value = self._compute_equity(inputs)
+            cost = time.perf_counter() - start
+        finally:
+            with self._equity_lock:
+                self._equity_pending.discard(key)
+        
+        # 计算期间开始了新的一手（底牌变化），或决策已经现场算过同一局面时结果作废
+        if self._equity_hand != key[:2] or not self._store_equity(key, value, cost, True):
+            speculation_stats.record_discard()
+            return False
+        speculation_stats.record_precompute(cost)
+        return True
     
     def _god_strategy(self, game_state: Dict) -> Tuple[PlayerAction, int]:
         """
@@ -732,52 +909,21 @@ class Bot(Player):
         if self.chips <= 0:
             return PlayerAction.FOLD, 0
         
-        community_cards = game_state.get('community_cards', [])
         current_bet = game_state.get('current_bet', 0)
         big_blind = game_state.get('big_blind', 20)
         pot_size = game_state.get('pot_size', 0)
-        all_players = game_state.get('all_players', [])
-        active_players = [p for p in all_players if p.status.value == 'playing' and p.id != self.id]
         
         print(f"🔮 德州扑克之神 {self.nickname} 开始分析...")
         print(f"  - 我的手牌: {[f'{c.rank.symbol}{c.suit.value}' for c in self.hole_cards]}")
         
-        # 🔮 上帝视角：分析所有玩家手牌
-        if len(community_cards) >= 3:
-            # 计算所有玩家的真实手牌强度
-            all_hand_strengths = {}
-            for player in active_players:
-                if hasattr(player, 'hole_cards') and player.hole_cards:
-                    hand_rank, _ = HandEvaluator.evaluate_hand(player.hole_cards, community_cards)
-                    all_hand_strengths[player.id] = hand_rank.rank_value
-                    print(f"  - {player.nickname}: {[f'{c.rank.symbol}{c.suit.value}' for c in player.hole_cards]} = {hand_rank.name}")
-            
-            # 计算我的手牌强度
-            my_hand_rank, _ = HandEvaluator.evaluate_hand(self.hole_cards, community_cards)
-            my_strength = my_hand_rank.rank_value
-            print(f"  - 我的牌力: {my_hand_rank.name} (强度: {my_strength})")
-            
-            # 判断我是否有最强手牌
-            stronger_opponents = [s for s in all_hand_strengths.values() if s > my_strength]
-            equal_opponents = [s for s in all_hand_strengths.values() if s == my_strength]
-            
-            if len(stronger_opponents) == 0:
-                # 我有最强手牌 - 坚果牌
-                win_probability = 1.0
-                print(f"  - 🏆 上帝判断: 我有坚果牌!")
-            elif len(stronger_opponents) == 1 and len(equal_opponents) == 0:
-                # 我是第二强
-                win_probability = 0.05
-                print(f"  - 🥈 上帝判断: 我是第二强，但会输")
-            else:
-                # 我比较弱
-                win_probability = 0.0
-                print(f"  - 💀 上帝判断: 我的牌很弱")
-        else:
-            # Pre-flop: 使用高级策略但略微激进
-            win_probability = self._advanced_preflop_strategy(len(active_players), 'late')
-            win_probability = min(0.95, win_probability * 1.1)  # 稍微提升自信
-            print(f"  - 🔮 Pre-flop上帝判断: 胜率 {win_probability:.2f}")
+        # 🔮 上帝视角：所有底牌已知，枚举剩余公共牌计算精确的底池权益
+        contenders, equities, runouts, exact = self.street_equity(game_state)
+        win_probability = equities[0]
+        
+        for player, equity in zip(contenders, equities[1:]):
+            print(f"  - {player.nickname}: {[f'{c.rank.symbol}{c.suit.value}' for c in player.hole_cards]} 权益 {equity:.3f}")
+        print(f"  - 🔮 上帝判断: 我的底池权益 {win_probability:.3f} "
+              f"({'精确枚举' if exact else '抽样估算'} {runouts} 种发牌)")
         
         call_amount = current_bet - self.current_bet
         
@@ -796,7 +942,7 @@ class Bot(Player):
                 return PlayerAction.BET, bet_amount
             elif win_probability <= 0.1:
                 # 垃圾牌 - 随机诈唬
-                if random.random() < 0.15:  # 15%诈唬频率
+                if self.rng.random() < 0.15:  # 15%诈唬频率
                     bluff_amount = min(int(pot_size * 0.6), self.chips)
                     print(f"  - 🎭 上帝决策: 完美诈唬 ${bluff_amount}")
                     return PlayerAction.BET, bluff_amount
@@ -832,7 +978,7 @@ class Bot(Player):
                 return PlayerAction.CALL, call_amount
         elif win_probability >= 0.5:
             # 强牌 - 跟注或小加注
-            if random.random() < 0.6:  # 60%概率加注
+            if self.rng.random() < 0.6:  # 60%概率加注
                 raise_amount = min(int(big_blind * 2), self.chips - call_amount)
                 if raise_amount >= big_blind // 2:
                     total_bet = call_amount + raise_amount
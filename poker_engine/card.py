@@ -81,6 +81,9 @@ class Card:
 class Deck:
     """牌堆类"""
     
+    # 完整的52张牌（牌对象不会被修改，各牌堆共用同一组对象）
+    FULL_DECK = tuple(Card(suit, rank) for suit in Suit for rank in Rank)
+    
     def __init__(self):
         """初始化一副完整的扑克牌（52张）"""
         self.cards: List[Card] = []
@@ -88,16 +91,16 @@ class Deck:
     
     def reset(self):
         """重置牌堆，生成完整的52张牌"""
-        self.cards = []
-        for suit in Suit:
-            for rank in Rank:
-                self.cards.append(Card(suit, rank))
-    
-    def shuffle(self):
-        """使用Fisher-Yates算法洗牌"""
-        for i in range(len(self.cards) - 1, 0, -1):
-            j = random.randint(0, i)
-            self.cards[i], self.cards[j] = self.cards[j], self.cards[i]
+        self.cards = list(self.FULL_DECK)
+    
+    def shuffle(self, rng: Optional[random.Random] = None):
+        """
+        使用Fisher-Yates算法洗牌
+        
+        Args:
+            rng: 随机数生成器（牌桌传入由手牌种子确定的生成器），None时使用全局 random
+        """
+        (rng or random).shuffle(self.cards)
     
     def deal_card(self) -> Optional[Card]:
         """
@@ -0,0 +1,80 @@
+"""
+记牌器
+Incremental per-hand card tracker
+"""
+
+import json
+from typing import Dict, List, Optional
+
+from .card import Card
+from .fast_eval import SUITS, RANKS, SUIT_INDEX, RANK_INDEX, card_bit
+from .outs import analyze_outs
+
+
+class CardTracker:
+    """每手牌的已知牌掩码和按花色/点数的剩余计数，只在发公共牌时增量更新"""
+
+    __slots__ = ('known_mask', 'known_cards', 'suit_remaining', 'rank_remaining', '_payload', '_payload_street',
+                 '_outs')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """新的一手牌开始时清空"""
+        self.known_mask = 0
+        self.known_cards: List[Card] = []
+        self.suit_remaining = [13] * len(SUITS)
+        self.rank_remaining = [4] * len(RANKS)
+        self._payload: Optional[str] = None
+        self._payload_street: Optional[str] = None
+        # player_id -> 本街outs分析的JSON
+        self._outs: Dict[str, str] = {}
+
+    def add_cards(self, cards: List[Card]):
+        """记录新发出的公共牌"""
+        for card in cards:
+            bit = card_bit(card)
+            if self.known_mask & bit:
+                continue
+            self.known_mask |= bit
+            self.known_cards.append(card)
+            self.suit_remaining[SUIT_INDEX[card.suit]] -= 1
+            self.rank_remaining[RANK_INDEX[card.rank]] -= 1
+        self._payload = None
+        self._outs = {}
+
+    @property
+    def total_remaining(self) -> int:
+        return 52 - len(self.known_cards)
+
+    def to_dict(self) -> dict:
+        """记牌信息"""
+        return {
+            'known_cards': [card.to_dict() for card in self.known_cards],
+            'remaining_cards': {
+                'suits': {suit.value: n for suit, n in zip(SUITS, self.suit_remaining)},
+                'ranks': {rank.symbol: n for rank, n in zip(RANKS, self.rank_remaining)},
+                'total_remaining': self.total_remaining
+            }
+        }
+
+    def payload(self, street: str) -> str:
+        """当前街的记牌信息JSON，每条街只序列化一次"""
+        if self._payload is None or self._payload_street != street:
+            self._payload = json.dumps(self.to_dict(), ensure_ascii=False, separators=(',', ':'))
+            self._payload_street = street
+            self._outs = {}
+        return self._payload
+
+    def outs_payload(self, player_id: str, street: str, hole_cards: List[Card], community_cards: List[Card]) -> str:
+        """玩家本街outs分析的JSON（翻牌和转牌圈，其它时候为null），每条街每名玩家只计算一次"""
+        if self._payload_street != street:
+            self.payload(street)
+        cached = self._outs.get(player_id)
+        if cached is None:
+            outs = None
+            if len(hole_cards) == 2 and 3 <= len(community_cards) < 5:
+                outs = analyze_outs(hole_cards, community_cards)
+            cached = self._outs[player_id] = json.dumps(outs, ensure_ascii=False)
+        return cached
@@ -0,0 +1,122 @@
+"""
+精确胜率枚举
+Exact pot equity by enumerating runouts when every hand is known
+
+所有玩家的底牌都已知时，翻牌圈最多990种、转牌圈最多44种剩余发牌，可以直接枚举。
+翻前的组合太多，在时间预算内随机抽样。结果按 (各玩家底牌, 公共牌) 缓存，
+同一手牌里重复决策或同桌多个机器人共享。
+"""
+
+import random
+import threading
+import time
+from collections import OrderedDict
+from itertools import combinations
+from typing import List, Optional, Tuple
+
+from .fast_eval import FULL_DECK, evaluate_mask
+
+
+# 不超过这么多张待发公共牌时完整枚举（翻牌圈2张、转牌圈1张）
+MAX_ENUMERATED_CARDS = 2
+# 每枚举这么多次检查一次时间预算
+CHECK_EVERY = 64
+# 翻前抽样的上限（精度足够后不再用满预算）
+MAX_SAMPLES = 5000
+
+_cache: 'OrderedDict[Tuple, Tuple[List[float], int, bool]]' = OrderedDict()
+_cache_lock = threading.Lock()
+CACHE_SIZE = 256
+
+stats = {'hits': 0, 'misses': 0, 'exact': 0, 'sampled': 0}
+
+
+def _award(shares: List[float], hands: List[int], board: int):
+    """按一个完整公共牌结算：最强者平分底池"""
+    best = -1
+    winners = []
+    for i, hand in enumerate(hands):
+        score = evaluate_mask(hand | board)
+        if score > best:
+            best, winners = score, [i]
+        elif score == best:
+            winners.append(i)
+    share = 1.0 / len(winners)
+    for i in winners:
+        shares[i] += share
+
+
+def pot_equity(hands: List[int], board_mask: int, board_cards: int, time_budget: float = 0.05,
+               rng: Optional[random.Random] = None) -> Tuple[List[float], int, bool]:
+    """
+    计算每手牌的底池权益
+
+    Args:
+        hands: 每个玩家两张底牌的52位掩码
+        board_mask: 已发公共牌的掩码
+        board_cards: 已发公共牌张数
+        time_budget: 时间预算（秒），超出时用已经结算的发牌估算
+        rng: 随机数生成器
+
+    Returns:
+        Tuple[List[float], int, bool]: (每手牌的权益, 结算的发牌数, 是否精确)
+    """
+    # 按底牌排序作为缓存键，不同机器人传入的顺序不同也能命中
+    ordered = sorted(hands)
+    key = (tuple(ordered), board_mask)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            stats['hits'] += 1
+    if cached is None:
+        cached = _enumerate(ordered, board_mask, board_cards, time_budget, rng or random)
+        with _cache_lock:
+            stats['misses'] += 1
+            stats['exact' if cached[2] else 'sampled'] += 1
+            _cache[key] = cached
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    equities, runouts, exact = cached
+    by_hand = dict(zip(ordered, equities))
+    return [by_hand[hand] for hand in hands], runouts, exact
+
+
+def _enumerate(hands: List[int], board_mask: int, board_cards: int, time_budget: float,
+               rng: random.Random) -> Tuple[List[float], int, bool]:
+    """枚举或抽样剩余公共牌"""
+    deadline = time.perf_counter() + time_budget
+    shares = [0.0] * len(hands)
+    need = 5 - board_cards
+
+    used = board_mask
+    for hand in hands:
+        used |= hand
+    deck = [1 << i for i in range(52) if (FULL_DECK & ~used) >> i & 1]
+
+    runouts = 0
+    exact = True
+    if need == 0:
+        _award(shares, hands, board_mask)
+        runouts = 1
+    elif need <= MAX_ENUMERATED_CARDS:
+        # 完整枚举（打乱顺序，超时时已结算的部分仍是无偏样本）
+        boards = [sum(cards) for cards in combinations(deck, need)]
+        rng.shuffle(boards)
+        for runout in boards:
+            _award(shares, hands, board_mask | runout)
+            runouts += 1
+            if runouts % CHECK_EVERY == 0 and time.perf_counter() > deadline:
+                exact = runouts == len(boards)
+                break
+    else:
+        # 翻前：在预算内随机抽样
+        exact = False
+        while True:
+            _award(shares, hands, board_mask | sum(rng.sample(deck, need)))
+            runouts += 1
+            if runouts >= MAX_SAMPLES or (runouts % CHECK_EVERY == 0 and time.perf_counter() > deadline):
+                break
+
+    return [share / runouts for share in shares], runouts, exact
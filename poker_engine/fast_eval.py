@@ -0,0 +1,159 @@
+"""
+位掩码快速手牌评估
+Bitmask hand evaluator (same results as HandEvaluator.evaluate_hand)
+
+牌编码为 0-51 的整数：花色序号 * 13 + (点数 - 2)，一手牌是52位掩码。
+评估结果打包为一个整数分数，可直接比较大小。
+"""
+
+from typing import Iterable, List, Tuple
+
+from .card import Card, Suit, Rank
+from .hand_evaluator import HandRank
+
+
+SUITS = list(Suit)
+RANKS = list(Rank)
+SUIT_INDEX = {suit: i for i, suit in enumerate(SUITS)}
+RANK_INDEX = {rank: i for i, rank in enumerate(RANKS)}
+
+RANK_MASK = 0x1FFF
+FULL_DECK = (1 << 52) - 1
+
+# 分数 -> 牌型
+HAND_RANKS = {hand_rank.rank_value: hand_rank for hand_rank in HandRank}
+
+# 顺子窗口（最高牌点数, 5位掩码），从A高到5高
+STRAIGHT_WINDOWS = [(high, 0x1F << (high - 6)) for high in range(14, 5, -1)] + [(5, 0x100F)]
+
+
+def _build_tables():
+    """预计算13位点数掩码的位数、顺子最高牌和降序点数列表"""
+    popcount = [0] * 8192
+    straight_high = [0] * 8192
+    ranks_desc = [()] * 8192
+    for mask in range(8192):
+        popcount[mask] = bin(mask).count('1')
+        ranks_desc[mask] = tuple(i + 2 for i in range(12, -1, -1) if mask >> i & 1)
+        for high, window in STRAIGHT_WINDOWS:
+            if mask & window == window:
+                straight_high[mask] = high
+                break
+    return popcount, straight_high, ranks_desc
+
+
+POPCOUNT, STRAIGHT_HIGH, RANKS_DESC = _build_tables()
+
+
+def card_index(card: Card) -> int:
+    """牌 -> 0-51"""
+    return SUIT_INDEX[card.suit] * 13 + RANK_INDEX[card.rank]
+
+
+def card_bit(card: Card) -> int:
+    """牌在52位掩码中的位"""
+    return 1 << card_index(card)
+
+
+def cards_mask(cards: Iterable[Card]) -> int:
+    """牌列表 -> 52位掩码"""
+    mask = 0
+    for card in cards:
+        mask |= card_bit(card)
+    return mask
+
+
+def mask_cards(mask: int) -> List[Card]:
+    """52位掩码 -> 牌列表"""
+    return [Card(SUITS[i // 13], RANKS[i % 13]) for i in range(52) if mask >> i & 1]
+
+
+def _score(hand_rank: HandRank, kickers: Iterable[int]) -> int:
+    """(牌型, 关键牌) -> 整数分数：牌型占高位，关键牌每个4位，不足5个补0"""
+    score = hand_rank.rank_value
+    count = 0
+    for kicker in kickers:
+        score = (score << 4) | kicker
+        count += 1
+    return score << (4 * (5 - count))
+
+
+def decode_score(score: int) -> Tuple[HandRank, List[int]]:
+    """整数分数 -> (牌型, 关键牌列表)"""
+    kickers = [(score >> (4 * i)) & 0xF for i in range(4, -1, -1)]
+    while kickers and kickers[-1] == 0:
+        kickers.pop()
+    return HAND_RANKS[score >> 20], kickers
+
+
+def evaluate_mask(mask: int) -> int:
+    """评估掩码中的牌（最多7张），返回整数分数"""
+    s0 = mask & RANK_MASK
+    s1 = (mask >> 13) & RANK_MASK
+    s2 = (mask >> 26) & RANK_MASK
+    s3 = (mask >> 39) & RANK_MASK
+
+    any_rank = s0 | s1 | s2 | s3
+    card_count = POPCOUNT[s0] + POPCOUNT[s1] + POPCOUNT[s2] + POPCOUNT[s3]
+
+    if card_count >= 5:
+        # 同花 / 同花顺
+        for suited in (s0, s1, s2, s3):
+            if POPCOUNT[suited] >= 5:
+                high = STRAIGHT_HIGH[suited]
+                if high == 14:
+                    return _score(HandRank.ROYAL_FLUSH, (14,))
+                if high:
+                    return _score(HandRank.STRAIGHT_FLUSH, (high,))
+                flush = _score(HandRank.FLUSH, RANKS_DESC[suited][:5])
+                break
+        else:
+            flush = 0
+    else:
+        flush = 0
+
+    # 按出现次数拆分点数
+    two_plus = (s0 & s1) | (s0 & s2) | (s0 & s3) | (s1 & s2) | (s1 & s3) | (s2 & s3)
+    three_plus = (s0 & s1 & s2) | (s0 & s1 & s3) | (s0 & s2 & s3) | (s1 & s2 & s3)
+    quads = s0 & s1 & s2 & s3
+
+    if quads:
+        quad = RANKS_DESC[quads][0]
+        others = RANKS_DESC[any_rank & ~(1 << (quad - 2))]
+        return _score(HandRank.FOUR_OF_A_KIND, (quad, others[0] if others else 0))
+
+    trips = RANKS_DESC[three_plus]
+    pairs = RANKS_DESC[two_plus & ~three_plus]
+    if trips and (len(trips) > 1 or pairs):
+        pair = max(trips[1] if len(trips) > 1 else 0, pairs[0] if pairs else 0)
+        return _score(HandRank.FULL_HOUSE, (trips[0], pair))
+
+    if flush:
+        return flush
+
+    if card_count >= 5:
+        high = STRAIGHT_HIGH[any_rank]
+        if high:
+            return _score(HandRank.STRAIGHT, (high,))
+
+    if trips:
+        return _score(HandRank.THREE_OF_A_KIND, (trips[0],) + RANKS_DESC[any_rank & ~three_plus][:2])
+
+    if len(pairs) >= 2:
+        kept = (1 << (pairs[0] - 2)) | (1 << (pairs[1] - 2))
+        return _score(HandRank.TWO_PAIR, pairs[:2] + RANKS_DESC[any_rank & ~kept][:1])
+
+    if pairs:
+        return _score(HandRank.PAIR, (pairs[0],) + RANKS_DESC[any_rank & ~two_plus][:3])
+
+    return _score(HandRank.HIGH_CARD, RANKS_DESC[any_rank][:5])
+
+
+def evaluate(hole_cards: List[Card], community_cards: List[Card]) -> Tuple[HandRank, List[int]]:
+    """与 HandEvaluator.evaluate_hand 相同的接口和结果"""
+    return decode_score(evaluate_mask(cards_mask(hole_cards) | cards_mask(community_cards)))
+
+
+def category_of(score: int) -> int:
+    """分数对应的牌型等级（1-10）"""
+    return score >> 20
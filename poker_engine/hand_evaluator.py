@@ -262,52 +262,11 @@ class HandEvaluator:
         Returns:
             Dict[str, int]: 各种改善的outs数量
         """
-        # 简化版本的outs计算
-        all_cards = hole_cards + community_cards
-        seen_cards = set((card.suit, card.rank) for card in all_cards)
-        
-        # 创建剩余牌组
-        remaining_cards = []
-        for suit in Suit:
-            for rank in Rank:
-                if (suit, rank) not in seen_cards:
-                    remaining_cards.append(Card(suit, rank))
-        
-        current_hand = HandEvaluator.evaluate_hand(hole_cards, community_cards)
-        
-        outs = {
-            "pair": 0,
-            "two_pair": 0,
-            "three_of_a_kind": 0,
-            "straight": 0,
-            "flush": 0,
-            "full_house": 0,
-            "four_of_a_kind": 0,
-            "straight_flush": 0
-        }
-        
-        # 检查每张剩余的牌
-        for card in remaining_cards:
-            new_community = community_cards + [card]
-            new_hand = HandEvaluator.evaluate_hand(hole_cards, new_community)
-            
-            if new_hand[0].rank_value > current_hand[0].rank_value:
-                # 手牌得到改善
-                if new_hand[0] == HandRank.PAIR:
-                    outs["pair"] += 1
-                elif new_hand[0] == HandRank.TWO_PAIR:
-                    outs["two_pair"] += 1
-                elif new_hand[0] == HandRank.THREE_OF_A_KIND:
-                    outs["three_of_a_kind"] += 1
-                elif new_hand[0] == HandRank.STRAIGHT:
-                    outs["straight"] += 1
-                elif new_hand[0] == HandRank.FLUSH:
-                    outs["flush"] += 1
-                elif new_hand[0] == HandRank.FULL_HOUSE:
-                    outs["full_house"] += 1
-                elif new_hand[0] == HandRank.FOUR_OF_A_KIND:
-                    outs["four_of_a_kind"] += 1
-                elif new_hand[0] == HandRank.STRAIGHT_FLUSH:
-                    outs["straight_flush"] += 1
-        
-        return outs 
\ No newline at end of file
+        # 位掩码outs引擎（延迟导入，避免与 fast_eval 循环依赖）
+        from .outs import analyze_outs
+        
+        outs = analyze_outs(hole_cards, community_cards, runner_runner=False)['outs']
+        if target_hands:
+            keys = {hand.name.lower() for hand in target_hands}
+            outs = {key: count for key, count in outs.items() if key in keys}
+        return outs
@@ -0,0 +1,120 @@
+"""
+手牌事件流
+Compact per-hand event stream (deck permutation, actions, stage transitions)
+
+每手牌记录为一串只追加的事件（JSON列表，牌用0-51的索引）：
+
+    ['start', 手牌前状态, 牌堆顺序, 手牌种子]  开始新一手（输入，牌堆顺序由手牌种子确定）
+    ['act', player_id, 动作, 金额]         真人动作（输入）
+    ['bot', player_id, 动作或None, 金额]   机器人决策（输入，None表示决策失败走兜底）
+    ['join', 座位, 玩家记录]              手牌进行中入座（输入）
+    ['leave', player_id]                  手牌进行中离座（输入）
+    ['stage', 阶段, 公共牌]               进入下一阶段（由输入推导，重放时用于校验）
+    ['end', [[player_id, 筹码], ...]]     手牌结束后的筹码（由输入推导，重放时用于校验）
+
+牌桌通过 instrumentation.set_hand_sink 注入的接收函数输出事件，未注入时不构建事件。
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .fast_eval import card_index
+from .player import PlayerStatus
+
+START = 'start'
+ACTION = 'act'
+BOT = 'bot'
+JOIN = 'join'
+LEAVE = 'leave'
+STAGE = 'stage'
+END = 'end'
+
+# 重放时由驱动方调用牌桌方法应用的事件；其余事件由牌桌在重放中自行产生并校验
+INPUT_EVENTS = (START, ACTION, BOT, JOIN, LEAVE)
+
+
+def encode_cards(cards) -> List[int]:
+    return [card_index(card) for card in cards]
+
+
+def player_record(player, seat: Optional[int]) -> list:
+    """[座位, id, 昵称, 筹码, 状态, 机器人等级或None]"""
+    level = getattr(player, 'bot_level', None)
+    # 开始下一轮时状态可能被直接设置为字符串
+    return [seat, player.id, player.nickname, player.chips, PlayerStatus(player.status).value,
+            level.value if level is not None else None]
+
+
+def table_header(table) -> Dict:
+    """开始新一手之前的牌桌状态（重放的起点）"""
+    return {
+        'hand_number': table.hand_number,
+        'dealer_position': table.dealer_position,
+        'config': [table.small_blind, table.big_blind, table.max_players, table.initial_chips,
+                   table.game_mode, table.ante_percentage],
+        'players': [player_record(p, table.get_player_position(p.id)) for p in table.players]
+    }
+
+
+class HandLog:
+    """一手牌的事件流"""
+
+    __slots__ = ('table_id', 'hand_number', 'events')
+
+    def __init__(self, table_id: str, hand_number: int, events: Optional[List[list]] = None):
+        self.table_id = table_id
+        self.hand_number = hand_number
+        self.events = events if events is not None else []
+
+    @property
+    def complete(self) -> bool:
+        return bool(self.events) and self.events[-1][0] == END
+
+    def to_dict(self) -> Dict:
+        return {'table_id': self.table_id, 'hand_number': self.hand_number, 'events': self.events}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'HandLog':
+        return cls(data['table_id'], data['hand_number'], data['events'])
+
+
+class HandRecorder:
+    """
+    按牌桌把事件汇集成 HandLog
+
+    可以直接作为 set_hand_sink 的接收函数；on_hand 在每手牌结束（或被下一手的开始打断）时调用。
+    """
+
+    def __init__(self, on_hand: Optional[Callable[[HandLog], None]] = None):
+        self.on_hand = on_hand
+        self.open: Dict[str, HandLog] = {}
+
+    def __call__(self, table_id: str, hand_number: int, event: list):
+        self.add(table_id, hand_number, event)
+
+    def add(self, table_id: str, hand_number: int, event: list):
+        hand = self.open.get(table_id)
+        if event[0] == START or hand is None or hand.hand_number != hand_number:
+            if hand is not None:
+                self._close(table_id)
+            if event[0] != START:
+                # 没有开始事件的残缺手牌无法重放，丢弃
+                return
+            hand = self.open[table_id] = HandLog(table_id, hand_number)
+        hand.events.append(event)
+        if event[0] == END:
+            self._close(table_id)
+
+    def _close(self, table_id: str):
+        hand = self.open.pop(table_id)
+        if self.on_hand:
+            self.on_hand(hand)
+
+
+def group_hands(records: Iterable[Tuple[str, int, list]]) -> List[HandLog]:
+    """把按时间顺序交错的 (table_id, hand_number, event) 分组为手牌（含未结束的）"""
+    hands: List[HandLog] = []
+    recorder = HandRecorder(hands.append)
+    for table_id, hand_number, event in records:
+        recorder.add(table_id, hand_number, event)
+    hands.extend(recorder.open.values())
+    return hands
@@ -0,0 +1,198 @@
+"""
+ICM 独立筹码模型
+Independent Chip Model equity for tournament payouts and bot decisions
+
+按 Malmuth-Harville 模型，每个名次由剩余筹码按比例抽出。逐一枚举名次顺序是阶乘复杂度；
+这里按"已占据前 j 名的玩家集合"做动态规划：同一集合的不同顺序合并成一个状态，
+下一名的概率只依赖这个集合，只需要展开到最后一个有奖金的名次。
+计算量过大（大型比赛）时改用蒙特卡洛：按 指数随机数/筹码 排序恰好得到 Harville 顺序，
+用 NumPy 批量抽样。结果按 (筹码, 奖金) 缓存。
+"""
+
+import heapq
+import math
+import random
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .rng import fast_stream, numpy_generator
+
+try:
+    import numpy as np
+except ImportError:  # NumPy是可选依赖，缺失时蒙特卡洛逐个抽样
+    np = None
+
+# 动态规划的转移次数上限（超过时用蒙特卡洛，约0.1秒）
+EXACT_STEP_LIMIT = 500_000
+# 蒙特卡洛默认样本数，以及每批抽样的随机数个数上限（控制内存）
+DEFAULT_SAMPLES = 20_000
+BATCH_ELEMENTS = 1 << 20
+# call_threshold 的三种结果共用的蒙特卡洛种子（固定后同一局面也能命中缓存）
+THRESHOLD_SEED = 20240801
+
+_cache: 'OrderedDict[Tuple, Tuple[List[float], bool]]' = OrderedDict()
+_cache_lock = threading.Lock()
+CACHE_SIZE = 512
+
+stats = {'hits': 0, 'misses': 0, 'exact': 0, 'sampled': 0}
+
+_rng = fast_stream('icm')
+
+
+def state_count(players: int, paid: int) -> int:
+    """动态规划需要展开的状态数：大小为 0..paid-1 的玩家集合个数"""
+    return sum(math.comb(players, size) for size in range(min(paid, players)))
+
+
+def step_count(players: int, paid: int) -> int:
+    """动态规划的转移次数：每个状态尝试每名玩家"""
+    return state_count(players, paid) * players
+
+
+def icm_equity(stacks: Sequence[float], payouts: Sequence[float], samples: int = DEFAULT_SAMPLES,
+               exact_limit: int = EXACT_STEP_LIMIT, seed: Optional[int] = None) -> Tuple[List[float], bool]:
+    """
+    每名玩家的ICM奖金期望
+
+    Args:
+        stacks: 各玩家筹码（0表示已出局，期望为0）
+        payouts: 第1名、第2名……的奖金
+        samples: 蒙特卡洛样本数
+        exact_limit: 动态规划转移次数上限
+        seed: 蒙特卡洛种子（比较几组筹码时用同一种子，差值的噪声小得多），None时用模块的随机数流
+
+    Returns:
+        Tuple[List[float], bool]: (各玩家的奖金期望, 是否精确)
+    """
+    key = (tuple(stacks), tuple(payouts), samples, exact_limit, seed)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            stats['hits'] += 1
+            return list(cached[0]), cached[1]
+
+    live = [i for i, stack in enumerate(stacks) if stack > 0]
+    live_stacks = [float(stacks[i]) for i in live]
+    prizes = [float(p) for p in payouts[:len(live)]]
+    while prizes and prizes[-1] == 0:
+        prizes.pop()
+
+    if not prizes:
+        values, exact = [0.0] * len(live), True
+    elif step_count(len(live), len(prizes)) <= exact_limit:
+        values, exact = _exact(live_stacks, prizes), True
+    else:
+        stream = _rng if seed is None else random.Random(seed)
+        values, exact = _sampled(live_stacks, prizes, samples, stream), False
+
+    equities = [0.0] * len(stacks)
+    for index, value in zip(live, values):
+        equities[index] = value
+
+    with _cache_lock:
+        stats['misses'] += 1
+        stats['exact' if exact else 'sampled'] += 1
+        _cache[key] = (equities, exact)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return list(equities), exact
+
+
+def _exact(stacks: List[float], prizes: List[float]) -> List[float]:
+    """
+    按集合的动态规划
+
+    level 保存 {已占据前 j 名的玩家集合(位掩码): (概率, 剩余筹码)}，
+    从 j=0 展开到最后一个有奖金的名次，每个状态尝试每个还没有名次的玩家。
+    """
+    count = len(stacks)
+    equities = [0.0] * count
+    level: Dict[int, Tuple[float, float]] = {0: (1.0, sum(stacks))}
+    for place, prize in enumerate(prizes):
+        last = place == len(prizes) - 1
+        following: Dict[int, List[float]] = {}
+        for mask, (probability, remaining) in level.items():
+            for i in range(count):
+                bit = 1 << i
+                if mask & bit:
+                    continue
+                p = probability * stacks[i] / remaining
+                equities[i] += p * prize
+                if not last:
+                    entry = following.get(mask | bit)
+                    if entry is None:
+                        following[mask | bit] = [p, remaining - stacks[i]]
+                    else:
+                        entry[0] += p
+        level = {mask: (entry[0], entry[1]) for mask, entry in following.items()}
+    return equities
+
+
+def _sampled(stacks: List[float], prizes: List[float], samples: int, stream: random.Random) -> List[float]:
+    """蒙特卡洛：每个样本取 Exp(1)/筹码 最小的 len(prizes) 名玩家，按从小到大为名次"""
+    count = len(stacks)
+    paid = len(prizes)
+    generator = numpy_generator(stream)
+    if generator is None:
+        totals = [0.0] * count
+        for _ in range(samples):
+            keys = [(stream.expovariate(1.0) / stack, i) for i, stack in enumerate(stacks)]
+            for place, (_, i) in enumerate(heapq.nsmallest(paid, keys)):
+                totals[i] += prizes[place]
+        return [total / samples for total in totals]
+
+    weights = 1.0 / np.asarray(stacks, dtype=np.float64)
+    prize_array = np.asarray(prizes, dtype=np.float64)
+    totals = np.zeros(count, dtype=np.float64)
+    batch = max(1, BATCH_ELEMENTS // count)
+    done = 0
+    while done < samples:
+        size = min(batch, samples - done)
+        keys = generator.standard_exponential((size, count)) * weights
+        if paid < count:
+            top = np.argpartition(keys, paid - 1, axis=1)[:, :paid]
+        else:
+            top = np.broadcast_to(np.arange(count), (size, count))
+        order = np.take_along_axis(top, np.argsort(np.take_along_axis(keys, top, axis=1), axis=1), axis=1)
+        totals += np.bincount(order.ravel(), weights=np.broadcast_to(prize_array, order.shape).ravel(),
+                              minlength=count)
+        done += size
+    return (totals / samples).tolist()
+
+
+def call_threshold(stacks: Sequence[float], payouts: Sequence[float], hero: int, villain: int,
+                   pot: float, call: float, samples: int = DEFAULT_SAMPLES) -> Optional[float]:
+    """
+    在ICM下跟注全下所需的最低胜率
+
+    Args:
+        stacks: 各玩家桌下的筹码（不含底池）
+        payouts: 奖金
+        hero: 决定是否跟注的玩家下标
+        villain: 全下的对手下标（底池归他或我们）
+        pot: 当前底池（含对手的全下）
+        call: 跟注金额（不超过我们的筹码）
+        samples: 需要蒙特卡洛时的样本数（三种结果用同一种子，差值的噪声小）
+
+    Returns:
+        float: 所需胜率（0~1），奖金期望不受影响时为None
+    """
+    def equity_of(changes: Dict[int, float]) -> float:
+        adjusted = list(stacks)
+        for index, delta in changes.items():
+            adjusted[index] = max(0.0, adjusted[index] + delta)
+        return icm_equity(adjusted, payouts, samples, seed=THRESHOLD_SEED)[0][hero]
+
+    fold = equity_of({villain: pot})
+    win = equity_of({hero: pot})
+    lose = equity_of({hero: -call, villain: pot + call})
+    if win - lose <= 0:
+        return None
+    return max(0.0, min(1.0, (fold - lose) / (win - lose)))
+
+
+def cache_stats() -> Dict:
+    with _cache_lock:
+        return dict(stats, size=len(_cache))
@@ -0,0 +1,78 @@
+"""
+引擎耗时埋点
+Pluggable latency and tracing hooks for engine stages
+
+引擎本身不依赖任何指标或追踪库：服务器通过 set_recorder 注入记录函数、
+通过 set_tracer 注入追踪器、通过 set_hand_sink 注入手牌事件的接收函数，
+未注入时被装饰的方法只多一次全局变量判断。
+"""
+
+import functools
+import time
+from typing import Callable, Optional
+
+# 记录函数 (阶段名, 耗时秒数, 标签)
+_recorder: Optional[Callable[[str, float, Optional[str]], None]] = None
+# 追踪器：需要提供 child_span(name, attributes) 上下文管理器和 propagate(func, name)
+_tracer = None
+# 手牌事件接收函数 (table_id, hand_number, event)，见 hand_events
+_hand_sink: Optional[Callable[[str, int, list], None]] = None
+
+
+def set_recorder(recorder: Optional[Callable[[str, float, Optional[str]], None]]):
+    """注入（或用None移除）耗时记录函数"""
+    global _recorder
+    _recorder = recorder
+
+
+def set_tracer(tracer):
+    """注入（或用None移除）追踪器"""
+    global _tracer
+    _tracer = tracer
+
+
+def set_hand_sink(sink: Optional[Callable[[str, int, list], None]]):
+    """注入（或用None移除）手牌事件接收函数"""
+    global _hand_sink
+    _hand_sink = sink
+
+
+def hand_sink() -> Optional[Callable[[str, int, list], None]]:
+    return _hand_sink
+
+
+def propagate(func: Callable, name: Optional[str] = None) -> Callable:
+    """把当前追踪上下文带到后台线程执行的函数中（未注入追踪器时原样返回）"""
+    tracer = _tracer
+    if tracer is None:
+        return func
+    return tracer.propagate(func, name)
+
+
+def timed(stage: str, label: Optional[Callable[..., str]] = None) -> Callable:
+    """
+    装饰器：记录方法耗时
+
+    Args:
+        stage: 阶段名
+        label: 从调用参数计算标签的函数（如机器人等级）
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _recorder
+            tracer = _tracer
+            if recorder is None and tracer is None:
+                return func(*args, **kwargs)
+            value = label(*args, **kwargs) if label else None
+            start = time.perf_counter()
+            try:
+                if tracer is None:
+                    return func(*args, **kwargs)
+                with tracer.child_span(f'engine {stage}', {'label': value} if value else None):
+                    return func(*args, **kwargs)
+            finally:
+                if recorder is not None:
+                    recorder(stage, time.perf_counter() - start, value)
+        return wrapper
+    return decorator
@@ -0,0 +1,159 @@
+"""
+对手模型存储
+Bounded opponent statistics for bots
+
+固定容量的LRU，记录每个对手的攻击性/紧松度等统计（__slots__记录），
+并增量维护所有在册对手的平均值，使机器人每次决策读取平均值为O(1)。
+"""
+
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class OpponentStats:
+    """单个对手的统计"""
+
+    __slots__ = ('aggression', 'tightness', 'bluff_frequency', 'action_count', 'range')
+
+    def __init__(self, aggression: float = 0.5, tightness: float = 0.5,
+                 bluff_frequency: float = 0.1, action_count: int = 0):
+        self.aggression = aggression
+        self.tightness = tightness
+        self.bluff_frequency = bluff_frequency
+        self.action_count = action_count
+        # 本手牌的底牌范围（高级机器人使用，不持久化）
+        self.range = None
+
+    def to_list(self) -> list:
+        """持久化用的紧凑格式"""
+        return [round(self.aggression, 4), round(self.tightness, 4),
+                round(self.bluff_frequency, 4), self.action_count]
+
+    @classmethod
+    def from_list(cls, values: list) -> 'OpponentStats':
+        return cls(*values[:4])
+
+
+class OpponentModel:
+    """对手统计的LRU（超出容量时淘汰最久未出现的对手）"""
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.records: 'OrderedDict[str, OpponentStats]' = OrderedDict()
+        # 所有在册对手的攻击性和紧松度之和，随更新和淘汰增量维护
+        self.aggression_sum = 0.0
+        self.tightness_sum = 0.0
+        # 从快照恢复、尚未展开为记录的列式数据（第一次读写记录时才建对象）
+        self._columns: Optional[Tuple[List[str], list]] = None
+
+    def _expand(self):
+        player_ids, values = self._columns
+        self._columns = None
+        self.records = OrderedDict(
+            (player_id, OpponentStats(a, t, b, n))
+            for player_id, a, t, b, n in zip(player_ids, values[0::4], values[1::4], values[2::4], values[3::4])
+        )
+
+    def __len__(self) -> int:
+        if self._columns is not None:
+            return len(self._columns[0])
+        return len(self.records)
+
+    def __contains__(self, player_id: str) -> bool:
+        if self._columns is not None:
+            self._expand()
+        return player_id in self.records
+
+    def __iter__(self) -> Iterator[str]:
+        if self._columns is not None:
+            self._expand()
+        return iter(self.records)
+
+    def get(self, player_id: str) -> Optional[OpponentStats]:
+        """读取对手统计（不改变LRU顺序）"""
+        if self._columns is not None:
+            self._expand()
+        return self.records.get(player_id)
+
+    def touch(self, player_id: str) -> OpponentStats:
+        """获取对手统计，不存在时创建，并标记为最近使用"""
+        if self._columns is not None:
+            self._expand()
+        stats = self.records.get(player_id)
+        if stats is not None:
+            self.records.move_to_end(player_id)
+            return stats
+        return self._insert(player_id, OpponentStats())
+
+    def adjust(self, stats: OpponentStats, aggression: float = 0.0, tightness: float = 0.0):
+        """调整对手的攻击性和紧松度（限制在0-1），同时更新总和"""
+        if aggression:
+            new = min(1.0, max(0.0, stats.aggression + aggression))
+            self.aggression_sum += new - stats.aggression
+            stats.aggression = new
+        if tightness:
+            new = min(1.0, max(0.0, stats.tightness + tightness))
+            self.tightness_sum += new - stats.tightness
+            stats.tightness = new
+
+    @property
+    def avg_aggression(self) -> float:
+        count = len(self)
+        return self.aggression_sum / count if count else 0.5
+
+    @property
+    def avg_tightness(self) -> float:
+        count = len(self)
+        return self.tightness_sum / count if count else 0.5
+
+    def _insert(self, player_id: str, stats: OpponentStats) -> OpponentStats:
+        self.records[player_id] = stats
+        self.aggression_sum += stats.aggression
+        self.tightness_sum += stats.tightness
+        while len(self.records) > self.capacity:
+            _, evicted = self.records.popitem(last=False)
+            self.aggression_sum -= evicted.aggression
+            self.tightness_sum -= evicted.tightness
+        return stats
+
+    def export(self) -> Dict[str, list]:
+        """导出为 {player_id: [攻击性, 紧松度, 诈唬频率, 动作数]}"""
+        if self._columns is not None:
+            self._expand()
+        return {player_id: stats.to_list() for player_id, stats in self.records.items()}
+
+    def load(self, data: Dict[str, list]):
+        """从导出数据恢复（按原顺序，超出容量的旧记录被淘汰）"""
+        self._columns = None
+        self.records.clear()
+        self.aggression_sum = self.tightness_sum = 0.0
+        for player_id, values in (data or {}).items():
+            try:
+                self._insert(player_id, OpponentStats.from_list(values))
+            except (TypeError, ValueError):
+                continue
+
+    def export_columns(self) -> Tuple[List[str], list]:
+        """
+        列式导出（牌桌快照用）：([player_id], [攻击性, 紧松度, 诈唬频率, 动作数, ...])
+
+        不为每个对手单独建列表和JSON对象，恢复后还没用到的模型直接原样导出
+        """
+        if self._columns is not None:
+            return self._columns
+        values = []
+        for stats in self.records.values():
+            values += (round(stats.aggression, 4), round(stats.tightness, 4),
+                       round(stats.bluff_frequency, 4), stats.action_count)
+        return list(self.records), values
+
+    def load_columns(self, player_ids: List[str], values: list):
+        """从 export_columns 的结果恢复（只算平均值用的总和，记录在第一次使用时才展开）"""
+        player_ids = list(player_ids[-self.capacity:])
+        values = list(values[len(values) - 4 * len(player_ids):])
+        if len(values) != 4 * len(player_ids):
+            raise ValueError("对手模型列数据长度不一致")
+        self.records = OrderedDict()
+        self.aggression_sum = float(sum(values[0::4]))
+        self.tightness_sum = float(sum(values[1::4]))
+        self._columns = (player_ids, values) if player_ids else None
@@ -0,0 +1,175 @@
+"""
+Outs与听牌分析
+Outs and draw analysis built on rank/suit bitmasks
+
+统计下一张牌的outs、转牌+河牌两张才成的runner-runner组合，以及干净outs
+（这张牌落下后，任何对手用两张未知牌都做不出比我们更高的牌型）。
+"""
+
+from typing import Dict, List
+
+from .card import Card
+from .hand_evaluator import HandRank
+from .fast_eval import (
+    RANK_MASK, FULL_DECK, POPCOUNT, STRAIGHT_WINDOWS, HAND_RANKS,
+    cards_mask, evaluate_mask, category_of, mask_cards
+)
+
+
+# 牌型 -> outs统计键（与 HandEvaluator.calculate_outs 的返回一致）
+OUT_KEYS = {
+    HandRank.PAIR.rank_value: 'pair',
+    HandRank.TWO_PAIR.rank_value: 'two_pair',
+    HandRank.THREE_OF_A_KIND.rank_value: 'three_of_a_kind',
+    HandRank.STRAIGHT.rank_value: 'straight',
+    HandRank.FLUSH.rank_value: 'flush',
+    HandRank.FULL_HOUSE.rank_value: 'full_house',
+    HandRank.FOUR_OF_A_KIND.rank_value: 'four_of_a_kind',
+    HandRank.STRAIGHT_FLUSH.rank_value: 'straight_flush',
+    HandRank.ROYAL_FLUSH.rank_value: 'straight_flush'
+}
+
+# 听牌：成顺子及以上
+DRAW_CATEGORY = HandRank.STRAIGHT.rank_value
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count('1')
+
+
+def _empty_outs() -> Dict[str, int]:
+    return {key: 0 for key in dict.fromkeys(OUT_KEYS.values())}
+
+
+def _rank_counts(mask: int) -> List[int]:
+    """每个点数的张数（下标为 点数 - 2）"""
+    suits = [(mask >> (13 * s)) & RANK_MASK for s in range(4)]
+    return [sum(suited >> r & 1 for suited in suits) for r in range(13)]
+
+
+def max_opponent_category(board_mask: int, unseen_mask: int) -> int:
+    """对手用任意两张未知牌加上公共牌最多能做成的牌型等级（只看牌型，不比较同牌型大小）"""
+    board = [(board_mask >> (13 * s)) & RANK_MASK for s in range(4)]
+    unseen = [(unseen_mask >> (13 * s)) & RANK_MASK for s in range(4)]
+
+    # 同花顺：某个花色的顺子窗口最多缺两张，且缺的牌都未出现
+    for s in range(4):
+        if POPCOUNT[board[s]] < 3:
+            continue
+        for high, window in STRAIGHT_WINDOWS:
+            missing = window & ~board[s]
+            if POPCOUNT[missing] <= 2 and not missing & ~unseen[s]:
+                return (HandRank.ROYAL_FLUSH if high == 14 else HandRank.STRAIGHT_FLUSH).rank_value
+
+    board_counts = _rank_counts(board_mask)
+    unseen_counts = _rank_counts(unseen_mask)
+
+    # 四条
+    if any(b + min(2, u) >= 4 for b, u in zip(board_counts, unseen_counts)):
+        return HandRank.FOUR_OF_A_KIND.rank_value
+
+    # 葫芦：凑三条和对子最多需要补两张
+    def cost(need: int, r: int) -> int:
+        missing = max(0, need - board_counts[r])
+        return missing if unseen_counts[r] >= missing else 3
+
+    cost2 = sorted((cost(2, r), r) for r in range(13))[:2]
+    for r in range(13):
+        pair_cost = cost2[0][0] if cost2[0][1] != r else cost2[1][0]
+        if cost(3, r) + pair_cost <= 2:
+            return HandRank.FULL_HOUSE.rank_value
+
+    # 同花
+    if any(POPCOUNT[b] >= 3 and POPCOUNT[u] >= 5 - POPCOUNT[b] for b, u in zip(board, unseen)):
+        return HandRank.FLUSH.rank_value
+
+    # 顺子
+    board_ranks = board[0] | board[1] | board[2] | board[3]
+    unseen_ranks = unseen[0] | unseen[1] | unseen[2] | unseen[3]
+    for _, window in STRAIGHT_WINDOWS:
+        missing = window & ~board_ranks
+        if POPCOUNT[missing] <= 2 and not missing & ~unseen_ranks:
+            return HandRank.STRAIGHT.rank_value
+
+    if any(b + min(2, u) >= 3 for b, u in zip(board_counts, unseen_counts)):
+        return HandRank.THREE_OF_A_KIND.rank_value
+    return HandRank.TWO_PAIR.rank_value
+
+
+def analyze_outs(hole_cards: List[Card], community_cards: List[Card], dead_cards: List[Card] = None,
+                 runner_runner: bool = True) -> Dict:
+    """
+    分析outs
+
+    Args:
+        hole_cards: 底牌
+        community_cards: 公共牌（0-4张）
+        dead_cards: 其他已知不会再出现的牌
+        runner_runner: 翻牌圈时是否统计两张牌的组合
+
+    Returns:
+        Dict: 下一张牌各牌型的outs、干净outs、runner-runner组合及成牌概率
+    """
+    hole_mask = cards_mask(hole_cards)
+    board_mask = cards_mask(community_cards)
+    known = hole_mask | board_mask | cards_mask(dead_cards or [])
+    unseen_mask = FULL_DECK & ~known
+    unseen_bits = [1 << i for i in range(52) if unseen_mask >> i & 1]
+
+    current = category_of(evaluate_mask(hole_mask | board_mask))
+    cards_to_come = 5 - len(community_cards)
+    check_clean = len(community_cards) >= 2
+
+    outs = _empty_outs()
+    out_mask = clean_mask = 0
+    next_categories = {}
+    draw_cards = 0
+    for bit in unseen_bits:
+        category = category_of(evaluate_mask(hole_mask | board_mask | bit))
+        next_categories[bit] = category
+        if category <= current:
+            continue
+        outs[OUT_KEYS[category]] += 1
+        out_mask |= bit
+        if category >= DRAW_CATEGORY:
+            draw_cards += 1
+        if not check_clean or category >= max_opponent_category(board_mask | bit, unseen_mask & ~bit):
+            clean_mask |= bit
+
+    unseen_count = len(unseen_bits)
+    result = {
+        'hand_rank': HAND_RANKS[current].rank_name,
+        'cards_to_come': cards_to_come,
+        'outs': outs,
+        'total_outs': _popcount(out_mask),
+        'clean_outs': _popcount(clean_mask),
+        'out_cards': [str(card) for card in mask_cards(out_mask)],
+        'clean_cards': [str(card) for card in mask_cards(clean_mask)],
+        'next_card_probability': round(_popcount(out_mask) / unseen_count, 4) if unseen_count else 0.0,
+        'runner_runner': _empty_outs(),
+        'runner_runner_combos': 0,
+        'improve_by_river': round(_popcount(out_mask) / unseen_count, 4) if unseen_count else 0.0,
+        'draw_probability': round(draw_cards / unseen_count, 4) if unseen_count and current < DRAW_CATEGORY else 0.0
+    }
+
+    # 翻牌圈：转牌和河牌两张的组合
+    if cards_to_come == 2 and runner_runner and unseen_count >= 2:
+        improved = drawn = combos = 0
+        for i, first in enumerate(unseen_bits):
+            base = hole_mask | board_mask | first
+            for second in unseen_bits[i + 1:]:
+                combos += 1
+                category = category_of(evaluate_mask(base | second))
+                if category <= current:
+                    continue
+                improved += 1
+                if category >= DRAW_CATEGORY and current < DRAW_CATEGORY:
+                    drawn += 1
+                if category > next_categories[first] and category > next_categories[second]:
+                    result['runner_runner'][OUT_KEYS[category]] += 1
+                    result['runner_runner_combos'] += 1
+        result['improve_by_river'] = round(improved / combos, 4)
+        result['draw_probability'] = round(drawn / combos, 4)
+
+    return result
+
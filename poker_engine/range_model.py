@@ -0,0 +1,212 @@
+"""
+对手范围模型
+Vectorized opponent range model over the 1326 hole-card combos
+
+每个对手用一个长度1326的NumPy权重向量表示其可能的底牌组合，观察到动作后按似然
+（贝叶斯方式）更新；胜率按范围对范围加权抽样计算。
+"""
+
+import functools
+from itertools import combinations
+from typing import List, Optional
+
+import numpy as np
+
+from .card import Card
+from .fast_eval import cards_mask, evaluate_mask
+
+
+NUM_COMBOS = 1326
+
+# 组合 -> 两张牌的编号（与 fast_eval 的编码一致）和52位掩码
+COMBO_CARDS = np.array(list(combinations(range(52), 2)), dtype=np.int64)
+COMBO_BITS = (np.uint64(1) << COMBO_CARDS[:, 0].astype(np.uint64)) | \
+             (np.uint64(1) << COMBO_CARDS[:, 1].astype(np.uint64))
+COMBO_MASKS = [int(bits) for bits in COMBO_BITS]
+
+_CARD_BITS = np.uint64(1) << np.arange(52, dtype=np.uint64)
+
+
+def _preflop_strength() -> np.ndarray:
+    """翻前牌力（0-1百分位）：高牌、对子、同花、连张的近似打分"""
+    ranks = COMBO_CARDS % 13 + 2
+    suits = COMBO_CARDS // 13
+    high = ranks.max(axis=1)
+    low = ranks.min(axis=1)
+    pair = high == low
+    suited = suits[:, 0] == suits[:, 1]
+    gap = np.clip(high - low - 1, 0, 4)
+
+    score = high * 2.0 + low
+    score += np.where(pair, 30 + 2.0 * high, 0)
+    score += np.where(suited, 4.0, 0)
+    score -= np.where(pair, 0, gap * 2.0)
+    return _percentile(score)
+
+
+def _percentile(scores: np.ndarray) -> np.ndarray:
+    """分数 -> 百分位（同分取平均）"""
+    ordered = np.sort(scores)
+    below = np.searchsorted(ordered, scores, side='left')
+    upto = np.searchsorted(ordered, scores, side='right')
+    return (below + upto) / (2.0 * len(scores))
+
+
+PREFLOP_STRENGTH = _preflop_strength()
+
+
+def live_combos(dead_mask: int) -> np.ndarray:
+    """不与已知牌冲突的组合"""
+    return (COMBO_BITS & np.uint64(dead_mask)) == 0
+
+
+@functools.lru_cache(maxsize=64)
+def board_scores(board_mask: int) -> np.ndarray:
+    """每个组合加上公共牌的牌力分数（与公共牌冲突的组合为-1），同一公共牌只计算一次"""
+    scores = np.full(NUM_COMBOS, -1, dtype=np.int64)
+    for i, combo in enumerate(COMBO_MASKS):
+        if not combo & board_mask:
+            scores[i] = evaluate_mask(combo | board_mask)
+    return scores
+
+
+def hand_strength(community_cards: List[Card]) -> np.ndarray:
+    """当前公共牌下每个组合的牌力百分位"""
+    if len(community_cards) < 3:
+        return PREFLOP_STRENGTH
+    scores = board_scores(cards_mask(community_cards))
+    live = scores >= 0
+    strength = np.zeros(NUM_COMBOS)
+    strength[live] = _percentile(scores[live])
+    return strength
+
+
+class OpponentRange:
+    """单个对手的底牌范围"""
+
+    __slots__ = ('weights', 'hand_key', 'observations')
+
+    def __init__(self):
+        self.weights = np.ones(NUM_COMBOS)
+        self.hand_key = None
+        self.observations = 0
+
+    def reset(self, hand_key=None):
+        """新的一手牌重新开始（均匀范围）"""
+        self.weights = np.ones(NUM_COMBOS)
+        self.hand_key = hand_key
+        self.observations = 0
+
+    def observe(self, action: str, community_cards: List[Card], amount: int = 0, pot: int = 0):
+        """
+        根据观察到的动作更新范围
+
+        Args:
+            action: 动作（PlayerAction的值）
+            community_cards: 动作发生时的公共牌
+            amount: 本轮已投入的筹码
+            pot: 动作前的底池
+        """
+        if action == 'fold':
+            return
+
+        strength = hand_strength(community_cards)
+        if action in ('bet', 'raise', 'all_in'):
+            # 下注越大，范围越偏向强牌
+            sizing = min(1.0, amount / pot) if pot > 0 else 0.5
+            likelihood = 0.15 + 0.85 * strength ** (1.0 + 2.0 * sizing)
+        elif action == 'call':
+            likelihood = 0.25 + 0.75 * strength
+        elif action == 'check':
+            likelihood = 1.0 - 0.5 * strength ** 2
+        else:
+            return
+
+        weights = self.weights * likelihood
+        total = weights.sum()
+        if total <= 0:
+            return
+        # 归一化到均值1，并保留下限避免范围塌缩
+        self.weights = np.maximum(weights * (NUM_COMBOS / total), 1e-6)
+        self.observations += 1
+
+
+def range_equity(hole_cards: List[Card], community_cards: List[Card], ranges: List[Optional[np.ndarray]],
+                 samples: int = 1000, rng: Optional[np.random.Generator] = None) -> float:
+    """
+    范围对范围的胜率（平局按人数分摊）
+
+    Args:
+        hole_cards: 自己的底牌
+        community_cards: 公共牌
+        ranges: 每个对手的权重向量，None表示均匀范围
+        samples: 抽样次数
+        rng: 随机数生成器
+
+    Returns:
+        float: 胜率
+    """
+    if not ranges:
+        return 1.0
+    rng = rng or np.random.default_rng()
+
+    hero_mask = cards_mask(hole_cards)
+    board_mask = cards_mask(community_cards)
+    dead = hero_mask | board_mask
+    live = live_combos(dead)
+
+    # 每个对手按权重抽样底牌组合
+    draws = []
+    for weights in ranges:
+        w = np.where(live, weights if weights is not None else 1.0, 0.0)
+        total = w.sum()
+        if total <= 0:
+            w, total = live.astype(float), live.sum()
+        draws.append(rng.choice(NUM_COMBOS, size=samples, p=w / total))
+    draws = np.array(draws)
+    opp_bits = COMBO_BITS[draws]
+
+    # 对手之间的底牌冲突的样本丢弃
+    used = np.full(samples, np.uint64(dead))
+    valid = np.ones(samples, dtype=bool)
+    for bits in opp_bits:
+        valid &= (used & bits) == 0
+        used |= bits
+    if not valid.any():
+        return 0.0
+    draws, opp_bits, used = draws[:, valid], opp_bits[:, valid], used[valid]
+    n = used.shape[0]
+
+    need = 5 - len(community_cards)
+    if need == 0:
+        # 河牌：每个组合的牌力只依赖公共牌，全部向量化
+        scores = board_scores(board_mask)
+        hero = evaluate_mask(hero_mask | board_mask)
+        opp_scores = scores[draws]
+        best = opp_scores.max(axis=0)
+        ties = (opp_scores == best).sum(axis=0)
+        share = np.where(hero > best, 1.0, np.where(hero == best, 1.0 / (ties + 1), 0.0))
+        return float(share.mean())
+
+    # 补齐公共牌：已用的牌排到最后，取随机键最小的need张
+    keys = rng.random((n, 52))
+    keys[(used[:, None] & _CARD_BITS) != 0] = 2.0
+    runout_cards = np.argpartition(keys, need, axis=1)[:, :need]
+    runouts = np.bitwise_or.reduce(_CARD_BITS[runout_cards], axis=1)
+
+    total = 0.0
+    for runout, opponents in zip(runouts.tolist(), opp_bits.T.tolist()):
+        board = board_mask | runout
+        hero = evaluate_mask(hero_mask | board)
+        best = ties = 0
+        for opp in opponents:
+            score = evaluate_mask(opp | board)
+            if score > best:
+                best, ties = score, 1
+            elif score == best:
+                ties += 1
+        if hero > best:
+            total += 1.0
+        elif hero == best:
+            total += 1.0 / (ties + 1)
+    return total / n
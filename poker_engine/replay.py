@@ -0,0 +1,165 @@
+"""
+手牌重放
+Deterministic replay of recorded hands
+
+从 hand_events 记录的开始事件重建牌桌，用记录的牌堆顺序发牌，按顺序重新执行
+真人动作和机器人决策（不调用机器人的决策逻辑），可以停在任意事件偏移处。
+牌桌在重放中产生的每个事件都和记录逐一比对，引擎行为变化时抛出 ReplayDivergence。
+"""
+
+from typing import List, Optional
+
+from .bot import Bot, BotLevel
+from .card import Card, Deck
+from .hand_events import HandLog, START, ACTION, BOT, JOIN, LEAVE
+from .player import Player, PlayerAction, PlayerStatus
+from .rng import hand_rng
+from .snapshot import decode_cards
+from .table import Table
+
+
+class ReplayDivergence(Exception):
+    """重放结果与记录不一致（引擎行为变化或记录不完整）"""
+
+
+class ReplayStop(BaseException):
+    """到达目标偏移量，中止牌桌内正在进行的处理（引擎中的 except Exception 不会拦截）"""
+
+
+class ReplayCursor:
+    """重放进度：牌桌在重放模式下通过它校验产生的事件、读取机器人决策"""
+
+    __slots__ = ('events', 'stop', 'verify', 'position')
+
+    def __init__(self, events: List[list], stop: int, verify: bool = True):
+        self.events = events
+        self.stop = stop
+        self.verify = verify
+        self.position = 0
+
+    def expect(self, event: list):
+        """牌桌产生了一个事件：与记录比对并前进"""
+        if self.position >= len(self.events):
+            raise ReplayDivergence(f"重放产生了记录之外的事件: {event}")
+        expected = self.events[self.position]
+        if expected[0] != event[0] or (self.verify and expected != event):
+            raise ReplayDivergence(f"事件 {self.position} 不一致: 记录 {expected}，重放 {event}")
+        self.position += 1
+
+    def bot_decision(self, player_id: str):
+        """机器人需要决策：返回记录的决策，到达目标偏移量时停止"""
+        if self.position >= self.stop:
+            raise ReplayStop()
+        event = self.events[self.position] if self.position < len(self.events) else None
+        if event is None or event[0] != BOT or event[1] != player_id:
+            raise ReplayDivergence(f"事件 {self.position} 应为机器人 {player_id} 的决策，记录为 {event}")
+        self.position += 1
+        return (PlayerAction(event[2]), event[3]) if event[2] is not None else None
+
+
+def player_from_record(record: list) -> Player:
+    """hand_events.player_record 的逆操作"""
+    seat, player_id, nickname, chips, status, level = record
+    if level is not None:
+        player = Bot(player_id, nickname, chips, BotLevel(level))
+    else:
+        player = Player(player_id, nickname, chips)
+    player.status = PlayerStatus(status)
+    return player
+
+
+def table_from_header(table_id: str, header: dict) -> Table:
+    """按开始事件中的手牌前状态建牌桌"""
+    small_blind, big_blind, max_players, initial_chips, game_mode, ante_percentage = header['config']
+    table = Table(table_id, table_id, small_blind, big_blind, max_players, initial_chips,
+                  game_mode, ante_percentage)
+    table.hand_number = header['hand_number']
+    table.dealer_position = header['dealer_position']
+    for record in header['players']:
+        player = player_from_record(record)
+        table.players.append(player)
+        if record[0] is not None:
+            table.seats[record[0]] = player
+    return table
+
+
+def deal_order(seed: str) -> List[Card]:
+    """手牌种子确定的牌堆顺序（与 Table.start_new_hand 的洗牌相同）"""
+    deck = Deck()
+    deck.shuffle(hand_rng(seed))
+    return deck.cards
+
+
+def replay(hand: HandLog, offset: Optional[int] = None, verify: bool = True) -> Table:
+    """
+    重放一手牌
+
+    Args:
+        hand: 记录的手牌
+        offset: 重放前多少个事件，None为全部。落在推导事件（阶段/结束）上时，
+                它之前的输入事件及其引起的阶段变化都已应用
+        verify: 是否逐个比对牌桌产生的事件内容并校验手牌种子能复现牌堆（False时只检查事件类型）
+
+    Returns:
+        Table: 重放后的牌桌
+
+    Raises:
+        ReplayDivergence: 重放与记录不一致
+    """
+    events = hand.events
+    if not events or events[0][0] != START:
+        raise ReplayDivergence("手牌缺少开始事件")
+    stop = len(events) if offset is None else max(1, min(offset, len(events)))
+
+    _, header, deck, *rest = events[0]
+    seed = rest[0] if rest else None
+    deck_order = decode_cards(deck)
+    if verify and seed is not None and deal_order(seed) != deck_order:
+        raise ReplayDivergence(f"手牌种子 {seed} 不能复现记录的牌堆顺序")
+    table = table_from_header(hand.table_id, header)
+    cursor = ReplayCursor(events, stop, verify)
+    table.replay = cursor
+    try:
+        if not table.start_new_hand(deck_order=deck_order, seed=seed):
+            raise ReplayDivergence("无法开始手牌")
+        while cursor.position < stop:
+            position = cursor.position
+            kind, *payload = events[position]
+            if kind == ACTION:
+                result = table.process_player_action(payload[0], PlayerAction(payload[1]), payload[2])
+                if not result.get('success'):
+                    raise ReplayDivergence(f"事件 {position} 的动作被拒绝: {result.get('message')}")
+            elif kind == BOT:
+                table.process_bot_actions()
+            elif kind == JOIN:
+                table.add_player_at_position(player_from_record(payload[1]), payload[0])
+            elif kind == LEAVE:
+                table.remove_player(payload[0])
+            else:
+                # 阶段变化/手牌结束由游戏流程推导（例如没有机器人需要行动时的流程检查）
+                table.process_game_flow()
+            if cursor.position == position:
+                raise ReplayDivergence(f"事件 {position} ({kind}) 没有被重放")
+    except ReplayStop:
+        pass
+    finally:
+        table.replay = None
+    return table
+
+
+def verify_hands(hands: List[HandLog]) -> List[dict]:
+    """
+    重放全部已结束的手牌（引擎改动的回归测试）
+
+    Returns:
+        List[dict]: 不一致的手牌 [{'table_id', 'hand_number', 'error'}]
+    """
+    failures = []
+    for hand in hands:
+        if not hand.complete:
+            continue
+        try:
+            replay(hand)
+        except ReplayDivergence as e:
+            failures.append({'table_id': hand.table_id, 'hand_number': hand.hand_number, 'error': str(e)})
+    return failures
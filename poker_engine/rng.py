@@ -0,0 +1,111 @@
+"""
+随机数流
+Independent RNG streams: seeded dealing per table, fast PRNGs for simulations
+
+每张牌桌拥有一个发牌流：流密钥来自 secrets（密码学安全），每手牌用带密钥的
+BLAKE2b 派生一个独立的手牌种子，由手牌种子确定牌堆顺序。手牌种子写入手牌事件，
+公开它不会泄露同桌其它手牌。机器人等模拟使用各自的快速PRNG（random.Random），
+不再共用全局 random。
+
+set_seed_override 设置覆盖种子后，所有新建的流按创建顺序从覆盖种子确定性派生
+（基准测试、复现问题用，线上不要设置）。
+"""
+
+import hashlib
+import itertools
+import random
+import secrets
+import threading
+from typing import List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy是可选依赖，缺失时批量排列逐个生成
+    np = None
+
+# 流密钥和手牌种子的字节数
+STREAM_KEY_BYTES = 32
+HAND_SEED_BYTES = 16
+
+_override: Optional[int] = None
+_counter = itertools.count()
+_lock = threading.Lock()
+
+
+def set_seed_override(seed: Optional[int]):
+    """设置覆盖种子（None恢复为密码学随机种子），同时重置派生计数"""
+    global _override, _counter
+    with _lock:
+        _override = seed
+        _counter = itertools.count()
+
+
+def seed_override() -> Optional[int]:
+    return _override
+
+
+def _stream_key(label: str) -> bytes:
+    """新流的密钥：没有覆盖种子时来自 secrets，否则由覆盖种子和创建序号派生"""
+    with _lock:
+        if _override is None:
+            return secrets.token_bytes(STREAM_KEY_BYTES)
+        index = next(_counter)
+        override = _override
+    return hashlib.blake2b(f'{override}:{label}:{index}'.encode(), digest_size=STREAM_KEY_BYTES).digest()
+
+
+def hand_rng(hand_seed: str) -> random.Random:
+    """由手牌种子（十六进制）确定的随机数生成器，同一种子总是得到同样的牌堆顺序"""
+    return random.Random(int(hand_seed, 16))
+
+
+class DealingStream:
+    """牌桌的发牌流"""
+
+    __slots__ = ('_key', 'hands')
+
+    def __init__(self, key: Optional[bytes] = None):
+        self._key = key or _stream_key('deal')
+        self.hands = 0
+
+    def next_hand_seed(self) -> str:
+        """下一手牌的种子（十六进制字符串）"""
+        self.hands += 1
+        return hashlib.blake2b(self.hands.to_bytes(8, 'big'), key=self._key,
+                               digest_size=HAND_SEED_BYTES).hexdigest()
+
+
+def fast_stream(label: str = 'sim') -> random.Random:
+    """模拟用的独立快速PRNG"""
+    return random.Random(int.from_bytes(_stream_key(label), 'big'))
+
+
+def numpy_generator(stream: random.Random):
+    """从快速流派生NumPy生成器（每次调用得到新的子流），没有NumPy时为None"""
+    if np is None:
+        return None
+    return np.random.default_rng(stream.getrandbits(128))
+
+
+def bulk_permutations(count: int, size: int, stream: random.Random, take: Optional[int] = None) -> List[List[int]]:
+    """
+    批量生成随机排列
+
+    Args:
+        count: 排列个数
+        size: 每个排列的元素数（range(size) 的排列）
+        stream: 随机数流
+        take: 只需要每个排列的前 take 个元素（仍是均匀随机的有序前缀）
+
+    Returns:
+        List[List[int]]: count 个排列（或前缀）
+    """
+    take = size if take is None else min(take, size)
+    if count <= 0 or take <= 0:
+        return [[] for _ in range(max(count, 0))]
+    generator = numpy_generator(stream)
+    if generator is None:
+        population = range(size)
+        return [stream.sample(population, take) for _ in range(count)]
+    permutations = generator.permuted(np.tile(np.arange(size, dtype=np.int16), (count, 1)), axis=1)
+    return permutations[:, :take].tolist()
@@ -0,0 +1,155 @@
+"""
+牌桌快照
+Full table snapshots (deck order, seats, bets, stage, bot models) for hot restart
+"""
+
+from typing import Dict, List
+
+from .card import Card
+from .player import Player, PlayerStatus
+from .bot import Bot, BotLevel
+from .table import Table, GameStage
+from .fast_eval import SUITS, RANKS, card_index
+
+# 快照格式版本，字段不兼容时递增，旧版本快照不会被恢复
+SNAPSHOT_VERSION = 1
+
+# 牌用 0-51 的索引保存（与 fast_eval 的位序一致）
+_CARDS = [Card(suit, rank) for suit in SUITS for rank in RANKS]
+
+
+class SnapshotError(ValueError):
+    """快照格式不兼容或内容损坏"""
+
+
+def encode_cards(cards: List[Card]) -> List[int]:
+    return [card_index(card) for card in cards]
+
+
+def decode_cards(indexes: List[int]) -> List[Card]:
+    try:
+        return [_CARDS[i] for i in indexes]
+    except (IndexError, TypeError) as e:
+        raise SnapshotError(f"无效的牌: {indexes}") from e
+
+
+def snapshot_player(player: Player) -> Dict:
+    """玩家（机器人含等级、对手模型和会话统计）"""
+    data = {
+        'id': player.id,
+        'nickname': player.nickname,
+        'chips': player.chips,
+        'is_bot': player.is_bot,
+        'status': player.status.value,
+        'hole_cards': encode_cards(player.hole_cards),
+        'current_bet': player.current_bet,
+        'total_bet': player.total_bet,
+        'is_dealer': player.is_dealer,
+        'is_small_blind': player.is_small_blind,
+        'is_big_blind': player.is_big_blind,
+        'has_acted': player.has_acted
+    }
+    if isinstance(player, Bot):
+        data['bot_level'] = player.bot_level.value
+        data['session_stats'] = dict(player.session_stats)
+        data['opponents'] = player.opponent_model.export_columns()
+        data['hand_history'] = list(player.hand_history)
+    return data
+
+
+def restore_player(data: Dict) -> Player:
+    if data.get('bot_level') is not None:
+        player = Bot(data['id'], data['nickname'], data['chips'], BotLevel(data['bot_level']))
+        player.load_learning_data({'session_stats': data.get('session_stats', {})})
+        player.opponent_model.load_columns(*data.get('opponents', ([], [])))
+        player.hand_history.extend(data.get('hand_history', []))
+    else:
+        player = Player(data['id'], data['nickname'], data['chips'], is_bot=data.get('is_bot', False))
+    player.status = PlayerStatus(data['status'])
+    player.hole_cards = decode_cards(data['hole_cards'])
+    player.current_bet = data['current_bet']
+    player.total_bet = data['total_bet']
+    player.is_dealer = data['is_dealer']
+    player.is_small_blind = data['is_small_blind']
+    player.is_big_blind = data['is_big_blind']
+    player.has_acted = data['has_acted']
+    return player
+
+
+def snapshot_table(table: Table) -> Dict:
+    """
+    牌桌的完整快照（可JSON序列化）
+
+    包含剩余牌堆的顺序，恢复后继续发出的牌与不重启时完全相同。
+    """
+    # 被移出玩家列表但仍占着座位的玩家也要保存，恢复后两处引用同一个对象
+    members: Dict[str, Player] = {p.id: p for p in table.players}
+    for seated in table.seats.values():
+        if seated is not None:
+            members.setdefault(seated.id, seated)
+    return {
+        'id': table.id,
+        'title': table.title,
+        'small_blind': table.small_blind,
+        'big_blind': table.big_blind,
+        'max_players': table.max_players,
+        'initial_chips': table.initial_chips,
+        'game_mode': table.game_mode,
+        'ante_percentage': table.ante_percentage,
+        'game_stage': table.game_stage.value,
+        'hand_number': table.hand_number,
+        'deck': encode_cards(table.deck.cards),
+        'community_cards': encode_cards(table.community_cards),
+        'pot': table.pot,
+        'current_bet': table.current_bet,
+        'min_raise': table.min_raise,
+        'dealer_position': table.dealer_position,
+        'current_player_position': table.current_player_position,
+        'enable_win_probability': table.enable_win_probability,
+        'enable_card_tracking': table.enable_card_tracking,
+        'chip_movements': [list(movement) for movement in table.chip_movements],
+        'created_at': table.created_at,
+        'last_activity': table.last_activity,
+        'members': [snapshot_player(p) for p in members.values()],
+        'players': [p.id for p in table.players],
+        'seats': [[seat, p.id] for seat, p in table.seats.items() if p is not None]
+    }
+
+
+def restore_table(data: Dict) -> Table:
+    """
+    从快照重建牌桌
+
+    Raises:
+        SnapshotError: 快照内容不完整或不合法
+    """
+    try:
+        table = Table(data['id'], data['title'], data['small_blind'], data['big_blind'],
+                      data['max_players'], data['initial_chips'], data['game_mode'],
+                      data['ante_percentage'])
+        restored = {player_data['id']: restore_player(player_data) for player_data in data['members']}
+        table.players = [restored[player_id] for player_id in data['players']]
+        for seat, player_id in data['seats']:
+            table.seats[int(seat)] = restored[player_id]
+
+        table.game_stage = GameStage(data['game_stage'])
+        table.hand_number = data['hand_number']
+        table.deck.cards = decode_cards(data['deck'])
+        table.community_cards = decode_cards(data['community_cards'])
+        table.card_tracker.reset()
+        table.card_tracker.add_cards(table.community_cards)
+        table.pot = data['pot']
+        table.current_bet = data['current_bet']
+        table.min_raise = data['min_raise']
+        table.dealer_position = data['dealer_position']
+        table.current_player_position = data['current_player_position']
+        table.enable_win_probability = data['enable_win_probability']
+        table.enable_card_tracking = data['enable_card_tracking']
+        table.chip_movements = [tuple(movement) for movement in data['chip_movements']]
+        table.created_at = data['created_at']
+        table.last_activity = data['last_activity']
+    except SnapshotError:
+        raise
+    except (KeyError, TypeError, ValueError) as e:
+        raise SnapshotError(f"牌桌快照不完整: {e!r}") from e
+    return table
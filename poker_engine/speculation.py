@@ -0,0 +1,159 @@
+"""
+机器人预计算
+Speculative bot equity precomputation while the table waits
+
+新的一条街发牌后、或牌桌在等待真人行动时，后台线程提前为每个机器人计算本街的胜率估算
+（蒙特卡洛/范围/精确枚举这些较重的部分）。轮到机器人行动时 Bot.decide_action 直接读取
+缓存，只做下注尺度和底池赔率等决策。统计命中率和节省的决策耗时。
+
+线程安全：玩家对象、对手模型等牌桌状态只由事件循环线程修改。schedule() 在事件循环线程上
+通过 Bot.equity_inputs 为每个机器人拍下输入快照，预计算线程只读这些快照，
+结果在机器人的 _equity_lock 下写入缓存。决策从不等待预计算线程：未命中时现场计算，
+同一局面后台算完的结果丢弃。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+
+from . import instrumentation
+from .player import PlayerStatus
+
+
+class SpeculationStats:
+    """预计算的命中率和耗时统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.precomputed = 0         # 后台算好的局面数
+            self.precompute_seconds = 0.0
+            self.discarded = 0           # 算完时局面已经变化（新的一手等）或决策已现场算过而丢弃
+            self.hits = 0                # 决策时直接读到缓存
+            self.speculative_hits = 0    # 其中由后台预计算提供的
+            self.misses = 0              # 决策时现场计算
+            self.miss_seconds = 0.0
+            self.saved_seconds = 0.0     # 命中缓存节省的计算时间
+
+    def record_precompute(self, seconds: float):
+        with self._lock:
+            self.precomputed += 1
+            self.precompute_seconds += seconds
+
+    def record_discard(self):
+        with self._lock:
+            self.discarded += 1
+
+    def record_hit(self, saved: float, speculative: bool):
+        with self._lock:
+            self.hits += 1
+            if speculative:
+                self.speculative_hits += 1
+            self.saved_seconds += saved
+
+    def record_miss(self, seconds: float):
+        with self._lock:
+            self.misses += 1
+            self.miss_seconds += seconds
+
+    def report(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'precomputed': self.precomputed,
+                'discarded': self.discarded,
+                'unused': max(0, self.precomputed - self.speculative_hits),
+                'hits': self.hits,
+                'speculative_hits': self.speculative_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'avg_precompute_ms': round(1000 * self.precompute_seconds / self.precomputed, 2)
+                if self.precomputed else 0.0,
+                'avg_miss_ms': round(1000 * self.miss_seconds / self.misses, 2) if self.misses else 0.0,
+                'saved_seconds': round(self.saved_seconds, 3)
+            }
+
+
+speculation_stats = SpeculationStats()
+
+
+class SpeculationWorker:
+    """
+    低优先级的预计算线程
+
+    使用真实的守护线程而不是协程：预计算是纯CPU计算，放在事件循环里会阻塞其它连接。
+    每张桌只保留最新的任务，局面变化后旧任务直接被替换；每算完一个机器人让出一次CPU。
+    任务里只有 schedule() 时拍下的输入快照，线程不接触活动的牌桌对象。
+    """
+
+    # 两个机器人之间让出CPU的时间（秒）
+    YIELD_SECONDS = 0.005
+
+    def __init__(self):
+        self._jobs: 'OrderedDict[str, Tuple[List[Tuple[object, Dict]], Callable]]' = OrderedDict()
+        self._cond = threading.Condition()
+        self._thread = None
+        self.enabled = True
+
+    def schedule(self, table) -> int:
+        """为牌桌上仍在牌局中的机器人安排预计算，返回安排的机器人数"""
+        if not self.enabled:
+            return 0
+        game_state = table.bot_game_state()
+        bots = [p for p in table.players
+                if p.is_bot and p.status == PlayerStatus.PLAYING and hasattr(p, 'precompute_equity')
+                and p.needs_equity(game_state)]
+        with self._cond:
+            if not bots:
+                self._jobs.pop(table.id, None)
+                return 0
+            # 输入快照在事件循环线程上拍下；预计算作为触发它的请求的子span记录
+            self._jobs[table.id] = ([(bot, bot.equity_inputs(game_state)) for bot in bots],
+                                    instrumentation.propagate(self._precompute, 'speculation precompute'))
+            self._jobs.move_to_end(table.id)
+            self._cond.notify()
+        self._ensure_thread()
+        return len(bots)
+
+    def cancel(self, table_id: str):
+        """牌桌关闭时丢弃尚未执行的任务"""
+        with self._cond:
+            self._jobs.pop(table_id, None)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._jobs)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='bot-speculation', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._jobs:
+                    self._cond.wait()
+                table_id, (snapshots, precompute) = self._jobs.popitem(last=False)
+
+            for bot, inputs in snapshots:
+                with self._cond:
+                    if table_id in self._jobs:
+                        break  # 牌桌已有更新的局面，放弃旧任务
+                precompute(bot, inputs)
+                time.sleep(self.YIELD_SECONDS)
+
+    @staticmethod
+    def _precompute(bot, inputs: Dict):
+        try:
+            bot.precompute_equity(inputs)
+        except Exception as e:
+            print(f"⚠️ 机器人 {bot.nickname} 预计算失败: {e}")
+
+
+speculation_worker = SpeculationWorker()
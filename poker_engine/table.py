@@ -5,13 +5,17 @@ Table management for poker game
 
 import uuid
 import time
-import random
 from typing import List, Dict, Optional, Tuple
 from enum import Enum
 from .card import Card, Deck
 from .player import Player, PlayerStatus, PlayerAction
 from .bot import Bot, BotLevel
 from .hand_evaluator import HandEvaluator, HandRank
+from .card_tracker import CardTracker
+from . import fast_eval
+from .instrumentation import timed, hand_sink
+from .rng import DealingStream, fast_stream, hand_rng
+from .hand_events import START, ACTION, BOT, JOIN, LEAVE, STAGE, END, encode_cards, player_record, table_header
 
 
 class GameStage(Enum):
@@ -48,7 +52,11 @@ class Table:
         self.game_stage = GameStage.WAITING
         self.hand_number = 0
         self.deck = Deck()
+        # 本桌独立的发牌流（每手牌派生手牌种子）和胜率模拟用的快速随机数流
+        self.deal_stream = DealingStream()
+        self.sim_rng = fast_stream('table')
         self.community_cards: List[Card] = []
+        self.card_tracker = CardTracker()
         self.pot = 0
         self.current_bet = 0
         self.min_raise = big_blind if game_mode == "blinds" else max(1, int(initial_chips * ante_percentage))
@@ -59,8 +67,44 @@ class Table:
         self.enable_win_probability = True
         self.enable_card_tracking = True
         
+        # 本手牌的筹码流水 [(player_id, entry_type, delta)]，手牌结束后写入账本
+        self.chip_movements: List[Tuple[str, str, int]] = []
+        
         self.created_at = time.time()
         self.last_activity = time.time()
+        
+        # 重放时的事件游标（见 replay.py），正常运行时为None
+        self.replay = None
+        # 所属的锦标赛（见 tournament.py），现金桌为None
+        self.tournament = None
+    
+    def _recording(self) -> bool:
+        """是否需要构建手牌事件（注入了接收函数或正在重放）"""
+        return self.replay is not None or hand_sink() is not None
+    
+    def _record(self, event: list):
+        """输出手牌事件；重放时改为与记录比对"""
+        if self.replay is not None:
+            self.replay.expect(event)
+            return
+        sink = hand_sink()
+        if sink is not None:
+            sink(self.id, self.hand_number, event)
+    
+    def _in_hand(self) -> bool:
+        return self.game_stage not in (GameStage.WAITING, GameStage.FINISHED)
+    
+    def _bot_decision(self, player: Bot, game_state: Dict):
+        """机器人决策：重放时读取记录的决策，否则调用决策逻辑并记录结果（包括失败）"""
+        if self.replay is not None:
+            return self.replay.bot_decision(player.id)
+        action = None
+        try:
+            action = player.decide_action(game_state)
+        finally:
+            if hand_sink() is not None:
+                self._record([BOT, player.id, action[0].value if action else None, action[1] if action else 0])
+        return action
     
     def add_player(self, player: Player) -> bool:
         """添加玩家到牌桌"""
@@ -78,6 +122,8 @@ class Table:
         self.seats[seat_number] = player
         player.status = PlayerStatus.WAITING
         
+        if self._in_hand() and self._recording():
+            self._record([JOIN, seat_number, player_record(player, seat_number)])
         self.last_activity = time.time()
         return True
     
@@ -96,9 +142,23 @@ class Table:
         # 从玩家列表中移除
         self.players = [p for p in self.players if p.id != player_id]
         
+        if self._in_hand() and self._recording():
+            self._record([LEAVE, player_id])
         self.last_activity = time.time()
         return player
     
+    def _add_to_pot(self, player: Player, amount: int, entry_type: str = 'bet'):
+        """把玩家投入的筹码计入底池，并记录筹码流水"""
+        self.pot += amount
+        if amount > 0:
+            self.chip_movements.append((player.id, entry_type, -amount))
+    
+    def _award_pot(self, player: Player, amount: int):
+        """把底池派给获胜者，并记录筹码流水"""
+        player.chips += amount
+        if amount > 0:
+            self.chip_movements.append((player.id, 'award', amount))
+    
     def _find_empty_seat(self) -> Optional[int]:
         """查找空座位"""
         for seat_num in range(self.max_players):
@@ -106,25 +166,43 @@ class Table:
                 return seat_num
         return None
     
-    def start_new_hand(self) -> bool:
-        """开始新一手牌"""
+    @timed('start_new_hand')
+    def start_new_hand(self, deck_order: Optional[List[Card]] = None, seed: Optional[str] = None) -> bool:
+        """
+        开始新一手牌
+        
+        Args:
+            deck_order: 指定牌堆顺序（重放用，从末尾发牌），None时按手牌种子洗牌
+            seed: 手牌种子，None时从本桌发牌流派生；与 deck_order 同时指定时只作记录
+        """
         active_players = [p for p in self.players if p.status != PlayerStatus.DISCONNECTED]
         if len(active_players) < 2:
             return False
         
+        header = table_header(self) if self._recording() else None
+        
         # 轮换庄家位置（每手牌轮换）
         if self.hand_number > 0:  # 第一手牌庄家位置为0，之后每手牌轮换
             self.dealer_position = (self.dealer_position + 1) % len(active_players)
         
         # 重置游戏状态
         self.community_cards = []
+        self.card_tracker.reset()
         self.pot = 0
         self.current_bet = 0
+        self.chip_movements = []
         self.hand_number += 1
         self.game_stage = GameStage.PRE_FLOP  # 明确设置为PRE_FLOP阶段
         
-        self.deck.reset()
-        self.deck.shuffle()
+        if deck_order is not None:
+            self.deck.cards = list(deck_order)
+        else:
+            seed = seed or self.deal_stream.next_hand_seed()
+            self.deck.reset()
+            self.deck.shuffle(hand_rng(seed))
+        if header is not None:
+            # 重放没有种子的旧记录时事件中也不带种子
+            self._record([START, header, encode_cards(self.deck.cards)] + ([seed] if seed else []))
         
         # 清除所有玩家的庄家标记
         for player in self.players:
@@ -151,7 +229,8 @@ class Table:
                 
                 sb_amount = sb_player.place_bet(self.small_blind)
                 bb_amount = bb_player.place_bet(self.big_blind)
-                self.pot += sb_amount + bb_amount
+                self._add_to_pot(sb_player, sb_amount, 'blind')
+                self._add_to_pot(bb_player, bb_amount, 'blind')
                 self.current_bet = self.big_blind
                 
                 # 小盲注玩家需要补齐到大盲注才算完成初始行动
@@ -169,9 +248,9 @@ class Table:
             total_ante = 0
             for player in active_players:
                 actual_ante = player.place_bet(ante_amount)
+                self._add_to_pot(player, actual_ante, 'ante')
                 total_ante += actual_ante
             
-            self.pot = total_ante
             # 重要：ante模式下，初始current_bet应该为0，让玩家可以自由选择过牌或下注
             self.current_bet = 0
             
@@ -187,6 +266,7 @@ class Table:
         print(f"🎮 新手牌开始: 手牌#{self.hand_number}, 阶段={self.game_stage.value}, 活跃玩家={len(active_players)}, 模式={self.game_mode}")
         return True
     
+    @timed('process_player_action')
     def process_player_action(self, player_id: str, action: PlayerAction, amount: int = 0) -> Dict:
         """处理玩家动作"""
         player = self.get_player(player_id)
@@ -215,7 +295,7 @@ class Table:
                 if call_amount <= 0:
                     return {'success': False, 'message': '无需跟注'}
                 actual_amount = player.call(self.current_bet)
-                self.pot += actual_amount
+                self._add_to_pot(player, actual_amount)
                 action_description = f"跟注 ${actual_amount}"
             elif action == PlayerAction.BET:
                 if self.current_bet > 0:
@@ -227,7 +307,7 @@ class Table:
                 # 下注逻辑（ante和blinds模式都一样）
                 actual_amount = player.place_bet(amount)
                 self.current_bet = player.current_bet
-                self.pot += actual_amount
+                self._add_to_pot(player, actual_amount)
                 action_description = f"下注 ${actual_amount}"
             elif action == PlayerAction.RAISE:
                 if self.current_bet == 0:
@@ -237,14 +317,14 @@ class Table:
                 raise_amount = amount - player.current_bet
                 actual_amount = player.place_bet(raise_amount)
                 self.current_bet = player.current_bet
-                self.pot += actual_amount
+                self._add_to_pot(player, actual_amount)
                 action_description = f"加注到 ${amount}"
             elif action == PlayerAction.ALL_IN:
                 if player.chips == 0:
                     return {'success': False, 'message': '没有筹码可以全下'}
                 actual_amount = player.place_bet(player.chips)
                 self.current_bet = max(self.current_bet, player.current_bet)
-                self.pot += actual_amount
+                self._add_to_pot(player, actual_amount)
                 action_description = f"全下 ${actual_amount}"
             else:
                 return {'success': False, 'message': '无效的动作'}
@@ -252,6 +332,9 @@ class Table:
             # 标记玩家已行动
             player.has_acted = True
             self.last_activity = time.time()
+            if self._recording():
+                self._record([ACTION, player_id, action.value, amount])
+            self._notify_bots(player, action, player.current_bet)
             
             # 检查游戏流程
             flow_result = self.process_game_flow()
@@ -277,6 +360,7 @@ class Table:
         except Exception as e:
             return {'success': False, 'message': f'动作执行失败: {str(e)}'}
     
+    @timed('process_bot_actions')
     def process_bot_actions(self):
         """处理机器人动作 - 持续处理直到轮到人类玩家或游戏结束"""
         from .bot import Bot
@@ -297,7 +381,11 @@ class Table:
             if not current_player:
                 print("没有找到需要行动的玩家，检查游戏流程...")
                 flow_result = self.process_game_flow()
-                if flow_result['hand_complete'] or flow_result['stage_changed']:
+                if flow_result['hand_complete']:
+                    # 手牌已结束：直接返回结算结果，不能再让机器人补充行动
+                    print(f"游戏流程更新: {flow_result}")
+                    return flow_result
+                if flow_result['stage_changed']:
                     print(f"游戏流程更新: {flow_result}")
                     break
                 else:
@@ -334,21 +422,12 @@ class Table:
                 continue
             
             # 构建游戏状态
-            game_state = {
-                'community_cards': self.community_cards,
-                'current_bet': self.current_bet,
-                'big_blind': self.big_blind,
-                'pot_size': self.pot,
-                'active_players': len([p for p in self.players if p.status == PlayerStatus.PLAYING]),
-                'position': 'middle',  # 简化，可以后续改进位置判断
-                'min_raise': self.min_raise,
-                'all_players': self.players  # 为GOD级别机器人提供所有玩家信息
-            }
+            game_state = self.bot_game_state()
             
             # 机器人决策 - 添加异常处理
             action = None
             try:
-                action = player.decide_action(game_state)
+                action = self._bot_decision(player, game_state)
             except Exception as e:
                 print(f"❌ 机器人 {player.nickname} 决策出错: {e}")
                 
@@ -402,7 +481,7 @@ class Table:
                         call_amount = self.current_bet - player.current_bet
                         if call_amount > 0:
                             actual_amount = player.call(self.current_bet)
-                            self.pot += actual_amount
+                            self._add_to_pot(player, actual_amount)
                             print(f"🤖 {player.nickname} 跟注 ${actual_amount} (总投注: ${player.current_bet})")
                         else:
                             # 无需跟注，相当于过牌
@@ -412,7 +491,7 @@ class Table:
                         if amount > 0 and amount <= player.chips:
                             actual_amount = player.place_bet(amount)
                             self.current_bet = player.current_bet
-                            self.pot += actual_amount
+                            self._add_to_pot(player, actual_amount)
                             print(f"🤖 {player.nickname} 下注 ${actual_amount} (总投注: ${player.current_bet})")
                         else:
                             # 无效下注，改为过牌
@@ -423,14 +502,14 @@ class Table:
                         if raise_amount > 0 and raise_amount <= player.chips:
                             actual_amount = player.place_bet(raise_amount)
                             self.current_bet = player.current_bet
-                            self.pot += actual_amount
+                            self._add_to_pot(player, actual_amount)
                             print(f"🤖 {player.nickname} 加注到 ${amount} (总投注: ${player.current_bet})")
                         else:
                             # 无效加注，改为跟注
                             call_amount = self.current_bet - player.current_bet
                             if call_amount > 0 and call_amount <= player.chips:
                                 actual_amount = player.call(self.current_bet)
-                                self.pot += actual_amount
+                                self._add_to_pot(player, actual_amount)
                                 print(f"🤖 {player.nickname} 加注无效，改为跟注 ${actual_amount}")
                             else:
                                 player.check()
@@ -439,7 +518,7 @@ class Table:
                         if player.chips > 0:
                             actual_amount = player.place_bet(player.chips)
                             self.current_bet = max(self.current_bet, player.current_bet)
-                            self.pot += actual_amount
+                            self._add_to_pot(player, actual_amount)
                             print(f"🤖 {player.nickname} 全下 ${actual_amount} (总投注: ${player.current_bet})")
                         else:
                             player.check()
@@ -448,6 +527,7 @@ class Table:
                     # 标记机器人已行动
                     player.has_acted = True
                     had_action_this_round = True
+                    self._notify_bots(player, action_type, player.current_bet)
                     print(f"✅ 机器人 {player.nickname} 已完成行动")
                     
                 except Exception as e:
@@ -493,6 +573,10 @@ class Table:
                 not player.has_acted):
                 remaining_bots.append(player.nickname)
         
+        if remaining_bots and self.game_stage in (GameStage.WAITING, GameStage.SHOWDOWN, GameStage.FINISHED):
+            # 不在下注阶段时不补充行动（否则下注会进入已经结算的底池）
+            remaining_bots = []
+        
         if remaining_bots:
             print(f"⚠️ 发现未完成行动的机器人: {remaining_bots}")
             # 让这些机器人正常决策，而不是强制弃牌
@@ -503,21 +587,12 @@ class Table:
                     print(f"🔧 补充处理机器人 {player.nickname}")
                     
                     # 构建游戏状态，让机器人正常决策
-                    game_state = {
-                        'community_cards': self.community_cards,
-                        'current_bet': self.current_bet,
-                        'big_blind': self.big_blind,
-                        'pot_size': self.pot,
-                        'active_players': len([p for p in self.players if p.status == PlayerStatus.PLAYING]),
-                        'position': 'middle',
-                        'min_raise': self.min_raise,
-                        'all_players': self.players
-                    }
+                    game_state = self.bot_game_state()
                     
                     # 让机器人正常决策
                     action = None
                     try:
-                        action = player.decide_action(game_state)
+                        action = self._bot_decision(player, game_state)
                         print(f"🤖 {player.nickname} 补充决策: {action}")
                     except Exception as e:
                         print(f"❌ 机器人 {player.nickname} 补充决策出错: {e}")
@@ -549,7 +624,7 @@ class Table:
                                 call_amount = self.current_bet - player.current_bet
                                 if call_amount > 0:
                                     actual_amount = player.call(self.current_bet)
-                                    self.pot += actual_amount
+                                    self._add_to_pot(player, actual_amount)
                                     print(f"🤖 {player.nickname} 跟注 ${actual_amount}")
                                 else:
                                     player.check()
@@ -558,7 +633,7 @@ class Table:
                                 if amount > 0 and amount <= player.chips:
                                     actual_amount = player.place_bet(amount)
                                     self.current_bet = player.current_bet
-                                    self.pot += actual_amount
+                                    self._add_to_pot(player, actual_amount)
                                     print(f"🤖 {player.nickname} 下注 ${actual_amount}")
                                 else:
                                     player.check()
@@ -568,14 +643,14 @@ class Table:
                                 if raise_amount > 0 and raise_amount <= player.chips:
                                     actual_amount = player.place_bet(raise_amount)
                                     self.current_bet = player.current_bet
-                                    self.pot += actual_amount
+                                    self._add_to_pot(player, actual_amount)
                                     print(f"🤖 {player.nickname} 加注到 ${amount}")
                                 else:
                                     # 尝试跟注
                                     call_amount = self.current_bet - player.current_bet
                                     if call_amount > 0 and call_amount <= player.chips:
                                         actual_amount = player.call(self.current_bet)
-                                        self.pot += actual_amount
+                                        self._add_to_pot(player, actual_amount)
                                         print(f"🤖 {player.nickname} 加注无效，改为跟注 ${actual_amount}")
                                     else:
                                         player.check()
@@ -584,7 +659,7 @@ class Table:
                                 if player.chips > 0:
                                     actual_amount = player.place_bet(player.chips)
                                     self.current_bet = max(self.current_bet, player.current_bet)
-                                    self.pot += actual_amount
+                                    self._add_to_pot(player, actual_amount)
                                     print(f"🤖 {player.nickname} 全下 ${actual_amount}")
                                 else:
                                     player.check()
@@ -593,6 +668,7 @@ class Table:
                             print(f"❌ 执行机器人动作失败: {e}")
                             player.fold()
                             print(f"🤖 {player.nickname} 因错误弃牌")
+                        self._notify_bots(player, action_type, player.current_bet)
                     
                     player.has_acted = True
         
@@ -621,6 +697,8 @@ class Table:
         # 如果不在玩家列表中，添加进去
         if player not in self.players:
             self.players.append(player)
+            if self._in_hand() and self._recording():
+                self._record([JOIN, position, player_record(player, position)])
         
         self.last_activity = time.time()
         return True
@@ -632,6 +710,37 @@ class Table:
                 return position
         return None
 
+    def bot_game_state(self) -> Dict:
+        """机器人决策用的游戏状态"""
+        return {
+            'community_cards': list(self.community_cards),
+            'current_bet': self.current_bet,
+            'big_blind': self.big_blind,
+            'pot_size': self.pot,
+            'active_players': len([p for p in self.players if p.status == PlayerStatus.PLAYING]),
+            'position': 'middle',  # 简化，可以后续改进位置判断
+            'min_raise': self.min_raise,
+            'hand_number': self.hand_number,
+            'all_players': list(self.players),  # 为GOD级别机器人提供所有玩家信息
+            'tournament': self.tournament  # 锦标赛中按ICM决策全下
+        }
+    
+    def _notify_bots(self, actor: Player, action: PlayerAction, amount: int):
+        """把玩家动作通知给同桌机器人（用于对手建模）"""
+        if self.replay is not None:
+            # 重放时机器人的决策来自记录，不需要更新对手模型
+            return
+        context = {
+            'hand_number': self.hand_number,
+            'stage': self.game_stage.value,
+            'community_cards': list(self.community_cards),
+            'pot': self.pot,
+            'current_bet': self.current_bet
+        }
+        for player in self.players:
+            if player is not actor and isinstance(player, Bot):
+                player.update_opponent_pattern(actor.id, action, amount, context)
+    
     def get_player(self, player_id: str) -> Optional[Player]:
         """获取指定ID的玩家"""
         for player in self.players:
@@ -651,18 +760,19 @@ class Table:
         wins = 0
         ties = 0
         
+        # 自己的牌力在模拟中不变，只评估一次
+        our_hand = HandEvaluator.evaluate_hand(player.hole_cards, self.community_cards)
+        our_strength = our_hand[0].rank_value / 10.0
+        
         for _ in range(simulations):
             # 简化的蒙特卡洛模拟
-            our_hand = HandEvaluator.evaluate_hand(player.hole_cards, self.community_cards)
-            
             # 模拟对手牌力
             opponent_stronger = False
             opponent_same = False
             
             # 简化：随机生成对手牌力
             for _ in range(len(self.players) - 1):
-                opponent_strength = random.random()
-                our_strength = our_hand[0].rank_value / 10.0
+                opponent_strength = self.sim_rng.random()
                 
                 if opponent_strength > our_strength:
                     opponent_stronger = True
@@ -690,36 +800,21 @@ class Table:
         """获取记牌信息"""
         if not self.enable_card_tracking:
             return {}
-        
-        # 统计已知的牌
-        known_cards = []
-        known_cards.extend(self.community_cards)
-        
-        # 统计每种花色和点数的剩余数量
-        suits = ['hearts', 'diamonds', 'clubs', 'spades']
-        ranks = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-        
-        remaining_cards = {
-            'suits': {suit: 13 for suit in suits},
-            'ranks': {rank: 4 for rank in ranks},
-            'total_remaining': 52 - len(known_cards)
-        }
-        
-        # 减去已知的牌
-        for card in known_cards:
-            card_dict = card.to_dict()
-            suit = card_dict['suit']
-            rank = card_dict['rank']
-            
-            if suit in remaining_cards['suits']:
-                remaining_cards['suits'][suit] -= 1
-            if rank in remaining_cards['ranks']:
-                remaining_cards['ranks'][rank] -= 1
-        
-        return {
-            'known_cards': [card.to_dict() for card in known_cards],
-            'remaining_cards': remaining_cards
-        }
+        return self.card_tracker.to_dict()
+    
+    def get_card_tracking_payload(self) -> Optional[str]:
+        """获取记牌信息的JSON（按街缓存，发牌时才失效）"""
+        if not self.enable_card_tracking:
+            return None
+        return self.card_tracker.payload(self.game_stage.value)
+    
+    def get_outs_payload(self, player_id: str) -> str:
+        """玩家本街outs分析的JSON（与记牌信息一样按街缓存）"""
+        player = self.get_player(player_id)
+        if not player:
+            return 'null'
+        return self.card_tracker.outs_payload(player_id, self.game_stage.value, player.hole_cards,
+                                              self.community_cards)
     
     def get_current_player(self) -> Optional[Player]:
         """获取当前应该行动的玩家"""
@@ -783,6 +878,7 @@ class Table:
         print("没有找到需要行动的玩家")
         return None
     
+    @timed('get_table_state')
     def get_table_state(self, player_id: Optional[str] = None) -> Dict:
         """获取牌桌状态"""
         current_player = self.get_current_player()
@@ -836,12 +932,14 @@ class Table:
         print(f"  - 全下玩家投注状况: {[(p.nickname, p.current_bet, p.chips) for p in all_in_players]}")
         return True
     
+    @timed('advance_to_next_stage')
     def advance_to_next_stage(self) -> bool:
         """进入下一个游戏阶段"""
         if self.game_stage == GameStage.PRE_FLOP:
             # 发 flop (3张公共牌)
             new_cards = self.deck.deal_cards(3)
             self.community_cards.extend(new_cards)
+            self.card_tracker.add_cards(new_cards)
             self.game_stage = GameStage.FLOP
             # 显示 flop 牌
             flop_str = " ".join([f"{card.rank.symbol}{card.suit.value}" for card in new_cards])
@@ -850,6 +948,7 @@ class Table:
             # 发 turn (第4张公共牌)
             new_card = self.deck.deal_cards(1)[0]
             self.community_cards.append(new_card)
+            self.card_tracker.add_cards([new_card])
             self.game_stage = GameStage.TURN
             turn_str = f"{new_card.rank.symbol}{new_card.suit.value}"
             print(f"🃏 Turn: {turn_str}")
@@ -857,6 +956,7 @@ class Table:
             # 发 river (第5张公共牌)
             new_card = self.deck.deal_cards(1)[0]
             self.community_cards.append(new_card)
+            self.card_tracker.add_cards([new_card])
             self.game_stage = GameStage.RIVER
             river_str = f"{new_card.rank.symbol}{new_card.suit.value}"
             print(f"🃏 River: {river_str}")
@@ -878,6 +978,8 @@ class Table:
                 player.current_bet = 0
                 player.has_acted = False  # 重置行动状态
         
+        if self._recording():
+            self._record([STAGE, self.game_stage.value, encode_cards(self.community_cards)])
         self.last_activity = time.time()
         return True
     
@@ -896,6 +998,7 @@ class Table:
         
         return False
     
+    @timed('determine_winner')
     def _determine_winner(self) -> Dict:
         """确定获胜者，返回详细的摊牌信息"""
         # 包括全下的玩家在胜负判定中（ALL_IN 和 PLAYING 状态）
@@ -917,7 +1020,7 @@ class Table:
         if len(active_players) == 1:
             # 只有一个活跃玩家，直接获胜（没有摊牌）
             winner = active_players[0]
-            winner.chips += self.pot
+            self._award_pot(winner, self.pot)
             self.game_stage = GameStage.FINISHED
             
             showdown_info['winner'] = winner
@@ -933,7 +1036,7 @@ class Table:
                 hand_description = "未知牌型"
                 if len(self.community_cards) >= 3:
                     from .hand_evaluator import HandEvaluator
-                    hand_rank, best_cards = HandEvaluator.evaluate_hand(winner.hole_cards, self.community_cards)
+                    hand_rank, best_cards = fast_eval.evaluate(winner.hole_cards, self.community_cards)
                     hand_description = HandEvaluator.hand_to_string((hand_rank, best_cards))
                 
                 # 创建获胜者的摊牌信息
@@ -957,6 +1060,7 @@ class Table:
             else:
                 print(f"玩家 {winner.nickname} 获胜（其他玩家弃牌），赢得底池 ${self.pot}")
             
+            self._record_end()
             return showdown_info
         
         if len(active_players) > 1 and self.game_stage == GameStage.SHOWDOWN:
@@ -979,7 +1083,7 @@ class Table:
                     card1_str = f"{player.hole_cards[0].rank.symbol}{player.hole_cards[0].suit.value}"
                     card2_str = f"{player.hole_cards[1].rank.symbol}{player.hole_cards[1].suit.value}"
                     
-                    hand_rank, best_cards = HandEvaluator.evaluate_hand(player.hole_cards, self.community_cards)
+                    hand_rank, best_cards = fast_eval.evaluate(player.hole_cards, self.community_cards)
                     hand_description = HandEvaluator.hand_to_string((hand_rank, best_cards))
                     player_type = "🤖" if player.is_bot else "👤"
                     
@@ -1008,7 +1112,7 @@ class Table:
             winner = None
             if player_hands:
                 winner = player_hands[0]['player']
-                winner.chips += self.pot
+                self._award_pot(winner, self.pot)
                 self.game_stage = GameStage.FINISHED
                 
                 # 添加排名信息
@@ -1044,8 +1148,15 @@ class Table:
         print(f"  - showdown_players数量: {len(showdown_info['showdown_players'])}")
         print(f"  - winner: {showdown_info['winner'].nickname if showdown_info['winner'] else None}")
         
+        self._record_end()
         return showdown_info
     
+    def _record_end(self):
+        """手牌结束事件：各玩家的最终筹码"""
+        if self.game_stage == GameStage.FINISHED and self._recording():
+            self._record([END, [[p.id, p.chips] for p in self.players]])
+    
+    @timed('process_game_flow')
     def process_game_flow(self) -> Dict:
         """处理游戏流程，返回状态更新"""
         result = {
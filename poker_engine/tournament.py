@@ -0,0 +1,327 @@
+"""
+多桌锦标赛
+Multi-table tournament controller with table balancing and breaking
+
+锦标赛控制器管理N张牌桌：玩家出局后按最少移动次数平衡各桌人数（相差不超过1），
+人数减少到可以少开一张桌时拆掉人数最少的桌，盲注按级别表定时上涨。
+正在进行手牌的桌不会移出玩家，欠下的移动在该桌这手牌结束时执行。
+"""
+
+import math
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .bot import Bot
+from .player import Player
+from .rng import fast_stream
+from .table import Table, GameStage
+
+
+class BlindLevel(NamedTuple):
+    small_blind: int
+    big_blind: int
+
+
+# 默认盲注级别表（超过最后一级后每级翻倍）
+DEFAULT_SCHEDULE: Tuple[BlindLevel, ...] = tuple(BlindLevel(sb, sb * 2) for sb in (
+    10, 15, 25, 50, 75, 100, 150, 200, 300, 400, 500, 700, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 10000
+))
+
+
+class TournamentError(ValueError):
+    """锦标赛状态不允许该操作"""
+
+
+class Tournament:
+    """多桌锦标赛控制器"""
+
+    # 无头模拟中一手牌最多调用 process_bot_actions 的次数（防止引擎卡住时死循环）
+    MAX_BOT_PASSES = 50
+
+    def __init__(self, tournament_id: str, starting_chips: int = 1500, table_size: int = 9,
+                 schedule: Optional[List[BlindLevel]] = None, level_hands: int = 10,
+                 level_seconds: Optional[float] = None, clock: Callable[[], float] = time.monotonic,
+                 payouts: Optional[List[float]] = None):
+        """
+        初始化锦标赛
+
+        Args:
+            tournament_id: 锦标赛ID（牌桌ID以它为前缀）
+            starting_chips: 起始筹码
+            table_size: 每桌人数上限
+            schedule: 盲注级别表
+            level_hands: 每张桌平均打多少手牌升一级（无头模拟用）
+            level_seconds: 每级的时长（秒），设置后按时间升级
+            clock: 时钟函数
+            payouts: 第1名、第2名……的奖金（机器人按ICM决策全下），None为不设奖金
+        """
+        if table_size < 2:
+            raise TournamentError("每桌至少2人")
+        self.id = tournament_id
+        self.starting_chips = starting_chips
+        self.table_size = table_size
+        self.schedule = list(schedule or DEFAULT_SCHEDULE)
+        self.level_hands = level_hands
+        self.level_seconds = level_seconds
+        self.clock = clock
+        self.payouts = list(payouts or [])
+
+        self.entrants: Dict[str, Player] = {}
+        self.tables: Dict[str, Table] = {}
+        self.seating: Dict[str, str] = {}           # player_id -> table_id
+        self.finish_order: List[str] = []           # 出局顺序（先出局的名次靠后）
+        # 每张桌在当前手牌结束后要移出的人数；拆桌中的桌整桌移出
+        self.owed: Dict[str, int] = {}
+        self.breaking: set = set()
+
+        self.started_at: Optional[float] = None
+        self.rounds = 0.0        # 平均每张桌打过的手牌数
+        self.hands_played = 0
+        self.level = 0
+        self.moves = 0
+        self.tables_broken = 0
+        self._next_table = 0
+        self._rng = fast_stream('tournament')
+
+    # ----- 报名和开赛 -----
+
+    def register(self, player: Player):
+        """报名（开赛前）"""
+        if self.started_at is not None:
+            raise TournamentError("锦标赛已开始")
+        if player.id in self.entrants:
+            raise TournamentError(f"玩家 {player.id} 已报名")
+        self.entrants[player.id] = player
+
+    def start(self):
+        """随机抽签入座：开 ceil(人数/每桌人数) 张桌，轮流分配，各桌人数相差不超过1"""
+        if self.started_at is not None:
+            raise TournamentError("锦标赛已开始")
+        if len(self.entrants) < 2:
+            raise TournamentError("至少需要2名玩家")
+        self.started_at = self.clock()
+        players = list(self.entrants.values())
+        self._rng.shuffle(players)
+        table_count = math.ceil(len(players) / self.table_size)
+        tables = [self._open_table() for _ in range(table_count)]
+        for index, player in enumerate(players):
+            player.chips = self.starting_chips
+            self._seat(player, tables[index % table_count])
+
+    def _open_table(self) -> Table:
+        self._next_table += 1
+        table_id = f'{self.id}-{self._next_table}'
+        blinds = self.blinds
+        table = Table(table_id, f'{self.id} #{self._next_table}', blinds.small_blind, blinds.big_blind,
+                      self.table_size, self.starting_chips)
+        table.tournament = self
+        self.tables[table_id] = table
+        return table
+
+    def _seat(self, player: Player, table: Table):
+        if not table.add_player(player):
+            raise TournamentError(f"牌桌 {table.id} 已满")
+        self.seating[player.id] = table.id
+
+    # ----- 状态 -----
+
+    @property
+    def remaining(self) -> int:
+        return len(self.seating)
+
+    @property
+    def finished(self) -> bool:
+        return self.started_at is not None and self.remaining <= 1
+
+    @property
+    def blinds(self) -> BlindLevel:
+        if self.level < len(self.schedule):
+            return self.schedule[self.level]
+        last = self.schedule[-1]
+        factor = 2 ** (self.level - len(self.schedule) + 1)
+        return BlindLevel(last.small_blind * factor, last.big_blind * factor)
+
+    def _update_level(self):
+        if self.level_seconds:
+            level = int((self.clock() - self.started_at) // self.level_seconds)
+        else:
+            level = int(self.rounds // self.level_hands) if self.level_hands else 0
+        self.level = max(self.level, level)
+
+    def icm_stacks(self) -> Tuple[List[str], List[int]]:
+        """仍在比赛的玩家ID和桌下筹码（ICM计算用）"""
+        ids = list(self.seating)
+        return ids, [self.entrants[player_id].chips for player_id in ids]
+
+    def standings(self) -> List[Dict]:
+        """名次表：仍在比赛的按筹码排序在前，出局的按出局顺序倒序在后"""
+        alive = sorted((self.entrants[pid] for pid in self.seating), key=lambda p: -p.chips)
+        rows = [{'player_id': p.id, 'nickname': p.nickname, 'chips': p.chips, 'table_id': self.seating[p.id]}
+                for p in alive]
+        rows.extend({'player_id': pid, 'nickname': self.entrants[pid].nickname, 'chips': 0, 'table_id': None}
+                    for pid in reversed(self.finish_order))
+        for place, row in enumerate(rows, 1):
+            row['place'] = place
+        return rows
+
+    def stats(self) -> Dict:
+        return {
+            'id': self.id,
+            'entrants': len(self.entrants),
+            'remaining': self.remaining,
+            'tables': len(self.tables),
+            'level': self.level,
+            'blinds': list(self.blinds),
+            'payouts': self.payouts,
+            'hands_played': self.hands_played,
+            'moves': self.moves,
+            'tables_broken': self.tables_broken
+        }
+
+    # ----- 手牌 -----
+
+    def start_hand(self, table_id: str) -> bool:
+        """按当前级别设置盲注后开始该桌的下一手"""
+        table = self.tables.get(table_id)
+        if table is None or table_id in self.breaking:
+            return False
+        self._update_level()
+        blinds = self.blinds
+        table.small_blind, table.big_blind = blinds
+        table.min_raise = blinds.big_blind
+        return table.start_new_hand()
+
+    def hand_finished(self, table_id: str) -> Dict:
+        """
+        某桌一手牌结束：淘汰没有筹码的玩家，重新规划平衡，执行所有可以执行的移动
+
+        Returns:
+            Dict: {'eliminated': [player_id], 'moved': [(player_id, 原桌, 新桌)], 'broken': [table_id]}
+        """
+        table = self.tables.get(table_id)
+        if table is None:
+            raise TournamentError(f"牌桌 {table_id} 不属于锦标赛")
+        self.hands_played += 1
+        self.rounds += 1 / len(self.tables)
+
+        # 同一手出局的玩家，开局筹码多的名次靠前（先加入出局顺序的名次靠后）
+        busted = sorted((p for p in table.players if p.chips <= 0), key=lambda p: p.total_bet)
+        for player in busted:
+            table.remove_player(player.id)
+            del self.seating[player.id]
+            self.finish_order.append(player.id)
+
+        result = {'eliminated': [p.id for p in busted], 'moved': [], 'broken': []}
+        if self.finished:
+            return result
+        self.rebalance()
+        for source_id in list(self.owed):
+            source = self.tables.get(source_id)
+            if source is not None and not self._in_hand(source):
+                self._release(source, result)
+        return result
+
+    @staticmethod
+    def _in_hand(table: Table) -> bool:
+        return table.game_stage not in (GameStage.WAITING, GameStage.FINISHED)
+
+    # ----- 平衡和拆桌 -----
+
+    def rebalance(self):
+        """
+        重新规划每张桌要移出的人数（覆盖之前的规划）
+
+        先拆桌：剩余人数用更少的桌坐得下时，拆掉人数最少的桌（整桌移出是拆桌所需的最少移动）；
+        再平衡：留下的桌目标人数为 floor(n/t) 或 ceil(n/t)，人数最多的桌分到 ceil，
+        超出目标的部分才移动，移动次数等于总超出人数（最少）。按人数计数排序，O(桌数 + 每桌人数)。
+        """
+        counts = {table_id: len(table.players) for table_id, table in self.tables.items()}
+        total = sum(counts.values())
+        needed = max(1, math.ceil(total / self.table_size))
+
+        staying = [table_id for table_id in counts if table_id not in self.breaking]
+        while len(staying) > needed:
+            smallest = min(staying, key=counts.__getitem__)
+            staying.remove(smallest)
+            self.breaking.add(smallest)
+
+        owed = {table_id: counts[table_id] for table_id in self.breaking}
+        # 计数排序：人数多的桌在前
+        buckets: List[List[str]] = [[] for _ in range(self.table_size + 1)]
+        for table_id in staying:
+            buckets[min(counts[table_id], self.table_size)].append(table_id)
+        ordered = [table_id for bucket in reversed(buckets) for table_id in bucket]
+
+        base, extra = divmod(total, len(ordered))
+        for index, table_id in enumerate(ordered):
+            surplus = counts[table_id] - (base + 1 if index < extra else base)
+            if surplus > 0:
+                owed[table_id] = surplus
+        self.owed = owed
+
+    def _release(self, source: Table, result: Dict):
+        """该桌不在手牌中时执行欠下的移动：每次移到人数最少的留下的桌"""
+        count = self.owed.pop(source.id, 0)
+        breaking = source.id in self.breaking
+        if breaking:
+            count = len(source.players)
+        for _ in range(count):
+            if not source.players:
+                break
+            destination = self._destination(source.id)
+            if destination is None:
+                break
+            player = self._mover(source)
+            source.remove_player(player.id)
+            self._seat(player, destination)
+            self.moves += 1
+            result['moved'].append((player.id, source.id, destination.id))
+        if breaking and not source.players:
+            self.breaking.discard(source.id)
+            del self.tables[source.id]
+            self.tables_broken += 1
+            result['broken'].append(source.id)
+
+    def _destination(self, source_id: str) -> Optional[Table]:
+        best = None
+        for table_id, table in self.tables.items():
+            if table_id == source_id or table_id in self.breaking or len(table.players) >= self.table_size:
+                continue
+            if best is None or len(table.players) < len(best.players):
+                best = table
+        return best
+
+    @staticmethod
+    def _mover(table: Table) -> Player:
+        """移出下一手要下大盲的玩家（引擎按玩家列表的前两位收盲注）"""
+        return table.players[1 % len(table.players)]
+
+    # ----- 无头模拟 -----
+
+    def run_headless(self, max_hands: Optional[int] = None) -> Dict:
+        """
+        全机器人锦标赛的无头模拟：各桌轮流打一手，直到只剩一名玩家
+
+        Args:
+            max_hands: 最多打多少手（None不限制）
+
+        Returns:
+            Dict: 统计信息
+        """
+        if any(not isinstance(player, Bot) for player in self.entrants.values()):
+            raise TournamentError("无头模拟只支持机器人")
+        if self.started_at is None:
+            self.start()
+        while not self.finished and (max_hands is None or self.hands_played < max_hands):
+            for table_id in list(self.tables):
+                if self.finished or (max_hands is not None and self.hands_played >= max_hands):
+                    break
+                if not self.start_hand(table_id):
+                    continue
+                table = self.tables[table_id]
+                for _ in range(self.MAX_BOT_PASSES):
+                    result = table.process_bot_actions()
+                    if (result and result.get('hand_complete')) or not self._in_hand(table):
+                        break
+                self.hand_finished(table_id)
+        return self.stats()
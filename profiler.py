@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+运行时采样分析
+按需启动的进程内采样分析器（输出按牌桌归类的折叠栈，可直接生成火焰图），
+以及自动记录超时处理函数调用栈的慢处理监控
+"""
+
+import functools
+import itertools
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from typing import Callable, Dict, List, Optional
+
+try:
+    import greenlet
+except ImportError:  # 没有greenlet时只能取线程当前的调用栈
+    greenlet = None
+
+
+# 只在本仓库代码的栈帧里查找牌桌ID（库代码里的 self/table 与牌桌无关）
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+# 栈顶是这些函数时视为空闲（等待锁/事件/IO），采样时跳过
+IDLE_FUNCTIONS = {'wait', 'sleep', 'select', 'poll', 'epoll', 'accept', 'recv', 'readline', '_wait_for_tstate_lock'}
+# 分析工具自己的线程不采样
+TOOL_THREADS = {'sampling-profiler', 'slow-handler-watchdog', 'trace-exporter', 'hand-log-writer'}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f'{module}.{code.co_name}'
+
+
+def table_of(frame) -> Optional[str]:
+    """沿调用栈向外查找正在处理的牌桌ID（table_id 变量、table 变量或 Table 实例方法）"""
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename.startswith(PROJECT_ROOT) and 'site-packages' not in code.co_filename:
+            names = code.co_varnames
+            if 'table_id' in names or 'table' in names or 'self' in names:
+                local_vars = frame.f_locals
+                table_id = local_vars.get('table_id')
+                if isinstance(table_id, str):
+                    return table_id
+                for name in ('table', 'self'):
+                    candidate = local_vars.get(name)
+                    if type(candidate).__name__ == 'Table' and isinstance(getattr(candidate, 'id', None), str):
+                        return candidate.id
+        frame = frame.f_back
+    return None
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return code.co_name in IDLE_FUNCTIONS or os.sep + 'hubs' + os.sep in code.co_filename
+
+
+class SamplingProfiler:
+    """定时抓取所有线程的调用栈，统计折叠栈出现次数"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        self.stacks: Counter = Counter()
+        self.by_table: Counter = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+        self._cpu_times: Dict[int, float] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.seconds = 0.0
+        self.interval = 0.01
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, seconds: float, interval: float = 0.01) -> bool:
+        """开始采样 seconds 秒，已在运行时返回False"""
+        with self.lock:
+            if self.running:
+                return False
+            self.stacks = Counter()
+            self.by_table = Counter()
+            self.samples = self.idle_samples = 0
+            self._cpu_times = {}
+            self.seconds = seconds
+            self.interval = interval
+            self.started_at = time.time()
+            self.finished_at = None
+            self.thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self.thread.start()
+        return True
+
+    def _run(self):
+        main = threading.main_thread().ident
+        deadline = time.perf_counter() + self.seconds
+        while time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                name = names.get(ident, str(ident))
+                if name in TOOL_THREADS:
+                    continue
+                # 主线程按墙钟时间统计（SQLite锁等待也要看到），后台线程只统计占用CPU的样本
+                idle = _is_idle(frame) or (ident != main and not self._on_cpu(ident))
+                self._sample(name, frame, idle)
+            time.sleep(self.interval)
+        with self.lock:
+            self.finished_at = time.time()
+
+    def _on_cpu(self, ident: int) -> bool:
+        """线程自上次采样以来是否占用过CPU（平台不支持线程CPU时钟时视为占用）"""
+        try:
+            cpu = time.clock_gettime(time.pthread_getcpuclockid(ident))
+        except (AttributeError, OSError):
+            return True
+        last = self._cpu_times.get(ident)
+        self._cpu_times[ident] = cpu
+        return last is None or cpu - last > self.interval * 0.1
+
+    def _sample(self, thread_name: str, frame, idle: bool):
+        if idle:
+            with self.lock:
+                self.idle_samples += 1
+            return
+        table_id = table_of(frame) or '-'
+        labels = []
+        while frame is not None:
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        labels.reverse()
+        stack = ';'.join([f'table:{table_id}', f'thread:{thread_name}'] + labels)
+        with self.lock:
+            self.stacks[stack] += 1
+            self.by_table[table_id] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """折叠栈格式（flamegraph.pl / speedscope 可直接读取）"""
+        with self.lock:
+            items = self.stacks.most_common()
+        return ''.join(f'{stack} {count}\n' for stack, count in items)
+
+    def report(self, top: int = 20) -> Dict:
+        with self.lock:
+            return {
+                'running': self.running,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'seconds': self.seconds,
+                'interval_ms': round(self.interval * 1000, 3),
+                'samples': self.samples,
+                'idle_samples': self.idle_samples,
+                'by_table': dict(self.by_table.most_common()),
+                'top_stacks': [{'stack': stack, 'samples': count} for stack, count in self.stacks.most_common(top)]
+            }
+
+
+class _Call:
+    __slots__ = ('name', 'start', 'thread_ident', 'glet', 'reported')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.thread_ident = threading.get_ident()
+        self.glet = greenlet.getcurrent() if greenlet is not None else None
+        self.reported = False
+
+
+class SlowHandlerWatchdog:
+    """
+    慢处理监控
+
+    处理函数执行超过阈值时，由后台线程抓取它此刻的调用栈并记录（能看到卡在机器人计算、
+    SQLite锁还是机器人循环里），而不是等它结束后才知道慢。
+    """
+
+    def __init__(self, threshold: float = 1.0, check_interval: float = 0.2, history: int = 50):
+        self.threshold = threshold
+        self.check_interval = check_interval
+        self.inflight: Dict[int, _Call] = {}
+        self.reports = deque(maxlen=history)
+        self.lock = threading.Lock()
+        self._ids = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, name: str) -> Callable:
+        """装饰器：监控处理函数的执行时间"""
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                call_id = next(self._ids)
+                call = _Call(name)
+                with self.lock:
+                    self.inflight[call_id] = call
+                self._ensure_thread()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    with self.lock:
+                        self.inflight.pop(call_id, None)
+                    if call.reported:
+                        elapsed = time.perf_counter() - call.start
+                        print(f"🐢 慢处理 {name} 结束，总耗时 {elapsed:.2f}秒")
+            return wrapper
+        return decorator
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self.lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='slow-handler-watchdog', daemon=True)
+                self._thread.start()
+
+    def _frame_of(self, call: _Call):
+        """处理函数当前的栈帧：挂起的协程取其保存的栈帧，否则取线程正在执行的栈帧"""
+        if call.glet is not None and call.glet.gr_frame is not None:
+            return call.glet.gr_frame
+        return sys._current_frames().get(call.thread_ident)
+
+    def _run(self):
+        while True:
+            time.sleep(self.check_interval)
+            now = time.perf_counter()
+            with self.lock:
+                overdue = [call for call in self.inflight.values()
+                           if not call.reported and now - call.start > self.threshold]
+            for call in overdue:
+                call.reported = True
+                self._report(call, now - call.start)
+
+    def _report(self, call: _Call, elapsed: float):
+        frame = self._frame_of(call)
+        stack = traceback.format_stack(frame) if frame is not None else []
+        table_id = table_of(frame) if frame is not None else None
+        self.reports.append({
+            'handler': call.name,
+            'table_id': table_id,
+            'elapsed': round(elapsed, 3),
+            'detected_at': time.time(),
+            'stack': [line.rstrip() for line in stack]
+        })
+        print(f"🐢 慢处理 {call.name} (牌桌 {table_id or '-'}) 已执行 {elapsed:.2f}秒，当前调用栈:\n"
+              + ''.join(stack[-15:]))
+
+    def recent(self) -> List[Dict]:
+        return list(self.reports)
+
+
+# 全局实例
+profiler = SamplingProfiler()
+slow_handlers = SlowHandlerWatchdog()
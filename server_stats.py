@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+服务器统计
+增量维护在线人数、活跃房间数和在座真人数，并合并推送 stats_update
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class ServerStats:
+    """增量服务器计数器"""
+
+    def __init__(self, broadcast_interval: float = 1.0):
+        """
+        初始化计数器
+
+        Args:
+            broadcast_interval: 两次 stats_update 推送之间的最小间隔（秒）
+        """
+        self.broadcast_interval = broadcast_interval
+        self.lock = threading.Lock()
+
+        self.online_players = 0
+        self.players_in_game = 0
+        # table_id -> 在座真人数
+        self.table_humans: Dict[str, int] = {}
+
+        # 推送相关：由app注入
+        self.emit: Optional[Callable[[Dict], None]] = None
+        self.start_task: Optional[Callable] = None
+        self.sleep: Callable[[float], None] = time.sleep
+
+        self.dirty = False
+        self.flush_scheduled = False
+        self.last_broadcast = 0.0
+        self.broadcasts = 0
+        self.coalesced = 0
+
+    def attach(self, emit: Callable[[Dict], None], start_task: Callable, sleep: Callable[[float], None]):
+        """注入推送函数和后台任务调度函数"""
+        self.emit = emit
+        self.start_task = start_task
+        self.sleep = sleep
+
+    @property
+    def active_tables(self) -> int:
+        return len(self.table_humans)
+
+    def set_online(self, count: int):
+        """更新在线人数"""
+        with self.lock:
+            if count == self.online_players:
+                return
+            self.online_players = count
+        self.mark_dirty()
+
+    def set_table(self, table_id: str, humans: int):
+        """更新房间的在座真人数（房间不存在时视为新增）"""
+        with self.lock:
+            previous = self.table_humans.get(table_id)
+            if previous == humans:
+                return
+            self.table_humans[table_id] = humans
+            self.players_in_game += humans - (previous or 0)
+        self.mark_dirty()
+
+    def remove_table(self, table_id: str):
+        """移除房间"""
+        with self.lock:
+            if table_id not in self.table_humans:
+                return
+            self.players_in_game -= self.table_humans.pop(table_id)
+        self.mark_dirty()
+
+    def snapshot(self) -> Dict:
+        """当前计数"""
+        with self.lock:
+            return {
+                'online_players': self.online_players,
+                'active_tables': self.active_tables,
+                'players_in_game': self.players_in_game
+            }
+
+    def mark_dirty(self):
+        """标记计数已变化，在推送间隔内合并为一次推送"""
+        with self.lock:
+            self.dirty = True
+            if self.flush_scheduled:
+                self.coalesced += 1
+                return
+            self.flush_scheduled = True
+
+        if self.start_task:
+            self.start_task(self._flush_later)
+        else:
+            self.flush_scheduled = False
+
+    def _flush_later(self):
+        """等到推送间隔结束后推送一次最新计数"""
+        wait = self.last_broadcast + self.broadcast_interval - time.time()
+        if wait > 0:
+            self.sleep(wait)
+
+        with self.lock:
+            self.flush_scheduled = False
+            if not self.dirty:
+                return
+            self.dirty = False
+            self.last_broadcast = time.time()
+            self.broadcasts += 1
+
+        if self.emit:
+            try:
+                self.emit(self.snapshot())
+            except Exception as e:
+                print(f"❌ 推送统计信息失败: {e}")
+
+
+# 全局计数器实例
+server_stats = ServerStats()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+会话注册表
+按socket会话、玩家ID和昵称双向索引在线会话，并维护每个房间的成员集合和玩家就座的房间，所有查找均为O(1)
+"""
+
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+
+class SessionRegistry:
+    """在线会话注册表"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+
+        # session_id -> 会话信息 {'player_id', 'nickname', 'timestamp', ...}
+        self.by_sid: Dict[str, Dict] = {}
+        # player_id -> session_id
+        self.by_player: Dict[str, str] = {}
+        # nickname -> session_id
+        self.by_nickname: Dict[str, str] = {}
+        # session_id -> table_id
+        self.sid_tables: Dict[str, str] = {}
+        # table_id -> session_id集合
+        self.table_members: Dict[str, Set[str]] = {}
+        # player_id -> 就座的房间（断线后保留，离座或房间关闭时清除）；table_id -> player_id集合
+        self.player_tables: Dict[str, Set[str]] = {}
+        self.table_players: Dict[str, Set[str]] = {}
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.by_sid
+
+    def __len__(self) -> int:
+        return len(self.by_sid)
+
+    def register(self, session_id: str, player_id: str, nickname: str, **fields) -> Dict:
+        """注册会话（同一会话重复注册时覆盖）"""
+        with self.lock:
+            self.unregister(session_id)
+
+            info = {'player_id': player_id, 'nickname': nickname, 'timestamp': datetime.now()}
+            info.update(fields)
+            self.by_sid[session_id] = info
+            self.by_player[player_id] = session_id
+            self.by_nickname[nickname] = session_id
+            return info
+
+    def unregister(self, session_id: str) -> Optional[Dict]:
+        """注销会话并清理所有索引，返回被移除的会话信息"""
+        with self.lock:
+            info = self.by_sid.pop(session_id, None)
+            if info is None:
+                return None
+
+            if self.by_player.get(info['player_id']) == session_id:
+                del self.by_player[info['player_id']]
+            if self.by_nickname.get(info['nickname']) == session_id:
+                del self.by_nickname[info['nickname']]
+            self.leave_table(session_id)
+            return info
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        """获取会话信息"""
+        return self.by_sid.get(session_id)
+
+    def update(self, session_id: str, **fields):
+        """更新会话附加字段"""
+        with self.lock:
+            info = self.by_sid.get(session_id)
+            if info is not None:
+                info.update(fields)
+
+    def sid_for_player(self, player_id: str) -> Optional[str]:
+        """玩家当前的socket会话"""
+        return self.by_player.get(player_id)
+
+    def sid_for_nickname(self, nickname: str) -> Optional[str]:
+        """昵称当前的socket会话"""
+        return self.by_nickname.get(nickname)
+
+    def is_online(self, player_id: str) -> bool:
+        """玩家是否在线"""
+        return player_id in self.by_player
+
+    def join_table(self, session_id: str, table_id: str):
+        """记录会话所在的房间（同时记录该玩家就座）"""
+        with self.lock:
+            self.leave_table(session_id)
+            self.sid_tables[session_id] = table_id
+            self.table_members.setdefault(table_id, set()).add(session_id)
+            info = self.by_sid.get(session_id)
+            if info is not None:
+                self.seat(info['player_id'], table_id)
+
+    def leave_table(self, session_id: str) -> Optional[str]:
+        """清除会话所在的房间，返回原房间ID"""
+        with self.lock:
+            table_id = self.sid_tables.pop(session_id, None)
+            if table_id is not None:
+                members = self.table_members.get(table_id)
+                if members is not None:
+                    members.discard(session_id)
+                    if not members:
+                        del self.table_members[table_id]
+            return table_id
+
+    def table_of(self, session_id: str) -> Optional[str]:
+        """会话所在的房间"""
+        return self.sid_tables.get(session_id)
+
+    def table_sessions(self, table_id: str) -> List[str]:
+        """房间内的所有会话"""
+        with self.lock:
+            return list(self.table_members.get(table_id, ()))
+
+    def seat(self, player_id: str, table_id: str):
+        """记录玩家就座的房间（不需要在线会话，例如从快照恢复的玩家）"""
+        with self.lock:
+            self.player_tables.setdefault(player_id, set()).add(table_id)
+            self.table_players.setdefault(table_id, set()).add(player_id)
+
+    def unseat(self, player_id: str, table_id: str):
+        """玩家离开房间的座位"""
+        with self.lock:
+            for index, key, value in ((self.player_tables, player_id, table_id),
+                                      (self.table_players, table_id, player_id)):
+                members = index.get(key)
+                if members is not None:
+                    members.discard(value)
+                    if not members:
+                        del index[key]
+
+    def tables_of(self, player_id: str) -> List[str]:
+        """玩家就座的房间（调用方仍以牌桌上的玩家列表为准）"""
+        with self.lock:
+            return list(self.player_tables.get(player_id, ()))
+
+    def drop_table(self, table_id: str):
+        """房间关闭时清理成员关系和座位"""
+        with self.lock:
+            for session_id in self.table_members.pop(table_id, ()):
+                self.sid_tables.pop(session_id, None)
+            for player_id in list(self.table_players.get(table_id, ())):
+                self.unseat(player_id, table_id)
+
+    def session_ids(self) -> List[str]:
+        """所有会话ID"""
+        with self.lock:
+            return list(self.by_sid)
+
+
+# 全局会话注册表实例
+session_registry = SessionRegistry()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+启动与就绪
+记录进程启动到第一个请求的时间，在后台按顺序执行预热步骤（数据库迁移、余额载入、
+大厅索引等），全部完成后就绪接口才返回200
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 进程启动到处理第一个请求的目标时间（秒），可用 POKER_STARTUP_TARGET 覆盖
+DEFAULT_TARGET_SECONDS = 2.0
+
+_imported_at = time.time()
+
+
+def process_started_at() -> float:
+    """进程的启动时间（Unix秒）：Linux上读取/proc，其他平台取本模块导入时间"""
+    try:
+        with open('/proc/self/stat') as f:
+            # 进程名可能含空格，从最后一个右括号之后开始按空格分割，starttime 是第22个字段
+            fields = f.read().rsplit(')', 1)[1].split()
+        start_ticks = int(fields[19])
+        with open('/proc/stat') as f:
+            boot_time = next(int(line.split()[1]) for line in f if line.startswith('btime'))
+        return boot_time + start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, StopIteration):
+        return _imported_at
+
+
+class StartupTracker:
+    """启动耗时、预热步骤和就绪状态"""
+
+    def __init__(self, target: float = DEFAULT_TARGET_SECONDS):
+        self.target = target
+        self.process_started_at = process_started_at()
+        self.serving_at: Optional[float] = None
+        self.first_request_at: Optional[float] = None
+        self.first_request: Optional[str] = None
+        self.ready_at: Optional[float] = None
+        self.steps: List[Dict] = []
+        self.lock = threading.Lock()
+        self._warmup_started = False
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_at is not None
+
+    def _since_start(self, at: Optional[float]) -> Optional[float]:
+        return round(at - self.process_started_at, 3) if at is not None else None
+
+    def mark_serving(self):
+        """开始监听请求（模块导入和启动代码已执行完）"""
+        self.serving_at = time.time()
+        elapsed = self.serving_at - self.process_started_at
+        print(f"⏱️ 启动用时 {elapsed:.2f}秒（目标 {self.target:.1f}秒）")
+        if elapsed > self.target:
+            print(f"⚠️ 启动用时超过目标 {self.target:.1f}秒")
+
+    def mark_request(self, name: str):
+        """记录第一个请求（之后只多一次属性判断）"""
+        if self.first_request_at is not None:
+            return
+        with self.lock:
+            if self.first_request_at is None:
+                self.first_request_at = time.time()
+                self.first_request = name
+
+    def warmup(self, steps: List[Tuple[str, Callable[[], object]]],
+               start_task: Optional[Callable] = None) -> bool:
+        """
+        在后台依次执行预热步骤（只执行一次）
+
+        某一步失败只记录错误并继续，失败的部分在第一次使用时还会再初始化。
+
+        Args:
+            steps: [(步骤名, 函数)]
+            start_task: 启动后台任务的函数，None时同步执行
+        """
+        with self.lock:
+            if self._warmup_started:
+                return False
+            self._warmup_started = True
+
+        def run():
+            for name, step in steps:
+                start = time.perf_counter()
+                error = None
+                try:
+                    step()
+                except Exception as e:
+                    error = str(e)
+                    print(f"⚠️ 预热步骤 {name} 失败: {e}")
+                with self.lock:
+                    self.steps.append({'name': name, 'seconds': round(time.perf_counter() - start, 4),
+                                       'error': error})
+            self.ready_at = time.time()
+            print(f"✅ 服务就绪（进程启动后 {self.ready_at - self.process_started_at:.2f}秒）")
+
+        if start_task:
+            start_task(run)
+        else:
+            run()
+        return True
+
+    def report(self) -> Dict:
+        with self.lock:
+            steps = list(self.steps)
+        return {
+            'ready': self.ready,
+            'target_seconds': self.target,
+            'serving_seconds': self._since_start(self.serving_at),
+            'time_to_first_request': self._since_start(self.first_request_at),
+            'first_request': self.first_request,
+            'ready_seconds': self._since_start(self.ready_at),
+            'steps': steps
+        }
+
+
+def _target_from_env() -> float:
+    try:
+        return float(os.environ.get('POKER_STARTUP_TARGET', DEFAULT_TARGET_SECONDS))
+    except ValueError:
+        return DEFAULT_TARGET_SECONDS
+
+
+# 全局启动状态
+startup = StartupTracker(_target_from_env())
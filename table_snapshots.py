@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+停机快照
+收到 SIGTERM 时把所有牌桌的完整状态原子地写入一个文件，下次启动时恢复，
+部署重启不再丢掉进行中的手牌
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from poker_engine.snapshot import SNAPSHOT_VERSION
+
+DEFAULT_SNAPSHOT_FILE = os.path.join('snapshots', 'tables.json')
+
+
+class TableSnapshotStore:
+    """快照文件的原子写入和一次性读取"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_SNAPSHOT_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.last_write: Optional[Dict] = None
+        self.last_restore: Optional[Dict] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def configure_from_env(self):
+        """按环境变量 POKER_SNAPSHOT_FILE 配置快照路径（off 关闭）"""
+        path = os.environ.get('POKER_SNAPSHOT_FILE', DEFAULT_SNAPSHOT_FILE)
+        self.path = None if path.lower() in ('', 'off', 'none', '0') else path
+
+    def write(self, entries: List[Dict]) -> Optional[Dict]:
+        """
+        原子写入快照：先写临时文件并 fsync，再 rename 覆盖，中途被杀不会留下半个文件
+
+        Args:
+            entries: 每张牌桌一项（可JSON序列化）
+
+        Returns:
+            Dict: 写入统计，未启用时为None
+        """
+        if not self.enabled:
+            return None
+        start = time.perf_counter()
+        payload = json.dumps({
+            'version': SNAPSHOT_VERSION,
+            'created_at': time.time(),
+            'tables': entries
+        }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+        with self.lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            temp_path = f'{self.path}.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+            # rename 本身也要落盘
+            try:
+                fd = os.open(directory, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError:
+                pass
+
+        self.last_write = {
+            'tables': len(entries),
+            'bytes': len(payload),
+            'seconds': round(time.perf_counter() - start, 4),
+            'at': time.time()
+        }
+        return self.last_write
+
+    def consume(self) -> List[Dict]:
+        """
+        读取快照并改名为 .restored（只恢复一次，之后崩溃重启不会回到旧状态）
+
+        Returns:
+            List[Dict]: 快照中的牌桌项，没有快照或版本不兼容时为空列表
+        """
+        if not self.enabled or not os.path.exists(self.path):
+            return []
+        start = time.perf_counter()
+        with self.lock:
+            try:
+                with open(self.path, 'rb') as f:
+                    data = json.loads(f.read().decode('utf-8'))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ 读取牌桌快照失败: {e}")
+                data = None
+            try:
+                os.replace(self.path, f'{self.path}.restored')
+            except OSError as e:
+                print(f"⚠️ 归档牌桌快照失败: {e}")
+
+        if not isinstance(data, dict):
+            return []
+        if data.get('version') != SNAPSHOT_VERSION:
+            print(f"⚠️ 牌桌快照版本 {data.get('version')} 与当前版本 {SNAPSHOT_VERSION} 不兼容，跳过恢复")
+            return []
+        entries = data.get('tables') or []
+        self.last_restore = {
+            'tables': len(entries),
+            'snapshot_age': round(time.time() - data.get('created_at', time.time()), 3),
+            'read_seconds': round(time.perf_counter() - start, 4)
+        }
+        return entries
+
+    def stats(self) -> Dict:
+        return {
+            'path': self.path,
+            'last_write': self.last_write,
+            'last_restore': self.last_restore
+        }
+
+
+# 全局快照存储
+table_snapshots = TableSnapshotStore()
@@ -11,6 +11,8 @@ import threading
 from typing import Dict, List, Optional, Callable
 from datetime import datetime, timedelta
 from enum import Enum
+from metrics import metrics
+from migrations import Migration, LazySchema
 
 class TableStateChange(Enum):
     """牌桌状态变化类型"""
@@ -22,6 +24,54 @@ class TableStateChange(Enum):
     WAITING_FOR_RESTART = "waiting_for_restart"
     RESTART_NEEDED = "restart_needed"
 
+
+def _create_tables(cursor):
+    """版本1：牌桌状态记录和重启检查点表"""
+    # 牌桌状态记录表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_states (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_id TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            state_type TEXT NOT NULL,
+            game_stage TEXT,
+            hand_number INTEGER,
+            player_count INTEGER,
+            active_player_count INTEGER,
+            pot INTEGER DEFAULT 0,
+            current_bet INTEGER DEFAULT 0,
+            is_hand_complete BOOLEAN DEFAULT FALSE,
+            needs_restart BOOLEAN DEFAULT FALSE,
+            metadata TEXT
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_table_states_table_id ON table_states(table_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_table_states_timestamp ON table_states(timestamp)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_table_states_needs_restart ON table_states(needs_restart)')
+
+    # 自动重启检查点表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS restart_checkpoints (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_id TEXT NOT NULL,
+            hand_number INTEGER NOT NULL,
+            finished_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            restart_scheduled_at DATETIME,
+            restart_completed_at DATETIME,
+            restart_attempts INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'pending',
+            error_message TEXT
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_restart_checkpoints_table_id ON restart_checkpoints(table_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_restart_checkpoints_status ON restart_checkpoints(status)')
+
+
+MIGRATIONS = [
+    Migration(1, '创建牌桌状态和重启检查点表', _create_tables),
+]
+
+
 class TableStateManager:
     """牌桌状态管理器"""
     
@@ -31,68 +81,28 @@ class TableStateManager:
         self.monitoring_active = True
         self.check_interval = 2  # 每2秒检查一次状态
         
-        self.init_database()
-        self.start_monitoring()
+        # 第一次访问数据库时才执行迁移
+        self.schema = LazySchema('table_states', db_path, MIGRATIONS)
+        # 监控线程在第一次注册回调时才启动（没有回调时检查点无人处理）
+        self.monitor_thread: Optional[threading.Thread] = None
+    
+    def get_connection(self) -> sqlite3.Connection:
+        """获取数据库连接（第一次使用时执行迁移）"""
+        self.schema.ensure()
+        return sqlite3.connect(self.db_path)
     
     def init_database(self):
-        """初始化数据库"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # 牌桌状态记录表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS table_states (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                table_id TEXT NOT NULL,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                state_type TEXT NOT NULL,
-                game_stage TEXT,
-                hand_number INTEGER,
-                player_count INTEGER,
-                active_player_count INTEGER,
-                pot INTEGER DEFAULT 0,
-                current_bet INTEGER DEFAULT 0,
-                is_hand_complete BOOLEAN DEFAULT FALSE,
-                needs_restart BOOLEAN DEFAULT FALSE,
-                metadata TEXT
-            )
-        ''')
-        
-        # 创建索引
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_table_states_table_id ON table_states(table_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_table_states_timestamp ON table_states(timestamp)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_table_states_needs_restart ON table_states(needs_restart)')
-        
-        # 自动重启检查点表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS restart_checkpoints (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                table_id TEXT NOT NULL,
-                hand_number INTEGER NOT NULL,
-                finished_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                restart_scheduled_at DATETIME,
-                restart_completed_at DATETIME,
-                restart_attempts INTEGER DEFAULT 0,
-                status TEXT DEFAULT 'pending',
-                error_message TEXT
-            )
-        ''')
-        
-        # 创建索引
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_restart_checkpoints_table_id ON restart_checkpoints(table_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_restart_checkpoints_status ON restart_checkpoints(status)')
-        
-        conn.commit()
-        conn.close()
-        print("📊 牌桌状态管理器数据库初始化完成")
+        """执行待处理的迁移"""
+        self.schema.ensure()
     
+    @metrics.timed_write('table_states')
     def record_state(self, table_id: str, state_type: TableStateChange, 
                     game_stage: str = None, hand_number: int = None,
                     player_count: int = 0, active_player_count: int = 0,
                     pot: int = 0, current_bet: int = 0, 
                     is_hand_complete: bool = False, metadata: Dict = None):
         """记录牌桌状态"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         needs_restart = self._check_if_needs_restart(
@@ -150,7 +160,7 @@ class TableStateManager:
     
     def _create_restart_checkpoint(self, table_id: str, hand_number: int):
         """创建重启检查点"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         # 检查是否已经有待处理的重启检查点
@@ -186,6 +196,7 @@ class TableStateManager:
         if table_id not in self.state_callbacks:
             self.state_callbacks[table_id] = []
         self.state_callbacks[table_id].append(callback)
+        self.start_monitoring()
     
     def _trigger_callbacks(self, table_id: str, state_type: TableStateChange, data: Dict):
         """触发状态变化回调"""
@@ -197,7 +208,10 @@ class TableStateManager:
                     print(f"❌ 回调执行失败: {e}")
     
     def start_monitoring(self):
-        """开始监控状态变化"""
+        """开始监控状态变化（已在运行时不重复启动）"""
+        if self.monitor_thread is not None and self.monitor_thread.is_alive():
+            return
+        
         def monitor_loop():
             while self.monitoring_active:
                 try:
@@ -207,13 +221,13 @@ class TableStateManager:
                     print(f"❌ 监控循环错误: {e}")
                     time.sleep(5)
         
-        monitor_thread = threading.Thread(target=monitor_loop, daemon=True)
-        monitor_thread.start()
+        self.monitor_thread = threading.Thread(target=monitor_loop, name='table-state-monitor', daemon=True)
+        self.monitor_thread.start()
         print("🔄 状态监控器已启动")
     
     def _check_pending_restarts(self):
         """检查待处理的重启"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         # 查找需要重启的检查点
@@ -248,9 +262,10 @@ class TableStateManager:
         conn.commit()
         conn.close()
     
+    @metrics.timed_write('table_states')
     def mark_restart_completed(self, table_id: str, hand_number: int, success: bool = True):
         """标记重启完成"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         status = 'completed' if success else 'failed'
@@ -267,7 +282,7 @@ class TableStateManager:
     
     def get_table_state_history(self, table_id: str, limit: int = 10) -> List[Dict]:
         """获取牌桌状态历史"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -303,7 +318,7 @@ class TableStateManager:
     
     def get_pending_restarts(self) -> List[Dict]:
         """获取待处理的重启"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -328,9 +343,10 @@ class TableStateManager:
         
         return restarts
     
+    @metrics.timed_write('table_states')
     def cleanup_old_states(self, days: int = 7):
         """清理旧状态记录"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         cutoff_date = datetime.now() - timedelta(days=days)
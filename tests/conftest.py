@@ -0,0 +1,9 @@
+"""
+测试公共配置
+仓库根目录的模块（app、chip_ledger 等）是平铺的，把根目录加入导入路径
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
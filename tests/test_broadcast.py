@@ -0,0 +1,85 @@
+"""
+广播批处理测试：每个牌桌房间每种协议格式只广播一次，私有事件的接收者单独收到frame
+"""
+
+from broadcast import FrameBatcher, LEGACY_WIRE, wire_room
+from wire_protocol import PROTOCOL_COMPACT
+
+
+COMPACT_WIRE = (PROTOCOL_COMPACT, False)
+
+
+class FakeServer:
+    def __init__(self):
+        self.rooms = {}
+
+    def enter_room(self, sid, room, namespace=None):
+        self.rooms.setdefault(room, set()).add(sid)
+
+    def leave_room(self, sid, room, namespace=None):
+        self.rooms.get(room, set()).discard(sid)
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.server = FakeServer()
+        self.sent = []
+
+    def emit(self, event, data=None, room=None, skip_sid=None):
+        self.sent.append((event, room, sorted(skip_sid or [])))
+
+
+def _batcher(members, wires):
+    socketio = FakeSocketIO()
+    frames = FrameBatcher(socketio, lambda room: members.get(room, []),
+                          is_room=lambda target: target in members,
+                          is_session=lambda target: target in wires,
+                          wire_of=lambda sid: wires.get(sid, LEGACY_WIRE))
+    return frames, socketio
+
+
+def test_one_emit_per_wire_group():
+    members = {'t1': ['a', 'b', 'c', 'd']}
+    wires = {'a': LEGACY_WIRE, 'b': LEGACY_WIRE, 'c': COMPACT_WIRE, 'd': COMPACT_WIRE}
+    frames, socketio = _batcher(members, wires)
+
+    @frames.batched
+    def command():
+        frames.emit('table_updated', {'pot': 10}, room='t1')
+        frames.emit('table_updated', {'pot': 20}, room='t1')
+
+    command()
+    assert socketio.sent == [('frame', 't1', ['c', 'd']), ('frame', wire_room('t1', COMPACT_WIRE), [])]
+    assert socketio.server.rooms[wire_room('t1', COMPACT_WIRE)] == {'c', 'd'}
+    assert frames.stats()['events_coalesced'] == 2
+
+
+def test_private_event_gets_own_frame():
+    members = {'t1': ['a', 'c', 'd']}
+    wires = {'a': LEGACY_WIRE, 'c': COMPACT_WIRE, 'd': COMPACT_WIRE}
+    frames, socketio = _batcher(members, wires)
+
+    @frames.batched
+    def command():
+        frames.emit('table_updated', {}, room='t1')
+        frames.emit('your_cards', {}, room='c')
+
+    command()
+    assert ('frame', wire_room('t1', COMPACT_WIRE), ['c']) in socketio.sent
+    assert ('frame', 'c', []) in socketio.sent
+    assert len(socketio.sent) == 3
+
+
+def test_wire_room_follows_membership():
+    members = {'t1': ['c', 'd']}
+    wires = {'c': COMPACT_WIRE, 'd': COMPACT_WIRE}
+    frames, socketio = _batcher(members, wires)
+    send = frames.batched(lambda: frames.emit('table_updated', {}, room='t1'))
+
+    send()
+    members['t1'] = ['c']
+    send()
+    assert socketio.server.rooms[wire_room('t1', COMPACT_WIRE)] == {'c'}
+    frames.drop_room('t1')
+    assert not socketio.server.rooms[wire_room('t1', COMPACT_WIRE)]
+    assert not frames.wire_members
@@ -0,0 +1,79 @@
+"""
+筹码账本测试：开户、对账、机器人共用账户、快照重建和旧快照清理
+"""
+
+import sqlite3
+
+import pytest
+
+from chip_ledger import ChipLedger, BOT_ACCOUNT
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return ChipLedger(str(tmp_path / 'ledger.db'), snapshot_interval=1000)
+
+
+def _count(ledger, table):
+    conn = sqlite3.connect(ledger.db_path)
+    count = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    conn.close()
+    return count
+
+
+def test_open_account_is_idempotent(ledger):
+    assert ledger.open_account('alice', 1000) == 1000
+    assert ledger.open_account('alice', 5000) == 1000
+    assert ledger.get_balance('alice') == 1000
+
+
+def test_record_hand_opens_with_pre_hand_chips(ledger):
+    movements = [('alice', 'blind', -10), ('bob', 'blind', -20), ('bob', 'award', 30)]
+    ledger.record_hand('t1', 1, movements, {'alice': 990, 'bob': 1010})
+    assert ledger.get_balance('alice') == 990
+    assert ledger.get_balance('bob') == 1010
+    opens = {e['entry_type'] for e in ledger.get_player_entries('alice')}
+    assert 'open' in opens
+    assert ledger.audit_hand('t1', 1)['balanced']
+
+
+def test_record_hand_reconciles_with_adjust_entry(ledger):
+    ledger.open_account('alice', 1000)
+    ledger.record_hand('t1', 1, [('alice', 'bet', -100)], {'alice': 950})
+    assert ledger.get_balance('alice') == 950
+    latest = ledger.get_player_entries('alice', limit=1)[0]
+    assert (latest['entry_type'], latest['delta']) == ('adjust', 50)
+
+
+def test_bots_share_one_account(ledger):
+    ledger.open_account('alice', 1000)
+    for hand in range(1, 4):
+        bot = f'bot-{hand}'
+        movements = [('alice', 'bet', -50), (bot, 'bet', -50), (bot, 'award', 100)]
+        ledger.record_hand('t1', hand, movements, {'alice': 1000 - 50 * hand}, {bot})
+        assert ledger.audit_hand('t1', hand)['balanced']
+    assert set(ledger.balances) == {'alice', BOT_ACCOUNT}
+    assert ledger.get_balance(BOT_ACCOUNT) == 150
+    assert ledger.get_balance('alice') == 850
+
+
+def test_rebuild_from_snapshot_and_tail(tmp_path):
+    path = str(tmp_path / 'ledger.db')
+    ledger = ChipLedger(path, snapshot_interval=3)
+    ledger.open_account('alice', 1000)
+    ledger.open_account('bob', 1000)
+    ledger.record_hand('t1', 1, [('alice', 'bet', -100), ('bob', 'award', 100)], {'alice': 900, 'bob': 1100})
+    ledger.record_hand('t1', 2, [('bob', 'bet', -40)], {'bob': 1060})
+
+    rebuilt = ChipLedger(path, snapshot_interval=3)
+    rebuilt.init_database()
+    assert rebuilt.balances == {'alice': 900, 'bob': 1060}
+    assert rebuilt.last_entry_id == ledger.last_entry_id
+
+
+def test_snapshot_keeps_only_latest(ledger):
+    ledger.open_account('alice', 1000)
+    for _ in range(3):
+        ledger.snapshot()
+    assert _count(ledger, 'balance_snapshots') == 1
+    assert _count(ledger, 'snapshot_balances') == 1
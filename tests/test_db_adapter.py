@@ -0,0 +1,23 @@
+"""
+数据库适配器测试：新玩家只分配一次唯一昵称，返回的昵称与入库的一致
+"""
+
+from db_adapter import DatabaseAdapter
+
+
+def test_new_players_get_suffix_without_separator(tmp_path, monkeypatch):
+    adapter = DatabaseAdapter(str(tmp_path / 'poker.db'))
+    assert adapter.create_or_get_player('alice').nickname == 'alice'
+
+    # 同名时跳过按昵称取回，强制走新建路径
+    monkeypatch.setattr(adapter.db, 'get_user_by_nickname', lambda nickname: None)
+    allocations = []
+    allocate = adapter.db.allocate_nickname
+    monkeypatch.setattr(adapter.db, 'allocate_nickname',
+                        lambda *args: allocations.append(args) or allocate(*args))
+
+    for expected in ('alice1', 'alice2'):
+        player = adapter.create_or_get_player('alice')
+        assert player.nickname == expected
+        assert adapter.db.get_user(player.id)['nickname'] == expected
+    assert allocations == [('alice', ''), ('alice', '')]
@@ -0,0 +1,21 @@
+"""
+胜率服务测试：令牌桶限流和桶数量上限
+"""
+
+from equity_service import EquityService, TokenBuckets
+
+
+def test_allow_limits_burst_per_player():
+    service = EquityService(rate=0.0, burst=2)
+    assert [service.allow('alice') for _ in range(3)] == [True, True, False]
+    assert service.allow('bob')
+    assert service.stats()['rate_limited'] == 1
+
+
+def test_buckets_are_bounded():
+    buckets = TokenBuckets(rate=0.0, burst=1, max_keys=100)
+    for index in range(1000):
+        buckets.take(f'player-{index}')
+    assert len(buckets) == 100
+    # 最近使用的键仍保留已用完的桶
+    assert not buckets.take('player-999')
@@ -0,0 +1,75 @@
+"""
+位掩码评估器测试：与 HandEvaluator 的结果逐手一致，outs分析按街缓存
+"""
+
+import random
+
+import pytest
+
+from poker_engine.card import Card, Deck, Suit, Rank
+from poker_engine.fast_eval import cards_mask, evaluate, evaluate_mask, mask_cards
+from poker_engine.hand_evaluator import HandEvaluator, HandRank
+from poker_engine.outs import analyze_outs
+from poker_engine.card_tracker import CardTracker
+
+
+def _cards(text):
+    suits = {'s': Suit.SPADES, 'h': Suit.HEARTS, 'd': Suit.DIAMONDS, 'c': Suit.CLUBS}
+    ranks = {rank.symbol: rank for rank in Rank}
+    return [Card(suits[token[-1]], ranks[token[:-1]]) for token in text.split()]
+
+
+@pytest.mark.parametrize('count', [5, 6, 7])
+def test_matches_hand_evaluator(count):
+    rng = random.Random(count)
+    deck = Deck()
+    for _ in range(2000):
+        cards = rng.sample(deck.cards, count)
+        assert evaluate(cards[:2], cards[2:]) == HandEvaluator.evaluate_hand(cards[:2], cards[2:])
+
+
+def test_score_order_matches_compare_hands():
+    rng = random.Random(1)
+    deck = Deck()
+    for _ in range(2000):
+        board = rng.sample(deck.cards, 9)
+        first, second = board[:2], board[2:4]
+        expected = HandEvaluator.compare_hands(HandEvaluator.evaluate_hand(first, board[4:]),
+                                               HandEvaluator.evaluate_hand(second, board[4:]))
+        a = evaluate_mask(cards_mask(first + board[4:]))
+        b = evaluate_mask(cards_mask(second + board[4:]))
+        assert (a > b) - (a < b) == expected
+
+
+@pytest.mark.parametrize('text, rank', [
+    ('As Ks Qs Js 10s', HandRank.ROYAL_FLUSH),
+    ('5h 4h 3h 2h Ah', HandRank.STRAIGHT_FLUSH),
+    ('Ad 2c 3s 4h 5d', HandRank.STRAIGHT),
+    ('9c 9d 9h 4s 4d', HandRank.FULL_HOUSE),
+])
+def test_categories(text, rank):
+    cards = _cards(text)
+    assert evaluate(cards[:2], cards[2:])[0] == rank
+
+
+def test_mask_round_trip():
+    cards = _cards('As 2c 10d Jh')
+    assert set(mask_cards(cards_mask(cards))) == set(cards)
+
+
+def test_flush_draw_outs():
+    outs = analyze_outs(_cards('Ah Kh'), _cards('2h 7h Jc'))
+    assert outs['outs']['flush'] == 9
+    assert outs['cards_to_come'] == 2
+
+
+def test_tracker_caches_outs_per_street():
+    tracker = CardTracker()
+    hole, board = _cards('Ah Kh'), _cards('2h 7h Jc')
+    tracker.add_cards(board)
+    first = tracker.outs_payload('alice', 'flop', hole, board)
+    assert tracker.outs_payload('alice', 'flop', hole, board) is first
+    board = board + _cards('3d')
+    tracker.add_cards(board[-1:])
+    assert tracker.outs_payload('alice', 'turn', hole, board) is not first
+    assert tracker.outs_payload('alice', 'river', hole, board + _cards('4c')) == 'null'
@@ -0,0 +1,75 @@
+"""
+ICM测试：动态规划与逐一枚举名次顺序一致，蒙特卡洛接近精确值，大型比赛不走动态规划
+"""
+
+import itertools
+
+import pytest
+
+from poker_engine import icm
+
+
+def _brute_force(stacks, payouts):
+    equities = [0.0] * len(stacks)
+    for order in itertools.permutations(range(len(stacks))):
+        probability, remaining = 1.0, sum(stacks)
+        for i in order:
+            probability *= stacks[i] / remaining
+            remaining -= stacks[i]
+        for place, i in enumerate(order[:len(payouts)]):
+            equities[i] += probability * payouts[place]
+    return equities
+
+
+@pytest.mark.parametrize('stacks, payouts', [
+    ([5000, 3000, 2000], [50, 30, 20]),
+    ([1200, 800, 4000, 300, 2700, 1000], [40, 25, 15]),
+    ([10, 20, 30, 40, 50, 60, 70], [1, 1, 1, 1, 1, 1, 1]),
+])
+def test_exact_matches_brute_force(stacks, payouts):
+    equities, exact = icm.icm_equity(stacks, payouts)
+    assert exact
+    assert equities == pytest.approx(_brute_force(stacks, payouts), abs=1e-9)
+    assert sum(equities) == pytest.approx(sum(payouts[:len(stacks)]))
+
+
+def test_busted_players_get_nothing():
+    equities, _ = icm.icm_equity([0, 100, 100], [70, 30])
+    assert equities == pytest.approx([0.0, 50.0, 50.0])
+
+
+def test_sampled_close_to_exact():
+    stacks = [1200, 800, 4000, 300, 2700, 1000, 1500, 600]
+    payouts = [50, 30, 20]
+    exact, _ = icm.icm_equity(stacks, payouts)
+    sampled, is_exact = icm.icm_equity(stacks, payouts, samples=50000, exact_limit=0, seed=7)
+    assert not is_exact
+    assert sampled == pytest.approx(exact, abs=0.5)
+
+
+def test_large_field_uses_monte_carlo():
+    stacks = list(range(1, 101))
+    assert icm.step_count(100, 4) > icm.EXACT_STEP_LIMIT
+    equities, exact = icm.icm_equity(stacks, [40, 30, 20, 10], samples=2000, seed=1)
+    assert not exact
+    assert sum(equities) == pytest.approx(100)
+
+
+def test_results_are_cached():
+    stacks, payouts = [3100, 2900, 1000], [60, 40]
+    icm.icm_equity(stacks, payouts)
+    hits = icm.cache_stats()['hits']
+    icm.icm_equity(stacks, payouts)
+    assert icm.cache_stats()['hits'] == hits + 1
+
+
+def test_call_threshold_exceeds_chip_odds_on_bubble():
+    # 4人争3个奖励圈，短码全下：跟注所需胜率高于筹码底池赔率
+    stacks = [4000, 4000, 1000, 1000]
+    pot, call = 2000, 2000
+    threshold = icm.call_threshold(stacks, [50, 30, 20], hero=0, villain=1, pot=pot, call=call)
+    assert call / (pot + call) < threshold <= 1.0
+
+
+def test_call_threshold_none_without_payouts():
+    assert icm.call_threshold([100, 100], [], hero=0, villain=1, pot=50, call=50) is None
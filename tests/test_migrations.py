@@ -0,0 +1,102 @@
+"""
+结构迁移测试：只执行尚未应用的版本，失败时整体回滚，各存储的迁移能从空库执行到最新版本
+"""
+
+import sqlite3
+
+import pytest
+
+import chip_ledger
+import database
+import game_logger
+import player_persistence
+import table_state_manager
+from migrations import Migration, LazySchema, Migrator, add_column
+
+STORES = [chip_ledger, database, game_logger, player_persistence, table_state_manager]
+
+BASE = [
+    Migration(1, 'items', 'CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)'),
+    Migration(2, 'items.price', lambda cursor: add_column(cursor, 'items', 'price', 'INTEGER DEFAULT 0')),
+]
+
+
+def _user_version(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _columns(path, table):
+    conn = sqlite3.connect(path)
+    try:
+        return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+    finally:
+        conn.close()
+
+
+def test_applies_only_pending_versions(tmp_path):
+    path = str(tmp_path / 'store.db')
+    migrator = Migrator()
+    assert migrator.migrate('store', path, BASE) == 2
+    assert migrator.status()['store']['applied'] == [1, 2]
+
+    assert migrator.migrate('store', path, BASE) == 2
+    assert migrator.status()['store']['applied'] == []
+
+    later = BASE + [Migration(3, 'items.sku', 'ALTER TABLE items ADD COLUMN sku TEXT')]
+    assert migrator.migrate('store', path, later) == 3
+    assert migrator.status()['store']['applied'] == [3]
+    assert _columns(path, 'items') == ['id', 'name', 'price', 'sku']
+
+
+def test_failed_migration_rolls_back(tmp_path):
+    path = str(tmp_path / 'store.db')
+
+    def broken(cursor):
+        cursor.execute('CREATE TABLE extra (id INTEGER)')
+        raise sqlite3.OperationalError('boom')
+
+    with pytest.raises(sqlite3.OperationalError):
+        Migrator().migrate('store', path, BASE + [Migration(3, 'broken', broken)])
+    # 同一事务中的所有版本都没有生效
+    assert _user_version(path) == 0
+    assert _columns(path, 'extra') == []
+    assert _columns(path, 'items') == []
+
+
+def test_add_column_is_idempotent(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'store.db'))
+    cursor = conn.cursor()
+    cursor.execute('CREATE TABLE items (id INTEGER PRIMARY KEY)')
+    assert add_column(cursor, 'items', 'name', 'TEXT')
+    assert not add_column(cursor, 'items', 'name', 'TEXT')
+    conn.close()
+
+
+def test_lazy_schema_initializes_once(tmp_path):
+    calls = []
+    schema = None
+
+    def on_ready():
+        # 初始化期间的再次调用直接返回
+        schema.ensure()
+        calls.append(schema.version)
+
+    schema = LazySchema('store', str(tmp_path / 'store.db'), BASE, on_ready=on_ready)
+    assert not schema.ready
+    schema.ensure()
+    schema.ensure()
+    assert schema.ready
+    assert calls == [2]
+
+
+@pytest.mark.parametrize('store', STORES, ids=lambda module: module.__name__)
+def test_store_migrations_from_empty(store, tmp_path):
+    versions = [migration.version for migration in store.MIGRATIONS]
+    assert versions == sorted(set(versions))
+    path = str(tmp_path / 'store.db')
+    assert Migrator().migrate(store.__name__, path, store.MIGRATIONS) == versions[-1]
+    assert _user_version(path) == versions[-1]
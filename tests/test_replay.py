@@ -0,0 +1,99 @@
+"""
+手牌重放测试：固定种子录制的机器人手牌可以逐事件重放，记录被篡改时报告不一致
+"""
+
+import contextlib
+import copy
+import io
+import json
+
+import pytest
+
+from poker_engine import Table, Bot, BotLevel, instrumentation
+from poker_engine.hand_events import HandLog, HandRecorder, END, BOT
+from poker_engine.replay import replay, verify_hands, ReplayDivergence
+from poker_engine.rng import set_seed_override
+
+SEED = 20240615
+
+
+def _record_hands(count, seed=SEED):
+    """6人初级机器人桌连续打 count 手牌并记录事件流（与 bench_replay 相同）"""
+    set_seed_override(seed)
+    hands = []
+    table = Table('replay', 'replay')
+    instrumentation.set_hand_sink(HandRecorder(hands.append))
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(6):
+                table.add_player(Bot(f'bot_{i}', f'bot_{i}', 1000, BotLevel.BEGINNER))
+            for _ in range(count):
+                for player in table.players:
+                    player.chips = 1000
+                table.start_new_hand()
+                for _ in range(10):
+                    result = table.process_bot_actions()
+                    if (result and result.get('hand_complete')) or table.game_stage.value in ('finished', 'showdown'):
+                        break
+    finally:
+        instrumentation.set_hand_sink(None)
+        set_seed_override(None)
+    return [hand for hand in hands if hand.complete]
+
+
+@pytest.fixture(scope='module')
+def hands():
+    recorded = _record_hands(20)
+    assert len(recorded) >= 15
+    return recorded
+
+
+def _replay_quietly(*args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return replay(*args, **kwargs)
+
+
+def test_recorded_hands_replay(hands):
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert verify_hands(hands) == []
+
+
+def test_same_seed_records_same_events(hands):
+    again = _record_hands(len(hands) + 5)
+    assert [hand.events for hand in again[:len(hands)]] == [hand.events for hand in hands]
+
+
+def test_replay_reaches_recorded_chips(hands):
+    for hand in hands:
+        table = _replay_quietly(hand)
+        kind, final_chips = hand.events[-1]
+        assert kind == END
+        chips = {p.id: p.chips for p in table.players}
+        assert {player_id: chips[player_id] for player_id, _ in final_chips} == dict(final_chips)
+
+
+def test_partial_replay_is_deterministic(hands):
+    hand = max(hands, key=lambda h: len(h.events))
+    offset = len(hand.events) // 2
+    first = _replay_quietly(hand, offset)
+    second = _replay_quietly(HandLog.from_dict(json.loads(json.dumps(hand.to_dict()))), offset)
+    assert [(p.id, p.chips, p.status) for p in first.players] == \
+           [(p.id, p.chips, p.status) for p in second.players]
+    assert first.community_cards == second.community_cards
+    assert first.pot == second.pot
+
+
+def test_tampered_end_is_detected(hands):
+    hand = HandLog.from_dict(copy.deepcopy(hands[0].to_dict()))
+    hand.events[-1][1][0][1] += 1
+    with pytest.raises(ReplayDivergence):
+        _replay_quietly(hand)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert len(verify_hands([hand])) == 1
+
+
+def test_missing_bot_decision_is_detected(hands):
+    hand = HandLog.from_dict(copy.deepcopy(hands[0].to_dict()))
+    hand.events = [event for event in hand.events if event[0] != BOT]
+    with pytest.raises(ReplayDivergence):
+        _replay_quietly(hand)
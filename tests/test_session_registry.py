@@ -0,0 +1,40 @@
+"""
+会话注册表测试：会话、房间成员和玩家座位的索引
+"""
+
+from session_registry import SessionRegistry
+
+
+def test_register_and_join():
+    registry = SessionRegistry()
+    registry.register('sid-1', 'alice', 'Alice')
+    registry.join_table('sid-1', 't1')
+    assert registry.table_of('sid-1') == 't1'
+    assert registry.sid_for_player('alice') == 'sid-1'
+    assert registry.table_sessions('t1') == ['sid-1']
+    assert registry.tables_of('alice') == ['t1']
+
+
+def test_seat_survives_disconnect_until_unseated():
+    registry = SessionRegistry()
+    registry.register('sid-1', 'alice', 'Alice')
+    registry.join_table('sid-1', 't1')
+    registry.unregister('sid-1')
+    assert not registry.is_online('alice')
+    assert registry.table_of('sid-1') is None
+    assert registry.tables_of('alice') == ['t1']
+    registry.unseat('alice', 't1')
+    assert registry.tables_of('alice') == []
+    assert not registry.player_tables and not registry.table_players
+
+
+def test_drop_table_clears_members_and_seats():
+    registry = SessionRegistry()
+    registry.register('sid-1', 'alice', 'Alice')
+    registry.join_table('sid-1', 't1')
+    registry.seat('bob', 't1')
+    registry.seat('bob', 't2')
+    registry.drop_table('t1')
+    assert registry.table_of('sid-1') is None
+    assert registry.tables_of('alice') == []
+    assert registry.tables_of('bob') == ['t2']
@@ -0,0 +1,91 @@
+"""
+牌桌快照测试：快照经JSON往返后恢复出同样的牌桌，恢复后继续发出的牌与不重启时相同
+"""
+
+import contextlib
+import io
+import json
+
+import pytest
+
+from poker_engine import Table, Player, Bot, BotLevel
+from poker_engine.player import PlayerAction
+from poker_engine.snapshot import snapshot_table, restore_table, SnapshotError
+from poker_engine.speculation import speculation_worker
+from table_snapshots import TableSnapshotStore
+
+
+def _table_on_flop():
+    table = Table('snap', 'snap')
+    with contextlib.redirect_stdout(io.StringIO()):
+        table.add_player(Player('h', 'human', 1000))
+        table.add_player(Bot('b1', 'beginner', 1000, BotLevel.BEGINNER))
+        table.add_player(Bot('b2', 'advanced', 1000, BotLevel.ADVANCED))
+        table.start_new_hand()
+        while table.game_stage.value == 'pre_flop':
+            _call_or_check(table)
+    return table
+
+
+def _call_or_check(table):
+    player = table.get_current_player()
+    call = table.current_bet - player.current_bet
+    table.process_player_action(player.id, PlayerAction.CALL if call else PlayerAction.CHECK, call)
+
+
+def _as_json(data):
+    return json.loads(json.dumps(data))
+
+
+def _round_trip(table):
+    return restore_table(_as_json(snapshot_table(table)))
+
+
+def test_round_trip_is_identical():
+    table = _table_on_flop()
+    restored = _round_trip(table)
+    assert _as_json(snapshot_table(restored)) == _as_json(snapshot_table(table))
+    assert isinstance(restored.get_player('b2'), Bot)
+    # 座位和玩家列表引用同一个对象
+    seated = {p.id: p for p in restored.seats.values() if p is not None}
+    assert all(seated[p.id] is p for p in restored.players)
+
+
+def test_restored_table_deals_the_same_cards():
+    table = _table_on_flop()
+    restored = _round_trip(table)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for current in (table, restored):
+            stage = current.game_stage
+            while current.game_stage == stage:
+                _call_or_check(current)
+    assert [str(c) for c in restored.community_cards] == [str(c) for c in table.community_cards]
+    assert restored.pot == table.pot
+
+
+def test_restored_bots_can_be_scheduled():
+    # 恢复的对手模型只有统计数据，没有本手的范围
+    restored = _round_trip(_table_on_flop())
+    bot = restored.get_player('b2')
+    assert bot.opponent_model.get('h') is not None
+    inputs = bot.equity_inputs(restored.bot_game_state())
+    assert all(opponent.weights is None for opponent in inputs['opponents'])
+    try:
+        assert speculation_worker.schedule(restored) >= 1
+    finally:
+        speculation_worker.cancel(restored.id)
+
+
+def test_incomplete_snapshot_raises():
+    data = snapshot_table(_table_on_flop())
+    del data['deck']
+    with pytest.raises(SnapshotError):
+        restore_table(data)
+
+
+def test_store_is_consumed_once(tmp_path):
+    store = TableSnapshotStore(str(tmp_path / 'tables.json'))
+    entry = {'table': snapshot_table(_table_on_flop())}
+    assert store.write([entry])['tables'] == 1
+    assert store.consume() == [_as_json(entry)]
+    assert store.consume() == []
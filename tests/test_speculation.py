@@ -0,0 +1,83 @@
+"""
+机器人预计算测试：预计算线程只读输入快照，结果被同一局面的决策命中
+"""
+
+import contextlib
+import io
+
+from poker_engine import Table, Player, Bot, BotLevel
+from poker_engine.player import PlayerAction
+from poker_engine.speculation import speculation_stats
+
+
+def _flop_table():
+    table = Table('spec', 'spec')
+    with contextlib.redirect_stdout(io.StringIO()):
+        table.add_player(Bot('god', 'god', 1000, BotLevel.GOD))
+        table.add_player(Player('h', 'human', 1000))
+        table.start_new_hand()
+        while table.game_stage.value == 'pre_flop':
+            player = table.get_current_player()
+            call = table.current_bet - player.current_bet
+            table.process_player_action(player.id, PlayerAction.CALL if call else PlayerAction.CHECK, call)
+    return table
+
+
+def test_inputs_are_detached_from_live_players():
+    table = _flop_table()
+    bot, human = table.players
+    inputs = bot.equity_inputs(table.bot_game_state())
+    hole_cards = inputs['hole_cards']
+    opponent_cards = inputs['opponents'][0].hole_cards
+
+    # 事件循环线程之后修改玩家对象，快照不受影响
+    bot.hole_cards.clear()
+    human.hole_cards.clear()
+    assert len(hole_cards) == 2 and len(opponent_cards) == 2
+    assert inputs['opponents'][0].id == human.id
+
+
+def test_precomputed_snapshot_is_hit():
+    table = _flop_table()
+    bot = table.players[0]
+    speculation_stats.reset()
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert bot.precompute_equity(bot.equity_inputs(table.bot_game_state()))
+        bot.street_equity(table.bot_game_state())
+    report = speculation_stats.report()
+    assert report['speculative_hits'] == 1
+    assert report['misses'] == 0
+
+
+def test_stale_snapshot_is_discarded():
+    table = _flop_table()
+    bot = table.players[0]
+    inputs = bot.equity_inputs(table.bot_game_state())
+    # 预计算开始前新的一手已经开始（事件循环线程为新局面拍了快照）
+    bot._equity_hand = (inputs['hand_number'] + 1, 0)
+    speculation_stats.reset()
+    assert not bot.precompute_equity(inputs)
+    assert speculation_stats.report()['discarded'] == 1
+
+
+def test_decision_does_not_wait_and_late_result_is_dropped():
+    table = _flop_table()
+    bot = table.players[0]
+    inputs = bot.equity_inputs(table.bot_game_state())
+    compute = bot._compute_equity
+    decided = []
+
+    def slow_compute(snapshot):
+        # 后台计算期间轮到机器人决策：不等待后台线程，现场计算
+        bot._compute_equity = compute
+        with contextlib.redirect_stdout(io.StringIO()):
+            decided.append(bot.street_equity(table.bot_game_state()))
+        return compute(snapshot)
+
+    bot._compute_equity = slow_compute
+    speculation_stats.reset()
+    assert not bot.precompute_equity(inputs)
+    report = speculation_stats.report()
+    assert report['misses'] == 1 and report['discarded'] == 1
+    # 缓存中保留的是决策现场算出的结果
+    assert bot._equity_cache[bot._equity_key(inputs)][0] is decided[0]
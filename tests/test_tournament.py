@@ -0,0 +1,106 @@
+"""
+锦标赛测试：开赛抽签和每手后的平衡让各桌人数相差不超过1，拆桌，无头模拟中筹码守恒
+"""
+
+import contextlib
+import io
+
+import pytest
+
+from poker_engine import Bot, BotLevel
+from poker_engine.rng import set_seed_override
+from poker_engine.tournament import Tournament, TournamentError
+
+SEED = 20240701
+
+
+def _tournament(entrants, **kwargs):
+    tournament = Tournament('t', **kwargs)
+    for i in range(entrants):
+        tournament.register(Bot(f'bot_{i}', f'bot_{i}', 0, BotLevel.BEGINNER))
+    return tournament
+
+
+def _sizes(tournament):
+    return sorted(len(table.players) for table in tournament.tables.values())
+
+
+def _bust(tournament, table, count):
+    for player in table.players[:count]:
+        player.chips = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        return tournament.hand_finished(table.id)
+
+
+def test_start_seats_evenly():
+    tournament = _tournament(20)
+    with contextlib.redirect_stdout(io.StringIO()):
+        tournament.start()
+    assert _sizes(tournament) == [6, 7, 7]
+    assert all(p.chips == tournament.starting_chips for p in tournament.entrants.values())
+    assert {tournament.seating[pid] for pid in tournament.entrants} == set(tournament.tables)
+
+
+def test_rebalance_moves_only_the_surplus():
+    tournament = _tournament(27)
+    with contextlib.redirect_stdout(io.StringIO()):
+        tournament.start()
+    table = next(iter(tournament.tables.values()))
+    result = _bust(tournament, table, 3)
+    # 9/9/6 -> 8/8/8：两张满桌各移出一人
+    assert len(result['eliminated']) == 3
+    assert len(result['moved']) == 2
+    assert _sizes(tournament) == [8, 8, 8]
+    assert tournament.owed == {}
+
+
+def test_table_is_broken_when_the_field_fits():
+    tournament = _tournament(18)
+    with contextlib.redirect_stdout(io.StringIO()):
+        tournament.start()
+    table = next(iter(tournament.tables.values()))
+    result = _bust(tournament, table, 1)
+    # 17人时两张桌坐不下，仍是9/8
+    assert result['broken'] == [] and _sizes(tournament) == [8, 9]
+    result = _bust(tournament, table, 8)
+    # 剩9人一张桌坐得下：拆掉人数少的桌
+    assert len(result['broken']) == 1
+    assert _sizes(tournament) == [9]
+
+
+def test_registration_errors():
+    tournament = _tournament(2)
+    with pytest.raises(TournamentError):
+        tournament.register(tournament.entrants['bot_0'])
+    with pytest.raises(TournamentError):
+        Tournament('t', table_size=1)
+    with pytest.raises(TournamentError):
+        _tournament(1).start()
+
+
+def test_headless_run_keeps_tables_balanced_and_chips_conserved():
+    set_seed_override(SEED)
+    tournament = _tournament(30)
+    total = 30 * tournament.starting_chips
+    hand_finished = tournament.hand_finished
+
+    def checked(table_id):
+        result = hand_finished(table_id)
+        sizes = _sizes(tournament)
+        assert sizes[-1] - sizes[0] <= 1
+        assert sum(tournament.entrants[pid].chips for pid in tournament.seating) == total
+        return result
+
+    tournament.hand_finished = checked
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            summary = tournament.run_headless(max_hands=3000)
+    finally:
+        set_seed_override(None)
+
+    assert tournament.finished
+    assert summary['remaining'] == 1
+    assert len(tournament.finish_order) == 29
+    standings = tournament.standings()
+    assert standings[0]['chips'] == total
+    assert [row['place'] for row in standings] == list(range(1, 31))
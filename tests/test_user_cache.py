@@ -0,0 +1,37 @@
+"""
+用户缓存测试：昵称编号入库后才占用，过期条目按一次未命中计数
+"""
+
+import time
+
+from user_cache import UserCache
+
+
+def test_suffix_is_taken_only_after_note():
+    cache = UserCache()
+    loads = []
+
+    def load_taken():
+        loads.append(1)
+        return {0, 1}
+
+    # 插入失败（没有 note_nickname）时同一编号仍然可用
+    assert cache.allocate_nickname('bob', '_', load_taken) == 'bob_2'
+    assert cache.allocate_nickname('bob', '_', load_taken) == 'bob_2'
+    cache.note_nickname('bob_2')
+    assert cache.allocate_nickname('bob', '_', load_taken) == 'bob_3'
+    assert len(loads) == 1
+
+
+def test_expired_nickname_lookup_counts_one_miss():
+    cache = UserCache(ttl=60)
+    cache.put({'id': 'u1', 'nickname': 'bob'})
+    assert cache.get_by_nickname('bob')['id'] == 'u1'
+
+    user, _ = cache._entries['u1']
+    cache._entries['u1'] = (user, time.time() - 1)
+    assert cache.get_by_nickname('bob') is None
+    assert cache.get_by_nickname('carol') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 2)
+    assert stats['size'] == 0
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+请求链路追踪
+从Socket.IO事件到引擎、机器人、数据库写入和广播的轻量级span追踪，
+上下文通过contextvars在调用链中传递，后台任务和线程用 propagate 显式传递，
+结束的span以OTLP JSON格式写入本地轮转的JSONL文件（无需外部collector）
+"""
+
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# OTLP SpanKind
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+# OTLP StatusCode
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+SERVICE_NAME = 'texas-holdem-poker'
+SCOPE_NAME = 'poker.tracing'
+
+# 默认配置（可用环境变量覆盖，POKER_TRACE_FILE 设为 off 关闭追踪）
+DEFAULT_TRACE_FILE = os.path.join('traces', 'spans.jsonl')
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+DEFAULT_BACKUPS = 5
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+# 独立的随机数生成器：生成ID和采样不影响（可能被设定种子的）全局 random
+_random = random.Random()
+
+
+def _attribute(key: str, value) -> Dict:
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+
+class Span:
+    """一个计时单元（trace_id/span_id 为十六进制字符串，时间为Unix纳秒）"""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_span_id', 'name', 'kind', 'start_ns', 'end_ns',
+                 '_start_perf', 'attributes', 'events', 'status', 'status_message')
+
+    recording = True
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], kind: int, attributes: Optional[Dict]):
+        self.trace_id = trace_id
+        self.span_id = '%016x' % _random.getrandbits(64)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.attributes = {k: v for k, v in attributes.items() if v is not None} if attributes else {}
+        self.events: List = []
+        self.status = STATUS_UNSET
+        self.status_message = ''
+        self.start_ns = time.time_ns()
+        self._start_perf = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value):
+        if value is not None:
+            self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes):
+        self.events.append((time.time_ns(), name, attributes))
+
+    def record_exception(self, exc: BaseException):
+        self.status = STATUS_ERROR
+        self.status_message = f'{type(exc).__name__}: {exc}'
+        self.add_event('exception', **{'exception.type': type(exc).__name__, 'exception.message': str(exc)})
+
+    def end(self):
+        # 用单调时钟计算时长，避免墙钟调整导致负耗时
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._start_perf)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or self.start_ns) - self.start_ns) / 1e6
+
+    def to_otlp(self) -> Dict:
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_span_id or '',
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or self.start_ns),
+            'attributes': [_attribute(k, v) for k, v in self.attributes.items()],
+            'status': {'code': self.status}
+        }
+        if self.status_message:
+            span['status']['message'] = self.status_message
+        if self.events:
+            span['events'] = [{'timeUnixNano': str(ts), 'name': name,
+                               'attributes': [_attribute(k, v) for k, v in attrs.items()]}
+                              for ts, name, attrs in self.events]
+        return span
+
+
+class _NonRecordingSpan:
+    """未采样或追踪关闭时使用的空span：所有操作都是空操作，子span也不会记录"""
+
+    recording = False
+    trace_id = span_id = None
+
+    def set_attribute(self, key: str, value):
+        pass
+
+    def add_event(self, name: str, **attributes):
+        pass
+
+    def record_exception(self, exc: BaseException):
+        pass
+
+
+NON_RECORDING = _NonRecordingSpan()
+
+
+class JsonlSpanExporter:
+    """
+    span导出器
+
+    结束的span放入队列，由后台线程按批写成一行OTLP JSON（ExportTraceServiceRequest结构），
+    文件超过 max_bytes 时按 spans.jsonl.1 ... .N 轮转。请求线程只做一次入队。
+    """
+
+    BATCH_SIZE = 256
+    FLUSH_INTERVAL = 1.0
+    QUEUE_SIZE = 20000
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES, backups: int = DEFAULT_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.queue: queue.Queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self.exported = 0
+        self.dropped = 0
+        self.write_errors = 0
+        self.rotations = 0
+        self.resource = {'attributes': [_attribute('service.name', SERVICE_NAME),
+                                        _attribute('process.pid', os.getpid())]}
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._ensure_thread()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.FLUSH_INTERVAL
+            while len(batch) < self.BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.write(batch)
+
+    def flush(self):
+        """同步写出队列中剩余的span（关闭服务器前调用）"""
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self.write(batch)
+
+    def write(self, spans: List[Span]):
+        payload = {'resourceSpans': [{
+            'resource': self.resource,
+            'scopeSpans': [{'scope': {'name': SCOPE_NAME}, 'spans': [span.to_otlp() for span in spans]}]
+        }]}
+        line = json.dumps(payload, ensure_ascii=False, separators=(',', ':')) + '\n'
+        data = line.encode('utf-8')
+        with self._lock:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                if self.max_bytes and os.path.exists(self.path) \
+                        and os.path.getsize(self.path) + len(data) > self.max_bytes:
+                    self._rotate()
+                with open(self.path, 'ab') as f:
+                    f.write(data)
+                self.exported += len(spans)
+            except OSError as e:
+                self.write_errors += 1
+                print(f"⚠️ 写入追踪文件失败: {e}")
+
+    def _rotate(self):
+        for index in range(self.backups - 1, 0, -1):
+            source = f'{self.path}.{index}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.path}.{index + 1}')
+        if self.backups > 0:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+
+    def stats(self) -> Dict:
+        return {
+            'path': self.path,
+            'queued': self.queue.qsize(),
+            'exported': self.exported,
+            'dropped': self.dropped,
+            'write_errors': self.write_errors,
+            'rotations': self.rotations
+        }
+
+
+class Tracer:
+    """创建span并维护当前span上下文"""
+
+    def __init__(self, exporter: Optional[JsonlSpanExporter] = None, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.traces_started = 0
+        self.traces_sampled_out = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def configure(self, path: Optional[str], sample_rate: float = 1.0,
+                  max_bytes: int = DEFAULT_MAX_BYTES, backups: int = DEFAULT_BACKUPS):
+        """设置导出文件（None关闭追踪）和根span采样率"""
+        self.exporter = JsonlSpanExporter(path, max_bytes, backups) if path else None
+        self.sample_rate = sample_rate
+
+    def configure_from_env(self):
+        """按环境变量配置：POKER_TRACE_FILE、POKER_TRACE_SAMPLE、POKER_TRACE_MAX_MB、POKER_TRACE_BACKUPS"""
+        path = os.environ.get('POKER_TRACE_FILE', DEFAULT_TRACE_FILE)
+        if path.lower() in ('', 'off', 'none', '0'):
+            path = None
+        try:
+            sample_rate = float(os.environ.get('POKER_TRACE_SAMPLE', '1.0'))
+            max_bytes = int(float(os.environ.get('POKER_TRACE_MAX_MB', DEFAULT_MAX_BYTES / 1024 / 1024)) * 1024 * 1024)
+            backups = int(os.environ.get('POKER_TRACE_BACKUPS', DEFAULT_BACKUPS))
+        except ValueError as e:
+            print(f"⚠️ 追踪配置无效，使用默认值: {e}")
+            sample_rate, max_bytes, backups = 1.0, DEFAULT_MAX_BYTES, DEFAULT_BACKUPS
+        self.configure(path, sample_rate, max_bytes, backups)
+
+    def current(self):
+        """当前span（没有时返回空span，可以直接调用 set_attribute）"""
+        return _current_span.get() or NON_RECORDING
+
+    def annotate(self, attributes: Dict):
+        """给当前span添加属性"""
+        span = _current_span.get()
+        if span is not None and span.recording:
+            for key, value in attributes.items():
+                span.set_attribute(key, value)
+
+    @contextlib.contextmanager
+    def span(self, name: str, kind: int = KIND_INTERNAL, attributes: Optional[Dict] = None):
+        """开始一个span：有当前span时作为其子span，否则开始新的trace（按采样率）"""
+        parent = _current_span.get()
+        if self.exporter is None or (parent is not None and not parent.recording):
+            yield NON_RECORDING
+            return
+        if parent is None:
+            self.traces_started += 1
+            if self.sample_rate < 1.0 and _random.random() >= self.sample_rate:
+                self.traces_sampled_out += 1
+                token = _current_span.set(NON_RECORDING)
+                try:
+                    yield NON_RECORDING
+                finally:
+                    _current_span.reset(token)
+                return
+            span = Span(name, '%032x' % _random.getrandbits(128), None, kind, attributes)
+        else:
+            span = Span(name, parent.trace_id, parent.span_id, kind, attributes)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            exporter = self.exporter
+            if exporter is not None:
+                exporter.export(span)
+
+    @contextlib.contextmanager
+    def child_span(self, name: str, attributes: Optional[Dict] = None):
+        """只在已有trace中记录的span（维护线程里的数据库写入等不单独成为trace）"""
+        if _current_span.get() is None:
+            yield NON_RECORDING
+            return
+        with self.span(name, attributes=attributes) as span:
+            yield span
+
+    def traced(self, name: str, kind: int = KIND_INTERNAL,
+               attributes: Optional[Callable[..., Dict]] = None) -> Callable:
+        """
+        装饰器：函数执行期间作为一个span
+
+        Args:
+            name: span名称
+            kind: KIND_SERVER 表示请求入口
+            attributes: 从调用参数计算属性的函数
+        """
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if self.exporter is None:
+                    return func(*args, **kwargs)
+                with self.span(name, kind, attributes(*args, **kwargs) if attributes else None):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def propagate(self, func: Callable, name: Optional[str] = None) -> Callable:
+        """
+        把当前span带到后台任务或线程中
+
+        新线程和新的协程从空的上下文开始，需要在提交任务时捕获当前span；
+        任务执行时作为它的子span（名称默认为 task 函数名）
+        """
+        parent = _current_span.get()
+        span_name = name or f'task {func.__name__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if self.exporter is None:
+                return func(*args, **kwargs)
+            token = _current_span.set(parent)
+            try:
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+            finally:
+                _current_span.reset(token)
+        return wrapper
+
+    def flush(self):
+        if self.exporter is not None:
+            self.exporter.flush()
+
+    def stats(self) -> Dict:
+        return {
+            'enabled': self.enabled,
+            'sample_rate': self.sample_rate,
+            'traces_started': self.traces_started,
+            'traces_sampled_out': self.traces_sampled_out,
+            'exporter': self.exporter.stats() if self.exporter is not None else None
+        }
+
+
+# 全局追踪器（默认关闭，由服务器启动时按环境变量配置）
+tracer = Tracer()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+用户目录缓存
+有界LRU用户缓存，按ID和昵称索引，支持写穿透、TTL失效和昵称前缀索引
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+
+class UserCache:
+    """有界LRU用户缓存"""
+
+    def __init__(self, capacity: int = 10000, ttl: float = 300.0, prefix_capacity: int = 2000):
+        """
+        初始化缓存
+
+        Args:
+            capacity: 最多缓存的用户数
+            ttl: 缓存条目的有效期（秒）
+            prefix_capacity: 最多缓存的昵称前缀数
+        """
+        self.capacity = capacity
+        self.ttl = ttl
+        self.prefix_capacity = prefix_capacity
+        self.lock = threading.RLock()
+
+        # user_id -> (用户数据, 过期时间)
+        self._entries: 'OrderedDict[str, Tuple[Dict, float]]' = OrderedDict()
+        # nickname -> user_id
+        self._by_nickname: Dict[str, str] = {}
+        # (基础昵称, 分隔符) -> (已占用的后缀编号, 过期时间)，0表示基础昵称本身
+        self._suffixes: 'OrderedDict[Tuple[str, str], Tuple[Set[int], float]]' = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        """按ID获取用户，未命中或已过期返回None"""
+        with self.lock:
+            user = self._lookup(user_id)
+            if user is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return user
+
+    def get_by_nickname(self, nickname: str) -> Optional[Dict]:
+        """按昵称获取用户（每次查找只计一次命中或未命中）"""
+        with self.lock:
+            user_id = self._by_nickname.get(nickname)
+            user = self._lookup(user_id) if user_id is not None else None
+            if user is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return user
+
+    def _lookup(self, user_id: str) -> Optional[Dict]:
+        """读取未过期的条目并移到LRU末尾，过期时移除（调用方需持有锁，不计数）"""
+        entry = self._entries.get(user_id)
+        if entry is None or entry[1] < time.time():
+            if entry is not None:
+                self._remove(user_id)
+            return None
+        self._entries.move_to_end(user_id)
+        return dict(entry[0])
+
+    def put(self, user: Dict):
+        """写入（或覆盖）一个用户"""
+        with self.lock:
+            user_id = user['id']
+            self._remove(user_id)
+
+            self._entries[user_id] = (dict(user), time.time() + self.ttl)
+            if user.get('nickname') is not None:
+                self._by_nickname[user['nickname']] = user_id
+
+            while len(self._entries) > self.capacity:
+                evicted_id, (evicted, _) = self._entries.popitem(last=False)
+                self._drop_nickname(evicted_id, evicted)
+                self.evictions += 1
+
+    def update(self, user_id: str, **fields):
+        """写穿透：更新已缓存用户的部分字段，未缓存时忽略"""
+        with self.lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            user = dict(entry[0])
+            user.update(fields)
+            self.put(user)
+
+    def invalidate(self, user_id: str):
+        """使单个用户缓存失效"""
+        with self.lock:
+            self._remove(user_id)
+
+    def clear(self):
+        """清空缓存"""
+        with self.lock:
+            self._entries.clear()
+            self._by_nickname.clear()
+            self._suffixes.clear()
+
+    def _remove(self, user_id: str):
+        """移除条目（调用方需持有锁）"""
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._drop_nickname(user_id, entry[0])
+
+    def _drop_nickname(self, user_id: str, user: Dict):
+        """移除指向该用户的昵称索引（调用方需持有锁）"""
+        nickname = user.get('nickname')
+        if nickname is not None and self._by_nickname.get(nickname) == user_id:
+            del self._by_nickname[nickname]
+
+    def allocate_nickname(self, base: str, separator: str,
+                          load_taken: Callable[[], Iterable[int]]) -> str:
+        """
+        一步分配唯一昵称
+
+        前缀索引未命中时调用load_taken一次性加载该前缀下已占用的后缀编号，
+        之后在内存中直接找到最小可用编号。这里不占用编号，入库成功后由 note_nickname 记录，
+        插入失败时编号仍然可用（调用方需在同一把锁内完成分配和入库）。
+
+        Args:
+            base: 期望的昵称
+            separator: 昵称与编号之间的分隔符
+            load_taken: 返回已占用后缀编号的加载函数（0表示基础昵称本身）
+
+        Returns:
+            str: 可用的唯一昵称
+        """
+        with self.lock:
+            key = (base, separator)
+            entry = self._suffixes.get(key)
+            if entry is None or entry[1] < time.time():
+                taken = set(load_taken())
+                self._suffixes[key] = (taken, time.time() + self.ttl)
+                while len(self._suffixes) > self.prefix_capacity:
+                    self._suffixes.popitem(last=False)
+            else:
+                taken = entry[0]
+                self._suffixes.move_to_end(key)
+
+            suffix = 0
+            while suffix in taken:
+                suffix += 1
+
+            return base if suffix == 0 else f"{base}{separator}{suffix}"
+
+    def note_nickname(self, nickname: str):
+        """写穿透：新昵称入库后更新前缀索引中已加载的前缀"""
+        with self.lock:
+            if not self._suffixes:
+                return
+            for separator in ('_', ''):
+                entry = self._suffixes.get((nickname, separator))
+                if entry is not None:
+                    entry[0].add(0)
+
+            # 末尾数字可能是某个已加载前缀的编号
+            digits = len(nickname) - len(nickname.rstrip('0123456789'))
+            for i in range(1, digits + 1):
+                head, suffix = nickname[:-i], int(nickname[-i:])
+                for base, separator in ((head[:-1], '_'), (head, '')):
+                    if separator and not head.endswith(separator):
+                        continue
+                    entry = self._suffixes.get((base, separator))
+                    if entry is not None:
+                        entry[0].add(suffix)
+
+    def stats(self) -> Dict:
+        """缓存命中统计"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'nickname_prefixes': len(self._suffixes)
+            }
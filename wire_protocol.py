@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+紧凑传输协议
+协议v2：牌编码为2字符代码，玩家编码为按schema排列的数组，可选MessagePack二进制帧；并统计每手牌的传输字节数
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:  # MessagePack是可选依赖，缺失时二进制帧退化为JSON
+    msgpack = None
+
+
+PROTOCOL_LEGACY = 1
+PROTOCOL_COMPACT = 2
+
+# 玩家数组的字段顺序
+PLAYER_FIELDS = (
+    'id', 'nickname', 'chips', 'is_bot', 'status', 'current_bet', 'total_bet',
+    'is_dealer', 'is_small_blind', 'is_big_blind', 'has_acted', 'bot_level', 'hole_cards'
+)
+# 以0/1传输的布尔字段
+BOOL_FIELDS = ('is_bot', 'is_dealer', 'is_small_blind', 'is_big_blind', 'has_acted')
+
+SUIT_CODES = {'♥': 'h', '♦': 'd', '♣': 'c', '♠': 's'}
+RANK_CODES = {'10': 'T'}
+
+# 客户端解码用的schema头，协商协议时下发
+WIRE_SCHEMA = {
+    'version': PROTOCOL_COMPACT,
+    'player': list(PLAYER_FIELDS),
+    'bool': list(BOOL_FIELDS),
+    'card': 'rank+suit, rank in 23456789TJQKA, suit in h/d/c/s',
+    'suits': {code: suit for suit, code in SUIT_CODES.items()}
+}
+
+
+def binary_supported() -> bool:
+    """服务端是否可以发送MessagePack二进制帧"""
+    return msgpack is not None
+
+
+def encode_card(card: Dict) -> str:
+    """{'suit': '♥', 'rank': 'A', 'value': 14} -> 'Ah'"""
+    return RANK_CODES.get(card['rank'], card['rank']) + SUIT_CODES[card['suit']]
+
+
+def _is_card(value: Any) -> bool:
+    return isinstance(value, dict) and 'suit' in value and 'rank' in value and value.get('suit') in SUIT_CODES
+
+
+def encode_player(player: Dict) -> List:
+    """玩家字典 -> 按PLAYER_FIELDS排列的数组，末尾多余的None会被截掉，未知字段放在最后一个字典里"""
+    row = []
+    for field in PLAYER_FIELDS:
+        value = player.get(field)
+        if field in BOOL_FIELDS and value is not None:
+            value = 1 if value else 0
+        elif field == 'hole_cards' and value is not None:
+            value = encode_value(field, value)
+        row.append(value)
+
+    extras = {k: encode_value(k, v) for k, v in player.items() if k not in PLAYER_FIELDS}
+    if extras:
+        row.append(extras)
+    else:
+        while row and row[-1] is None:
+            row.pop()
+    return row
+
+
+def encode_value(key: Optional[str], value: Any) -> Any:
+    """递归编码：*cards 键下的牌列表和 players 键下的玩家列表"""
+    if isinstance(value, list):
+        if key and key.endswith('cards') and value and all(_is_card(v) for v in value):
+            return [encode_card(v) for v in value]
+        if key == 'players' and value and all(isinstance(v, dict) and 'nickname' in v for v in value):
+            return [encode_player(v) for v in value]
+        return [encode_value(None, v) for v in value]
+    if isinstance(value, dict):
+        return {k: encode_value(k, v) for k, v in value.items()}
+    return value
+
+
+def encode_frame(events: List[List]) -> Dict:
+    """把一帧事件编码为v2格式"""
+    return {
+        'v': PROTOCOL_COMPACT,
+        'events': [[name, encode_value(None, data)] for name, data in events]
+    }
+
+
+def pack_frame(frame: Dict) -> Optional[bytes]:
+    """MessagePack打包，不可用时返回None"""
+    if msgpack is None:
+        return None
+    return msgpack.packb(frame, use_bin_type=True)
+
+
+def payload_size(payload: Any) -> int:
+    """估算发送字节数（与Socket.IO的JSON序列化一致）"""
+    if isinstance(payload, (bytes, bytearray)):
+        return len(payload)
+    return len(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+
+
+class WireStats:
+    """按手牌统计帧大小（抽样测量，避免每帧多一次序列化）"""
+
+    def __init__(self, sample_every: int = 10, max_hands: int = 200):
+        self.sample_every = sample_every
+        self.max_hands = max_hands
+        self.lock = threading.Lock()
+
+        self.frames = 0
+        self.sampled = 0
+        # 协议 -> {'frames', 'bytes', 'legacy_bytes'}（只统计抽样帧）
+        self.by_protocol: Dict[str, Dict[str, int]] = {}
+        # (table_id, hand_number) -> 统计
+        self.hands: 'OrderedDict[Tuple[str, int], Dict]' = OrderedDict()
+
+    def should_sample(self) -> bool:
+        """本帧是否需要测量"""
+        with self.lock:
+            self.frames += 1
+            return self.frames % self.sample_every == 0
+
+    def record(self, table_id: Optional[str], hand_number: Optional[int], protocol: str,
+               wire_bytes: int, legacy_bytes: int):
+        """记录一次抽样：实际发送的字节数和旧协议下的字节数"""
+        with self.lock:
+            self.sampled += 1
+            totals = self.by_protocol.setdefault(protocol, {'frames': 0, 'bytes': 0, 'legacy_bytes': 0})
+            totals['frames'] += 1
+            totals['bytes'] += wire_bytes
+            totals['legacy_bytes'] += legacy_bytes
+
+            if table_id is None:
+                return
+            key = (table_id, hand_number or 0)
+            hand = self.hands.get(key)
+            if hand is None:
+                hand = self.hands[key] = {'table_id': table_id, 'hand_number': hand_number or 0,
+                                          'frames': 0, 'bytes': 0, 'legacy_bytes': 0}
+                while len(self.hands) > self.max_hands:
+                    self.hands.popitem(last=False)
+            hand['frames'] += 1
+            hand['bytes'] += wire_bytes
+            hand['legacy_bytes'] += legacy_bytes
+
+    def report(self, recent: int = 20) -> Dict:
+        """统计报告"""
+        with self.lock:
+            protocols = {}
+            for protocol, totals in self.by_protocol.items():
+                frames = totals['frames'] or 1
+                protocols[protocol] = dict(
+                    totals,
+                    avg_frame_bytes=round(totals['bytes'] / frames, 1),
+                    avg_legacy_frame_bytes=round(totals['legacy_bytes'] / frames, 1),
+                    ratio=round(totals['bytes'] / totals['legacy_bytes'], 3) if totals['legacy_bytes'] else None
+                )
+
+            hands = list(self.hands.values())
+            return {
+                'frames': self.frames,
+                'sampled_frames': self.sampled,
+                'sample_every': self.sample_every,
+                'protocols': protocols,
+                'avg_hand_bytes': round(sum(h['bytes'] for h in hands) / len(hands), 1) if hands else 0,
+                'avg_hand_legacy_bytes': round(sum(h['legacy_bytes'] for h in hands) / len(hands), 1) if hands else 0,
+                'recent_hands': [dict(h) for h in hands[-recent:]]
+            }
+
+
+# 全局统计实例
+wire_stats = WireStats()